@@ -0,0 +1,269 @@
+import logging
+
+from datetime import datetime, timedelta
+from queue import Queue
+from threading import Thread, Condition
+from time import monotonic, time
+from typing import Callable, List
+
+
+_LOGGER = logging.getLogger("NooLiteScheduler")
+
+
+class ScheduledAction(object):
+    """ Handle of the scheduled action. """
+
+    def __init__(self, action: Callable, args: tuple, kwargs: dict, interval: float = None, daily: tuple = None):
+        self.action = action
+        self.args = args
+        self.kwargs = kwargs
+        self.interval = interval
+        self.daily = daily
+        self.expires = None
+        self._cancelled = False
+        self._scheduler = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    @property
+    def recurring(self) -> bool:
+        return self.interval is not None or self.daily is not None
+
+    def cancel(self):
+        """ Cancel the action. If action is running now, it will not be repeated. """
+        if not self._cancelled:
+            self._cancelled = True
+            if self._scheduler is not None:
+                self._scheduler._on_cancel(self)
+
+    def __repr__(self):
+        return "<ScheduledAction (0x{0:x}), action: {1}, interval: {2}, daily: {3}, cancelled: {4}>" \
+            .format(id(self), self.action, self.interval, self.daily, self.cancelled)
+
+
+class TimerWheel(object):
+    """ Hierarchical timer wheel.
+
+    Level 0 has one slot per tick, each next level has slots which cover the whole previous level. Adding and
+    cancelling of timer is O(1), timers are moved to lower level once when their level slot is reached.
+    Timers which are out of the wheel range are kept in the last slot of the top level and re-added on cascade.
+
+    Wheel is not thread safe.
+    """
+
+    def __init__(self, level_bits: tuple = (8, 6, 6, 6)):
+        self._level_bits = level_bits
+        self._levels = [[[] for _ in range(1 << bits)] for bits in level_bits]
+        self._shifts = []
+        shift = 0
+        for bits in level_bits:
+            self._shifts.append(shift)
+            shift += bits
+        self._range = 1 << shift
+        self.tick = 0
+        self.size = 0
+
+    def add(self, timer: ScheduledAction, expires: int) -> List[ScheduledAction]:
+        """ Add timer which expires on the specified tick.
+
+        :return: list with timer if it is already expired, otherwise empty list.
+        """
+        timer.expires = expires
+        if expires <= self.tick:
+            return [timer]
+        self._insert(timer)
+        self.size += 1
+        return []
+
+    def remove(self):
+        """ Notify wheel that one of timers is cancelled. The timer itself is dropped lazily. """
+        self.size -= 1
+
+    def advance(self) -> List[ScheduledAction]:
+        """ Move wheel to the next tick.
+
+        :return: timers which expire on the new tick.
+        """
+        self.tick += 1
+
+        for level in range(1, len(self._levels)):
+            # cascade when all lower levels made a full turn
+            if self.tick & ((1 << self._shifts[level]) - 1) != 0:
+                break
+            index = (self.tick >> self._shifts[level]) & ((1 << self._level_bits[level]) - 1)
+            timers = self._levels[level][index]
+            self._levels[level][index] = []
+            for timer in timers:
+                if not timer.cancelled:
+                    self._insert(timer)
+
+        index = self.tick & ((1 << self._level_bits[0]) - 1)
+        timers = self._levels[0][index]
+        self._levels[0][index] = []
+
+        due = []
+        for timer in timers:
+            if timer.cancelled:
+                continue
+            if timer.expires <= self.tick:
+                self.size -= 1
+                due.append(timer)
+            else:
+                self._insert(timer)
+        return due
+
+    # Private
+    def _insert(self, timer: ScheduledAction):
+        delta = timer.expires - self.tick
+        if delta >= self._range:
+            level = len(self._levels) - 1
+            expires = self.tick + self._range - 1
+        else:
+            level = 0
+            while delta >= (1 << (self._shifts[level] + self._level_bits[level])):
+                level += 1
+            expires = timer.expires
+        index = (expires >> self._shifts[level]) & ((1 << self._level_bits[level]) - 1)
+        self._levels[level][index].append(timer)
+
+
+class CommandScheduler(object):
+    """ Runs delayed and recurring actions (for example module commands).
+
+    Timers are kept in the hierarchical timer wheel, so scheduler can hold many thousands of pending actions.
+    Due actions are executed one by one in the single dispatch thread, so commands are sent to the adapter
+    sequentially and respect its pacing. Long action delays next due actions, but not the timer wheel.
+    """
+
+    def __init__(self, resolution: float = 0.1):
+        """
+        :param resolution: timer tick in seconds. Actions are executed with this precision.
+        """
+        self._resolution = resolution
+        self._wheel = TimerWheel()
+        self._condition = Condition()
+        self._dispatch_queue = Queue()
+        self._started_at = monotonic()
+        self._is_stopped = False
+
+        self._timer_thread = Thread(target=self._timer_loop)
+        self._timer_thread.daemon = True
+        self._timer_thread.start()
+
+        self._dispatch_thread = Thread(target=self._dispatch_loop)
+        self._dispatch_thread.daemon = True
+        self._dispatch_thread.start()
+
+    def call_later(self, delay: float, action: Callable, *args, **kwargs) -> ScheduledAction:
+        """ Run action once after the delay in seconds. """
+        scheduled = ScheduledAction(action, args, kwargs)
+        self._add(scheduled, monotonic() + delay)
+        return scheduled
+
+    def call_at(self, timestamp: float, action: Callable, *args, **kwargs) -> ScheduledAction:
+        """ Run action once at the specified time (seconds since epoch). """
+        return self.call_later(max(0.0, timestamp - time()), action, *args, **kwargs)
+
+    def call_every(self, interval: float, action: Callable, *args, first_delay: float = None, **kwargs) -> ScheduledAction:
+        """ Run action repeatedly with the specified interval in seconds.
+
+        :param first_delay: delay before the first run. If None then interval is used.
+        """
+        if interval <= 0:
+            raise ValueError("Interval should be positive: {0}".format(interval))
+        scheduled = ScheduledAction(action, args, kwargs, interval=interval)
+        self._add(scheduled, monotonic() + (interval if first_delay is None else first_delay))
+        return scheduled
+
+    def call_daily(self, hour: int, minute: int, action: Callable, *args, second: int = 0, **kwargs) -> ScheduledAction:
+        """ Run action every day at the specified local time. """
+        scheduled = ScheduledAction(action, args, kwargs, daily=(hour, minute, second))
+        self._add(scheduled, monotonic() + self._daily_delay(scheduled.daily))
+        return scheduled
+
+    def pending(self) -> int:
+        """ Returns number of actions waiting in the timer wheel. """
+        with self._condition:
+            return self._wheel.size
+
+    def stop(self):
+        """ Stop scheduler. Pending actions are not executed. """
+        with self._condition:
+            self._is_stopped = True
+            self._condition.notify_all()
+        self._dispatch_queue.put(None)
+        self._timer_thread.join()
+        self._dispatch_thread.join()
+
+    # Private
+    def _tick_of(self, when: float) -> int:
+        return int((when - self._started_at) / self._resolution + 0.999999)
+
+    @staticmethod
+    def _daily_delay(daily: tuple) -> float:
+        now = datetime.now()
+        hour, minute, second = daily
+        target = now.replace(hour=hour, minute=minute, second=second, microsecond=0)
+        if target <= now:
+            target += timedelta(days=1)
+        return (target - now).total_seconds()
+
+    def _add(self, scheduled: ScheduledAction, when: float):
+        with self._condition:
+            if self._is_stopped:
+                raise RuntimeError("Scheduler is stopped")
+            scheduled._scheduler = self
+            if self._wheel.size == 0:
+                self._wheel.tick = max(self._wheel.tick, int((monotonic() - self._started_at) / self._resolution))
+            for due in self._wheel.add(scheduled, self._tick_of(when)):
+                self._dispatch_queue.put(due)
+            self._condition.notify_all()
+
+    def _on_cancel(self, scheduled: ScheduledAction):
+        with self._condition:
+            if scheduled.expires is not None and scheduled.expires > self._wheel.tick:
+                self._wheel.remove()
+
+    def _timer_loop(self):
+        with self._condition:
+            while not self._is_stopped:
+                if self._wheel.size == 0:
+                    # nothing to wait, just keep the wheel in sync with time
+                    self._wheel.tick = max(self._wheel.tick, int((monotonic() - self._started_at) / self._resolution))
+                    self._condition.wait()
+                    continue
+
+                now_tick = int((monotonic() - self._started_at) / self._resolution)
+                while self._wheel.tick < now_tick:
+                    for due in self._wheel.advance():
+                        self._dispatch_queue.put(due)
+
+                next_time = self._started_at + (self._wheel.tick + 1) * self._resolution
+                self._condition.wait(max(0.0, next_time - monotonic()))
+
+    def _dispatch_loop(self):
+        while True:
+            scheduled = self._dispatch_queue.get()
+            if scheduled is None or self._is_stopped:
+                break
+            if scheduled.cancelled:
+                continue
+
+            try:
+                scheduled.action(*scheduled.args, **scheduled.kwargs)
+            except Exception as err:
+                _LOGGER.error("Scheduled action error: {0}".format(err))
+
+            if scheduled.recurring and not scheduled.cancelled and not self._is_stopped:
+                if scheduled.interval is not None:
+                    # next run is counted from the planned time, so recurring actions don't drift
+                    when = self._started_at + scheduled.expires * self._resolution + scheduled.interval
+                    when = max(when, monotonic())
+                else:
+                    when = monotonic() + self._daily_delay(scheduled.daily)
+                try:
+                    self._add(scheduled, when)
+                except RuntimeError:
+                    break
@@ -0,0 +1,265 @@
+import logging
+
+from enum import Enum
+from queue import Queue, Empty
+from threading import Thread, Lock
+from time import monotonic, sleep
+from typing import Callable, Iterable, List
+
+from NooLite_F import ModuleConfig, DimmerCorrectionConfig, Deadline, Timeout
+from NooLite_F.Modules import Switch
+
+
+_LOGGER = logging.getLogger("NooLiteConfigPush")
+
+_CONFIG_FIELDS = ("save_state_mode", "dimmer_mode", "noolite_support", "input_mode", "init_state", "noolite_retranslation")
+
+
+class ConfigPushStatus(Enum):
+    UNCHANGED = 0   # module already has requested config, nothing is written
+    WRITTEN = 1     # changed values are written and confirmed by module reply
+    MISMATCH = 2    # module replied, but reply does not contain requested values
+    FAILED = 3      # module did not answer
+
+
+class ConfigPushResult(object):
+    module = None
+    status = None
+    changed = None
+    config = None
+    correction = None
+
+    def __init__(self, module: Switch):
+        self.module = module
+        self.changed = []
+
+    def __repr__(self):
+        return "<ConfigPushResult (0x{0:x}), module id: {1}, status: {2}, changed: {3}>" \
+            .format(id(self), self.module.module_id, self.status, self.changed)
+
+
+def config_diff(current: ModuleConfig, requested: ModuleConfig) -> List[str]:
+    """ Returns names of requested config values which differ from the current ones. None values are not requested. """
+    return [name for name in _CONFIG_FIELDS
+            if getattr(requested, name) is not None and (current is None or getattr(current, name) != getattr(requested, name))]
+
+
+def _level(value: float) -> int:
+    # the same conversion as in write_dimmer_correction
+    if value >= 1:
+        return 255
+    elif value <= 0:
+        return 0
+    return int((255 * value) + 0.5)
+
+
+def correction_diff(current: DimmerCorrectionConfig, requested: DimmerCorrectionConfig) -> List[str]:
+    """ Returns names of dimmer correction levels which differ from the current ones after conversion to module units.
+    None values are not requested.
+    """
+    return [name for name in ("max_level", "min_level")
+            if getattr(requested, name) is not None and (current is None or _level(getattr(current, name)) != _level(getattr(requested, name)))]
+
+
+class ConfigApplier(object):
+    """ Applies module config and dimmer correction to many modules.
+
+    Current config of each module is read (or taken from cache), only changed values are written: write_module_config
+    sets mask bits only for values which are not None. Write command reply contains the whole module config, so it is
+    used for verification and cache update without extra read.
+
+    Modules are processed by several worker threads. All commands share the rate budget, so config push does not occupy
+    the radio. Commands of one adapter are sent sequentially anyway, config commands have background priority.
+    """
+
+    def __init__(self, concurrency: int = 2, max_rate: float = 2.0, use_cache: bool = True):
+        """
+        :param concurrency: number of modules processed simultaneously.
+        :param max_rate: maximal number of commands (reads and writes) per second.
+        :param use_cache: use config known from previous reads and writes instead of reading it from module.
+        """
+        self._concurrency = max(1, concurrency)
+        self._max_rate = max_rate
+        self._use_cache = use_cache
+        self._lock = Lock()
+        self._configs = {}
+        self._corrections = {}
+        self._tokens = 1.0
+        self._tokens_updated = monotonic()
+
+    def apply(self, modules: Iterable[Switch], config: ModuleConfig = None, correction: DimmerCorrectionConfig = None,
+              on_progress: Callable[[int, int, ConfigPushResult], None] = None, timeout: Timeout = None) -> List[ConfigPushResult]:
+        """ Apply config to modules.
+
+        :param modules: module objects, module id is required.
+        :param config: module config. Only not None values are applied.
+        :param correction: dimmer correction config. If None then correction is not changed.
+        :param on_progress: called from worker thread after each module with (done, total, result).
+        :param timeout: time limit of the whole push. Modules which are not processed in time are FAILED.
+        :return: results in the same order as modules.
+        """
+        modules = list(modules)
+        for module in modules:
+            if module.module_id is None:
+                raise ValueError("Module id is required for config push: {0}".format(module))
+
+        deadline = Deadline.of(timeout)
+        results = [ConfigPushResult(module) for module in modules]
+        queue = Queue()
+        for result in results:
+            queue.put(result)
+
+        progress = [0]
+        progress_lock = Lock()
+
+        def worker():
+            while True:
+                try:
+                    result = queue.get_nowait()
+                except Empty:
+                    return
+                try:
+                    self._apply_module(result, config, correction, deadline)
+                except Exception as err:
+                    _LOGGER.error("Config push error for module {0}: {1}".format(result.module, err))
+                    result.status = ConfigPushStatus.FAILED
+                if on_progress is not None:
+                    with progress_lock:
+                        progress[0] += 1
+                        done = progress[0]
+                    on_progress(done, len(results), result)
+
+        threads = []
+        for i in range(min(self._concurrency, len(results))):
+            thread = Thread(target=worker)
+            thread.daemon = True
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+        return results
+
+    def cached_config(self, module: Switch) -> ModuleConfig:
+        with self._lock:
+            return self._configs.get(self._key(module))
+
+    def invalidate(self, module: Switch = None):
+        """ Forget cached config of module or of all modules. """
+        with self._lock:
+            if module is None:
+                self._configs.clear()
+                self._corrections.clear()
+            else:
+                self._configs.pop(self._key(module), None)
+                self._corrections.pop(self._key(module), None)
+
+    # Private
+    @staticmethod
+    def _key(module: Switch) -> tuple:
+        return id(module.controller), module.module_id
+
+    def _wait_token(self, deadline: Deadline) -> bool:
+        while True:
+            with self._lock:
+                now = monotonic()
+                self._tokens = min(1.0, self._tokens + (now - self._tokens_updated) * self._max_rate)
+                self._tokens_updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return True
+                wait = (1.0 - self._tokens) / self._max_rate
+
+            remaining = deadline.remaining()
+            if deadline.cancelled or (remaining is not None and remaining < wait):
+                return False
+            sleep(wait)
+
+    def _command(self, deadline: Deadline, method, *args) -> list:
+        if not self._wait_token(deadline):
+            return []
+        return method(*args, deadline)
+
+    def _read(self, module: Switch, cache: dict, method, deadline: Deadline):
+        key = self._key(module)
+        if self._use_cache:
+            with self._lock:
+                if key in cache:
+                    return cache[key]
+
+        responses = self._command(deadline, method, module.module_id, module.channel, False, module.module_mode)
+        for status, current in responses:
+            if status and current is not None:
+                with self._lock:
+                    cache[key] = current
+                return current
+        return None
+
+    def _write(self, module: Switch, cache: dict, method, value, deadline: Deadline):
+        responses = self._command(deadline, method, value, module.module_id, module.channel, False, module.module_mode)
+        for status, current in responses:
+            if status and current is not None:
+                with self._lock:
+                    cache[self._key(module)] = current
+                return current
+
+        # module state is unknown now, so it will be read next time
+        with self._lock:
+            cache.pop(self._key(module), None)
+        return None
+
+    def _apply_module(self, result: ConfigPushResult, config: ModuleConfig, correction: DimmerCorrectionConfig, deadline: Deadline):
+        module = result.module
+        controller = module.controller
+        statuses = []
+
+        if config is not None:
+            current = self._read(module, self._configs, controller.read_module_config, deadline)
+            if current is None:
+                result.status = ConfigPushStatus.FAILED
+                return
+            changed = config_diff(current, config)
+            result.config = current
+            if len(changed) > 0:
+                partial = ModuleConfig()
+                for name in changed:
+                    setattr(partial, name, getattr(config, name))
+                reply = self._write(module, self._configs, controller.write_module_config, partial, deadline)
+                result.changed.extend(changed)
+                result.config = reply
+                statuses.append(self._verify(reply, config_diff(reply, config) if reply is not None else None))
+
+        if correction is not None:
+            current = self._read(module, self._corrections, controller.read_dimmer_correction, deadline)
+            if current is None:
+                result.status = ConfigPushStatus.FAILED
+                return
+            changed = correction_diff(current, correction)
+            result.correction = current
+            if len(changed) > 0:
+                # both levels are written by one command, so not requested level keeps the current value
+                complete = DimmerCorrectionConfig()
+                complete.min_level = current.min_level
+                complete.max_level = current.max_level
+                for name in changed:
+                    setattr(complete, name, getattr(correction, name))
+                reply = self._write(module, self._corrections, controller.write_dimmer_correction, complete, deadline)
+                result.changed.extend(changed)
+                result.correction = reply
+                statuses.append(self._verify(reply, correction_diff(reply, correction) if reply is not None else None))
+
+        if ConfigPushStatus.FAILED in statuses:
+            result.status = ConfigPushStatus.FAILED
+        elif ConfigPushStatus.MISMATCH in statuses:
+            result.status = ConfigPushStatus.MISMATCH
+        elif len(statuses) > 0:
+            result.status = ConfigPushStatus.WRITTEN
+        else:
+            result.status = ConfigPushStatus.UNCHANGED
+
+    @staticmethod
+    def _verify(reply, diff: List[str]) -> ConfigPushStatus:
+        if reply is None:
+            return ConfigPushStatus.FAILED
+        if len(diff) > 0:
+            return ConfigPushStatus.MISMATCH
+        return ConfigPushStatus.WRITTEN
@@ -1,12 +1,20 @@
 import logging
 
+from contextlib import contextmanager
 from enum import IntEnum
-from serial import Serial
+from serial import Serial, SerialException
 from struct import Struct
-from time import sleep
+from time import sleep, monotonic
+from typing import Dict, Iterator
 
 from threading import *
-from queue import Queue, Empty
+from queue import Empty
+
+from NooLite_F.NooLiteFController import Deadline, Timeout
+from NooLite_F.MTRF64.MTRF64Scheduler import PriorityScheduler, Priority, LaneStats
+from NooLite_F.MTRF64.MTRF64Reconnect import ReconnectPolicy, PendingPolicy, ConnectionStats
+from NooLite_F.MTRF64.MTRF64Queue import EventQueue, QueueStats
+from NooLite_F.MTRF64.MTRF64IOLoop import MTRF64IOLoop
 
 
 class Command(IntEnum):
@@ -100,6 +108,29 @@ class IncomingData(object):
         return "<Response (0x{0:x}), mode: {1}, status: {2}, packet_count: {3} channel: {4:d}, command: {5:d}, format: {6:d}, data: {7}, id: 0x{8:x}>".format(id(self), self.mode, self.status, self.count, self.channel, self.command, self.format, self.data, self.id)
 
 
+class AdapterSession(object):
+    """ Exclusive access to the adapter for protocols which write many request frames without waiting for each
+    response, e.g. firmware update. Created by MTRF64Adapter.session().
+    """
+
+    def __init__(self, adapter: 'MTRF64Adapter'):
+        self._adapter = adapter
+
+    def write(self, data: OutgoingData):
+        """ Write request frame to the port.
+
+        :raises SerialException: if the port is not connected or is lost while writing.
+        """
+        self._adapter._write(self._adapter._build(data))
+
+    def read(self, timeout: float = None) -> 'IncomingData':
+        """ Returns the next response or None if there is no response within timeout. """
+        try:
+            return self._adapter._command_response_queue.get(timeout=timeout)
+        except Empty:
+            return None
+
+
 _LOGGER = logging.getLogger("MTRF64USBAdapter")
 _LOGGER.setLevel(logging.WARNING)
 _LOGGER_HANDLER = logging.StreamHandler()
@@ -107,25 +138,69 @@ _LOGGER_HANDLER.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(
 _LOGGER.addHandler(_LOGGER_HANDLER)
 
 DEFAULT_BAUDRATE = 9600
+RESPONSE_TIMEOUT = 2
 
 
 class MTRF64Adapter(object):
     _packet_size = 17
     _serial = None
     _read_thread = None
-    _command_response_queue = Queue()
-    _incoming_queue = Queue()
-    _send_lock = Lock()
+    _command_response_queue = None
+    _incoming_queue = None
+    _scheduler = None
     _listener_thread = None
     _listener = None
+    _accept_incoming = None
     _is_released = False
-
-    def __init__(self, port: str, baudrate: int = DEFAULT_BAUDRATE, on_receive_data=None):
-        self._serial = Serial(baudrate=baudrate)
-        self._serial.port = port
-        self._serial.open()
+    _port = None
+    _baudrate = None
+    _reconnect = None
+    _on_connection_change = None
+    _connected = None
+    _released = None
+    _connection_lock = None
+    _connection_stats = None
+    _disconnected_at = None
+    _io_loop = None
+
+    def __init__(self, port: str, baudrate: int = DEFAULT_BAUDRATE, on_receive_data=None, scheduler: PriorityScheduler = None, accept_incoming=None,
+                 reconnect: ReconnectPolicy = None, on_connection_change=None, incoming_queue: EventQueue = None, response_queue: EventQueue = None,
+                 io_loop: MTRF64IOLoop = None):
+        """
+        :param port: serial port.
+        :param baudrate: serial port baudrate.
+        :param on_receive_data: listener which is called for each incoming packet (from remote controls and sensors).
+        :param scheduler: scheduler of requests. If None, then own scheduler is created.
+        :param accept_incoming: function which is called in reader thread for each incoming packet. If it returns False, packet is dropped.
+        :param reconnect: how to reopen the port after failure. If None, default policy is used.
+        :param on_connection_change: function which is called with True/False when port is reopened/lost. It is called
+        from reader thread, so it must not send commands to the adapter.
+        :param incoming_queue: queue of packets from remote controls and sensors. If None, queue with default capacity is created.
+        :param response_queue: queue of command responses. If None, queue with default capacity is created.
+        :param io_loop: shared loop which reads the port and calls listener. If None, adapter starts own reader and listener threads.
+        """
+        self._scheduler = scheduler if scheduler is not None else PriorityScheduler()
+        self._port = port
+        self._baudrate = baudrate
+        self._reconnect = reconnect if reconnect is not None else ReconnectPolicy()
+        self._on_connection_change = on_connection_change
+        self._connected = Event()
+        self._released = Event()
+        self._connection_lock = Lock()
+        self._connection_stats = ConnectionStats()
+        self._incoming_queue = incoming_queue if incoming_queue is not None else EventQueue()
+        self._command_response_queue = response_queue if response_queue is not None else EventQueue(256)
+        self._io_loop = io_loop
 
         self._listener = on_receive_data
+        self._accept_incoming = accept_incoming
+
+        self._serial = self._open(port)
+        self._connected.set()
+
+        if self._io_loop is not None:
+            self._io_loop.register(self, self._serial)
+            return
 
         self._read_thread = Thread(target=self._read_loop)
         self._read_thread.daemon = True
@@ -137,37 +212,244 @@ class MTRF64Adapter(object):
 
     def release(self):
         self._is_released = True
-        self._serial.close()
-        self._incoming_queue.put(None)
+        self._released.set()
+        # wake up commands which wait for reconnection
+        self._connected.set()
+        if self._io_loop is not None:
+            self._io_loop.unregister(self)
+        try:
+            self._serial.close()
+        except (SerialException, OSError) as err:
+            _LOGGER.debug("Port close error: {0}".format(err))
+        self._incoming_queue.close()
+        self._command_response_queue.close()
         self._listener = None
 
-    def send(self, data: OutgoingData) -> [IncomingData]:
-        responses = []
+    def send(self, data: OutgoingData, timeout: Timeout = None, priority: Priority = Priority.NORMAL) -> [IncomingData]:
+        """ Send request to the adapter and wait for responses.
 
-        packet = self._build(data)
-        with self._send_lock:
-            _LOGGER.debug("Send:\n - request: {0},\n - packet: {1}".format(data, packet))
-            self._command_response_queue.queue.clear()
-            self._serial.write(packet)
+        :param data: request.
+        :param timeout: maximal time in seconds to wait for the responses or Deadline object. When time is over,
+        responses received so far are returned. If deadline is cancelled or expired before request was written to the port,
+        then request is not sent and empty list is returned.
+        :param priority: request priority. Requests with higher priority are sent first when adapter is busy.
+        :return: list of responses. While the port is reopened after failure, request waits for reconnection or
+        empty list is returned immediately, depending on the reconnect policy.
+        """
+        return list(self.stream(data, timeout, priority))
 
-            try:
-                while True:
-                    response = self._command_response_queue.get(timeout=2)
-                    responses.append(response)
-                    if response.count == 0:
-                        break
+    def stream(self, data: OutgoingData, timeout: Timeout = None, priority: Priority = Priority.NORMAL) -> Iterator[IncomingData]:
+        """ Send request to the adapter and yield each response as soon as it is received.
+
+        Parameters are the same as for send. Adapter is not available for other requests until the generator is
+        exhausted or closed, so responses should not be processed for long. When generator is closed before the last
+        response, caller is not blocked: remaining responses are dropped in background and then adapter is released.
+        """
+        deadline = Deadline.of(timeout)
 
-            except Empty as err:
-                _LOGGER.error("Error receiving response: {0}.".format(err))
+        packet = self._build(data)
+        if not self._scheduler.acquire(priority, deadline):
+            _LOGGER.debug("Request is cancelled: {0}".format(data))
+            return
+
+        pending = False
+        try:
+            _LOGGER.debug("Send:\n - request: {0},\n - packet: {1}".format(data, packet))
+            while True:
+                if not self._wait_connected(deadline):
+                    _LOGGER.warning("Port is not connected, request is dropped: {0}".format(data))
+                    return
+                self._command_response_queue.clear()
+                try:
+                    self._serial.write(packet)
+                    break
+                except (SerialException, OSError) as err:
+                    self._connection_lost(err)
+
+            received = 0
+            pending = True
+            while True:
+                wait = RESPONSE_TIMEOUT
+                remaining = deadline.remaining()
+                if remaining is not None:
+                    wait = min(wait, remaining)
+                try:
+                    response = self._command_response_queue.get(timeout=wait)
+                except Empty as err:
+                    if deadline.expired:
+                        _LOGGER.warning("Deadline expired, received {0} responses.".format(received))
+                    else:
+                        _LOGGER.error("Error receiving response: {0}.".format(err))
+                    break
+                if response is None:
+                    break
+                received += 1
+                pending = response.count != 0
+                yield response
+                if not pending:
+                    break
+            pending = False
 
             # For NooLite.TX we should make a bit delay. Adapter send the response without waiting until command was delivered.
             # So if we send new command until previous command was sent to module, adapter will ignore new command. Note:
             if data.mode == Mode.TX or data.mode == Mode.RX:
                 sleep(0.2)
-
-        return responses
+        finally:
+            if pending:
+                # Generator is closed before the last response. Remaining responses are dropped by the separate thread,
+                # otherwise they would be taken as responses of the next request.
+                thread = Thread(target=self._drop_responses)
+                thread.daemon = True
+                thread.start()
+            else:
+                self._scheduler.release()
+
+    @contextmanager
+    def session(self, priority: Priority = Priority.BACKGROUND, timeout: Timeout = None):
+        """ Context manager which gives exclusive access to the adapter. Other requests wait until session is closed.
+
+        Yields AdapterSession or None if access is not granted within timeout.
+        """
+        deadline = Deadline.of(timeout)
+        if not self._scheduler.acquire(priority, deadline):
+            yield None
+            return
+        try:
+            self._command_response_queue.clear()
+            yield AdapterSession(self)
+        finally:
+            self._scheduler.release()
+
+    def lane_stats(self) -> Dict[Priority, LaneStats]:
+        """ Returns queue depth and wait time statistics for each priority lane. """
+        return self._scheduler.stats()
+
+    def queue_stats(self) -> Dict[str, QueueStats]:
+        """ Returns depth, high water mark and dropped packets counters of incoming and response queues. """
+        return {"incoming": self._incoming_queue.stats(), "responses": self._command_response_queue.stats()}
+
+    def connection_stats(self) -> ConnectionStats:
+        """ Returns number of disconnects, reconnects and outage durations. """
+        with self._connection_lock:
+            return self._connection_stats.copy()
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set() and not self._is_released
 
     # Private
+    def _open(self, port: str) -> Serial:
+        serial = Serial(baudrate=self._baudrate)
+        serial.port = port
+        serial.open()
+        return serial
+
+    def _write(self, packet: bytes):
+        if not self._connected.is_set() or self._is_released:
+            raise SerialException("Port is not connected")
+        try:
+            self._serial.write(packet)
+        except (SerialException, OSError) as err:
+            self._connection_lost(err)
+            raise SerialException("Port is lost: {0}".format(err))
+
+    def _drop_responses(self):
+        try:
+            while True:
+                response = self._command_response_queue.get(timeout=RESPONSE_TIMEOUT)
+                if response is None or response.count == 0:
+                    break
+        except Empty:
+            pass
+        finally:
+            self._scheduler.release()
+
+    def _wait_connected(self, deadline: Deadline) -> bool:
+        if self._connected.is_set():
+            return not self._is_released
+        if self._reconnect.pending == PendingPolicy.FAIL_FAST:
+            return False
+
+        wait = self._reconnect.buffer_timeout
+        remaining = deadline.remaining()
+        if remaining is not None:
+            wait = min(wait, remaining)
+        return self._connected.wait(wait) and not self._is_released
+
+    def _connection_lost(self, err: Exception):
+        with self._connection_lock:
+            if not self._connected.is_set() or self._is_released:
+                return
+            self._connected.clear()
+            self._disconnected_at = monotonic()
+            self._connection_stats.connected = False
+            self._connection_stats.disconnects += 1
+            self._connection_stats.last_error = str(err)
+
+        _LOGGER.error("Port {0} is lost: {1}".format(self._port, err))
+        try:
+            # reader thread gets error on closed port and starts reconnection
+            self._serial.close()
+        except (SerialException, OSError):
+            pass
+        self._notify_connection(False)
+
+    def _reopen(self):
+        attempt = 0
+        while not self._is_released:
+            if self._released.wait(self._reconnect.retry_delay(attempt)):
+                return
+            attempt += 1
+
+            port = self._port
+            try:
+                if self._reconnect.port_resolver is not None:
+                    port = self._reconnect.port_resolver()
+                if port is None:
+                    continue
+                serial = self._open(port)
+            except (SerialException, OSError) as err:
+                _LOGGER.debug("Reopen of port {0} failed: {1}".format(port, err))
+                continue
+            finally:
+                with self._connection_lock:
+                    self._connection_stats.attempts += 1
+
+            with self._connection_lock:
+                if self._is_released:
+                    serial.close()
+                    return
+                self._serial = serial
+                self._port = port
+                outage = monotonic() - self._disconnected_at
+                self._connection_stats.connected = True
+                self._connection_stats.reconnects += 1
+                self._connection_stats.last_outage = outage
+                self._connection_stats.total_outage += outage
+                self._connected.set()
+
+            _LOGGER.warning("Port {0} is reopened after {1:.2f} s".format(port, outage))
+            if self._io_loop is not None:
+                self._io_loop.register(self, serial)
+            self._notify_connection(True)
+            return
+
+    def _on_io_error(self, err: Exception):
+        # Called from I/O loop thread, port is reopened in the separate thread to not block other adapters
+        if self._is_released:
+            return
+        self._connection_lost(err)
+        thread = Thread(target=self._reopen)
+        thread.daemon = True
+        thread.start()
+
+    def _notify_connection(self, connected: bool):
+        if self._on_connection_change is not None:
+            try:
+                self._on_connection_change(connected)
+            except Exception as err:
+                _LOGGER.error("Connection listener error: {0}".format(err))
+
     def _crc(self, data) -> int:
         sum = 0
         for i in range(0, len(data)):
@@ -202,32 +484,50 @@ class MTRF64Adapter(object):
 
     def _read_loop(self):
         while True:
-            packet = self._serial.read(self._packet_size)
+            try:
+                packet = self._serial.read(self._packet_size)
+            except Exception as err:
+                # pyserial can fail with any error when port is closed during read
+                if self._is_released:
+                    break
+                self._connection_lost(err)
+                self._reopen()
+                continue
 
             if self._is_released:
                 break
 
-            try:
-                data = self._parse(packet)
-                _LOGGER.debug("Receive:\n - packet: {0},\n - data: {1}".format(packet, data))
+            self._handle_packet(packet)
 
-                if data.mode == Mode.TX or data.mode == Mode.TX_F:
-                    self._command_response_queue.put(data)
-                elif data.mode == Mode.RX or data.mode == Mode.RX_F:
-                    self._incoming_queue.put(data)
-                else:
-                    pass
+    def _handle_packet(self, packet: bytes):
+        try:
+            data = self._parse(packet)
+            _LOGGER.debug("Receive:\n - packet: {0},\n - data: {1}".format(packet, data))
 
-            except IncomingDataException as err:
-                _LOGGER.error("Packet error: {0}".format(err))
+            if data.mode == Mode.TX or data.mode == Mode.TX_F or data.mode == Mode.FIRMWARE_UPDATE:
+                self._command_response_queue.put(data)
+            elif data.mode == Mode.RX or data.mode == Mode.RX_F:
+                if self._accept_incoming is None or self._accept_incoming(data):
+                    self._incoming_queue.put(data)
+                    if self._io_loop is not None:
+                        self._io_loop.notify_incoming(self)
+            else:
                 pass
 
+        except IncomingDataException as err:
+            _LOGGER.error("Packet error: {0}".format(err))
+            pass
+
     def _read_from_incoming_queue(self):
         while True:
             input_data = self._incoming_queue.get()
 
-            if self._is_released:
+            if self._is_released or input_data is None:
                 break
 
-            if self._listener is not None:
-                self._listener(input_data)
+            self._dispatch(input_data)
+
+    def _dispatch(self, input_data: IncomingData):
+        listener = self._listener
+        if listener is not None:
+            listener(input_data)
@@ -0,0 +1,126 @@
+from NooLite_F.MTRF64.MTRF64Adapter import Command, IncomingDataException
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+PACKET_SIZE = 17
+START_BYTE = 173
+STOP_BYTE = 174
+
+
+def _frame_dtype():
+    return np.dtype([
+        ("start", "u1"),
+        ("mode", "u1"),
+        ("status", "u1"),
+        ("count", "u1"),
+        ("channel", "u1"),
+        ("command", "u1"),
+        ("format", "u1"),
+        ("data", "u1", (4,)),
+        ("id", ">u4"),
+        ("crc", "u1"),
+        ("stop", "u1"),
+    ])
+
+
+class DecodedFrames(object):
+    """ Decoded frames as column arrays. Each array has one item per frame.
+
+    Values which are not applicable for the frame (e.g. temperature for button press) are NaN.
+
+    * valid - start/stop bytes and crc are correct. Other columns of invalid frames contain garbage.
+    * mode, status, count, channel, command, format, id - frame header fields.
+    * data - frame data, array of shape (n, 4).
+    * temp, humi, analog, battery - SENS_TEMP_HUMI (format 7) data, battery is 0 (ok) or 1 (low).
+    * brightness - SET_BRIGHTNESS (format 1) level.
+    * red, green, blue - SET_BRIGHTNESS (format 3) levels.
+    * duration - TEMPORARY_ON (format 5 and 6) duration.
+    """
+    valid = None
+    mode = None
+    status = None
+    count = None
+    channel = None
+    command = None
+    format = None
+    data = None
+    id = None
+    temp = None
+    humi = None
+    analog = None
+    battery = None
+    brightness = None
+    red = None
+    green = None
+    blue = None
+    duration = None
+
+    def __len__(self):
+        return len(self.valid)
+
+    def __repr__(self):
+        return "<DecodedFrames (0x{0:x}), frames: {1}, valid: {2}>".format(id(self), len(self), int(self.valid.sum()))
+
+
+def decode_frames(buffer) -> DecodedFrames:
+    """ Decode contiguous buffer of adapter frames at once.
+
+    The result for each valid frame is the same as for MTRF64Adapter._parse and scalar decoders from MTRF64Decoders.
+    Requires numpy.
+
+    :param buffer: bytes-like object, its length should be multiple of frame size (17 bytes).
+    :return: decoded frames.
+    """
+    if np is None:
+        raise ImportError("numpy is required for batch decoding")
+
+    if len(buffer) % PACKET_SIZE != 0:
+        raise IncomingDataException("Buffer size {0} is not multiple of packet size".format(len(buffer)))
+
+    raw = np.frombuffer(buffer, dtype=np.uint8).reshape(-1, PACKET_SIZE)
+    frames = raw.view(_frame_dtype()).reshape(-1)
+
+    result = DecodedFrames()
+    crc = raw[:, :PACKET_SIZE - 2].sum(axis=1, dtype=np.uint32) & 0xFF
+    result.valid = (frames["start"] == START_BYTE) & (frames["stop"] == STOP_BYTE) & (frames["crc"] == crc)
+
+    for name in ("mode", "status", "count", "channel", "command", "format"):
+        setattr(result, name, frames[name])
+    result.data = frames["data"]
+    result.id = frames["id"].astype(np.uint32)
+
+    data = result.data.astype(np.int64)
+    command = result.command
+    fmt = result.format
+    size = len(frames)
+
+    # SENS_TEMP_HUMI, really from PT111 I get fmt = 7, but in specs is specify that fmt should be 3
+    is_temp = result.valid & (command == Command.SENS_TEMP_HUMI) & (fmt == 7)
+    temp = ((data[:, 1] & 0x0F) << 8) + data[:, 0]
+    temp = np.where(temp > 0x0800, temp - 0x1000, temp)
+    result.temp = np.where(is_temp, temp / 10, np.nan)
+    result.humi = np.where(is_temp & (((data[:, 1] & 0x70) >> 4) == 2), data[:, 2], np.nan)
+    result.analog = np.where(is_temp, data[:, 3] / 255, np.nan)
+    result.battery = np.where(is_temp, (data[:, 1] & 0x80) >> 7, np.nan)
+
+    # SET_BRIGHTNESS
+    is_brightness = result.valid & (command == Command.SET_BRIGHTNESS)
+    level = np.clip((data[:, 0] - 35) / 120, 0, 1)
+    result.brightness = np.where(is_brightness & (fmt == 1), level, np.nan)
+    is_rgb = is_brightness & (fmt == 3)
+    result.red = np.where(is_rgb, data[:, 0] / 255, np.nan)
+    result.green = np.where(is_rgb, data[:, 1] / 255, np.nan)
+    result.blue = np.where(is_rgb, data[:, 2] / 255, np.nan)
+
+    # TEMPORARY_ON
+    is_temporary_on = result.valid & (command == Command.TEMPORARY_ON)
+    duration = np.full(size, np.nan)
+    duration = np.where(is_temporary_on & (fmt == 5), data[:, 0], duration)
+    duration = np.where(is_temporary_on & (fmt == 6), data[:, 0] + (data[:, 1] << 15), duration)
+    result.duration = duration
+
+    return result
@@ -0,0 +1,350 @@
+""" Command line tool which sends commands to modules in one adapter session.
+
+Commands are taken from arguments, from the script file or from stdin and are executed one by one with the same
+controller, so the port is opened and the adapter threads are started once. The result of each command is written
+as a JSON line as soon as the command is completed::
+
+    noolite-f -p /dev/ttyUSB0 "on channel=3" "set_brightness 0.5 module_id=0x5023" "read_state channel=3"
+    noolite-f -p /dev/ttyUSB0 --timing -f morning.txt
+    echo "read_state channel=3" | noolite-f -p /dev/ttyUSB0
+    noolite-f -p /dev/ttyUSB0 --interactive
+"""
+import argparse
+import cmd
+import inspect
+import json
+import logging
+import os
+import shlex
+import sys
+
+from collections import OrderedDict
+from enum import Enum
+from time import monotonic, sleep
+from typing import List, Iterable
+
+from NooLite_F import ModuleMode, Direction
+from NooLite_F.MTRF64.MTRF64Adapter import DEFAULT_BAUDRATE
+from NooLite_F.MTRF64.MTRF64Reconnect import find_port
+from NooLite_F.MTRF64.MTRF64Controller import MTRF64Controller
+
+
+_LOGGER = logging.getLogger("MTRF64CLI")
+
+PORT_VARIABLE = "NOOLITE_PORT"
+
+
+class CommandError(Exception):
+    """Base class for command line errors."""
+    pass
+
+
+def _boolean(value: str) -> bool:
+    text = value.lower()
+    if text in ("1", "true", "yes", "on"):
+        return True
+    if text in ("0", "false", "no", "off"):
+        return False
+    raise ValueError("Invalid boolean value: {0}".format(value))
+
+
+def _direction(value: str) -> Direction:
+    return Direction[value.upper()]
+
+
+def _module_mode(value: str) -> ModuleMode:
+    return ModuleMode[value.upper()]
+
+
+def _module_id(value: str) -> int:
+    return int(value, 0)
+
+
+# Parsers of positional arguments of each command, other arguments are passed as key=value
+_COMMANDS = OrderedDict([
+    ("on", ()),
+    ("off", ()),
+    ("switch", ()),
+    ("temporary_on", (int,)),
+    ("set_temporary_on_mode", (_boolean,)),
+    ("brightness_tune", (_direction,)),
+    ("brightness_tune_back", ()),
+    ("brightness_tune_stop", ()),
+    ("brightness_tune_custom", (_direction, float)),
+    ("brightness_tune_step", (_direction, int)),
+    ("set_brightness", (float,)),
+    ("roll_rgb_color", ()),
+    ("switch_rgb_color", ()),
+    ("switch_rgb_mode", ()),
+    ("switch_rgb_mode_speed", ()),
+    ("set_rgb_brightness", (float, float, float)),
+    ("load_preset", ()),
+    ("save_preset", ()),
+    ("read_state", ()),
+    ("read_extra_state", ()),
+    ("read_channels_state", ()),
+    ("read_module_config", ()),
+    ("read_dimmer_correction", ()),
+    ("bind", ()),
+    ("unbind", ()),
+    ("set_service_mode", (_boolean,)),
+    ("bind_mode_on", ()),
+    ("bind_mode_off", ()),
+    ("unbind_address", ()),
+    ("clear_channel", ()),
+    ("clear_memory", ()),
+])
+
+_KEYWORDS = {
+    "module_id": _module_id,
+    "channel": int,
+    "broadcast": _boolean,
+    "module_mode": _module_mode,
+    "receiver": _boolean,
+    "timeout": float,
+}
+
+
+def command_usage(name: str) -> str:
+    """ Returns usage line of the command, e.g. "set_brightness brightness [module_id=..] [channel=..]". """
+    if name == "sleep":
+        return "sleep seconds"
+    parameters = list(inspect.signature(getattr(MTRF64Controller, name)).parameters.values())[1:]
+    positional = [parameter.name for parameter in parameters[:len(_COMMANDS[name])]]
+    keywords = ["[{0}=..]".format(parameter.name) for parameter in parameters[len(positional):]]
+    return " ".join([name] + positional + keywords)
+
+
+def _encode(value):
+    if isinstance(value, Enum):
+        return value.name
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_encode(item) for item in value]
+    return OrderedDict((name, _encode(getattr(value, name))) for name in sorted(dir(value))
+                       if not name.startswith("_") and not callable(getattr(value, name)))
+
+
+def _encode_response(response: tuple) -> OrderedDict:
+    """ Encodes (status, module info, state) or (status, config) response of the controller. """
+    result = OrderedDict()
+    result["status"] = response[0]
+    if len(response) == 3:
+        info, payload = response[1], response[2]
+        if info is not None:
+            result["id"] = "{0:x}".format(info.id)
+            result["type"] = info.type
+            result["firmware"] = info.firmware
+    else:
+        payload = response[1]
+    if payload is not None:
+        result.update(_encode(payload))
+    return result
+
+
+class CommandSession(object):
+    """ Executes text commands with one controller and returns results which can be written as JSON. """
+
+    def __init__(self, controller: MTRF64Controller, timing: bool = False):
+        """
+        :param controller: controller which sends commands.
+        :param timing: add the command latency (in seconds) to results.
+        """
+        self._controller = controller
+        self._timing = timing
+        self._count = 0
+        self._latencies = []
+
+    def execute(self, line: str) -> OrderedDict:
+        """ Executes one command line, e.g. "set_brightness 0.5 channel=3". Errors are reported in the result. """
+        self._count += 1
+        result = OrderedDict()
+        result["n"] = self._count
+        result["command"] = line
+
+        started_at = monotonic()
+        try:
+            name, args, kwargs = self._parse(line)
+            if name == "sleep":
+                sleep(*args)
+                result["ok"] = True
+            else:
+                response = getattr(self._controller, name)(*args, **kwargs)
+                if isinstance(response, bool):
+                    result["ok"] = response
+                else:
+                    result["ok"] = any(item[0] for item in response)
+                    result["responses"] = [_encode_response(item) for item in response]
+        except Exception as err:
+            result["ok"] = False
+            result["error"] = "{0}: {1}".format(type(err).__name__, err)
+
+        latency = monotonic() - started_at
+        self._latencies.append(latency)
+        if self._timing:
+            result["latency"] = round(latency, 6)
+        return result
+
+    def summary(self) -> str:
+        """ Returns latency summary of executed commands. """
+        if len(self._latencies) == 0:
+            return "no commands"
+        latencies = sorted(self._latencies)
+        return "{0} commands, total: {1:.3f} s, mean: {2:.1f} ms, median: {3:.1f} ms, max: {4:.1f} ms" \
+            .format(len(latencies), sum(latencies), sum(latencies) * 1000 / len(latencies),
+                    latencies[len(latencies) // 2] * 1000, latencies[-1] * 1000)
+
+    # Private
+    @staticmethod
+    def _parse(line: str) -> tuple:
+        words = shlex.split(line, comments=True)
+        if len(words) == 0:
+            raise CommandError("Empty command")
+        name, arguments = words[0], words[1:]
+        if name == "sleep":
+            if len(arguments) != 1:
+                raise CommandError("Usage: {0}".format(command_usage(name)))
+            return name, [float(arguments[0])], {}
+
+        parsers = _COMMANDS.get(name)
+        if parsers is None:
+            raise CommandError("Unknown command: {0}".format(name))
+
+        args = []
+        kwargs = {}
+        for argument in arguments:
+            key, separator, value = argument.partition("=")
+            if separator:
+                parser = _KEYWORDS.get(key)
+                if parser is None:
+                    raise CommandError("Unknown argument: {0}".format(key))
+                kwargs[key] = parser(value)
+            elif len(args) < len(parsers) and len(kwargs) == 0:
+                args.append(parsers[len(args)](argument))
+            else:
+                raise CommandError("Usage: {0}".format(command_usage(name)))
+        return name, args, kwargs
+
+
+class _Shell(cmd.Cmd):
+    intro = "Type help for the list of commands, quit or Ctrl-D to exit."
+    prompt = "noolite-f> "
+
+    def __init__(self, session: CommandSession, output):
+        super().__init__()
+        self._session = session
+        self._output = output
+        self.failed = False
+
+    def default(self, line: str):
+        result = self._session.execute(line)
+        self.failed = self.failed or not result["ok"]
+        _write(self._output, result)
+
+    def emptyline(self):
+        pass
+
+    def completenames(self, text: str, *ignored):
+        return [name + " " for name in list(_COMMANDS) + ["sleep", "help", "quit"] if name.startswith(text)]
+
+    def do_help(self, arg: str):
+        names = [arg] if arg in _COMMANDS or arg == "sleep" else list(_COMMANDS) + ["sleep"]
+        for name in names:
+            print(command_usage(name))
+
+    def do_quit(self, arg: str):
+        return True
+
+    do_exit = do_quit
+
+    def do_EOF(self, arg: str):
+        print()
+        return True
+
+
+def _write(output, result: OrderedDict):
+    # Each result is flushed at once, so the reader of the pipe gets it without waiting for the next command
+    output.write(json.dumps(result) + "\n")
+    output.flush()
+
+
+def _lines(stream) -> Iterable[str]:
+    # readline is used instead of the file iterator, so each line is executed as soon as it is received
+    for line in iter(stream.readline, ""):
+        line = line.strip()
+        if len(line) > 0 and not line.startswith("#"):
+            yield line
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="noolite-f",
+        description="Send commands to NooLite/NooLite-F modules via MTRF-64 adapter in one session. "
+                    "The result of each command is written as a JSON line.",
+        epilog="Commands: {0}, sleep. Use help in the interactive shell for arguments.".format(", ".join(_COMMANDS)))
+    parser.add_argument("commands", nargs="*", metavar="COMMAND",
+                        help='command with arguments, e.g. "set_brightness 0.5 channel=3"')
+    parser.add_argument("-p", "--port", default=os.environ.get(PORT_VARIABLE),
+                        help="adapter port, /dev/serial/by-id name or serial number (default: ${0})".format(PORT_VARIABLE))
+    parser.add_argument("-b", "--baudrate", type=int, default=DEFAULT_BAUDRATE, help="port baudrate")
+    parser.add_argument("-f", "--file", help="script file with one command per line, - for stdin")
+    parser.add_argument("-i", "--interactive", action="store_true", help="start the shell after other commands")
+    parser.add_argument("-t", "--timing", action="store_true",
+                        help="add latency to each result and print latency summary to stderr")
+    parser.add_argument("-x", "--stop-on-error", action="store_true", help="stop after the first failed command")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log adapter messages to stderr")
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    """ Entry point of noolite-f tool. Returns 0 if all commands succeeded, 1 otherwise. """
+    parser = _parser()
+    args = parser.parse_args(argv)
+    if args.port is None:
+        parser.error("adapter port is not specified, use --port or ${0}".format(PORT_VARIABLE))
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING, stream=sys.stderr)
+
+    sources = []
+    if len(args.commands) > 0:
+        sources.append(args.commands)
+    if args.file == "-":
+        sources.append(_lines(sys.stdin))
+    elif args.file is not None:
+        try:
+            with open(args.file) as file:
+                sources.append(list(_lines(file)))
+        except OSError as err:
+            parser.error("can't read script: {0}".format(err))
+    interactive = args.interactive or (len(sources) == 0 and sys.stdin.isatty())
+    if len(sources) == 0 and not interactive:
+        sources.append(_lines(sys.stdin))
+
+    started_at = monotonic()
+    controller = MTRF64Controller(find_port(args.port) or args.port, args.baudrate)
+    if args.timing:
+        print("session opened in {0:.1f} ms".format((monotonic() - started_at) * 1000), file=sys.stderr)
+
+    session = CommandSession(controller, args.timing)
+    failed = False
+    try:
+        for source in sources:
+            for line in source:
+                result = session.execute(line)
+                _write(sys.stdout, result)
+                if not result["ok"]:
+                    failed = True
+                    if args.stop_on_error:
+                        return 1
+        if interactive:
+            shell = _Shell(session, sys.stdout)
+            try:
+                shell.cmdloop()
+            except KeyboardInterrupt:
+                print()
+            failed = failed or shell.failed
+    finally:
+        if args.timing:
+            print(session.summary(), file=sys.stderr)
+        controller.release()
+    return 1 if failed else 0
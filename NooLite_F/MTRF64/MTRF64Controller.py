@@ -1,17 +1,47 @@
-from NooLite_F import NooLiteFController, Direction, ModuleMode, NooLiteFListener, BatteryState
-from NooLite_F import ModuleInfo, ModuleBaseStateInfo, ModuleExtraStateInfo, ModuleChannelsStateInfo, ModuleState, ServiceModeState, DimmerCorrectionConfig, ModuleConfig
-from NooLite_F import NooliteModeState, InputMode
+from NooLite_F import NooLiteFController, Direction, ModuleMode, NooLiteFListener
+from NooLite_F import ModuleInfo, ModuleBaseStateInfo, ModuleExtraStateInfo, ModuleChannelsStateInfo, DimmerCorrectionConfig, ModuleConfig
+from NooLite_F import InputMode, Deadline, Timeout
 from NooLite_F import ResponseBaseInfo, ResponseExtraInfo, ResponseChannelsInfo, ResponseModuleConfig, ResponseDimmerCorrectionConfig
-from NooLite_F.MTRF64 import IncomingData, Command, Mode, Action, OutgoingData, ResponseCode, MTRF64Adapter
+from NooLite_F.MTRF64 import IncomingData, Command, Mode, Action, OutgoingData, MTRF64Adapter
 from NooLite_F.MTRF64.MTRF64Adapter import DEFAULT_BAUDRATE
+from NooLite_F.MTRF64.MTRF64Scheduler import PriorityScheduler, Priority, LaneStats
+from NooLite_F.MTRF64.MTRF64Reconnect import ReconnectPolicy, ConnectionStats
+from NooLite_F.MTRF64.MTRF64Queue import EventQueue, QueueStats
+from NooLite_F.MTRF64.MTRF64IOLoop import MTRF64IOLoop
+from NooLite_F.MTRF64.MTRF64Decoders import decode_temp_humi, decode_temporary_on, decode_brightness, decode_rgb_brightness, decode_response
+from NooLite_F.MTRF64.MTRF64Filter import EventFilter
+from NooLite_F.MTRF64.MTRF64Suppression import CommandSuppressor, SuppressionStats
+from NooLite_F.MTRF64.MTRF64DutyCycle import DutyCycleGovernor, AirtimeStats
+from NooLite_F.MTRF64.MTRF64Streaming import AsyncResponseIterator
+from NooLite_F.MTRF64.MTRF64StateTable import StateTable
+from NooLite_F.MTRF64.MTRF64Listeners import ListenerRegistry
+from NooLite_F.MTRF64.MTRF64Retry import RetryPolicy, CircuitBreakerRegistry, CommandClass, NO_RETRY, command_class, is_failed, no_response
+
+import inspect
+import logging
 
 from abc import ABC, abstractmethod
-from typing import TypeVar, Generic, List, Tuple
+from serial import SerialException
+from collections import OrderedDict
+from threading import Lock, Thread
+from time import sleep, monotonic
+from typing import TypeVar, Generic, List, Tuple, Dict, Iterator
 
 
 T = TypeVar('T')
 V = TypeVar('V')
 
+_LOGGER = logging.getLogger("MTRF64Controller")
+
+# Maximal number of recently commanded modules which state is re-read after reconnection
+_RESYNC_LIMIT = 256
+
+# Adapter clears the whole memory only if request data is this key, so memory can't be cleared by mistake
+_CLEAR_MEMORY_KEY = bytearray([170, 85, 170, 85])
+
+# Adapter ignores requests which are received while it executes the previous one
+_RECEIVER_ACTION_DELAY = 0.2
+
 
 class OutgoingDataException(Exception):
     """Base class for response exceptions."""
@@ -26,134 +56,361 @@ class Parser(ABC, Generic[T, V]):
 
 class ModuleInfoParser(Parser[IncomingData, ModuleInfo]):
     def parse(self, data: IncomingData) -> ModuleInfo:
-        info = None
-        if data.command == Command.SEND_STATE and (data.format in (0, 1, 2)):
-            info = ModuleInfo()
-            info.type = data.data[0]
-            info.firmware = data.data[1]
-            info.id = data.id
+        return decode_response(data).info
 
-        return info
 
+class _PayloadParser(Parser[IncomingData, V]):
+    """ Returns payload of the response with specified format, decoding is made by response decoders table. """
+    format = None
 
-class ModuleBaseStateInfoParser(Parser[IncomingData, ModuleBaseStateInfo]):
-    def parse(self, data: IncomingData) -> ModuleBaseStateInfo:
-        info = None
-        if data.command == Command.SEND_STATE and data.format == 0:
-            info = ModuleBaseStateInfo()
+    def parse(self, data: IncomingData) -> V:
+        if data.command != Command.SEND_STATE or data.format != self.format:
+            return None
+        return decode_response(data).payload
 
-            states = {
-                0: ModuleState.OFF,
-                1: ModuleState.ON,
-                2: ModuleState.TEMPORARY_ON,
-            }
 
-            state = data.data[2]
+class ModuleBaseStateInfoParser(_PayloadParser[ModuleBaseStateInfo]):
+    format = 0
 
-            if state in states:
-                info.state = states[state]
 
-            if (data.data[2] & 0x80) == 0x80:
-                info.service_mode = ServiceModeState.BIND_ON
-            else:
-                info.service_mode = ServiceModeState.BIND_OFF
+class ModuleExtraStateInfoParser(_PayloadParser[ModuleExtraStateInfo]):
+    format = 1
 
-            info.brightness = data.data[3] / 255
 
-        return info
+class ModuleChannelsInfoParser(_PayloadParser[ModuleChannelsStateInfo]):
+    format = 2
 
 
-class ModuleExtraStateInfoParser(Parser[IncomingData, ModuleExtraStateInfo]):
-    def parse(self, data: IncomingData) -> ModuleExtraStateInfo:
-        info = None
-        if data.command == Command.SEND_STATE and data.format == 1:
-            info = ModuleExtraStateInfo()
-            info.extra_input_state = (data.data[2] > 0)
+class ModuleConfigurationParser(_PayloadParser[ModuleConfig]):
+    format = 16
 
-            if (data.data[3] & 0x02) == 0x02:
-                info.noolite_mode_state = NooliteModeState.DISABLED
-            elif (data.data[3] & 0x01) == 0x01:
-                info.noolite_mode_state = NooliteModeState.TEMPORARY_DISABLED
-            else:
-                info.noolite_mode_state = NooliteModeState.ENABLED
+    def state(self, data: int, bit_num: int) -> bool:
+        return (data & 1 << bit_num) == (1 << bit_num)
 
-        return info
 
+class BrightnessConfigurationParser(_PayloadParser[DimmerCorrectionConfig]):
+    format = 17
 
-class ModuleChannelsInfoParser(Parser[IncomingData, ModuleChannelsStateInfo]):
-    def parse(self, data: IncomingData) -> ModuleChannelsStateInfo:
-        info = None
-        if data.command == Command.SEND_STATE and data.format == 2:
-            info = ModuleChannelsStateInfo()
-            info.noolite_cells = data.data[2]
-            info.noolite_f_cells = data.data[3]
 
-        return info
+def _convert_brightness(bright: float) -> int:
+    if bright >= 1:
+        value = 255
+    elif bright <= 0:
+        value = 0
+    else:
+        value = int((255 * bright) + 0.5)
+    return value
 
 
-class ModuleConfigurationParser(Parser[IncomingData, ModuleConfig]):
+def _plain(command: Command, fmt: int = None, payload_format: int = 0):
+    return lambda: (command, None, fmt, payload_format)
+
+
+def _encode_temporary_on(duration: int) -> tuple:
+    data = bytearray(2)
+    data[0] = duration & 0x00FF
+    data[1] = duration & 0xFF00
+    return Command.TEMPORARY_ON, data, 6, 0
+
+
+def _encode_temporary_on_mode(enabled: bool) -> tuple:
+    data = bytearray(1)
+    if not enabled:
+        data[0] = 1
+    return Command.MODES, data, 1, 0
 
-    def state(self, data: int, bit_num: int) -> bool:
-        return (data & 1 << bit_num) == (1 << bit_num)
 
-    def parse(self, data: IncomingData) -> ModuleConfig:
-        info = None
-        if data.command == Command.SEND_STATE and data.format == 16:
-            info = ModuleConfig()
+def _encode_brightness_tune(direction: Direction) -> tuple:
+    if direction == Direction.UP:
+        command = Command.BRIGHT_UP
+    else:
+        command = Command.BRIGHT_DOWN
+    return command, None, None, 0
 
-            info.save_state_mode = self.state(data.data[0], 0)
-            info.dimmer_mode = self.state(data.data[0], 1)
-            info.noolite_support = self.state(data.data[0], 2)
-            info.init_state = self.state(data.data[0], 5)
-            info.noolite_retranslation = self.state(data.data[0], 6)
 
-            extra_input_modes = {
-                0: InputMode.SWITCH,
-                1: InputMode.BUTTON,
-                2: InputMode.BREAKER,
-                3: InputMode.DISABLED,
-            }
+def _encode_brightness_tune_custom(direction: Direction, speed: float) -> tuple:
+    if speed >= 1:
+        value = 127
+    elif speed <= 0:
+        value = 0
+    else:
+        value = int((speed * 127) + 0.5)
 
-            extra_input_mode = (data.data[0] & 0x18) >> 3
-            if extra_input_mode in extra_input_modes:
-                info.input_mode = extra_input_modes[extra_input_mode]
+    if direction == Direction.DOWN:
+        value = -value - 1
 
-        return info
+    data = bytearray(1)
+    data[0] = value & 0xFF
+    return Command.BRIGHT_REG, data, 1, 0
 
 
-class BrightnessConfigurationParser(Parser[IncomingData, ModuleConfig]):
-    def parse(self, data: IncomingData) -> DimmerCorrectionConfig:
-        info = None
-        if data.command == Command.SEND_STATE and data.format == 17:
-            info = DimmerCorrectionConfig()
-            info.max_level = data.data[0] / 255
-            info.min_level = data.data[1] / 255
-        return info
+def _encode_brightness_tune_step(direction: Direction, step: int = None) -> tuple:
+    data = None
+    fmt = None
+
+    if step is not None:
+        fmt = 1
+        data = bytearray(1)
+        data[0] = step
+
+    if direction == Direction.UP:
+        command = Command.BRIGHT_STEP_UP
+    else:
+        command = Command.BRIGHT_STEP_DOWN
+    return command, data, fmt, 0
+
+
+def _encode_brightness(brightness: float) -> tuple:
+    if brightness >= 1:
+        value = 155
+    elif brightness <= 0:
+        value = 0
+    else:
+        value = 35 + int((120 * brightness) + 0.5)
+
+    data = bytearray(1)
+    data[0] = value
+    return Command.SET_BRIGHTNESS, data, 1, 0
+
+
+def _encode_rgb_brightness(red: float, green: float, blue: float) -> tuple:
+    data = bytearray(3)
+    data[0] = _convert_brightness(red)
+    data[1] = _convert_brightness(green)
+    data[2] = _convert_brightness(blue)
+    return Command.SET_BRIGHTNESS, data, 3, 0
+
+
+def _encode_module_config(config: ModuleConfig) -> tuple:
+    data = bytearray(4)
+
+    save_state_mode = config.save_state_mode
+    if save_state_mode is not None:
+        data[2] = data[2] | 0x01
+        if save_state_mode:
+            data[0] = data[0] | 0x01
+
+    dimmer_mode = config.dimmer_mode
+    if dimmer_mode is not None:
+        data[2] = data[2] | 0x02
+        if dimmer_mode:
+            data[0] = data[0] | 0x02
+
+    noolite_support = config.noolite_support
+    if noolite_support is not None:
+        data[2] = data[2] | 0x04
+        if noolite_support:
+            data[0] = data[0] | 0x04
+
+    input_mode = config.input_mode
+    if input_mode is not None:
+        data[2] = data[2] | 0x18
+        if input_mode == InputMode.SWITCH:
+            pass
+        elif input_mode == InputMode.BUTTON:
+            data[0] = data[0] | 0x08
+        elif input_mode == InputMode.BREAKER:
+            data[0] = data[0] | 0x10
+        elif input_mode == InputMode.DISABLED:
+            data[0] = data[0] | 0x18
+
+    init_state = config.init_state
+    if init_state is not None:
+        data[2] = data[2] | 0x20
+        if init_state:
+            data[0] = data[0] | 0x20
+
+    noolite_retranslation = config.noolite_retranslation
+    if noolite_retranslation is not None:
+        data[2] = data[2] | 0x40
+        if noolite_retranslation:
+            data[0] = data[0] | 0x40
+
+    return Command.WRITE_STATE, data, 16, None
+
+
+def _encode_dimmer_correction(config: DimmerCorrectionConfig) -> tuple:
+    data = bytearray(4)
+
+    data[0] = _convert_brightness(config.max_level)
+    data[1] = _convert_brightness(config.min_level)
+    data[2] = 0xFF
+    data[3] = 0xFF
+    return Command.WRITE_STATE, data, 17, None
+
+
+def _encode_service_mode(state: bool) -> tuple:
+    data = bytearray(1)
+    if state:
+        data[0] = 1
+    return Command.SERVICE, data, None, 0
+
+
+class _ModuleCommand(object):
+    """ Module command of the controller: encode returns (command, data, format, payload format) from the command
+    arguments. Responses of config commands are decoded as config of the command format.
+    """
+
+    def __init__(self, encode, config: bool = False):
+        self.encode = encode
+        self.config = config
+
+
+# Module commands by controller method name, they are sent at once or streamed by command_iter
+_MODULE_COMMANDS = {
+    "off": _ModuleCommand(_plain(Command.OFF)),
+    "on": _ModuleCommand(_plain(Command.ON)),
+    "temporary_on": _ModuleCommand(_encode_temporary_on),
+    "set_temporary_on_mode": _ModuleCommand(_encode_temporary_on_mode),
+    "switch": _ModuleCommand(_plain(Command.SWITCH)),
+    "brightness_tune": _ModuleCommand(_encode_brightness_tune),
+    "brightness_tune_back": _ModuleCommand(_plain(Command.BRIGHT_BACK)),
+    "brightness_tune_stop": _ModuleCommand(_plain(Command.STOP_BRIGHT)),
+    "brightness_tune_custom": _ModuleCommand(_encode_brightness_tune_custom),
+    "brightness_tune_step": _ModuleCommand(_encode_brightness_tune_step),
+    "set_brightness": _ModuleCommand(_encode_brightness),
+    "roll_rgb_color": _ModuleCommand(_plain(Command.ROLL_COLOR)),
+    "switch_rgb_color": _ModuleCommand(_plain(Command.SWITCH_COLOR)),
+    "switch_rgb_mode": _ModuleCommand(_plain(Command.SWITCH_MODE)),
+    "switch_rgb_mode_speed": _ModuleCommand(_plain(Command.SPEED_MODE)),
+    "set_rgb_brightness": _ModuleCommand(_encode_rgb_brightness),
+    "load_preset": _ModuleCommand(_plain(Command.LOAD_PRESET)),
+    "save_preset": _ModuleCommand(_plain(Command.SAVE_PRESET)),
+    "read_state": _ModuleCommand(_plain(Command.READ_STATE)),
+    "read_extra_state": _ModuleCommand(_plain(Command.READ_STATE, 1, 1)),
+    "read_channels_state": _ModuleCommand(_plain(Command.READ_STATE, 2, 2)),
+    "read_module_config": _ModuleCommand(_plain(Command.READ_STATE, 16, None), config=True),
+    "write_module_config": _ModuleCommand(_encode_module_config, config=True),
+    "read_dimmer_correction": _ModuleCommand(_plain(Command.READ_STATE, 17, None), config=True),
+    "write_dimmer_correction": _ModuleCommand(_encode_dimmer_correction, config=True),
+    "bind": _ModuleCommand(_plain(Command.BIND)),
+    "unbind": _ModuleCommand(_plain(Command.UNBIND)),
+    "set_service_mode": _ModuleCommand(_encode_service_mode),
+}
+
+# Arguments of module commands which address the module, other arguments are encoded into the request
+_ADDRESS_ARGUMENTS = ("module_id", "channel", "broadcast", "module_mode", "timeout")
 
 
 class MTRF64Controller(NooLiteFController):
 
     _adapter = None
-    _listener_map = {}
+    _listeners = None
+    _retry_policies = {}
+    _circuit_breakers = None
+    _priorities = {}
+    _event_filter = None
+    _event_sinks = []
+    _connection_listeners = []
+    _recent_modules = None
+    _recent_lock = None
+    _resync_window = None
+    _suppressor = None
+    _duty_cycle = None
+    _state_table = None
 
     _mode_map = {
         ModuleMode.NOOLITE: Mode.TX,
         ModuleMode.NOOLITE_F: Mode.TX_F,
     }
 
-    def __init__(self, port: str, baudrate: int = DEFAULT_BAUDRATE):
-        self._adapter = MTRF64Adapter(port, baudrate, self._on_receive)
+    _receiver_mode_map = {
+        ModuleMode.NOOLITE: Mode.RX,
+        ModuleMode.NOOLITE_F: Mode.RX_F,
+    }
+
+    _default_priorities = {
+        CommandClass.CONTROL: Priority.INTERACTIVE,
+        CommandClass.STATE: Priority.NORMAL,
+        CommandClass.CONFIG: Priority.BACKGROUND,
+        CommandClass.SERVICE: Priority.NORMAL,
+    }
+
+    def __init__(self, port: str, baudrate: int = DEFAULT_BAUDRATE, retry_policies: Dict[CommandClass, RetryPolicy] = None, circuit_breakers: CircuitBreakerRegistry = None, priorities: Dict[CommandClass, Priority] = None, event_filter: EventFilter = None,
+                 reconnect: ReconnectPolicy = None, resync_window: float = 300, incoming_queue: EventQueue = None,
+                 response_queue: EventQueue = None, io_loop: MTRF64IOLoop = None, suppressor: CommandSuppressor = None,
+                 duty_cycle: DutyCycleGovernor = None, state_table: StateTable = None, scheduler: PriorityScheduler = None):
+        """
+        :param port: serial port of the adapter.
+        :param baudrate: serial port baudrate.
+        :param retry_policies: retry policy for each command class. Commands of classes without policy are sent once.
+        :param circuit_breakers: registry of per module circuit breakers. If None, commands are always sent to modules.
+        :param priorities: adapter priority for each command class. By default control commands are interactive, config commands are background.
+        :param event_filter: filter for incoming events. Events rejected by filter are not dispatched to listeners.
+        :param reconnect: how adapter reopens the port after failure. If None, default policy is used.
+        :param resync_window: after reconnection the state of NooLite-F modules commanded during this time (in seconds) is re-read.
+        :param incoming_queue: queue of incoming events between adapter reader thread and listeners. If None, default queue is used.
+        :param response_queue: queue of command responses between adapter reader thread and commands. If None, default queue is used.
+        :param io_loop: shared I/O loop which serves many adapters. If None, adapter uses own reader and listener threads.
+        :param suppressor: answers commands which don't change confirmed module state without transmission. If None, all commands are sent.
+        :param duty_cycle: delays requests to keep radio duty cycle within the budget. If None, airtime is not limited.
+        :param state_table: shared memory table which receives module states and sensor readings. If None, states are not published.
+        :param scheduler: scheduler of adapter requests, e.g. with own max_wait of priority lanes. If None, default scheduler is used.
+        """
+        self._retry_policies = retry_policies if retry_policies is not None else {}
+        self._circuit_breakers = circuit_breakers
+        self._priorities = dict(self._default_priorities)
+        if priorities is not None:
+            self._priorities.update(priorities)
+        self._event_filter = event_filter
+        self._event_sinks = []
+        self._listeners = ListenerRegistry()
+        self._connection_listeners = []
+        self._recent_modules = OrderedDict()
+        self._recent_lock = Lock()
+        self._resync_window = resync_window
+        self._suppressor = suppressor
+        self._duty_cycle = duty_cycle
+        self._state_table = state_table
+        self._adapter = MTRF64Adapter(port, baudrate, self._on_receive, scheduler=scheduler, accept_incoming=self._accept_incoming,
+                                      reconnect=reconnect, on_connection_change=self._on_connection_change, incoming_queue=incoming_queue,
+                                      response_queue=response_queue, io_loop=io_loop)
 
     def release(self):
         self._adapter.release()
         self._adapter = None
-        self._listener_map = {}
+        self._listeners.clear()
+
+    def lane_stats(self) -> Dict[Priority, LaneStats]:
+        """ Returns queue depth and wait time statistics for each adapter priority lane. """
+        return self._adapter.lane_stats()
+
+    def queue_stats(self) -> Dict[str, QueueStats]:
+        """ Returns depth, high water mark and dropped packets counters of adapter incoming and response queues. """
+        return self._adapter.queue_stats()
+
+    def connection_stats(self) -> ConnectionStats:
+        """ Returns number of adapter disconnects, reconnects and outage durations. """
+        return self._adapter.connection_stats()
+
+    def suppression_stats(self) -> SuppressionStats:
+        """ Returns number of checked and suppressed commands or None if suppression is not used. """
+        if self._suppressor is None:
+            return None
+        return self._suppressor.stats()
+
+    def airtime_stats(self) -> AirtimeStats:
+        """ Returns radio utilisation and delays made by duty cycle governor or None if it is not used. """
+        if self._duty_cycle is None:
+            return None
+        return self._duty_cycle.stats()
+
+    def add_connection_listener(self, listener):
+        """ Add the listener of adapter connection changes.
+
+        :param listener: callable which accepts (connected, states). On disconnect states is empty, after reconnection
+        it maps (module_id, channel) of recently commanded modules to the result of read_state command.
+        """
+        self._connection_listeners = self._connection_listeners + [listener]
+
+    def remove_connection_listener(self, listener):
+        self._connection_listeners = [item for item in self._connection_listeners if item is not listener]
 
     # Private
     def _command_mode(self, module_mode: ModuleMode) -> Mode:
         return self._mode_map[module_mode]
 
-    def _send_module_command(self, module_id, channel: int, command: Command, broadcast, mode: Mode, command_data: bytearray = None, fmt: int = None) -> List[IncomingData]:
+    def _module_request(self, module_id, channel: int, command: Command, broadcast, mode: Mode, command_data: bytearray = None, fmt: int = None) -> OutgoingData:
         data = OutgoingData()
 
         data.mode = mode
@@ -182,257 +439,410 @@ class MTRF64Controller(NooLiteFController):
         if fmt is not None:
             data.format = fmt
 
-        return self._adapter.send(data)
-
-    def _send_module_base_command(self, module_id, channel: int, command: Command, broadcast, mode: Mode, command_data: bytearray = None, fmt: int = None, parser: Parser[IncomingData, V] = ModuleBaseStateInfoParser()) -> List[Tuple[bool, ModuleInfo, V]]:
-        response = self._send_module_command(module_id, channel, command, broadcast, mode, command_data, fmt)
-        return self._handle_base_command_responses(response, parser)
-
-    def _send_module_config_command(self, module_id, channel: int, command: Command, broadcast, mode: Mode, command_data: bytearray = None, fmt: int = None,  parser: Parser[IncomingData, V] = ModuleConfigurationParser()) -> List[Tuple[bool, V]]:
-        response = self._send_module_command(module_id, channel, command, broadcast, mode, command_data, fmt)
-        return self._handle_config_command_responses(response, parser)
-
-    @staticmethod
-    def _handle_base_command_responses(responses: List[IncomingData], parser: Parser[IncomingData, V]) -> List[Tuple[bool, ModuleInfo, V]]:
-        results = []
-        for response in responses:
-            info = ModuleInfoParser().parse(response)
-            extra_info = parser.parse(response)
-            status = response.status == ResponseCode.SUCCESS or response.status == ResponseCode.BIND_SUCCESS
-            results.append((status, info, extra_info))
-        return results
-
-    @staticmethod
-    def _handle_config_command_responses(responses: List[IncomingData], parser: Parser[IncomingData, V]) -> List[Tuple[bool, V]]:
-        results = []
-        for response in responses:
-            config = parser.parse(response)
-            status = response.status == ResponseCode.SUCCESS or response.status == ResponseCode.BIND_SUCCESS
-            results.append((status, config))
-        return results
-
-    @staticmethod
-    def _convert_brightness(bright: float) -> int:
-        if bright >= 1:
-            value = 255
-        elif bright <= 0:
-            value = 0
-        else:
-            value = int((255 * bright) + 0.5)
-        return value
+        if mode == Mode.TX_F and command != Command.READ_STATE:
+            self._remember_module(module_id, channel)
 
-    # Commands
-    def off(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
-        return self._send_module_base_command(module_id, channel, Command.OFF, broadcast, self._command_mode(module_mode))
+        return data
 
-    def on(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
-        return self._send_module_base_command(module_id, channel, Command.ON, broadcast, self._command_mode(module_mode))
+    def _send(self, data: OutgoingData, deadline: Deadline) -> List[IncomingData]:
+        return list(self._stream(data, deadline))
 
-    def temporary_on(self, duration: int, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
-        data = bytearray(2)
-        data[0] = duration & 0x00FF
-        data[1] = duration & 0xFF00
-        return self._send_module_base_command(module_id, channel, Command.TEMPORARY_ON, broadcast, self._command_mode(module_mode), data, 6)
+    def _stream(self, data: OutgoingData, deadline: Deadline) -> Iterator[IncomingData]:
+        """ Send request with retries and yield responses as soon as they are received.
 
-    def set_temporary_on_mode(self, enabled: bool, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
-        data = bytearray(1)
-        if not enabled:
-            data[0] = 1
-        return self._send_module_base_command(module_id, channel, Command.MODES, broadcast, self._command_mode(module_mode), data, 1)
+        Responses of the attempt are held back until it is known that the attempt is not failed (e.g. the first module
+        answered), so responses of failed attempts which are retried are never yielded.
+        """
+        breaker = None
+        if self._circuit_breakers is not None:
+            breaker = self._circuit_breakers.breaker(data)
+            if not breaker.allow():
+                yield no_response(data)
+                return
 
-    def switch(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
-        return self._send_module_base_command(module_id, channel, Command.SWITCH, broadcast, self._command_mode(module_mode))
+        cmd_class = command_class(data.command, data.format)
+        policy = self._retry_policies.get(cmd_class, NO_RETRY)
+        priority = self._priorities[cmd_class]
+
+        # breaker gets success or failure of the command, otherwise (cancellation, port error, generator is closed)
+        # the command is aborted, so half open breaker doesn't wait for the probe result forever
+        reported = False
+        throttled = False
+        try:
+            responses = []
+            for attempt in range(policy.attempts):
+                if attempt > 0:
+                    delay = policy.retry_delay(attempt - 1)
+                    remaining = deadline.remaining()
+                    if deadline.cancelled or (remaining is not None and remaining <= delay):
+                        break
+                    sleep(delay)
+
+                # each attempt is transmitted, so it is accounted separately
+                if self._duty_cycle is not None and not self._duty_cycle.acquire(data, priority, deadline):
+                    throttled = True
+                    break
+
+                responses = []
+                delivered = False
+                for response in self._adapter.stream(data, deadline, priority):
+                    if self._state_table is not None:
+                        self._state_table.on_response(response)
+                    if delivered:
+                        yield response
+                        continue
+                    responses.append(response)
+                    if not is_failed(data, responses):
+                        delivered = True
+                        if breaker is not None:
+                            breaker.on_success()
+                            reported = True
+                        for item in responses:
+                            yield item
+                if delivered:
+                    return
+
+            # The command was limited by caller or by the airtime budget, so module can't be treated as unreachable
+            if breaker is not None and not throttled and not deadline.cancelled and not deadline.expired:
+                breaker.on_failure()
+                reported = True
+            for response in responses:
+                yield response
+        finally:
+            if breaker is not None and not reported:
+                breaker.on_abort()
+
+    def _send_command(self, name: str, args: tuple, module_id: int, channel: int, broadcast: bool, module_mode: ModuleMode, timeout: Timeout) -> list:
+        """ Send module command by the controller method name and return the result of each response. """
+        return list(self._stream_command(name, args, module_id, channel, broadcast, module_mode, timeout))
+
+    def _stream_command(self, name: str, args: tuple, module_id: int, channel: int, broadcast: bool, module_mode: ModuleMode, timeout: Timeout) -> Iterator:
+        """ Send module command by the controller method name and return iterator over the results of responses. """
+        module_command = _MODULE_COMMANDS[name]
+        command, data, fmt, payload_format = module_command.encode(*args)
+        mode = self._command_mode(module_mode)
+        if module_command.config:
+            return self._stream_module_config_command(module_id, channel, command, broadcast, mode, data, fmt, timeout)
+        return self._stream_module_base_command(module_id, channel, command, broadcast, mode, data, fmt, payload_format, timeout)
+
+    def _stream_module_base_command(self, module_id, channel: int, command: Command, broadcast, mode: Mode, command_data: bytearray = None, fmt: int = None, payload_format: int = 0, timeout: Timeout = None) -> Iterator[Tuple[bool, ModuleInfo, V]]:
+        """ Send command and return iterator over (status, module info, state) which yields each response as soon as it is received. """
+        suppressor = self._suppressor
+        if suppressor is not None:
+            result = suppressor.lookup(module_id, mode, command, command_data, fmt)
+            if result is not None:
+                return iter(result)
+
+        # request is built at once, so wrong arguments are reported by the call and not by the first iteration
+        data = self._module_request(module_id, channel, command, broadcast, mode, command_data, fmt)
+        return self._stream_base_records(data, module_id, payload_format, Deadline.of(timeout))
+
+    def _stream_base_records(self, data: OutgoingData, module_id, payload_format: int, deadline: Deadline) -> Iterator[Tuple[bool, ModuleInfo, V]]:
+        suppressor = self._suppressor
+        if suppressor is None:
+            for item in self._stream(data, deadline):
+                yield decode_response(item).base(payload_format)
+            return
 
-    def brightness_tune(self, direction: Direction, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
-        if direction == Direction.UP:
-            command = Command.BRIGHT_UP
-        else:
-            command = Command.BRIGHT_DOWN
-        return self._send_module_base_command(module_id, channel, command, broadcast, self._command_mode(module_mode))
+        token = suppressor.begin(module_id, data.command)
+        records = []
+        try:
+            for item in self._stream(data, deadline):
+                record = decode_response(item)
+                records.append(record)
+                yield record.base(payload_format)
+        finally:
+            suppressor.confirm(token, data.mode, data.command, records)
+
+    def _stream_module_config_command(self, module_id, channel: int, command: Command, broadcast, mode: Mode, command_data: bytearray = None, fmt: int = None, timeout: Timeout = None) -> Iterator[Tuple[bool, V]]:
+        """ Send command and return iterator over (status, config) which yields each response as soon as it is received. """
+        data = self._module_request(module_id, channel, command, broadcast, mode, command_data, fmt)
+        return self._stream_config_records(data, fmt, Deadline.of(timeout))
+
+    def _stream_config_records(self, data: OutgoingData, fmt: int, deadline: Deadline) -> Iterator[Tuple[bool, V]]:
+        for item in self._stream(data, deadline):
+            yield decode_response(item).config(fmt)
+
+    def _send_memory_action(self, action: Action, mode: Mode, channel: int, module_id: int = 0, data: bytearray = None, timeout: Timeout = None) -> bool:
+        request = OutgoingData()
+        request.mode = mode
+        request.action = action
+        request.channel = channel
+        request.id = module_id
+        if data is not None:
+            request.data = data
+
+        # Memory actions are not transmitted, so they are neither retried nor counted by circuit breakers
+        priority = self._priorities[CommandClass.SERVICE]
+        if mode == Mode.TX or mode == Mode.TX_F:
+            return not is_failed(request, self._adapter.send(request, timeout, priority))
+
+        # Receiver requests are not answered as commands (results come as incoming events), so they are only written
+        with self._adapter.session(priority, timeout) as session:
+            if session is None:
+                return False
+            try:
+                session.write(request)
+            except SerialException as err:
+                _LOGGER.error("Request is not sent: {0}".format(err))
+                return False
+            sleep(_RECEIVER_ACTION_DELAY)
+        return True
+
+    # Commands
+    def off(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
+        return self._send_command("off", (), module_id, channel, broadcast, module_mode, timeout)
 
-    def brightness_tune_back(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
-        return self._send_module_base_command(module_id, channel, Command.BRIGHT_BACK, broadcast, self._command_mode(module_mode))
+    def on(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
+        return self._send_command("on", (), module_id, channel, broadcast, module_mode, timeout)
 
-    def brightness_tune_stop(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
-        return self._send_module_base_command(module_id, channel, Command.STOP_BRIGHT, broadcast, self._command_mode(module_mode))
+    def temporary_on(self, duration: int, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
+        return self._send_command("temporary_on", (duration,), module_id, channel, broadcast, module_mode, timeout)
 
-    def brightness_tune_custom(self, direction: Direction, speed: float, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
-        if speed >= 1:
-            value = 127
-        elif speed <= 0:
-            value = 0
-        else:
-            value = int((speed * 127) + 0.5)
+    def set_temporary_on_mode(self, enabled: bool, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
+        return self._send_command("set_temporary_on_mode", (enabled,), module_id, channel, broadcast, module_mode, timeout)
 
-        if direction == Direction.DOWN:
-            value = -value - 1
+    def switch(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
+        return self._send_command("switch", (), module_id, channel, broadcast, module_mode, timeout)
 
-        data = bytearray(1)
-        data[0] = value & 0xFF
+    def brightness_tune(self, direction: Direction, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
+        return self._send_command("brightness_tune", (direction,), module_id, channel, broadcast, module_mode, timeout)
 
-        return self._send_module_base_command(module_id, channel, Command.BRIGHT_REG, broadcast, self._command_mode(module_mode), data, 1)
+    def brightness_tune_back(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
+        return self._send_command("brightness_tune_back", (), module_id, channel, broadcast, module_mode, timeout)
 
-    def brightness_tune_step(self, direction: Direction, step: int = None, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
-        data = None
-        fmt = None
+    def brightness_tune_stop(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
+        return self._send_command("brightness_tune_stop", (), module_id, channel, broadcast, module_mode, timeout)
 
-        if step is not None:
-            fmt = 1
-            data = bytearray(1)
-            data[0] = step
+    def brightness_tune_custom(self, direction: Direction, speed: float, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
+        return self._send_command("brightness_tune_custom", (direction, speed), module_id, channel, broadcast, module_mode, timeout)
 
-        if direction == Direction.UP:
-            command = Command.BRIGHT_STEP_UP
-        else:
-            command = Command.BRIGHT_STEP_DOWN
+    def brightness_tune_step(self, direction: Direction, step: int = None, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
+        return self._send_command("brightness_tune_step", (direction, step), module_id, channel, broadcast, module_mode, timeout)
 
-        return self._send_module_base_command(module_id, channel, command, broadcast, self._command_mode(module_mode), data, fmt)
+    def set_brightness(self, brightness: float, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
+        return self._send_command("set_brightness", (brightness,), module_id, channel, broadcast, module_mode, timeout)
 
-    def set_brightness(self, brightness: float, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
-        if brightness >= 1:
-            value = 155
-        elif brightness <= 0:
-            value = 0
-        else:
-            value = 35 + int((120 * brightness) + 0.5)
+    def roll_rgb_color(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
+        return self._send_command("roll_rgb_color", (), module_id, channel, broadcast, module_mode, timeout)
 
-        data = bytearray(1)
-        data[0] = value
+    def switch_rgb_color(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
+        return self._send_command("switch_rgb_color", (), module_id, channel, broadcast, module_mode, timeout)
 
-        return self._send_module_base_command(module_id, channel, Command.SET_BRIGHTNESS, broadcast, self._command_mode(module_mode), data, 1)
+    def switch_rgb_mode(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
+        return self._send_command("switch_rgb_mode", (), module_id, channel, broadcast, module_mode, timeout)
 
-    def roll_rgb_color(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
-        return self._send_module_base_command(module_id, channel, Command.ROLL_COLOR, broadcast, self._command_mode(module_mode))
+    def switch_rgb_mode_speed(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
+        return self._send_command("switch_rgb_mode_speed", (), module_id, channel, broadcast, module_mode, timeout)
 
-    def switch_rgb_color(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
-        return self._send_module_base_command(module_id, channel, Command.SWITCH_COLOR, broadcast, self._command_mode(module_mode))
+    def set_rgb_brightness(self, red: float, green: float, blue: float, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
+        return self._send_command("set_rgb_brightness", (red, green, blue), module_id, channel, broadcast, module_mode, timeout)
 
-    def switch_rgb_mode(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
-        return self._send_module_base_command(module_id, channel, Command.SWITCH_MODE, broadcast, self._command_mode(module_mode))
+    def load_preset(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
+        return self._send_command("load_preset", (), module_id, channel, broadcast, module_mode, timeout)
 
-    def switch_rgb_mode_speed(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
-        return self._send_module_base_command(module_id, channel, Command.SPEED_MODE, broadcast, self._command_mode(module_mode))
+    def save_preset(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
+        return self._send_command("save_preset", (), module_id, channel, broadcast, module_mode, timeout)
 
-    def set_rgb_brightness(self, red: float, green: float, blue: float, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
-        data = bytearray(3)
-        data[0] = self._convert_brightness(red)
-        data[1] = self._convert_brightness(green)
-        data[2] = self._convert_brightness(blue)
-        return self._send_module_base_command(module_id, channel, Command.SET_BRIGHTNESS, broadcast, self._command_mode(module_mode), data, 3)
+    def read_state(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
+        return self._send_command("read_state", (), module_id, channel, broadcast, module_mode, timeout)
 
-    def load_preset(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
-        return self._send_module_base_command(module_id, channel, Command.LOAD_PRESET, broadcast, self._command_mode(module_mode))
+    def read_extra_state(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseExtraInfo]:
+        return self._send_command("read_extra_state", (), module_id, channel, broadcast, module_mode, timeout)
 
-    def save_preset(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
-        return self._send_module_base_command(module_id, channel, Command.SAVE_PRESET, broadcast, self._command_mode(module_mode))
+    def read_channels_state(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseChannelsInfo]:
+        return self._send_command("read_channels_state", (), module_id, channel, broadcast, module_mode, timeout)
 
-    def read_state(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
-        return self._send_module_base_command(module_id, channel, Command.READ_STATE, broadcast, self._command_mode(module_mode))
+    def read_state_iter(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> Iterator[ResponseBaseInfo]:
+        """ Same as read_state, but yields the response of each module as soon as it is received.
 
-    def read_extra_state(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseExtraInfo]:
-        return self._send_module_base_command(module_id, channel, Command.READ_STATE, broadcast, self._command_mode(module_mode), fmt=1, parser=ModuleExtraStateInfoParser())
+        Adapter is not available for other commands until iteration is over, so responses should not be processed
+        for long. Iteration can be stopped early by close(), remaining responses are dropped. Iterator which is not
+        exhausted or closed holds the adapter until it is garbage collected, so use contextlib.closing when the loop
+        can be left by break or exception.
+        """
+        return self._stream_command("read_state", (), module_id, channel, broadcast, module_mode, timeout)
 
-    def read_channels_state(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseChannelsInfo]:
-        return self._send_module_base_command(module_id, channel, Command.READ_STATE, broadcast, self._command_mode(module_mode), fmt=2, parser=ModuleChannelsInfoParser())
+    def read_extra_state_iter(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> Iterator[ResponseExtraInfo]:
+        """ Same as read_extra_state, but yields the response of each module as soon as it is received. """
+        return self._stream_command("read_extra_state", (), module_id, channel, broadcast, module_mode, timeout)
 
-    def read_module_config(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseModuleConfig]:
-        return self._send_module_config_command(module_id, channel, Command.READ_STATE, broadcast, self._command_mode(module_mode), fmt=16, parser=ModuleConfigurationParser())
+    def read_channels_state_iter(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> Iterator[ResponseChannelsInfo]:
+        """ Same as read_channels_state, but yields the response of each module as soon as it is received. """
+        return self._stream_command("read_channels_state", (), module_id, channel, broadcast, module_mode, timeout)
 
-    def write_module_config(self, config: ModuleConfig, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseModuleConfig]:
-        data = bytearray(4)
+    def command_iter(self, method: str, *args, **kwargs) -> Iterator:
+        """ Call module command by the name of its method (e.g. "on" or "read_module_config") and return iterator which
+        yields the result of each response as soon as it is received, like read_state_iter.
 
-        save_state_mode = config.save_state_mode
-        if save_state_mode is not None:
-            data[2] = data[2] | 0x01
-            if save_state_mode:
-                data[0] = data[0] | 0x01
+        :raises ValueError: if the method is not a module command, e.g. adapter memory action.
+        """
+        if method not in _MODULE_COMMANDS:
+            raise ValueError("Method {0} is not a module command".format(method))
+        # arguments are bound to the signature of the controller method, so they are checked in the same way as by the call
+        arguments = inspect.signature(getattr(MTRF64Controller, method)).bind(self, *args, **kwargs)
+        arguments.apply_defaults()
+        values = arguments.arguments
+        address = [values.pop(name) for name in _ADDRESS_ARGUMENTS]
+        del values["self"]
+        return self._stream_command(method, tuple(values.values()), *address)
 
-        dimmer_mode = config.dimmer_mode
-        if dimmer_mode is not None:
-            data[2] = data[2] | 0x02
-            if dimmer_mode:
-                data[0] = data[0] | 0x02
+    def command_aiter(self, method: str, *args, **kwargs) -> AsyncResponseIterator:
+        """ Async variant of command_iter. """
+        return AsyncResponseIterator(self.command_iter(method, *args, **kwargs))
 
-        noolite_support = config.noolite_support
-        if noolite_support is not None:
-            data[2] = data[2] | 0x04
-            if noolite_support:
-                data[0] = data[0] | 0x04
+    def read_state_aiter(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> AsyncResponseIterator:
+        """ Async variant of read_state_iter. """
+        return AsyncResponseIterator(self.read_state_iter(module_id, channel, broadcast, module_mode, timeout))
 
-        input_mode = config.input_mode
-        if input_mode is not None:
-            data[2] = data[2] | 0x18
-            if input_mode == InputMode.SWITCH:
-                pass
-            elif input_mode == InputMode.BUTTON:
-                data[0] = data[0] | 0x08
-            elif input_mode == InputMode.BREAKER:
-                data[0] = data[0] | 0x10
-            elif input_mode == InputMode.DISABLED:
-                data[0] = data[0] | 0x18
+    def read_extra_state_aiter(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> AsyncResponseIterator:
+        """ Async variant of read_extra_state_iter. """
+        return AsyncResponseIterator(self.read_extra_state_iter(module_id, channel, broadcast, module_mode, timeout))
 
-        init_state = config.init_state
-        if init_state is not None:
-            data[2] = data[2] | 0x20
-            if init_state:
-                data[0] = data[0] | 0x20
+    def read_channels_state_aiter(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> AsyncResponseIterator:
+        """ Async variant of read_channels_state_iter. """
+        return AsyncResponseIterator(self.read_channels_state_iter(module_id, channel, broadcast, module_mode, timeout))
 
-        noolite_retranslation = config.noolite_retranslation
-        if noolite_retranslation is not None:
-            data[2] = data[2] | 0x40
-            if noolite_retranslation:
-                data[0] = data[0] | 0x40
+    def read_module_config(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseModuleConfig]:
+        return self._send_command("read_module_config", (), module_id, channel, broadcast, module_mode, timeout)
 
-        return self._send_module_config_command(module_id, channel, Command.WRITE_STATE, broadcast, self._command_mode(module_mode), data, fmt=16, parser=ModuleConfigurationParser())
+    def write_module_config(self, config: ModuleConfig, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseModuleConfig]:
+        return self._send_command("write_module_config", (config,), module_id, channel, broadcast, module_mode, timeout)
 
-    def read_dimmer_correction(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseDimmerCorrectionConfig]:
-        return self._send_module_config_command(module_id, channel, Command.READ_STATE, broadcast, self._command_mode(module_mode), fmt=17, parser=BrightnessConfigurationParser())
+    def read_dimmer_correction(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseDimmerCorrectionConfig]:
+        return self._send_command("read_dimmer_correction", (), module_id, channel, broadcast, module_mode, timeout)
 
-    def write_dimmer_correction(self, config: DimmerCorrectionConfig, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseDimmerCorrectionConfig]:
-        data = bytearray(4)
+    def write_dimmer_correction(self, config: DimmerCorrectionConfig, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseDimmerCorrectionConfig]:
+        return self._send_command("write_dimmer_correction", (config,), module_id, channel, broadcast, module_mode, timeout)
 
-        data[0] = self._convert_brightness(config.max_level)
-        data[1] = self._convert_brightness(config.min_level)
-        data[2] = 0xFF
-        data[3] = 0xFF
+    def bind(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
+        return self._send_command("bind", (), module_id, channel, broadcast, module_mode, timeout)
 
-        return self._send_module_config_command(module_id, channel, Command.WRITE_STATE, broadcast, self._command_mode(module_mode), data, fmt=17, parser=BrightnessConfigurationParser())
+    def unbind(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
+        return self._send_command("unbind", (), module_id, channel, broadcast, module_mode, timeout)
 
-    def bind(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
-        return self._send_module_base_command(module_id, channel, Command.BIND, broadcast, self._command_mode(module_mode))
+    def set_service_mode(self, state: bool, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
+        return self._send_command("set_service_mode", (state,), module_id, channel, broadcast, module_mode, timeout)
 
-    def unbind(self, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
-        return self._send_module_base_command(module_id, channel, Command.UNBIND, broadcast, self._command_mode(module_mode))
+    # Adapter memory
+    def bind_mode_on(self, channel: int, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> bool:
+        """ Start binding of the remote control or sensor to the adapter channel. Adapter binds the first transmitter which
+        sends the bind command (e.g. service button of the sensor is pressed) and reports it by incoming event with
+        BIND_SUCCESS status.
 
-    def set_service_mode(self, state: bool, module_id: int = None, channel: int = None, broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
-        data = bytearray(1)
-        if state:
-            data[0] = 1
-        return self._send_module_base_command(module_id, channel, Command.SERVICE, broadcast, self._command_mode(module_mode), data)
+        :return: True if request is written to the adapter.
+        """
+        return self._send_memory_action(Action.BIND_MODE_ON, self._receiver_mode_map[module_mode], channel, timeout=timeout)
 
-    def add_listener(self, channel: int, listener: NooLiteFListener):
-        listeners = self._listener_map.get(channel, [])
-        listeners.append(listener)
-        self._listener_map[channel] = listeners
+    def bind_mode_off(self, channel: int, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> bool:
+        """ Stop binding to the adapter channel without waiting for the transmitter. """
+        return self._send_memory_action(Action.BIND_MODE_OFF, self._receiver_mode_map[module_mode], channel, timeout=timeout)
+
+    def unbind_address(self, module_id: int, channel: int, timeout: Timeout = None) -> bool:
+        """ Remove one NooLite-F transmitter from the adapter channel, other transmitters of the channel stay bound.
+
+        :return: True if request is written to the adapter. Adapter doesn't answer receiver requests, so the result is not confirmed.
+        """
+        return self._send_memory_action(Action.UNBIND_ADDRESS_FROM_CHANNEL, Mode.RX_F, channel, module_id, timeout=timeout)
+
+    def clear_channel(self, channel: int, module_mode: ModuleMode = ModuleMode.NOOLITE_F, receiver: bool = True, timeout: Timeout = None) -> bool:
+        """ Remove all bindings of the channel from the adapter memory.
+
+        :param receiver: clear bindings of remote controls and sensors if True, otherwise bindings of modules.
+        :return: True if request is accepted by the adapter. Adapter doesn't answer receiver requests, so for remote controls
+        and sensors True means that request is written to the adapter.
+        """
+        mode = self._receiver_mode_map[module_mode] if receiver else self._command_mode(module_mode)
+        return self._send_memory_action(Action.CLEAR_CHANNEL, mode, channel, timeout=timeout)
+
+    def clear_memory(self, module_mode: ModuleMode = ModuleMode.NOOLITE_F, receiver: bool = True, timeout: Timeout = None) -> bool:
+        """ Remove bindings of all channels from the adapter memory.
+
+        :param receiver: clear bindings of remote controls and sensors if True, otherwise bindings of modules.
+        :return: True if request is accepted by the adapter. Adapter doesn't answer receiver requests, so for remote controls
+        and sensors True means that request is written to the adapter.
+        """
+        mode = self._receiver_mode_map[module_mode] if receiver else self._command_mode(module_mode)
+        return self._send_memory_action(Action.CLEAR_MEMORY, mode, 0, data=_CLEAR_MEMORY_KEY, timeout=timeout)
+
+    def add_listener(self, channel: int, listener: NooLiteFListener, commands: List[Command] = None):
+        """ Add the remote controls listener to channel.
+
+        :param channel: channel to which the listener will be assigned or None to assign listener to all channels.
+        :param listener: listener
+        :param commands: commands which listener receives. If None then listener receives commands handled by methods it overrides or callbacks assigned to it.
+        """
+        self._listeners.add(channel, listener, commands)
 
     def remove_listener(self, channel: int, listener: NooLiteFListener):
-        listeners = self._listener_map.get(channel, [])
-        listeners.remove(listener)
-        if len(listeners) == 0:
-            listeners = None
-        self._listener_map[channel] = listeners
+        self._listeners.remove(channel, listener)
+
+    def add_event_sink(self, sink):
+        """ Add the sink which receives all incoming events (from all channels) that passed the event filter.
+
+        :param sink: callable which accepts IncomingData, for example EventStore.
+        """
+        self._event_sinks = self._event_sinks + [sink]
+
+    def remove_event_sink(self, sink):
+        self._event_sinks = [item for item in self._event_sinks if item is not sink]
+
+    # Connection
+    def _remember_module(self, module_id: int, channel: int):
+        key = (module_id, channel)
+        with self._recent_lock:
+            self._recent_modules.pop(key, None)
+            self._recent_modules[key] = monotonic()
+            while len(self._recent_modules) > _RESYNC_LIMIT:
+                self._recent_modules.popitem(last=False)
+
+    def _on_connection_change(self, connected: bool):
+        # Called from adapter reader thread, so commands are sent from the separate thread
+        if connected:
+            thread = Thread(target=self._resync)
+            thread.daemon = True
+            thread.start()
+        else:
+            if self._suppressor is not None:
+                self._suppressor.invalidate()
+            self._notify_connection(False, {})
+
+    def _resync(self):
+        since = monotonic() - self._resync_window
+        with self._recent_lock:
+            modules = [key for key, commanded_at in self._recent_modules.items() if commanded_at >= since]
+
+        states = OrderedDict()
+        for module_id, channel in modules:
+            if self._adapter is None:
+                return
+            states[(module_id, channel)] = self.read_state(module_id, channel)
+        self._notify_connection(True, states)
+
+    def _notify_connection(self, connected: bool, states: dict):
+        for listener in self._connection_listeners:
+            try:
+                listener(connected, states)
+            except Exception as err:
+                _LOGGER.error("Connection listener error: {0}".format(err))
 
     # Listeners
-    def _on_receive(self, incoming_data: IncomingData):
-        listeners = self._listener_map.get(incoming_data.channel, None)
+    def _accept_incoming(self, incoming_data: IncomingData) -> bool:
+        # Called from adapter reader thread, packets that nobody is interested in are dropped before queueing
+        if self._suppressor is not None:
+            self._suppressor.on_incoming(incoming_data)
+        if self._state_table is not None:
+            self._state_table.on_incoming(incoming_data)
+        return len(self._event_sinks) > 0 or self._listeners.is_subscribed(incoming_data.channel, incoming_data.command)
 
-        if listeners is None:
+    def _on_receive(self, incoming_data: IncomingData):
+        if self._event_filter is not None and not self._event_filter.accept(incoming_data):
             return
 
-        for listener in listeners:
-            if listener is None:
-                return
+        for sink in self._event_sinks:
+            sink(incoming_data)
 
+        for listener in self._listeners.listeners(incoming_data.channel, incoming_data.command):
             if incoming_data.command == Command.ON:
                 listener.on_on()
             elif incoming_data.command == Command.OFF:
@@ -440,12 +850,7 @@ class MTRF64Controller(NooLiteFController):
             elif incoming_data.command == Command.SWITCH:
                 listener.on_switch()
             elif incoming_data.command == Command.TEMPORARY_ON:
-                delay = None
-                if incoming_data.format == 5:
-                    delay = incoming_data.data[0]
-                elif incoming_data.format == 6:
-                    delay = incoming_data.data[0] + (incoming_data.data[1] << 15)
-                listener.on_temporary_on(delay)
+                listener.on_temporary_on(decode_temporary_on(incoming_data))
             elif incoming_data.command == Command.BRIGHT_UP:
                 listener.on_brightness_tune(Direction.UP)
             elif incoming_data.command == Command.BRIGHT_DOWN:
@@ -468,17 +873,10 @@ class MTRF64Controller(NooLiteFController):
                 listener.on_brightness_tune_stop()
             elif incoming_data.command == Command.SET_BRIGHTNESS:
                 if incoming_data.format == 3:
-                    red = incoming_data.data[0] / 255
-                    green = incoming_data.data[1] / 255
-                    blue = incoming_data.data[2] / 255
+                    red, green, blue = decode_rgb_brightness(incoming_data)
                     listener.on_set_rgb_brightness(red, green, blue)
                 elif incoming_data.format == 1:
-                    level = (incoming_data.data[0] - 35) / 120
-                    if level < 0:
-                        level = 0
-                    elif level > 1:
-                        level = 1
-                    listener.on_set_brightness(level)
+                    listener.on_set_brightness(decode_brightness(incoming_data))
             elif incoming_data.command == Command.LOAD_PRESET:
                 listener.on_load_preset()
             elif incoming_data.command == Command.SAVE_PRESET:
@@ -500,31 +898,9 @@ class MTRF64Controller(NooLiteFController):
                     speed = (incoming_data.data[0] & 0x7F) / 127
                     listener.on_brightness_tune_custom(direction, speed)
             elif incoming_data.command == Command.SENS_TEMP_HUMI:
-                # really from PT111 I get fmt = 7, but in specs is specify that fmt should be 3
-
-                if incoming_data.format == 7:
-
-                    battery_bit = (incoming_data.data[1] & 0x80) >> 7
-                    if battery_bit:
-                        battery = BatteryState.LOW
-                    else:
-                        battery = BatteryState.OK
-
-                    temp_low = incoming_data.data[0]
-                    temp_hi = incoming_data.data[1] & 0x0F
-                    temp = (temp_hi << 8) + temp_low
-                    if temp > 0x0800:
-                        temp = -(0x1000 - temp)
-                    temp = temp / 10
-
-                    device_type = (incoming_data.data[1] & 0x70) >> 4
-                    if device_type == 2:
-                        humi = incoming_data.data[2]
-                    else:
-                        humi = None
-
-                    analog = incoming_data.data[3] / 255
-
+                values = decode_temp_humi(incoming_data)
+                if values is not None:
+                    temp, humi, battery, analog = values
                     listener.on_temp_humi(temp, humi, battery, analog)
             elif incoming_data.command == Command.BATTERY_LOW:
                 listener.on_battery_low()
@@ -0,0 +1,174 @@
+from typing import Tuple
+
+from NooLite_F import BatteryState, ModuleInfo, ModuleBaseStateInfo, ModuleExtraStateInfo, ModuleChannelsStateInfo, ModuleConfig, DimmerCorrectionConfig
+from NooLite_F import ModuleState, ServiceModeState, NooliteModeState, InputMode
+from NooLite_F.MTRF64.MTRF64Adapter import IncomingData, Command, ResponseCode
+
+
+TempHumiData = Tuple[float, int, BatteryState, float]
+
+
+def decode_temp_humi(data: IncomingData) -> TempHumiData:
+    """ Decode temperature/humidity sensor data.
+
+    :return: (temp, humi, battery, analog) or None if data format is not supported.
+    """
+    # really from PT111 I get fmt = 7, but in specs is specify that fmt should be 3
+    if data.command != Command.SENS_TEMP_HUMI or data.format != 7:
+        return None
+
+    battery_bit = (data.data[1] & 0x80) >> 7
+    if battery_bit:
+        battery = BatteryState.LOW
+    else:
+        battery = BatteryState.OK
+
+    temp_low = data.data[0]
+    temp_hi = data.data[1] & 0x0F
+    temp = (temp_hi << 8) + temp_low
+    if temp > 0x0800:
+        temp = -(0x1000 - temp)
+    temp = temp / 10
+
+    device_type = (data.data[1] & 0x70) >> 4
+    if device_type == 2:
+        humi = data.data[2]
+    else:
+        humi = None
+
+    analog = data.data[3] / 255
+
+    return temp, humi, battery, analog
+
+
+def decode_temporary_on(data: IncomingData) -> int:
+    """ Decode duration of temporary on command (in 5 sec units) or None if it is not specified. """
+    duration = None
+    if data.format == 5:
+        duration = data.data[0]
+    elif data.format == 6:
+        duration = data.data[0] + (data.data[1] << 15)
+    return duration
+
+
+def decode_brightness(data: IncomingData) -> float:
+    """ Decode brightness level of set brightness command (format 1). """
+    level = (data.data[0] - 35) / 120
+    if level < 0:
+        level = 0
+    elif level > 1:
+        level = 1
+    return level
+
+
+def decode_rgb_brightness(data: IncomingData) -> Tuple[float, float, float]:
+    """ Decode brightness of each color of set brightness command (format 3). """
+    return data.data[0] / 255, data.data[1] / 255, data.data[2] / 255
+
+
+class ResponseRecord(object):
+    """ Decoded module response: status, module info and payload (state or config depending on response format). """
+
+    __slots__ = ("status", "format", "info", "payload")
+
+    def __init__(self, status: bool, fmt: int, info: ModuleInfo, payload):
+        self.status = status
+        self.format = fmt
+        self.info = info
+        self.payload = payload
+
+    def base(self, fmt: int = 0) -> tuple:
+        """ Returns (status, module info, state) view. State is None if response has other format than expected. """
+        return self.status, self.info, self.payload if self.format == fmt else None
+
+    def config(self, fmt: int = 16) -> tuple:
+        """ Returns (status, config) view. Config is None if response has other format than expected. """
+        return self.status, self.payload if self.format == fmt else None
+
+    def __repr__(self):
+        return "<ResponseRecord (0x{0:x}), status: {1}, format: {2}, info: {3}, payload: {4}>" \
+            .format(id(self), self.status, self.format, self.info, self.payload)
+
+
+_MODULE_STATES = (ModuleState.OFF, ModuleState.ON, ModuleState.TEMPORARY_ON)
+_INPUT_MODES = (InputMode.SWITCH, InputMode.BUTTON, InputMode.BREAKER, InputMode.DISABLED)
+
+
+def _module_info(data: IncomingData) -> ModuleInfo:
+    info = ModuleInfo()
+    info.type = data.data[0]
+    info.firmware = data.data[1]
+    info.id = data.id
+    return info
+
+
+def _decode_base_state(data: IncomingData) -> Tuple[ModuleInfo, ModuleBaseStateInfo]:
+    state = ModuleBaseStateInfo()
+    value = data.data[2]
+    if value < len(_MODULE_STATES):
+        state.state = _MODULE_STATES[value]
+    state.service_mode = ServiceModeState.BIND_ON if value & 0x80 else ServiceModeState.BIND_OFF
+    state.brightness = data.data[3] / 255
+    return _module_info(data), state
+
+
+def _decode_extra_state(data: IncomingData) -> Tuple[ModuleInfo, ModuleExtraStateInfo]:
+    state = ModuleExtraStateInfo()
+    state.extra_input_state = data.data[2] > 0
+    if data.data[3] & 0x02:
+        state.noolite_mode_state = NooliteModeState.DISABLED
+    elif data.data[3] & 0x01:
+        state.noolite_mode_state = NooliteModeState.TEMPORARY_DISABLED
+    else:
+        state.noolite_mode_state = NooliteModeState.ENABLED
+    return _module_info(data), state
+
+
+def _decode_channels_state(data: IncomingData) -> Tuple[ModuleInfo, ModuleChannelsStateInfo]:
+    state = ModuleChannelsStateInfo()
+    state.noolite_cells = data.data[2]
+    state.noolite_f_cells = data.data[3]
+    return _module_info(data), state
+
+
+def _decode_module_config(data: IncomingData) -> Tuple[None, ModuleConfig]:
+    value = data.data[0]
+    config = ModuleConfig()
+    config.save_state_mode = bool(value & 0x01)
+    config.dimmer_mode = bool(value & 0x02)
+    config.noolite_support = bool(value & 0x04)
+    config.init_state = bool(value & 0x20)
+    config.noolite_retranslation = bool(value & 0x40)
+    config.input_mode = _INPUT_MODES[(value & 0x18) >> 3]
+    return None, config
+
+
+def _decode_dimmer_correction(data: IncomingData) -> Tuple[None, DimmerCorrectionConfig]:
+    config = DimmerCorrectionConfig()
+    config.max_level = data.data[0] / 255
+    config.min_level = data.data[1] / 255
+    return None, config
+
+
+def _response_key(command: int, fmt: int) -> int:
+    return (command << 8) | fmt
+
+
+# Response decoders keyed by (command, format), the pair is packed into int to avoid tuple creation per frame
+RESPONSE_DECODERS = {
+    _response_key(Command.SEND_STATE, 0): _decode_base_state,
+    _response_key(Command.SEND_STATE, 1): _decode_extra_state,
+    _response_key(Command.SEND_STATE, 2): _decode_channels_state,
+    _response_key(Command.SEND_STATE, 16): _decode_module_config,
+    _response_key(Command.SEND_STATE, 17): _decode_dimmer_correction,
+}
+
+
+def decode_response(data: IncomingData) -> ResponseRecord:
+    """ Decode module response in one pass. Module info and payload are None if response has no them. """
+    status = data.status == ResponseCode.SUCCESS or data.status == ResponseCode.BIND_SUCCESS
+    decoder = RESPONSE_DECODERS.get((data.command << 8) | data.format)
+    if decoder is None:
+        return ResponseRecord(status, data.format, None, None)
+    info, payload = decoder(data)
+    return ResponseRecord(status, data.format, info, payload)
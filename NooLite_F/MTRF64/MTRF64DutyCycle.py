@@ -0,0 +1,249 @@
+from bisect import bisect_left, insort
+from threading import Lock
+from time import monotonic, sleep
+from typing import Iterable
+
+from NooLite_F.NooLiteFController import Deadline
+from NooLite_F.MTRF64.MTRF64Adapter import OutgoingData, Mode, Action
+from NooLite_F.MTRF64.MTRF64Scheduler import Priority
+
+
+# Actions which change adapter memory only, nothing is transmitted
+_LOCAL_ACTIONS = frozenset([
+    Action.READ_RESPONSE, Action.BIND_MODE_ON, Action.BIND_MODE_OFF, Action.CLEAR_CHANNEL, Action.CLEAR_MEMORY,
+    Action.UNBIND_ADDRESS_FROM_CHANNEL,
+])
+
+
+class AirtimeModel(object):
+    """ Estimates on-air time of the request in seconds. Default values are rough estimates for MTRF-64, measure them
+    for the actual band and firmware when precise accounting is required.
+    """
+
+    def __init__(self, noolite_frame: float = 0.04, noolite_repeats: int = 2, noolite_f_frame: float = 0.012,
+                 broadcast_repeats: int = 2):
+        """
+        :param noolite_frame: on-air time of one NooLite (legacy TX mode) frame.
+        :param noolite_repeats: number of additional NooLite frame transmissions (NooLite modules don't acknowledge commands).
+        :param noolite_f_frame: on-air time of one NooLite-F frame.
+        :param broadcast_repeats: number of additional transmissions of NooLite-F broadcast frame.
+        """
+        self.noolite_frame = noolite_frame
+        self.noolite_repeats = noolite_repeats
+        self.noolite_f_frame = noolite_f_frame
+        self.broadcast_repeats = broadcast_repeats
+
+    def airtime(self, data: OutgoingData) -> float:
+        if data.action in _LOCAL_ACTIONS:
+            return 0.0
+        if data.mode == Mode.TX:
+            return self.noolite_frame * (1 + self.noolite_repeats)
+        if data.mode == Mode.TX_F:
+            if data.action == Action.SEND_BROADCAST_COMMAND:
+                return self.noolite_f_frame * (1 + self.broadcast_repeats)
+            return self.noolite_f_frame
+        # service and firmware update requests are processed by adapter itself
+        return 0.0
+
+    def __repr__(self):
+        return "<AirtimeModel (0x{0:x}), noolite frame: {1}, noolite repeats: {2}, noolite-f frame: {3}, broadcast repeats: {4}>" \
+            .format(id(self), self.noolite_frame, self.noolite_repeats, self.noolite_f_frame, self.broadcast_repeats)
+
+
+class AirtimeStats(object):
+    utilisation = 0.0
+    channels = {}
+    airtime = 0.0
+    requests = 0
+    delayed = 0
+    total_delay = 0.0
+    dropped = 0
+
+    def copy(self) -> 'AirtimeStats':
+        stats = AirtimeStats()
+        stats.__dict__.update(self.__dict__)
+        stats.channels = dict(self.channels)
+        return stats
+
+    def __repr__(self):
+        return "<AirtimeStats (0x{0:x}), utilisation: {1:.4f}, airtime: {2:.3f}, requests: {3}, delayed: {4}, total delay: {5:.3f}, dropped: {6}>" \
+            .format(id(self), self.utilisation, self.airtime, self.requests, self.delayed, self.total_delay, self.dropped)
+
+
+class DutyCycleGovernor(object):
+    """ Keeps the radio duty cycle of the adapter within the budget.
+
+    Two limits are applied to each request:
+
+    * pacing: non urgent requests are spaced so that the average duty cycle does not exceed the budget, i.e. after
+      the request with airtime A the next one is sent not earlier than A / budget later. Urgent requests are not paced,
+      but they move the pacing clock, so the following non urgent traffic yields to them;
+    * rolling window: total airtime within the window never exceeds budget * window, all requests wait for it.
+
+    The same limits with channel budget are applied to each channel, so one channel can't be flooded. Requests to
+    module id without channel are accounted in the global budget only.
+    """
+
+    def __init__(self, budget: float = 0.1, channel_budget: float = None, window: float = 3600.0, model: AirtimeModel = None,
+                 urgent: Iterable[Priority] = (Priority.INTERACTIVE,)):
+        """
+        :param budget: allowed part of time the adapter transmits, e.g. 0.1 for 10% duty cycle.
+        :param channel_budget: allowed part of time the adapter transmits to one channel. If None, budget is used.
+        :param window: length of the rolling window in seconds.
+        :param model: airtime estimation model. If None, default model is used.
+        :param urgent: priorities of requests which are not paced.
+        """
+        if budget <= 0 or budget > 1:
+            raise ValueError("Budget should be in (0, 1]: {0}".format(budget))
+        self._budget = budget
+        self._channel_budget = channel_budget if channel_budget is not None else budget
+        self._window = window
+        self._model = model if model is not None else AirtimeModel()
+        self._urgent = frozenset(urgent)
+        self._lock = Lock()
+        # pacing clocks: None for the global budget and channel number for channels
+        self._next_free = {}
+        # rolling window of the global budget (None) and of each channel: sorted list of (start time, sequence number,
+        # airtime) and the running sum of airtime in the list
+        self._history = {}
+        self._totals = {}
+        self._sequence = 0
+        self._stats = AirtimeStats()
+
+    def acquire(self, data: OutgoingData, priority: Priority = Priority.NORMAL, deadline: Deadline = None) -> bool:
+        """ Wait until the request can be transmitted within the budget.
+
+        :return: False if deadline is over or cancelled before the request can be transmitted. The reservation of
+        the request is returned to the budget in this case.
+        """
+        if deadline is None:
+            deadline = Deadline()
+
+        airtime = self._model.airtime(data)
+        if airtime <= 0:
+            return True
+        channel = None if data.action == Action.SEND_COMMAND_TO_ID else data.channel
+        keys = (None,) if channel is None else (None, channel)
+
+        with self._lock:
+            now = monotonic()
+            self._expire(now)
+            start = self._window_start(now, airtime, None, self._budget)
+            if channel is not None:
+                start = max(start, self._window_start(now, airtime, channel, self._channel_budget))
+            if priority not in self._urgent:
+                start = max(start, self._next_free.get(None, now))
+                if channel is not None:
+                    start = max(start, self._next_free.get(channel, now))
+
+            delay = start - now
+            remaining = deadline.remaining()
+            if deadline.cancelled or (remaining is not None and remaining < delay):
+                self._stats.dropped += 1
+                return False
+
+            self._sequence += 1
+            item = (start, self._sequence, airtime)
+            clocks = [self._reserve(start, airtime, key, self._budget if key is None else self._channel_budget) for key in keys]
+            for key in keys:
+                insort(self._history.setdefault(key, []), item)
+                self._totals[key] = self._totals.get(key, 0.0) + airtime
+            self._stats.requests += 1
+            self._stats.airtime += airtime
+            if delay > 0:
+                self._stats.delayed += 1
+                self._stats.total_delay += delay
+
+        wait = delay
+        while wait > 0:
+            if deadline.cancelled or deadline.expired:
+                self._cancel(item, keys, clocks, delay)
+                return False
+            sleep(min(wait, 0.05))
+            wait = start - monotonic()
+        return True
+
+    def utilisation(self, channel: int = None) -> float:
+        """ Returns part of the rolling window used for transmission globally or to the channel. """
+        with self._lock:
+            now = monotonic()
+            self._expire(now)
+            return self._used(now, channel) / self._window
+
+    def stats(self) -> AirtimeStats:
+        with self._lock:
+            now = monotonic()
+            self._expire(now)
+            stats = self._stats.copy()
+            stats.utilisation = self._used(now, None) / self._window
+            channels = sorted(key for key in self._history if key is not None)
+            stats.channels = {channel: self._used(now, channel) / self._window for channel in channels}
+            return stats
+
+    # Private
+    def _expire(self, now: float):
+        for key in list(self._history):
+            history = self._history[key]
+            index = 0
+            while index < len(history) and history[index][0] + self._window <= now:
+                self._totals[key] -= history[index][2]
+                index += 1
+            if index == len(history):
+                del self._history[key]
+                del self._totals[key]
+            elif index > 0:
+                del history[:index]
+
+    def _used(self, now: float, key) -> float:
+        # reserved but not started requests are not counted, they are at the end of the history
+        history = self._history.get(key, ())
+        used = self._totals.get(key, 0.0)
+        index = len(history) - 1
+        while index >= 0 and history[index][0] > now:
+            used -= history[index][2]
+            index -= 1
+        return max(used, 0.0)
+
+    def _window_start(self, now: float, airtime: float, key, budget: float) -> float:
+        """ Returns the earliest time when the request fits into the rolling window budget. """
+        limit = budget * self._window
+        used = self._totals.get(key, 0.0)
+        start = now
+        # only the oldest requests which must leave the window are visited
+        for item_start, sequence, item_airtime in self._history.get(key, ()):
+            if used + airtime <= limit:
+                break
+            used -= item_airtime
+            start = max(start, item_start + self._window)
+        return start
+
+    def _reserve(self, start: float, airtime: float, key, budget: float) -> tuple:
+        """ Moves the pacing clock, returns (key, previous clock, new clock) to return the reservation. """
+        previous = self._next_free.get(key)
+        self._next_free[key] = max(previous if previous is not None else start, start) + airtime / budget
+        return key, previous, self._next_free[key]
+
+    def _cancel(self, item: tuple, keys: tuple, clocks: list, delay: float):
+        """ Returns reservation of the request which was not transmitted to the budget. """
+        with self._lock:
+            for key in keys:
+                history = self._history.get(key)
+                index = bisect_left(history, item) if history is not None else 0
+                if history is not None and index < len(history) and history[index] == item:
+                    del history[index]
+                    self._totals[key] -= item[2]
+                    if not history:
+                        del self._history[key]
+                        del self._totals[key]
+            # the clock is moved back only if no request was paced after this one
+            for key, previous, reserved in clocks:
+                if self._next_free.get(key) == reserved:
+                    if previous is None:
+                        del self._next_free[key]
+                    else:
+                        self._next_free[key] = previous
+            self._stats.requests -= 1
+            self._stats.airtime -= item[2]
+            self._stats.delayed -= 1
+            self._stats.total_delay -= delay
+            self._stats.dropped += 1
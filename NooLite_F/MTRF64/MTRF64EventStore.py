@@ -0,0 +1,301 @@
+import logging
+import mmap
+import os
+import sys
+
+from math import nan, isnan
+from struct import Struct
+from threading import Lock
+from time import time
+from typing import Iterator, List, Tuple
+
+from NooLite_F.MTRF64.MTRF64Adapter import IncomingData, Command
+from NooLite_F.MTRF64.MTRF64Decoders import decode_temp_humi, decode_temporary_on, decode_brightness, decode_rgb_brightness
+
+
+_LOGGER = logging.getLogger("MTRF64EventStore")
+
+_MAGIC = b"NLFEVT01"
+_HEADER = Struct("<8sBxxxIIxxxxdd")
+_HEADER_SIZE = 64
+_BYTE_ORDER = 0 if sys.byteorder == "little" else 1
+_SEGMENT_SUFFIX = ".nlseg"
+
+VALUES_COUNT = 4
+
+# column name, typecode, item size. Columns with larger items go first to keep them aligned.
+_COLUMNS = [("timestamp", "d", 8)] + [("value{0}".format(i), "f", 4) for i in range(VALUES_COUNT)] + \
+           [("channel", "B", 1), ("command", "B", 1), ("format", "B", 1)]
+
+
+class EventStoreException(Exception):
+    """Base class for event store exceptions."""
+
+
+class StoredEvent(object):
+    timestamp = None
+    channel = None
+    command = None
+    format = None
+    values = None
+
+    def __repr__(self):
+        return "<StoredEvent (0x{0:x}), timestamp: {1}, channel: {2}, command: {3}, format: {4}, values: {5}>" \
+            .format(id(self), self.timestamp, self.channel, self.command, self.format, self.values)
+
+
+def decode_values(data: IncomingData) -> Tuple[float, ...]:
+    """ Decode incoming event into fixed number of values. Missed values are NaN.
+
+    * SENS_TEMP_HUMI - temperature, humidity, analog value, battery state (0 - ok, 1 - low).
+    * TEMPORARY_ON - duration.
+    * SET_BRIGHTNESS - brightness level (format 1) or red, green, blue levels (format 3).
+    * BRIGHT_STEP_UP/BRIGHT_STEP_DOWN - step.
+    """
+    values = [nan] * VALUES_COUNT
+    if data.command == Command.SENS_TEMP_HUMI:
+        decoded = decode_temp_humi(data)
+        if decoded is not None:
+            temp, humi, battery, analog = decoded
+            values[0] = temp
+            values[1] = nan if humi is None else humi
+            values[2] = analog
+            values[3] = battery.value
+    elif data.command == Command.TEMPORARY_ON:
+        duration = decode_temporary_on(data)
+        if duration is not None:
+            values[0] = duration
+    elif data.command == Command.SET_BRIGHTNESS:
+        if data.format == 1:
+            values[0] = decode_brightness(data)
+        elif data.format == 3:
+            values[0], values[1], values[2] = decode_rgb_brightness(data)
+    elif data.command in (Command.BRIGHT_STEP_UP, Command.BRIGHT_STEP_DOWN) and data.format == 1:
+        values[0] = data.data[0]
+    return tuple(values)
+
+
+class _Segment(object):
+    """ Segment file with preallocated columns. Columns are stored one after another, each has capacity items. """
+
+    def __init__(self, path: str, capacity: int = None, writable: bool = False):
+        self.path = path
+        self._file = None
+        self._map = None
+        self._views = {}
+
+        if capacity is not None:
+            with open(path, "xb") as file:
+                file.truncate(self.file_size(capacity))
+                file.write(_HEADER.pack(_MAGIC, _BYTE_ORDER, capacity, 0, nan, nan))
+
+        self._file = open(path, "r+b" if writable else "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+            magic, byte_order, self.capacity, count, first, last = _HEADER.unpack_from(self._map, 0)
+            if magic != _MAGIC or byte_order != _BYTE_ORDER or len(self._map) != self.file_size(self.capacity):
+                raise EventStoreException("Invalid segment file: {0}".format(path))
+
+            offset = _HEADER_SIZE
+            for name, typecode, size in _COLUMNS:
+                self._views[name] = memoryview(self._map)[offset:offset + self.capacity * size].cast(typecode)
+                offset += self.capacity * size
+        except Exception:
+            self.close()
+            raise
+
+    @staticmethod
+    def file_size(capacity: int) -> int:
+        return _HEADER_SIZE + capacity * sum(size for name, typecode, size in _COLUMNS)
+
+    def header(self) -> Tuple[int, float, float]:
+        magic, byte_order, capacity, count, first, last = _HEADER.unpack_from(self._map, 0)
+        return count, first, last
+
+    def column(self, name: str) -> memoryview:
+        return self._views[name]
+
+    def append(self, timestamp: float, channel: int, command: int, fmt: int, values: Tuple[float, ...]) -> int:
+        count, first, last = self.header()
+        self._views["timestamp"][count] = timestamp
+        self._views["channel"][count] = channel
+        self._views["command"][count] = command
+        self._views["format"][count] = fmt
+        for i in range(VALUES_COUNT):
+            self._views["value{0}".format(i)][count] = values[i]
+
+        if count == 0:
+            first = timestamp
+        # count is written last, so readers never see partially written row
+        count += 1
+        _HEADER.pack_into(self._map, 0, _MAGIC, _BYTE_ORDER, self.capacity, count, first, timestamp)
+        return count
+
+    def flush(self):
+        self._map.flush()
+
+    def close(self):
+        for view in self._views.values():
+            view.release()
+        self._views = {}
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class EventStore(object):
+    """ Append only store of incoming events.
+
+    Events are written into segment files with fixed width columns: timestamp, channel, command, format and
+    decoded values (see decode_values). When segment is full, the new one is created. Queries map segment files
+    into memory and read only segments and rows which match requested time range, so the whole history is never
+    loaded into memory. Timestamps are expected to be non decreasing, events with older timestamp are stored
+    with the last timestamp.
+
+    Segment files use native byte order and can't be moved to machine with other byte order.
+    """
+
+    def __init__(self, path: str, segment_capacity: int = 65536, max_segments: int = None):
+        """
+        :param path: directory for segment files. It will be created if not exists.
+        :param segment_capacity: number of events in one segment.
+        :param max_segments: maximal number of segments. The oldest segments are removed. If None - segments are never removed.
+        """
+        self._path = path
+        self._capacity = (segment_capacity + 7) // 8 * 8
+        self._max_segments = max_segments
+        self._lock = Lock()
+        self._segment = None
+        self._last_timestamp = None
+
+        os.makedirs(path, exist_ok=True)
+        segments = self._segment_paths()
+        if len(segments) > 0:
+            segment = _Segment(segments[-1], writable=True)
+            count, first, last = segment.header()
+            if count < segment.capacity:
+                self._segment = segment
+                if count > 0:
+                    self._last_timestamp = last
+            else:
+                self._last_timestamp = last
+                segment.close()
+
+    def __call__(self, data: IncomingData):
+        self.append(data)
+
+    def append(self, data: IncomingData, timestamp: float = None):
+        """ Store incoming event.
+
+        :param data: incoming event.
+        :param timestamp: event time (seconds since epoch). If None then current time is used.
+        """
+        if timestamp is None:
+            timestamp = time()
+        values = decode_values(data)
+
+        with self._lock:
+            if self._last_timestamp is not None:
+                timestamp = max(timestamp, self._last_timestamp)
+            self._last_timestamp = timestamp
+
+            if self._segment is None:
+                self._segment = self._new_segment()
+
+            count = self._segment.append(timestamp, data.channel, data.command, data.format, values)
+            if count >= self._segment.capacity:
+                self._segment.close()
+                self._segment = None
+
+    def flush(self):
+        with self._lock:
+            if self._segment is not None:
+                self._segment.flush()
+
+    def close(self):
+        with self._lock:
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+
+    def segments(self) -> List[str]:
+        """ Returns paths of all segment files, the oldest first. """
+        return self._segment_paths()
+
+    def scan(self, channel: int = None, start: float = None, end: float = None, command: Command = None) -> Iterator[StoredEvent]:
+        """ Iterate over stored events, the oldest first.
+
+        :param channel: channel of events. If None then events of all channels are returned.
+        :param start: the earliest event time (inclusive). If None then time is not limited.
+        :param end: the latest event time (exclusive). If None then time is not limited.
+        :param command: command of events. If None then events with any command are returned.
+        """
+        for path in self._segment_paths():
+            try:
+                segment = _Segment(path)
+            except (OSError, ValueError, EventStoreException) as err:
+                # segment can be removed by rotation while iterating
+                _LOGGER.debug("Skip segment {0}: {1}".format(path, err))
+                continue
+
+            try:
+                count, first, last = segment.header()
+                if count == 0 or (start is not None and last < start) or (end is not None and first >= end):
+                    continue
+
+                timestamps = segment.column("timestamp")
+                begin = 0 if start is None else self._find(timestamps, start, count)
+                stop = count if end is None else self._find(timestamps, end, count)
+
+                channels = segment.column("channel")
+                commands = segment.column("command")
+                formats = segment.column("format")
+                values = [segment.column("value{0}".format(i)) for i in range(VALUES_COUNT)]
+
+                for row in range(begin, stop):
+                    if channel is not None and channels[row] != channel:
+                        continue
+                    if command is not None and commands[row] != command:
+                        continue
+                    event = StoredEvent()
+                    event.timestamp = timestamps[row]
+                    event.channel = channels[row]
+                    event.command = commands[row]
+                    event.format = formats[row]
+                    event.values = tuple(None if isnan(column[row]) else column[row] for column in values)
+                    yield event
+            finally:
+                segment.close()
+
+    # Private
+    @staticmethod
+    def _find(timestamps: memoryview, timestamp: float, count: int) -> int:
+        begin = 0
+        end = count
+        while begin < end:
+            middle = (begin + end) // 2
+            if timestamps[middle] < timestamp:
+                begin = middle + 1
+            else:
+                end = middle
+        return begin
+
+    def _segment_paths(self) -> List[str]:
+        names = sorted(name for name in os.listdir(self._path) if name.endswith(_SEGMENT_SUFFIX))
+        return [os.path.join(self._path, name) for name in names]
+
+    def _new_segment(self) -> _Segment:
+        segments = self._segment_paths()
+        index = 0
+        if len(segments) > 0:
+            index = int(os.path.basename(segments[-1])[:-len(_SEGMENT_SUFFIX)]) + 1
+
+        if self._max_segments is not None:
+            for path in segments[:max(0, len(segments) - self._max_segments + 1)]:
+                os.remove(path)
+
+        path = os.path.join(self._path, "{0:010d}{1}".format(index, _SEGMENT_SUFFIX))
+        return _Segment(path, self._capacity, writable=True)
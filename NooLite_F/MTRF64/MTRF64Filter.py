@@ -0,0 +1,182 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+from NooLite_F.MTRF64.MTRF64Adapter import IncomingData, Command
+from NooLite_F.MTRF64.MTRF64Decoders import decode_temp_humi
+
+
+class FilterStats(object):
+    passed = 0
+    duplicates = 0
+    deadband = 0
+    rate_limited = 0
+
+    @property
+    def suppressed(self) -> int:
+        return self.duplicates + self.deadband + self.rate_limited
+
+    def copy(self) -> 'FilterStats':
+        stats = FilterStats()
+        stats.passed = self.passed
+        stats.duplicates = self.duplicates
+        stats.deadband = self.deadband
+        stats.rate_limited = self.rate_limited
+        return stats
+
+    def __repr__(self):
+        return "<FilterStats (0x{0:x}), passed: {1}, duplicates: {2}, deadband: {3}, rate limited: {4}>" \
+            .format(id(self), self.passed, self.duplicates, self.deadband, self.rate_limited)
+
+
+class _TokenBucket(object):
+    def __init__(self, rate: float, burst: int, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now: float) -> bool:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class EventFilter(object):
+    """ Drops incoming events before they are dispatched to listeners.
+
+    Filter is applied in following order:
+
+    * duplicates - the same packet (channel, command, format, data, id, toggle counter) received again within
+      dedup_window. NooLite transmitters repeat each command several times with the same toggle counter.
+    * deadband - temperature/humidity readings which differ from the last passed reading of the channel less than
+      temp_deadband/humi_deadband. The reading is passed anyway if battery state is changed or if the last
+      reading was passed more than deadband_heartbeat seconds ago. Readings dropped by the rate limit are not
+      remembered as passed.
+    * rate limit - events of the channel exceeding rate_limit events per second (with bursts up to rate_burst).
+    """
+
+    def __init__(self, dedup_window: float = 0.5, temp_deadband: float = None, humi_deadband: int = None,
+                 deadband_heartbeat: float = None, rate_limit: float = None, rate_burst: int = 5):
+        """
+        :param dedup_window: time in seconds during which the same packet is considered as duplicate. None disables deduplication.
+        :param temp_deadband: minimal temperature change to pass the reading. None disables temperature deadband.
+        :param humi_deadband: minimal humidity change to pass the reading. None disables humidity deadband.
+        :param deadband_heartbeat: time in seconds after which reading is passed even if it is not changed. None - never.
+        :param rate_limit: maximal average number of events per second for each channel. None disables rate limit.
+        :param rate_burst: maximal number of events which can be passed at once for each channel.
+        """
+        self.dedup_window = dedup_window
+        self.temp_deadband = temp_deadband
+        self.humi_deadband = humi_deadband
+        self.deadband_heartbeat = deadband_heartbeat
+        self.rate_limit = rate_limit
+        self.rate_burst = rate_burst
+
+        self._lock = Lock()
+        self._recent = OrderedDict()
+        self._last_readings = {}
+        self._buckets = {}
+        self._stats = FilterStats()
+
+    def accept(self, data: IncomingData, now: float = None) -> bool:
+        """ Check incoming event.
+
+        :param data: incoming event.
+        :param now: event time (monotonic clock). If None then current time is used.
+        :return: True if event should be dispatched to listeners.
+        """
+        if now is None:
+            now = monotonic()
+
+        with self._lock:
+            if self._is_duplicate(data, now):
+                self._stats.duplicates += 1
+                return False
+
+            reading = self._temp_humi_reading(data)
+            if reading is not None and self._is_in_deadband(data.channel, reading, now):
+                self._stats.deadband += 1
+                return False
+
+            if self._is_rate_limited(data, now):
+                self._stats.rate_limited += 1
+                return False
+
+            # reading becomes the deadband reference only when the event is really passed
+            if reading is not None:
+                self._last_readings[data.channel] = reading + (now,)
+            self._stats.passed += 1
+            return True
+
+    def stats(self) -> FilterStats:
+        with self._lock:
+            return self._stats.copy()
+
+    def reset(self):
+        with self._lock:
+            self._recent.clear()
+            self._last_readings.clear()
+            self._buckets.clear()
+            self._stats = FilterStats()
+
+    # Private
+    def _is_duplicate(self, data: IncomingData, now: float) -> bool:
+        if self.dedup_window is None:
+            return False
+
+        while len(self._recent) > 0:
+            key, seen = next(iter(self._recent.items()))
+            if now - seen < self.dedup_window:
+                break
+            self._recent.popitem(last=False)
+
+        # count is the toggle counter of RX packet, so the next press of the same button is not a duplicate
+        key = (data.channel, data.command, data.format, bytes(data.data), data.id, data.count)
+        if key in self._recent:
+            return True
+
+        self._recent[key] = now
+        return False
+
+    def _temp_humi_reading(self, data: IncomingData) -> tuple:
+        """ Returns (temp, humi, battery) of the reading checked by deadband or None. """
+        if data.command != Command.SENS_TEMP_HUMI or (self.temp_deadband is None and self.humi_deadband is None):
+            return None
+
+        values = decode_temp_humi(data)
+        if values is None:
+            return None
+        temp, humi, battery, analog = values
+        return temp, humi, battery
+
+    def _is_in_deadband(self, channel: int, reading: tuple, now: float) -> bool:
+        last = self._last_readings.get(channel)
+        if last is None:
+            return False
+
+        temp, humi, battery = reading
+        last_temp, last_humi, last_battery, passed_at = last
+        in_deadband = battery == last_battery
+        if self.deadband_heartbeat is not None and now - passed_at >= self.deadband_heartbeat:
+            in_deadband = False
+        if self.temp_deadband is not None and abs(temp - last_temp) >= self.temp_deadband:
+            in_deadband = False
+        if self.humi_deadband is not None and (humi is None) != (last_humi is None):
+            in_deadband = False
+        elif self.humi_deadband is not None and humi is not None and abs(humi - last_humi) >= self.humi_deadband:
+            in_deadband = False
+        return in_deadband
+
+    def _is_rate_limited(self, data: IncomingData, now: float) -> bool:
+        if self.rate_limit is None:
+            return False
+
+        bucket = self._buckets.get(data.channel)
+        if bucket is None:
+            bucket = _TokenBucket(self.rate_limit, self.rate_burst, now)
+            self._buckets[data.channel] = bucket
+        return not bucket.take(now)
@@ -0,0 +1,224 @@
+import logging
+import zlib
+
+from abc import ABC, abstractmethod
+from serial import SerialException
+from time import monotonic, sleep
+from typing import Callable, Tuple
+
+from NooLite_F.NooLiteFController import Deadline, Timeout
+from NooLite_F.MTRF64.MTRF64Adapter import MTRF64Adapter, IncomingData, OutgoingData
+from NooLite_F.MTRF64.MTRF64Scheduler import Priority
+
+
+_LOGGER = logging.getLogger("MTRF64Firmware")
+
+
+class FirmwareUpdateError(Exception):
+    """ Firmware transfer is interrupted. Calling update with the same image again resumes it from offset. """
+
+    def __init__(self, message: str, offset: int = 0):
+        super().__init__(message)
+        self.offset = offset
+
+
+class FirmwareFrameCodec(ABC):
+    """ Layout of Mode.FIRMWARE_UPDATE frames. Firmware update protocol of MTRF-64 is not documented, so the layout
+    of the updated adapter firmware must be provided, see benchmarks/firmware_update.py for example.
+    """
+    # maximal size of image chunk in one data frame
+    payload_size = 4
+
+    @abstractmethod
+    def begin(self, size: int, crc: int) -> OutgoingData:
+        """ Returns frame which starts or resumes transfer of the image with size and CRC32. """
+
+    @abstractmethod
+    def data(self, offset: int, chunk: bytes) -> OutgoingData:
+        """ Returns frame with image chunk at offset. """
+
+    @abstractmethod
+    def end(self, crc: int) -> OutgoingData:
+        """ Returns frame which finishes transfer of the image with CRC32. """
+
+    @abstractmethod
+    def is_ack(self, request: OutgoingData, response: IncomingData) -> bool:
+        """ Returns True if response is acknowledgement of the request frame or of the frame of the same kind. """
+
+    @abstractmethod
+    def ack(self, response: IncomingData) -> Tuple[bool, int]:
+        """ Returns (accepted, received size). Not accepted frame means adapter is busy or checksum is wrong. """
+
+
+class FirmwareUpdateResult(object):
+    size = 0
+    resumed_from = 0
+    frames = 0
+    retransmits = 0
+    duration = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """ Transferred bytes per second (resumed part is not counted). """
+        return (self.size - self.resumed_from) / self.duration if self.duration > 0 else 0.0
+
+    def __repr__(self):
+        return "<FirmwareUpdateResult (0x{0:x}), size: {1}, resumed from: {2}, frames: {3}, retransmits: {4}, duration: {5:.3f}, throughput: {6:.1f} B/s>" \
+            .format(id(self), self.size, self.resumed_from, self.frames, self.retransmits, self.duration, self.throughput)
+
+
+class FirmwareUpdater(object):
+    """ Streams firmware image to the adapter.
+
+    Frames are pipelined: up to window frames are written without waiting for acknowledgements. Adapter acknowledges
+    received size (cumulative ack), so lost frames are resent from the first not acknowledged one (go-back-N) after
+    ack timeout or repeated acknowledgements. Busy adapter rejects frames, then the updater waits and resends them.
+    Transfer is resumed from the size received by the adapter, the whole image is verified by CRC32 at the end.
+    """
+
+    def __init__(self, adapter: MTRF64Adapter, codec: FirmwareFrameCodec, window: int = 16, ack_timeout: float = 0.5,
+                 max_retries: int = 5, busy_delay: float = 0.05):
+        """
+        :param adapter: adapter to update.
+        :param codec: frames layout of the adapter firmware.
+        :param window: maximal number of not acknowledged frames.
+        :param ack_timeout: time in seconds to wait for the acknowledgement before frames are resent.
+        :param max_retries: number of resends without progress after which transfer is interrupted.
+        :param busy_delay: time in seconds to wait after adapter rejected frame.
+        """
+        if window < 1:
+            raise ValueError("Window should be positive: {0}".format(window))
+        self._adapter = adapter
+        self._window = window
+        self._ack_timeout = ack_timeout
+        self._max_retries = max_retries
+        self._busy_delay = busy_delay
+        self._codec = codec
+
+    def update(self, image: bytes, on_progress: Callable[[int, int], None] = None, timeout: Timeout = None) -> FirmwareUpdateResult:
+        """ Transfer image to the adapter.
+
+        :param image: firmware image.
+        :param on_progress: callable which accepts (acknowledged size, image size).
+        :param timeout: maximal time in seconds to wait for exclusive access to the adapter.
+        :raises FirmwareUpdateError: if transfer is interrupted or image checksum is wrong.
+        """
+        deadline = Deadline.of(timeout)
+        with self._adapter.session(Priority.BACKGROUND, deadline) as session:
+            if session is None:
+                raise FirmwareUpdateError("Adapter is busy")
+            try:
+                return self._transfer(session, bytes(image), on_progress)
+            except SerialException as err:
+                raise FirmwareUpdateError("Port error: {0}".format(err))
+
+    # Private
+    def _request(self, session, data: OutgoingData) -> Tuple[bool, int]:
+        for attempt in range(self._max_retries + 1):
+            session.write(data)
+            response = self._read_ack(session, data, monotonic() + self._ack_timeout)
+            if response is not None:
+                return self._codec.ack(response)
+        raise FirmwareUpdateError("Adapter does not answer")
+
+    @staticmethod
+    def _go_back(result: FirmwareUpdateResult, base: int, following: int, step: int) -> int:
+        """ Returns number of frames which are sent again. """
+        count = (following - base) // step
+        result.retransmits += count
+        return count
+
+    def _read_ack(self, session, request: OutgoingData, until: float) -> IncomingData:
+        # acknowledgements of other requests (e.g. late acknowledgements of begin frame) are skipped
+        while True:
+            remaining = until - monotonic()
+            if remaining <= 0:
+                return None
+            response = session.read(remaining)
+            if response is not None and self._codec.is_ack(request, response):
+                return response
+
+    def _drain(self, session, request: OutgoingData) -> int:
+        """ Skips received acknowledgements, returns the greatest size acknowledged by data frames. """
+        offset = 0
+        while True:
+            response = session.read(0)
+            if response is None:
+                return offset
+            if self._codec.is_ack(request, response):
+                offset = max(offset, self._codec.ack(response)[1])
+
+    def _transfer(self, session, image: bytes, on_progress) -> FirmwareUpdateResult:
+        codec = self._codec
+        size = len(image)
+        crc = zlib.crc32(image) & 0xFFFFFFFF
+        step = codec.payload_size
+        result = FirmwareUpdateResult()
+        result.size = size
+        started_at = monotonic()
+
+        accepted, offset = self._request(session, codec.begin(size, crc))
+        if not accepted:
+            raise FirmwareUpdateError("Adapter rejected firmware update")
+        # adapter keeps received part of the same image, so transfer continues from it
+        base = offset - offset % step if offset <= size else 0
+        result.resumed_from = base
+        following = base
+        retries = 0
+        # window is halved when adapter is busy and grows back by one frame with each progress
+        window = self._window
+        # negative value is the number of acknowledgements of resent frames which are still expected
+        duplicates = 0
+        # the last written data frame, acknowledgements of data frames are matched by it
+        frame = None
+
+        while base < size:
+            while following < size and following - base < window * step:
+                frame = codec.data(following, image[following:following + step])
+                try:
+                    session.write(frame)
+                except SerialException as err:
+                    raise FirmwareUpdateError("Port error: {0}".format(err), base)
+                following += step
+                result.frames += 1
+
+            response = self._read_ack(session, frame, monotonic() + self._ack_timeout)
+            if response is None:
+                retries += 1
+                if retries > self._max_retries:
+                    raise FirmwareUpdateError("Acknowledgement timeout", base)
+                duplicates = -self._go_back(result, base, following, step)
+                following = base
+                continue
+
+            accepted, offset = codec.ack(response)
+            if offset > base:
+                base = min(offset, size)
+                retries = 0
+                window = min(window + 1, self._window)
+                duplicates = min(duplicates, 0)
+                if on_progress is not None:
+                    on_progress(base, size)
+            elif accepted and following > base:
+                # repeated acknowledgement means that the frame at base is lost
+                duplicates += 1
+                if duplicates >= 3:
+                    duplicates = -self._go_back(result, base, following, step)
+                    following = base
+
+            if not accepted:
+                # adapter is busy, frames after base are dropped by it. Rejects of the frames which are already sent
+                # are skipped, otherwise each of them would resend the window again
+                sleep(self._busy_delay)
+                base = max(base, min(self._drain(session, frame), size))
+                window = max(window // 2, 1)
+                duplicates = -self._go_back(result, base, following, step) if following > base else 0
+                following = base
+
+        accepted, offset = self._request(session, codec.end(crc))
+        if not accepted:
+            raise FirmwareUpdateError("Image checksum mismatch", 0)
+
+        result.duration = monotonic() - started_at
+        _LOGGER.info("Firmware is updated: {0}".format(result))
+        return result
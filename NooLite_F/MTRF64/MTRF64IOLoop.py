@@ -0,0 +1,242 @@
+import logging
+import os
+import selectors
+
+from collections import deque
+from queue import Empty
+from threading import Thread, Condition, Lock, Event, current_thread
+
+
+_LOGGER = logging.getLogger("MTRF64IOLoop")
+
+PACKET_SIZE = 17
+START_BYTE = 173
+
+# Maximal number of bytes read from one port at once
+_READ_SIZE = 4096
+# Number of events of one adapter dispatched before switching to the next adapter
+_DISPATCH_BATCH = 16
+
+
+class IOLoopStats(object):
+    adapters = 0
+    wakeups = 0
+    packets = 0
+    dispatched = 0
+    skipped_bytes = 0
+
+    def copy(self) -> 'IOLoopStats':
+        stats = IOLoopStats()
+        stats.__dict__.update(self.__dict__)
+        return stats
+
+    def __repr__(self):
+        return "<IOLoopStats (0x{0:x}), adapters: {1}, wakeups: {2}, packets: {3}, dispatched: {4}, skipped bytes: {5}>" \
+            .format(id(self), self.adapters, self.wakeups, self.packets, self.dispatched, self.skipped_bytes)
+
+
+class MTRF64IOLoop(object):
+    """ Serves any number of adapters with two threads: the I/O thread reads all serial ports with selector and
+    the dispatch thread calls listeners of incoming events of all adapters (round robin between adapters).
+
+    Ports are read in non blocking mode, so the loop requires ports with file descriptors (POSIX systems).
+    Commands are still written from the caller thread, see MTRF64Adapter.send.
+    """
+
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+        self._lock = Lock()
+        self._changes = []
+        self._adapters = {}
+        self._buffers = {}
+        self._stats = IOLoopStats()
+        self._is_stopped = False
+
+        self._ready = deque()
+        self._ready_set = set()
+        self._ready_condition = Condition()
+
+        self._wakeup_read, self._wakeup_write = os.pipe()
+        os.set_blocking(self._wakeup_read, False)
+        self._selector.register(self._wakeup_read, selectors.EVENT_READ, None)
+
+        self._io_thread = Thread(target=self._io_loop)
+        self._io_thread.daemon = True
+        self._io_thread.start()
+
+        self._dispatch_thread = Thread(target=self._dispatch_loop)
+        self._dispatch_thread.daemon = True
+        self._dispatch_thread.start()
+
+    def register(self, adapter, serial):
+        """ Start reading of adapter port. Called by adapter when port is opened. """
+        self._change(("register", adapter, serial, None))
+
+    def unregister(self, adapter):
+        """ Stop reading of adapter port. Called by adapter before port is closed, so waits until the loop forgets the
+        port descriptor.
+        """
+        if self._is_stopped:
+            return
+        if current_thread() is self._io_thread:
+            self._remove(adapter)
+            return
+        done = Event()
+        self._change(("unregister", adapter, None, done))
+        done.wait(1.0)
+
+    def notify_incoming(self, adapter):
+        """ Schedule dispatching of the adapter incoming queue. """
+        with self._ready_condition:
+            if adapter not in self._ready_set:
+                self._ready_set.add(adapter)
+                self._ready.append(adapter)
+                self._ready_condition.notify()
+
+    def stats(self) -> IOLoopStats:
+        with self._lock:
+            stats = self._stats.copy()
+            stats.adapters = len(self._adapters)
+            return stats
+
+    def stop(self):
+        """ Stop both threads. Adapters should be released before. """
+        with self._lock:
+            self._is_stopped = True
+        self._wakeup()
+        with self._ready_condition:
+            self._ready_condition.notify_all()
+        self._io_thread.join()
+        self._dispatch_thread.join()
+        self._selector.close()
+        os.close(self._wakeup_read)
+        os.close(self._wakeup_write)
+
+    # Private
+    def _change(self, change: tuple):
+        with self._lock:
+            if self._is_stopped:
+                raise RuntimeError("I/O loop is stopped")
+            self._changes.append(change)
+        self._wakeup()
+
+    def _wakeup(self):
+        try:
+            os.write(self._wakeup_write, b"\0")
+        except OSError:
+            pass
+
+    def _apply_changes(self):
+        with self._lock:
+            changes = self._changes
+            self._changes = []
+
+        for action, adapter, serial, done in changes:
+            self._remove(adapter)
+            if action == "register":
+                try:
+                    fd = serial.fileno()
+                    os.set_blocking(fd, False)
+                    self._selector.register(fd, selectors.EVENT_READ, adapter)
+                except Exception as err:
+                    adapter._on_io_error(err)
+                    continue
+                with self._lock:
+                    self._adapters[adapter] = serial
+                self._buffers[adapter] = bytearray()
+            if done is not None:
+                done.set()
+
+    def _remove(self, adapter):
+        with self._lock:
+            serial = self._adapters.pop(adapter, None)
+        self._buffers.pop(adapter, None)
+        if serial is not None:
+            try:
+                self._selector.unregister(serial.fileno())
+            except (KeyError, ValueError, OSError):
+                pass
+
+    def _io_loop(self):
+        while not self._is_stopped:
+            self._apply_changes()
+            events = self._selector.select()
+            with self._lock:
+                self._stats.wakeups += 1
+
+            for key, mask in events:
+                if key.data is None:
+                    try:
+                        os.read(self._wakeup_read, 512)
+                    except OSError:
+                        pass
+                    continue
+
+                adapter = key.data
+                try:
+                    # read descriptor directly, pyserial read makes one more select call
+                    chunk = os.read(key.fd, _READ_SIZE)
+                    if len(chunk) == 0:
+                        raise OSError("Port is closed by device")
+                except BlockingIOError:
+                    continue
+                except Exception as err:
+                    # port is lost, adapter reopens it in own thread and registers it again
+                    self._remove(adapter)
+                    adapter._on_io_error(err)
+                    continue
+                self._feed(adapter, chunk)
+
+    def _feed(self, adapter, chunk: bytes):
+        buffer = self._buffers.get(adapter)
+        if buffer is None:
+            return
+        buffer += chunk
+
+        packets = 0
+        skipped = 0
+        while len(buffer) >= PACKET_SIZE:
+            if buffer[0] != START_BYTE:
+                # resynchronize on the next start byte
+                index = buffer.find(START_BYTE, 1)
+                index = len(buffer) if index < 0 else index
+                skipped += index
+                del buffer[:index]
+                continue
+            packet = bytes(buffer[:PACKET_SIZE])
+            del buffer[:PACKET_SIZE]
+            packets += 1
+            adapter._handle_packet(packet)
+
+        with self._lock:
+            self._stats.packets += packets
+            self._stats.skipped_bytes += skipped
+
+    def _dispatch_loop(self):
+        while True:
+            with self._ready_condition:
+                while len(self._ready) == 0 and not self._is_stopped:
+                    self._ready_condition.wait()
+                if self._is_stopped:
+                    return
+                adapter = self._ready.popleft()
+                self._ready_set.discard(adapter)
+
+            dispatched = 0
+            for i in range(_DISPATCH_BATCH):
+                try:
+                    data = adapter._incoming_queue.get(timeout=0)
+                except Empty:
+                    break
+                if data is None:
+                    break
+                try:
+                    adapter._dispatch(data)
+                except Exception as err:
+                    _LOGGER.error("Listener error: {0}".format(err))
+                dispatched += 1
+
+            with self._lock:
+                self._stats.dispatched += dispatched
+            if dispatched == _DISPATCH_BATCH:
+                self.notify_incoming(adapter)
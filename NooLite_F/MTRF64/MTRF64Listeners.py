@@ -0,0 +1,133 @@
+from threading import Lock
+from typing import Iterable, Tuple
+
+from NooLite_F import NooLiteFListener
+from NooLite_F.MTRF64.MTRF64Adapter import Command
+
+
+CHANNELS_COUNT = 64
+
+# Commands handled by each listener method
+LISTENER_COMMANDS = {
+    "on_on": (Command.ON,),
+    "on_off": (Command.OFF,),
+    "on_switch": (Command.SWITCH,),
+    "on_load_preset": (Command.LOAD_PRESET,),
+    "on_save_preset": (Command.SAVE_PRESET,),
+    "on_temporary_on": (Command.TEMPORARY_ON,),
+    "on_brightness_tune": (Command.BRIGHT_UP, Command.BRIGHT_DOWN),
+    "on_brightness_tune_back": (Command.BRIGHT_BACK,),
+    "on_brightness_tune_stop": (Command.STOP_BRIGHT,),
+    "on_brightness_tune_custom": (Command.BRIGHT_REG,),
+    "on_brightness_tune_step": (Command.BRIGHT_STEP_UP, Command.BRIGHT_STEP_DOWN),
+    "on_set_brightness": (Command.SET_BRIGHTNESS,),
+    "on_roll_rgb_color": (Command.ROLL_COLOR,),
+    "on_switch_rgb_color": (Command.SWITCH_COLOR,),
+    "on_switch_rgb_mode": (Command.SWITCH_MODE,),
+    "on_switch_rgb_mode_speed": (Command.SPEED_MODE,),
+    "on_set_rgb_brightness": (Command.SET_BRIGHTNESS,),
+    "on_temp_humi": (Command.SENS_TEMP_HUMI,),
+    "on_battery_low": (Command.BATTERY_LOW,),
+}
+
+
+ALL_COMMANDS = tuple(sorted(set(command for commands in LISTENER_COMMANDS.values() for command in commands)))
+
+
+def listener_commands(listener: NooLiteFListener) -> Tuple[Command, ...]:
+    """ Returns commands handled by the listener: methods overriding NooLiteFListener ones and callbacks assigned to the
+    listener instance. Listener without own handlers gets all commands, its callbacks can be assigned later.
+    """
+    instance = getattr(listener, "__dict__", {})
+    commands = []
+    for name, method_commands in LISTENER_COMMANDS.items():
+        method = getattr(type(listener), name, None)
+        if name in instance or (method is not None and method is not getattr(NooLiteFListener, name)):
+            commands.extend(command for command in method_commands if command not in commands)
+    if len(commands) == 0:
+        return ALL_COMMANDS
+    return tuple(commands)
+
+
+class ListenerRegistry(object):
+    """ Keeps listeners subscribed to commands of channels.
+
+    Listeners are stored in the fixed array of 64 channel buckets, each bucket maps command to the tuple of listeners.
+    Lookup of listeners for the incoming packet is O(1). Subscriptions are replaced on change (copy on write), so
+    lookup does not need any lock and can be made from reader thread.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._channels = [{} for _ in range(CHANNELS_COUNT)]
+        self._wildcard = {}
+
+    def add(self, channel: int, listener: NooLiteFListener, commands: Iterable[Command] = None):
+        """ Subscribe listener to commands.
+
+        :param channel: channel number or None to subscribe to all channels.
+        :param listener: listener.
+        :param commands: commands to subscribe. If None then listener is subscribed to commands it handles (see listener_commands).
+        """
+        if commands is None:
+            commands = listener_commands(listener)
+
+        with self._lock:
+            bucket = dict(self._bucket(channel))
+            for command in commands:
+                listeners = bucket.get(command, ())
+                if listener not in listeners:
+                    bucket[command] = listeners + (listener,)
+            self._set_bucket(channel, bucket)
+
+    def remove(self, channel: int, listener: NooLiteFListener):
+        """ Unsubscribe listener from all commands of channel.
+
+        :param channel: channel number or None to unsubscribe from all channels subscription.
+        :param listener: listener.
+        """
+        with self._lock:
+            bucket = {}
+            for command, listeners in self._bucket(channel).items():
+                listeners = tuple(item for item in listeners if item is not listener)
+                if len(listeners) > 0:
+                    bucket[command] = listeners
+            self._set_bucket(channel, bucket)
+
+    def clear(self):
+        with self._lock:
+            self._channels = [{} for _ in range(CHANNELS_COUNT)]
+            self._wildcard = {}
+
+    def listeners(self, channel: int, command: int) -> Tuple[NooLiteFListener, ...]:
+        """ Returns listeners subscribed to the command of channel, including all channels subscriptions. """
+        listeners = self._wildcard.get(command, ())
+        if 0 <= channel < CHANNELS_COUNT:
+            channel_listeners = self._channels[channel].get(command, ())
+            if len(listeners) == 0:
+                return channel_listeners
+            listeners = channel_listeners + listeners
+        return listeners
+
+    def is_subscribed(self, channel: int, command: int) -> bool:
+        if command in self._wildcard:
+            return True
+        return 0 <= channel < CHANNELS_COUNT and command in self._channels[channel]
+
+    # Private
+    def _bucket(self, channel: int) -> dict:
+        if channel is None:
+            return self._wildcard
+        self._check_channel(channel)
+        return self._channels[channel]
+
+    def _set_bucket(self, channel: int, bucket: dict):
+        if channel is None:
+            self._wildcard = bucket
+        else:
+            self._channels[channel] = bucket
+
+    @staticmethod
+    def _check_channel(channel: int):
+        if not 0 <= channel < CHANNELS_COUNT:
+            raise ValueError("Invalid channel: {0}, channel should be in range 0..{1}".format(channel, CHANNELS_COUNT - 1))
@@ -0,0 +1,418 @@
+import json
+import logging
+
+from collections import OrderedDict
+from queue import Queue
+from threading import Thread, Condition, Lock
+from time import monotonic
+from typing import Callable, List
+
+from NooLite_F import ModuleMode, ModuleInfo, ModuleBaseStateInfo, Deadline
+from NooLite_F.MTRF64.MTRF64Adapter import IncomingData, Command, Mode
+from NooLite_F.MTRF64.MTRF64Decoders import decode_temp_humi, decode_response
+from NooLite_F.MTRF64.MTRF64EventStore import decode_values
+
+
+_LOGGER = logging.getLogger("MTRF64MQTTBridge")
+
+_ONLINE = "online"
+_OFFLINE = "offline"
+
+
+class BridgeStats(object):
+    commands = 0
+    executed = 0
+    rejected = 0
+    expired = 0
+    failed = 0
+    published = 0
+    coalesced = 0
+    batches = 0
+
+    def copy(self) -> 'BridgeStats':
+        stats = BridgeStats()
+        stats.__dict__.update(self.__dict__)
+        return stats
+
+    def __repr__(self):
+        return "<BridgeStats (0x{0:x}), commands: {1}, executed: {2}, rejected: {3}, expired: {4}, failed: {5}, published: {6}, coalesced: {7}, batches: {8}>" \
+            .format(id(self), self.commands, self.executed, self.rejected, self.expired, self.failed, self.published, self.coalesced, self.batches)
+
+
+class LocalMessage(object):
+    """ Message delivered by LocalBroker, has the same attributes as paho MQTTMessage. """
+
+    def __init__(self, topic: str, payload: bytes, qos: int = 0, retain: bool = False):
+        self.topic = topic
+        self.payload = payload
+        self.qos = qos
+        self.retain = retain
+
+    def __repr__(self):
+        return "<LocalMessage (0x{0:x}), topic: {1}, payload: {2}, retain: {3}>".format(id(self), self.topic, self.payload, self.retain)
+
+
+def topic_matches(subscription: str, topic: str) -> bool:
+    """ Check MQTT topic against subscription with + and # wildcards. """
+    patterns = subscription.split("/")
+    levels = topic.split("/")
+    for index, pattern in enumerate(patterns):
+        if pattern == "#":
+            return True
+        if index >= len(levels) or (pattern != "+" and pattern != levels[index]):
+            return False
+    return len(patterns) == len(levels)
+
+
+class LocalBroker(object):
+    """ In-process broker stand-in with retained messages. Messages are delivered synchronously in publisher thread.
+
+    Clients returned by client() implement the part of paho-mqtt Client interface used by MQTTBridge.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._retained = OrderedDict()
+        self._subscriptions = []
+
+    def client(self) -> 'LocalClient':
+        return LocalClient(self)
+
+    def retained(self, topic: str = "#") -> dict:
+        """ Returns retained payloads of matching topics. """
+        with self._lock:
+            return {key: message.payload for key, message in self._retained.items() if topic_matches(topic, key)}
+
+    # Private
+    def _publish(self, message: LocalMessage):
+        with self._lock:
+            if message.retain:
+                if len(message.payload) == 0:
+                    self._retained.pop(message.topic, None)
+                else:
+                    self._retained[message.topic] = message
+            subscriptions = [item for item in self._subscriptions if topic_matches(item[1], message.topic)]
+
+        delivered = set()
+        for client, subscription in subscriptions:
+            if client not in delivered:
+                delivered.add(client)
+                # retain flag is set only for messages sent on subscription
+                client._deliver(LocalMessage(message.topic, message.payload, message.qos, False))
+
+    def _subscribe(self, client: 'LocalClient', subscription: str):
+        with self._lock:
+            self._subscriptions.append((client, subscription))
+            retained = [message for topic, message in self._retained.items() if topic_matches(subscription, topic)]
+        for message in retained:
+            client._deliver(message)
+
+    def _unsubscribe(self, client: 'LocalClient', subscription: str):
+        with self._lock:
+            self._subscriptions = [item for item in self._subscriptions if item != (client, subscription)]
+
+
+class LocalClient(object):
+    on_message = None
+
+    def __init__(self, broker: LocalBroker):
+        self._broker = broker
+        self._callbacks = []
+
+    def publish(self, topic: str, payload=None, qos: int = 0, retain: bool = False):
+        if payload is None:
+            payload = b""
+        elif isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        self._broker._publish(LocalMessage(topic, payload, qos, retain))
+
+    def subscribe(self, topic: str, qos: int = 0):
+        self._broker._subscribe(self, topic)
+
+    def unsubscribe(self, topic: str):
+        self._broker._unsubscribe(self, topic)
+
+    def message_callback_add(self, subscription: str, callback: Callable):
+        self._callbacks.append((subscription, callback))
+
+    def message_callback_remove(self, subscription: str):
+        self._callbacks = [item for item in self._callbacks if item[0] != subscription]
+
+    # Private
+    def _deliver(self, message: LocalMessage):
+        handled = False
+        for subscription, callback in self._callbacks:
+            if topic_matches(subscription, message.topic):
+                callback(self, None, message)
+                handled = True
+        if not handled and self.on_message is not None:
+            self.on_message(self, None, message)
+
+
+class MQTTBridge(object):
+    """ Connects MTRF64Controller with MQTT broker.
+
+    Topics (prefix is "noolite" by default, module id is in hex):
+
+    * prefix/module/<id>/set, prefix/channel/<channel>/set - commands. Payload is ON, OFF, SWITCH, READ or JSON object
+      with "state" (ON, OFF, SWITCH), "brightness" (0..1), "rgb" ([r, g, b]), "temporary_on" (duration in 5 sec units),
+      "read" (true) and for channel commands "broadcast" (true) and "mode" ("noolite" or "noolite-f") values;
+    * prefix/module/<id>/state - retained module state confirmed by module responses;
+    * prefix/channel/<channel>/sensor - retained last reading of the temperature/humidity sensor;
+    * prefix/channel/<channel>/event - events from remote controls and sensors (not retained);
+    * prefix/bridge/state - retained "online" or "offline" adapter connection state.
+
+    Commands are parsed in MQTT client thread and executed by the bridge worker with deadline, so the client thread is
+    never blocked by the radio and commands which waited too long are dropped. Publications are collected by the
+    publisher thread: under load retained topics are coalesced (only the latest state is published) and messages
+    are published in batches.
+    """
+
+    def __init__(self, controller, client, prefix: str = "noolite", command_timeout: float = 5.0, batch_size: int = 64,
+                 linger: float = 0.02, qos: int = 0):
+        """
+        :param controller: MTRF64Controller.
+        :param client: connected MQTT client, e.g. paho.mqtt.client.Client or LocalBroker.client().
+        :param prefix: topics prefix.
+        :param command_timeout: maximal time in seconds from command reception till it is sent to the adapter.
+        :param batch_size: maximal number of messages published at once.
+        :param linger: time in seconds the publisher waits for more messages before publishing a batch.
+        :param qos: QoS of subscription and published messages.
+        """
+        self._controller = controller
+        self._client = client
+        self._prefix = prefix
+        self._command_timeout = command_timeout
+        self._batch_size = batch_size
+        self._linger = linger
+        self._qos = qos
+        self._stats = BridgeStats()
+        self._stats_lock = Lock()
+        self._is_stopped = False
+
+        self._commands = Queue()
+        self._pending_condition = Condition()
+        # retained messages are coalesced by topic, events are published in order
+        self._pending_retained = OrderedDict()
+        self._pending_events = []
+        self._pending_since = None
+
+        self._worker = Thread(target=self._work)
+        self._worker.daemon = True
+        self._worker.start()
+
+        self._publisher = Thread(target=self._publish_loop)
+        self._publisher.daemon = True
+        self._publisher.start()
+
+        self._command_topics = [self._topic("module", "+", "set"), self._topic("channel", "+", "set")]
+        for topic in self._command_topics:
+            self._client.message_callback_add(topic, self._on_command)
+            self._client.subscribe(topic, qos)
+
+        self._controller.add_event_sink(self._on_event)
+        self._controller.add_connection_listener(self._on_connection)
+        self._publish(self._topic("bridge", "state"), _ONLINE, True)
+
+    def stop(self):
+        """ Unsubscribe, publish pending messages and stop threads. """
+        for topic in self._command_topics:
+            self._client.unsubscribe(topic)
+            self._client.message_callback_remove(topic)
+        self._controller.remove_event_sink(self._on_event)
+        self._controller.remove_connection_listener(self._on_connection)
+        self._publish(self._topic("bridge", "state"), _OFFLINE, True)
+
+        self._commands.put(None)
+        self._worker.join()
+        with self._pending_condition:
+            self._is_stopped = True
+            self._pending_condition.notify_all()
+        self._publisher.join()
+
+    def publish_states(self, responses: List[tuple]):
+        """ Publish module states from read_state or other command responses, e.g. after reading all modules on start. """
+        for response in responses:
+            status, info, state = response
+            if status and isinstance(state, ModuleBaseStateInfo):
+                self._publish_state(info, state)
+
+    def stats(self) -> BridgeStats:
+        with self._stats_lock:
+            return self._stats.copy()
+
+    # Private
+    def _topic(self, *levels) -> str:
+        return "/".join((self._prefix,) + tuple(str(level) for level in levels))
+
+    def _count(self, name: str, value: int = 1):
+        with self._stats_lock:
+            setattr(self._stats, name, getattr(self._stats, name) + value)
+
+    # Commands
+    def _on_command(self, client, userdata, message):
+        # Called from MQTT client thread, the command is only parsed and queued here
+        self._count("commands")
+        levels = message.topic.split("/")
+        try:
+            target = int(levels[-2], 16) if levels[-3] == "module" else int(levels[-2])
+            command = self._parse_command(message.payload)
+        except ValueError as err:
+            _LOGGER.warning("Invalid command {0}: {1}".format(message.topic, err))
+            self._count("rejected")
+            return
+        self._commands.put((levels[-3], target, command, Deadline(self._command_timeout)))
+
+    @staticmethod
+    def _parse_command(payload: bytes) -> dict:
+        text = payload.decode("utf-8").strip()
+        if text.upper() in ("ON", "OFF", "SWITCH"):
+            return {"state": text.upper()}
+        if text.upper() == "READ":
+            return {"read": True}
+        command = json.loads(text)
+        if not isinstance(command, dict):
+            raise ValueError("Command should be JSON object: {0}".format(text))
+        return command
+
+    def _work(self):
+        while True:
+            item = self._commands.get()
+            if item is None:
+                break
+            kind, target, command, deadline = item
+            if deadline.expired:
+                self._count("expired")
+                continue
+            try:
+                responses = self._execute(kind, target, command, deadline)
+            except Exception as err:
+                _LOGGER.error("Command error: {0}".format(err))
+                self._count("failed")
+                continue
+            self._count("executed")
+            self.publish_states(responses)
+
+    def _execute(self, kind: str, target: int, command: dict, deadline: Deadline) -> List[tuple]:
+        if kind == "module":
+            address = {"module_id": target}
+        else:
+            address = {"channel": target, "broadcast": bool(command.get("broadcast", False))}
+            if command.get("mode") == "noolite":
+                address["module_mode"] = ModuleMode.NOOLITE
+
+        controller = self._controller
+        responses = []
+        state = command.get("state")
+        if state is not None:
+            state = str(state).upper()
+            if state == "ON":
+                responses = controller.on(timeout=deadline, **address)
+            elif state == "OFF":
+                responses = controller.off(timeout=deadline, **address)
+            elif state == "SWITCH":
+                responses = controller.switch(timeout=deadline, **address)
+            else:
+                raise ValueError("Unknown state: {0}".format(state))
+        if "brightness" in command:
+            responses = controller.set_brightness(float(command["brightness"]), timeout=deadline, **address)
+        if "rgb" in command:
+            red, green, blue = command["rgb"]
+            responses = controller.set_rgb_brightness(red, green, blue, timeout=deadline, **address)
+        if "temporary_on" in command:
+            responses = controller.temporary_on(int(command["temporary_on"]), timeout=deadline, **address)
+        if command.get("read"):
+            responses = controller.read_state(timeout=deadline, **address)
+        return responses
+
+    # Events and states
+    def _on_event(self, data: IncomingData):
+        # Called from controller listener thread
+        if data.mode == Mode.RX_F and data.command == Command.SEND_STATE and data.format == 0:
+            record = decode_response(data)
+            self._publish_state(record.info, record.payload)
+            return
+
+        event = OrderedDict()
+        event["command"] = self._command_name(data.command)
+        event["format"] = data.format
+        event["values"] = [value for value in decode_values(data) if value == value]
+        if data.id:
+            event["id"] = "{0:x}".format(data.id)
+        self._publish(self._topic("channel", data.channel, "event"), json.dumps(event), False)
+
+        if data.command == Command.SENS_TEMP_HUMI:
+            decoded = decode_temp_humi(data)
+            if decoded is not None:
+                temp, humi, battery, analog = decoded
+                reading = OrderedDict([("temperature", temp), ("humidity", humi), ("battery", battery.name), ("analog", analog)])
+                self._publish(self._topic("channel", data.channel, "sensor"), json.dumps(reading), True)
+
+    @staticmethod
+    def _command_name(command: int):
+        try:
+            return Command(command).name
+        except ValueError:
+            return command
+
+    def _on_connection(self, connected: bool, states: dict):
+        self._publish(self._topic("bridge", "state"), _ONLINE if connected else _OFFLINE, True)
+        for responses in states.values():
+            self.publish_states(responses)
+
+    def _publish_state(self, info: ModuleInfo, state: ModuleBaseStateInfo):
+        payload = OrderedDict()
+        payload["state"] = state.state.name if state.state is not None else None
+        payload["brightness"] = state.brightness
+        payload["service_mode"] = state.service_mode.name if state.service_mode is not None else None
+        payload["type"] = info.type
+        payload["firmware"] = info.firmware
+        self._publish(self._topic("module", "{0:x}".format(info.id), "state"), json.dumps(payload), True)
+
+    # Publishing
+    def _publish(self, topic: str, payload: str, retain: bool):
+        with self._pending_condition:
+            if retain:
+                if topic in self._pending_retained:
+                    self._count("coalesced")
+                    del self._pending_retained[topic]
+                self._pending_retained[topic] = payload
+            else:
+                self._pending_events.append((topic, payload))
+            if self._pending_since is None:
+                self._pending_since = monotonic()
+            self._pending_condition.notify()
+
+    def _publish_loop(self):
+        while True:
+            with self._pending_condition:
+                while True:
+                    count = len(self._pending_retained) + len(self._pending_events)
+                    if count >= self._batch_size or (count > 0 and self._is_stopped):
+                        break
+                    if self._is_stopped:
+                        return
+                    if count > 0:
+                        remaining = self._pending_since + self._linger - monotonic()
+                        if remaining <= 0:
+                            break
+                        self._pending_condition.wait(remaining)
+                    else:
+                        self._pending_condition.wait()
+
+                batch = [(topic, payload, False) for topic, payload in self._pending_events[:self._batch_size]]
+                del self._pending_events[:len(batch)]
+                while len(batch) < self._batch_size and len(self._pending_retained) > 0:
+                    topic, payload = self._pending_retained.popitem(last=False)
+                    batch.append((topic, payload, True))
+                count = len(self._pending_retained) + len(self._pending_events)
+                self._pending_since = monotonic() if count > 0 else None
+
+            for topic, payload, retain in batch:
+                try:
+                    self._client.publish(topic, payload, self._qos, retain)
+                except Exception as err:
+                    _LOGGER.error("Publish error: {0}".format(err))
+            with self._stats_lock:
+                self._stats.published += len(batch)
+                self._stats.batches += 1
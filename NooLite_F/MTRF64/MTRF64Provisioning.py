@@ -0,0 +1,417 @@
+import logging
+
+from bisect import insort
+from queue import Queue, Empty
+from threading import Thread, Lock
+from time import monotonic
+from typing import Callable, Iterable, List
+
+from NooLite_F import ModuleMode, Deadline
+from NooLite_F.MTRF64.MTRF64Adapter import IncomingData, Command, Mode, ResponseCode
+
+
+_LOGGER = logging.getLogger("MTRF64Provisioning")
+
+# Number of channels in each adapter memory (remote controls and sensors, modules)
+CHANNELS = 64
+
+
+class ProvisioningError(Exception):
+    """ Provisioning can't be continued, e.g. there are no free channels. """
+
+
+class ProvisionedModule(object):
+    """ Remote control, sensor or module bound by Provisioner. """
+
+    def __init__(self, channel: int, module_id: int = None, receiver: bool = True, module_mode: ModuleMode = ModuleMode.NOOLITE_F):
+        """
+        :param channel: adapter channel.
+        :param module_id: NooLite-F id, None for NooLite transmitters which have no id.
+        :param receiver: True for remote controls and sensors (bound to adapter receiver), False for modules.
+        :param module_mode: NooLite or NooLite-F.
+        """
+        self.channel = channel
+        self.module_id = module_id
+        self.receiver = receiver
+        self.module_mode = module_mode
+        self.verified = False
+        self.bound_at = monotonic()
+
+    def __repr__(self):
+        return "<ProvisionedModule (0x{0:x}), channel: {1}, id: {2}, receiver: {3}, mode: {4}, verified: {5}>" \
+            .format(id(self), self.channel, None if self.module_id is None else hex(self.module_id), self.receiver, self.module_mode, self.verified)
+
+
+class ProvisioningStats(object):
+    windows = 0
+    bound = 0
+    verified = 0
+    failed = 0
+    expired = 0
+    unbound = 0
+    cleared = 0
+    duration = 0.0
+
+    @property
+    def modules_per_minute(self) -> float:
+        """ Bound modules per minute of provisioning runs. """
+        return self.bound * 60 / self.duration if self.duration > 0 else 0.0
+
+    def copy(self) -> 'ProvisioningStats':
+        stats = ProvisioningStats()
+        stats.__dict__.update(self.__dict__)
+        return stats
+
+    def __repr__(self):
+        return "<ProvisioningStats (0x{0:x}), windows: {1}, bound: {2}, verified: {3}, failed: {4}, expired: {5}, unbound: {6}, cleared: {7}, modules per minute: {8:.1f}>" \
+            .format(id(self), self.windows, self.bound, self.verified, self.failed, self.expired, self.unbound, self.cleared, self.modules_per_minute)
+
+
+class ChannelAllocator(object):
+    """ Free channels of one adapter memory. Adapter memory can't be read, so channels which are already used should
+    be passed as used.
+    """
+
+    def __init__(self, channels: Iterable[int] = range(CHANNELS), used: Iterable[int] = ()):
+        self._lock = Lock()
+        self._channels = sorted(set(channels))
+        self._free = sorted(set(channels) - set(used))
+
+    def allocate(self) -> int:
+        """ Returns the lowest free channel.
+
+        :raises ProvisioningError: if there are no free channels.
+        """
+        with self._lock:
+            if len(self._free) == 0:
+                raise ProvisioningError("No free channels")
+            return self._free.pop(0)
+
+    def reserve(self, channel: int):
+        with self._lock:
+            if channel in self._free:
+                self._free.remove(channel)
+
+    def release(self, channel: int):
+        with self._lock:
+            if channel not in self._free:
+                insort(self._free, channel)
+
+    def reset(self):
+        """ Release all channels, e.g. after adapter memory is cleared. """
+        with self._lock:
+            self._free = list(self._channels)
+
+    @property
+    def free(self) -> List[int]:
+        with self._lock:
+            return list(self._free)
+
+    def __repr__(self):
+        return "<ChannelAllocator (0x{0:x}), free: {1}>".format(id(self), len(self._free))
+
+
+class _BindWindow(object):
+    __slots__ = ("mode", "channel", "requests", "events")
+
+    def __init__(self, mode: Mode, channel: int, events: Queue = None):
+        self.mode = mode
+        self.channel = channel
+        self.requests = Queue()
+        # other events of the run, bound transmitters are verified by them
+        self.events = events if events is not None else Queue()
+
+
+class Provisioner(object):
+    """ Binds and unbinds many remote controls, sensors and modules of MTRF64Controller.
+
+    Bind runs as a pipeline. Each transmitter or module gets the next free channel. When the bind request is taken
+    from the incoming stream (or the module answers the bind command), the next channel is allocated and its bind
+    window is opened at once, while bound modules are verified by the worker thread and bound transmitters by their
+    first event. The run is over when the required number of modules is bound or nobody is bound within the bind window.
+    """
+
+    def __init__(self, controller, receiver_channels: ChannelAllocator = None, module_channels: ChannelAllocator = None,
+                 bind_window: float = 30.0, verify_timeout: float = 2.0):
+        """
+        :param controller: MTRF64Controller of the adapter.
+        :param receiver_channels: free channels for remote controls and sensors. If None, all channels are free.
+        :param module_channels: free channels for modules. If None, all channels are free.
+        :param bind_window: time in seconds to wait for the next bind request.
+        :param verify_timeout: maximal time in seconds of each module verification request and time to wait for the first
+        event of the transmitters which are not verified when the bind run is over.
+        """
+        self._controller = controller
+        self._receiver_channels = receiver_channels if receiver_channels is not None else ChannelAllocator()
+        self._module_channels = module_channels if module_channels is not None else ChannelAllocator()
+        self._bind_window = bind_window
+        self._verify_timeout = verify_timeout
+        self._lock = Lock()
+        self._stats = ProvisioningStats()
+        self._modules = []
+        self._window = None
+
+    def bind_transmitters(self, count: int, module_mode: ModuleMode = ModuleMode.NOOLITE_F, on_bound: Callable[[ProvisionedModule], None] = None,
+                          bind_window: float = None) -> List[ProvisionedModule]:
+        """ Bind remote controls and sensors: send bind command from them (e.g. press service button) one by one.
+
+        The bind request only shows that adapter memory is written. Transmitter is verified when its first event after
+        the bind (e.g. the next button press or sensor reading) is received in the channel, while the next transmitters
+        are bound or within verify timeout after the run.
+
+        :param count: maximal number of transmitters to bind.
+        :param module_mode: NooLite or NooLite-F transmitters.
+        :param on_bound: callable which accepts each ProvisionedModule as soon as it is bound.
+        :param bind_window: time in seconds to wait for each bind request. If None, provisioner bind window is used.
+        :return: bound transmitters, verified flag is set for transmitters which sent event in the channel after bind.
+        :raises ProvisioningError: if there are no free channels or adapter doesn't accept requests.
+        """
+        bind_window = bind_window if bind_window is not None else self._bind_window
+        mode = Mode.RX_F if module_mode == ModuleMode.NOOLITE_F else Mode.RX
+        bound = []
+        started_at = monotonic()
+        window = None
+        self._controller.add_event_sink(self)
+        try:
+            while len(bound) < count:
+                channel = self._receiver_channels.allocate()
+                window = _BindWindow(mode, channel, window.events if window is not None else None)
+                self._window = window
+                with self._lock:
+                    self._stats.windows += 1
+                if not self._controller.bind_mode_on(channel, module_mode):
+                    self._receiver_channels.release(channel)
+                    raise ProvisioningError("Adapter doesn't accept bind mode request")
+
+                try:
+                    request = window.requests.get(timeout=bind_window)
+                except Empty:
+                    request = None
+
+                if request is None:
+                    self._controller.bind_mode_off(channel, module_mode)
+                    self._receiver_channels.release(channel)
+                    with self._lock:
+                        self._stats.expired += 1
+                    break
+
+                module = ProvisionedModule(channel, request.id if mode == Mode.RX_F else None, True, module_mode)
+                self._add(module)
+                bound.append(module)
+                if on_bound is not None:
+                    on_bound(module)
+
+            if window is not None:
+                self._verify_transmitters(window, bound)
+        finally:
+            self._window = None
+            self._controller.remove_event_sink(self)
+            with self._lock:
+                self._stats.duration += monotonic() - started_at
+        return bound
+
+    def bind_modules(self, count: int, on_bound: Callable[[ProvisionedModule], None] = None, bind_window: float = None) -> List[ProvisionedModule]:
+        """ Bind NooLite-F modules in service mode (service button is pressed).
+
+        Bind command is sent to the next free channel until module answers. Modules which answer the same bind command
+        share the channel. Each bound module is verified by reading its state in the channel, while bind command is
+        sent to the next channel.
+
+        :param count: maximal number of modules to bind.
+        :param on_bound: callable which accepts each ProvisionedModule as soon as it answers the bind command.
+        :param bind_window: time in seconds to wait for the next module. If None, provisioner bind window is used.
+        :return: bound modules, verified flag is set for modules which answered in the channel after bind.
+        :raises ProvisioningError: if there are no free channels.
+        """
+        bind_window = bind_window if bind_window is not None else self._bind_window
+        bound = []
+        verifications = Queue()
+        verifier = Thread(target=self._verify_modules, args=(verifications,))
+        verifier.daemon = True
+        verifier.start()
+
+        started_at = monotonic()
+        channel = None
+        try:
+            deadline = Deadline(bind_window)
+            while len(bound) < count and not deadline.expired:
+                if channel is None:
+                    channel = self._module_channels.allocate()
+                    with self._lock:
+                        self._stats.windows += 1
+
+                answered = [info for status, info, state in self._controller.bind(channel=channel, timeout=deadline)
+                            if status and info is not None]
+                if len(answered) == 0:
+                    # adapter answers after module answer timeout, so bind commands are not sent too often
+                    continue
+
+                for info in answered[:count - len(bound)]:
+                    module = ProvisionedModule(channel, info.id, False, ModuleMode.NOOLITE_F)
+                    self._add(module)
+                    bound.append(module)
+                    verifications.put(module)
+                    if on_bound is not None:
+                        on_bound(module)
+                channel = None
+                deadline = Deadline(bind_window)
+        finally:
+            if channel is not None:
+                self._module_channels.release(channel)
+                with self._lock:
+                    self._stats.expired += 1
+            verifications.put(None)
+            verifier.join()
+            with self._lock:
+                self._stats.duration += monotonic() - started_at
+        return bound
+
+    def unbind(self, modules: Iterable[ProvisionedModule]) -> List[ProvisionedModule]:
+        """ Unbind modules and release their channels.
+
+        Modules are verified by reading their state, they should not answer in the channel anymore. Adapter doesn't
+        answer requests to its receiver memory and the memory can't be read, so unbinding of remote controls and
+        sensors is not verified: it is done when the request is written to the adapter.
+
+        :return: modules which unbinding is not verified, their channels stay allocated.
+        """
+        failed = []
+        for module in modules:
+            if module.receiver:
+                if module.module_id is not None:
+                    done = self._controller.unbind_address(module.module_id, module.channel)
+                else:
+                    done = self._controller.clear_channel(module.channel, module.module_mode)
+            else:
+                self._controller.unbind(module_id=module.module_id, channel=module.channel, timeout=self._verify_timeout)
+                done = not self._answers(module.module_id, module.channel)
+
+            if not done:
+                _LOGGER.warning("Unbind is not verified: {0}".format(module))
+                failed.append(module)
+                continue
+            self._remove(lambda item: item is module)
+            with self._lock:
+                self._stats.unbound += 1
+        return failed
+
+    def clear_channels(self, channels: Iterable[int], receiver: bool = True, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[int]:
+        """ Remove all bindings of the channels and release them.
+
+        Modules of the channel are unbound before the channel is cleared and verified by reading the state of the channel.
+        Clearing of receiver channels is done when the request is written to the adapter, it can't be verified.
+
+        :param receiver: clear channels of remote controls and sensors if True, otherwise channels of modules.
+        :return: channels which clearing is not verified.
+        """
+        failed = []
+        for channel in channels:
+            if receiver:
+                done = self._controller.clear_channel(channel, module_mode, receiver=True)
+            else:
+                self._controller.unbind(channel=channel, module_mode=module_mode, timeout=self._verify_timeout)
+                done = self._controller.clear_channel(channel, module_mode, receiver=False) and not self._answers(None, channel)
+
+            if not done:
+                _LOGGER.warning("Channel {0} clearing is not verified".format(channel))
+                failed.append(channel)
+                continue
+            self._remove(lambda item: item.channel == channel and item.receiver == receiver)
+            (self._receiver_channels if receiver else self._module_channels).release(channel)
+            with self._lock:
+                self._stats.cleared += 1
+        return failed
+
+    def clear_memory(self, receiver: bool = True, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> bool:
+        """ Remove bindings of all channels from the adapter memory and release all channels of it.
+
+        :return: True if the request is accepted by the adapter (modules) or written to it (remote controls and sensors).
+        """
+        if not self._controller.clear_memory(module_mode, receiver):
+            return False
+        self._remove(lambda item: item.receiver == receiver)
+        (self._receiver_channels if receiver else self._module_channels).reset()
+        with self._lock:
+            self._stats.cleared += CHANNELS
+        return True
+
+    def modules(self) -> List[ProvisionedModule]:
+        """ Returns modules bound by this provisioner and not unbound yet. """
+        with self._lock:
+            return list(self._modules)
+
+    def stats(self) -> ProvisioningStats:
+        with self._lock:
+            return self._stats.copy()
+
+    def __call__(self, data: IncomingData):
+        # Called from controller listener thread as event sink
+        window = self._window
+        if window is None or data.mode != window.mode:
+            return
+        if data.status == ResponseCode.BIND_SUCCESS or data.command == Command.BIND:
+            if data.channel == window.channel:
+                window.requests.put(data)
+            return
+        # channels are free before the bind, so any event of the channel is received after the bind
+        window.events.put(data)
+
+    # Private
+    def _verify_transmitters(self, window: _BindWindow, modules: List[ProvisionedModule]):
+        """ Matches events of the run to the bound transmitters, waits for the first event of the transmitters which
+        are not verified yet within verify timeout.
+        """
+        unverified = {module.channel: module for module in modules}
+        deadline = Deadline(self._verify_timeout)
+        while len(unverified) > 0:
+            try:
+                data = window.events.get(timeout=deadline.remaining())
+            except Empty:
+                break
+            module = unverified.get(data.channel)
+            if module is not None and (module.module_id is None or module.module_id == data.id):
+                module.verified = True
+                del unverified[data.channel]
+        self._window = None
+
+        with self._lock:
+            self._stats.verified += len(modules) - len(unverified)
+            self._stats.failed += len(unverified)
+        for module in unverified.values():
+            _LOGGER.warning("Transmitter doesn't send events after bind: {0}".format(module))
+
+    def _answers(self, module_id: int, channel: int) -> bool:
+        responses = self._controller.read_state(module_id=module_id, channel=channel, timeout=self._verify_timeout)
+        return any(status for status, info, state in responses)
+
+    def _verify_modules(self, modules: Queue):
+        while True:
+            module = modules.get()
+            if module is None:
+                return
+            module.verified = self._answers(module.module_id, module.channel)
+            with self._lock:
+                if module.verified:
+                    self._stats.verified += 1
+                else:
+                    self._stats.failed += 1
+            if not module.verified:
+                _LOGGER.warning("Module doesn't answer after bind: {0}".format(module))
+
+    def _add(self, module: ProvisionedModule):
+        with self._lock:
+            self._modules.append(module)
+            self._stats.bound += 1
+            if module.verified:
+                self._stats.verified += 1
+
+    def _remove(self, condition) -> List[ProvisionedModule]:
+        with self._lock:
+            removed = [item for item in self._modules if condition(item)]
+            self._modules = [item for item in self._modules if not condition(item)]
+        for module in removed:
+            if module.receiver:
+                self._receiver_channels.release(module.channel)
+            elif not any(item.channel == module.channel and not item.receiver for item in self._modules):
+                self._module_channels.release(module.channel)
+        return removed
@@ -0,0 +1,164 @@
+from collections import deque
+from enum import Enum
+from queue import Empty
+from threading import Condition
+from time import monotonic
+from typing import Callable, Hashable, Iterable
+
+
+class OverflowPolicy(Enum):
+    DROP_OLDEST = 0     # the oldest item is dropped to free space for the new one
+    DROP_NEWEST = 1     # the new item is dropped
+    BLOCK = 2           # producer (reader thread) waits for free space, the new item is dropped after block_timeout
+
+
+class QueueStats(object):
+    capacity = 0
+    depth = 0
+    high_water = 0
+    received = 0
+    overflow = 0
+    stale = 0
+
+    def copy(self) -> 'QueueStats':
+        stats = QueueStats()
+        stats.__dict__.update(self.__dict__)
+        return stats
+
+    def __repr__(self):
+        return "<QueueStats (0x{0:x}), capacity: {1}, depth: {2}, high water: {3}, received: {4}, overflow: {5}, stale: {6}>" \
+            .format(id(self), self.capacity, self.depth, self.high_water, self.received, self.overflow, self.stale)
+
+
+def stale_key(commands: Iterable[int]) -> Callable[[object], Hashable]:
+    """ Returns key function for EventQueue which makes queued event of the listed commands stale when newer event
+    of the same command from the same sensor (mode, channel and id) arrives.
+    """
+    commands = frozenset(commands)
+
+    def key(data):
+        if data.command in commands:
+            return data.mode, data.channel, data.command, data.id
+        return None
+
+    return key
+
+
+class EventQueue(object):
+    """ Bounded FIFO queue of adapter packets.
+
+    When queue is full, overflow policy is applied. If key function is specified, an item with the same key as
+    queued one replaces it in place (older item is stale), so slow consumer gets only the latest value.
+    """
+
+    def __init__(self, capacity: int = 1024, overflow: OverflowPolicy = OverflowPolicy.DROP_OLDEST, key: Callable[[object], Hashable] = None,
+                 block_timeout: float = 1.0):
+        """
+        :param capacity: maximal number of queued items.
+        :param overflow: what to do when queue is full.
+        :param key: function which returns key of item or None. Queued item is replaced by the new item with the same key.
+        :param block_timeout: maximal wait time in seconds for BLOCK overflow policy.
+        """
+        if capacity < 1:
+            raise ValueError("Capacity should be positive: {0}".format(capacity))
+        self._capacity = capacity
+        self._overflow = overflow
+        self._key = key
+        self._block_timeout = block_timeout
+        self._condition = Condition()
+        # each slot is [key, item], so item can be replaced without moving it in the queue
+        self._slots = deque()
+        self._keys = {}
+        self._stats = QueueStats()
+        self._stats.capacity = capacity
+        self._is_closed = False
+
+    def put(self, item) -> bool:
+        """ Add item to the queue.
+
+        :return: False if item is dropped because of overflow.
+        """
+        key = self._key(item) if self._key is not None else None
+        with self._condition:
+            self._stats.received += 1
+            if key is not None:
+                slot = self._keys.get(key)
+                if slot is not None:
+                    slot[1] = item
+                    self._stats.stale += 1
+                    return True
+
+            if len(self._slots) >= self._capacity:
+                if self._overflow == OverflowPolicy.DROP_OLDEST:
+                    self._remove(self._slots.popleft())
+                    self._stats.overflow += 1
+                elif self._overflow == OverflowPolicy.BLOCK:
+                    until = monotonic() + self._block_timeout
+                    while len(self._slots) >= self._capacity and not self._is_closed:
+                        remaining = until - monotonic()
+                        if remaining <= 0:
+                            break
+                        self._condition.wait(remaining)
+
+                if len(self._slots) >= self._capacity:
+                    self._stats.overflow += 1
+                    return False
+
+            slot = [key, item]
+            self._slots.append(slot)
+            if key is not None:
+                self._keys[key] = slot
+            self._stats.depth = len(self._slots)
+            self._stats.high_water = max(self._stats.high_water, self._stats.depth)
+            self._condition.notify_all()
+            return True
+
+    def get(self, timeout: float = None):
+        """ Remove and return the oldest item. Returns None if queue is closed.
+
+        :raises Empty: if no item is available within timeout.
+        """
+        with self._condition:
+            until = None if timeout is None else monotonic() + timeout
+            while len(self._slots) == 0:
+                if self._is_closed:
+                    return None
+                remaining = None
+                if until is not None:
+                    remaining = until - monotonic()
+                    if remaining <= 0:
+                        raise Empty()
+                self._condition.wait(remaining)
+
+            slot = self._slots.popleft()
+            self._remove(slot)
+            self._stats.depth = len(self._slots)
+            self._condition.notify_all()
+            return slot[1]
+
+    def clear(self):
+        with self._condition:
+            self._slots.clear()
+            self._keys.clear()
+            self._stats.depth = 0
+            self._condition.notify_all()
+
+    def close(self):
+        """ Wake up all consumers, get returns None when queue is empty. """
+        with self._condition:
+            self._is_closed = True
+            self._condition.notify_all()
+
+    def stats(self) -> QueueStats:
+        with self._condition:
+            return self._stats.copy()
+
+    def __len__(self):
+        with self._condition:
+            return len(self._slots)
+
+    # Private
+    def _remove(self, slot: list):
+        key = slot[0]
+        if key is not None and self._keys.get(key) is slot:
+            del self._keys[key]
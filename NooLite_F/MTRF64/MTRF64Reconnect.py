@@ -0,0 +1,83 @@
+import glob
+import os
+
+from enum import Enum
+from typing import Callable
+
+
+class PendingPolicy(Enum):
+    BUFFER = 0      # commands wait until the port is reopened (or their deadline is over)
+    FAIL_FAST = 1   # commands return empty responses list immediately while the port is closed
+
+
+class ReconnectPolicy(object):
+    """ Describes how adapter reopens the serial port after failure (e.g. USB stick is unplugged or reset). """
+
+    def __init__(self, delay: float = 0.5, backoff: float = 2.0, max_delay: float = 10.0, pending: PendingPolicy = PendingPolicy.BUFFER,
+                 buffer_timeout: float = 30.0, port_resolver: Callable[[], str] = None):
+        """
+        :param delay: delay before the first reopen attempt in seconds.
+        :param backoff: multiplier applied to the delay after each failed attempt.
+        :param max_delay: upper limit of the delay between attempts in seconds.
+        :param pending: what to do with commands sent while the port is closed.
+        :param buffer_timeout: maximal time in seconds the buffered command waits for reconnection.
+        :param port_resolver: function which returns current port path. Use it when device path can change after
+        re-enumeration, e.g. lambda: find_port("MTRF-64 serial number"). If None, the original port is reopened.
+        """
+        self.delay = delay
+        self.backoff = backoff
+        self.max_delay = max_delay
+        self.pending = pending
+        self.buffer_timeout = buffer_timeout
+        self.port_resolver = port_resolver
+
+    def retry_delay(self, attempt: int) -> float:
+        return min(self.delay * (self.backoff ** attempt), self.max_delay)
+
+    def __repr__(self):
+        return "<ReconnectPolicy (0x{0:x}), delay: {1}, backoff: {2}, max delay: {3}, pending: {4}>" \
+            .format(id(self), self.delay, self.backoff, self.max_delay, self.pending)
+
+
+class ConnectionStats(object):
+    connected = True
+    disconnects = 0
+    reconnects = 0
+    attempts = 0
+    last_error = None
+    last_outage = None
+    total_outage = 0.0
+
+    def copy(self) -> 'ConnectionStats':
+        stats = ConnectionStats()
+        stats.__dict__.update(self.__dict__)
+        return stats
+
+    def __repr__(self):
+        return "<ConnectionStats (0x{0:x}), connected: {1}, disconnects: {2}, reconnects: {3}, last outage: {4}, total outage: {5}>" \
+            .format(id(self), self.connected, self.disconnects, self.reconnects, self.last_outage, self.total_outage)
+
+
+def find_port(stable_id: str) -> str:
+    """ Find the current device path of the adapter by stable id.
+
+    Stable id can be the path in /dev/serial/by-id (or its part) or the USB serial number / hardware id of the device.
+
+    :return: device path or None if device is not connected.
+    """
+    if os.path.exists(stable_id):
+        return os.path.realpath(stable_id)
+
+    for path in glob.glob("/dev/serial/by-id/*"):
+        if stable_id in os.path.basename(path):
+            return os.path.realpath(path)
+
+    try:
+        from serial.tools.list_ports import comports
+    except ImportError:
+        return None
+
+    for port in comports():
+        if port.serial_number == stable_id or stable_id in (port.hwid or ""):
+            return port.device
+    return None
@@ -0,0 +1,205 @@
+import logging
+
+from enum import Enum
+from threading import Lock
+from time import monotonic
+
+from NooLite_F.MTRF64.MTRF64Adapter import Command, Mode, ResponseCode, IncomingData, OutgoingData
+
+
+_LOGGER = logging.getLogger("MTRF64Retry")
+
+
+class CommandClass(Enum):
+    CONTROL = 0
+    STATE = 1
+    CONFIG = 2
+    SERVICE = 3
+
+
+class CircuitState(Enum):
+    CLOSED = 0
+    OPEN = 1
+    HALF_OPEN = 2
+
+
+def command_class(command: Command, fmt: int = 0) -> CommandClass:
+    """ Returns the class of the command, used to select the retry policy for it.
+
+    :param command: the command.
+    :param fmt: the command format.
+    :return: the command class.
+    """
+    if command == Command.WRITE_STATE or (command == Command.READ_STATE and fmt in (16, 17)):
+        return CommandClass.CONFIG
+    if command == Command.READ_STATE:
+        return CommandClass.STATE
+    if command in (Command.BIND, Command.UNBIND, Command.SERVICE, Command.CLEAR_MEMORY):
+        return CommandClass.SERVICE
+    return CommandClass.CONTROL
+
+
+class RetryPolicy(object):
+    """ Describes how many times and how often the command is resent when module does not answer.
+
+    Note: the command is resent when no answer was received, so it may be delivered to the module several times.
+    Use retries for non idempotent commands (switch, brightness tune, etc.) carefully.
+    """
+
+    def __init__(self, attempts: int = 1, delay: float = 0.1, backoff: float = 2.0, max_delay: float = 2.0):
+        """
+        :param attempts: total number of attempts to send command (1 - no retries).
+        :param delay: delay before the first retry in seconds.
+        :param backoff: multiplier applied to the delay after each retry.
+        :param max_delay: upper limit of the delay between retries in seconds.
+        """
+        self.attempts = max(1, attempts)
+        self.delay = delay
+        self.backoff = backoff
+        self.max_delay = max_delay
+
+    def retry_delay(self, retry: int) -> float:
+        """ Returns delay before the retry.
+
+        :param retry: number of the retry (starting from 0).
+        :return: delay in seconds.
+        """
+        return min(self.delay * (self.backoff ** retry), self.max_delay)
+
+    def __repr__(self):
+        return "<RetryPolicy (0x{0:x}), attempts: {1}, delay: {2}, backoff: {3}, max delay: {4}>" \
+            .format(id(self), self.attempts, self.delay, self.backoff, self.max_delay)
+
+
+NO_RETRY = RetryPolicy()
+
+
+class CircuitBreaker(object):
+    """ Tracks failures of one module and stops sending commands to it after several failures in a row.
+
+    When the breaker is open, commands to the module fail immediately. After reset_timeout the breaker
+    lets exactly one command through (half open state): success closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        """
+        :param failure_threshold: number of failures in a row after which breaker opens.
+        :param reset_timeout: time in seconds after which the probe command is allowed.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probe_in_progress = False
+        self._lock = Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == CircuitState.CLOSED:
+                return True
+
+            if self.state == CircuitState.OPEN and monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = CircuitState.HALF_OPEN
+                self._probe_in_progress = False
+
+            if self.state == CircuitState.HALF_OPEN and not self._probe_in_progress:
+                self._probe_in_progress = True
+                return True
+
+            return False
+
+    def on_success(self):
+        with self._lock:
+            self.failures = 0
+            self.state = CircuitState.CLOSED
+            self._probe_in_progress = False
+
+    def on_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_progress = False
+            if self.state == CircuitState.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != CircuitState.OPEN:
+                    _LOGGER.warning("Circuit breaker opened after {0} failures".format(self.failures))
+                self.state = CircuitState.OPEN
+                self._opened_at = monotonic()
+
+    def on_abort(self):
+        """ The command is finished without result, e.g. it is cancelled by caller or the port failed.
+
+        The probe of half open breaker is over, so the breaker is open again. Failure is not counted and reset timeout
+        is not restarted, so the next command is the new probe.
+        """
+        with self._lock:
+            if self.state == CircuitState.HALF_OPEN and self._probe_in_progress:
+                self._probe_in_progress = False
+                self.state = CircuitState.OPEN
+
+    def __repr__(self):
+        return "<CircuitBreaker (0x{0:x}), state: {1}, failures: {2}>".format(id(self), self.state, self.failures)
+
+
+class CircuitBreakerRegistry(object):
+    """ Keeps circuit breakers for all addressed modules.
+
+    The breaker key is the module id if it specified, otherwise the channel number.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers = {}
+        self._lock = Lock()
+
+    @staticmethod
+    def key(data: OutgoingData):
+        if data.id:
+            return "id", data.id
+        return "channel", data.channel
+
+    def breaker(self, data: OutgoingData) -> CircuitBreaker:
+        key = self.key(data)
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+                self._breakers[key] = breaker
+        return breaker
+
+    def state(self, module_id: int = None, channel: int = None) -> CircuitState:
+        key = ("id", module_id) if module_id else ("channel", channel)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            return CircuitState.CLOSED
+        return breaker.state
+
+    def reset(self):
+        with self._lock:
+            self._breakers = {}
+
+
+def is_failed(data: OutgoingData, responses: [IncomingData]) -> bool:
+    """ Checks that the command was not delivered.
+
+    For NooLite modules adapter does not get an answer from module, so only missed adapter response is a failure.
+    """
+    if len(responses) == 0:
+        return True
+    if data.mode != Mode.TX_F:
+        return False
+    return all(response.status in (ResponseCode.NO_RESPONSE, ResponseCode.ERROR) for response in responses)
+
+
+def no_response(data: OutgoingData) -> IncomingData:
+    """ Builds the response which is returned to caller when command is rejected by open circuit breaker. """
+    response = IncomingData()
+    response.mode = data.mode
+    response.status = ResponseCode.NO_RESPONSE
+    response.count = 0
+    response.channel = data.channel
+    response.command = data.command
+    response.format = data.format
+    response.data = bytes(4)
+    response.id = data.id
+    return response
@@ -0,0 +1,322 @@
+import logging
+
+from queue import Queue
+from threading import Thread, Lock
+from time import monotonic
+from typing import Callable, Iterable, List
+
+from NooLite_F import Deadline
+from NooLite_F.MTRF64.MTRF64Adapter import IncomingData, Command
+from NooLite_F.MTRF64.MTRF64EventStore import decode_values
+
+
+_LOGGER = logging.getLogger("MTRF64Rules")
+
+# Names of decoded values (see decode_values) which can be used in triggers
+_VALUE_INDEXES = {
+    "temperature": 0,
+    "humidity": 1,
+    "analog": 2,
+    "battery": 3,
+    "duration": 0,
+    "brightness": 0,
+    "red": 0,
+    "green": 1,
+    "blue": 2,
+    "step": 0,
+}
+
+
+class Trigger(object):
+    """ Condition over incoming event.
+
+    Event matches trigger if it is received on the channel with the command and the decoded value (if specified)
+    is above and/or below the thresholds. Threshold triggers fire on edge by default: only when the value crosses
+    the threshold, not for every reading which is over it.
+    """
+
+    def __init__(self, channel: int, command: Command, value: str = None, above: float = None, below: float = None,
+                 condition: Callable[[IncomingData], bool] = None, edge: bool = None):
+        """
+        :param channel: channel of the remote control or sensor.
+        :param command: command of the event, e.g. Command.ON or Command.SENS_TEMP_HUMI.
+        :param value: name of decoded value: temperature, humidity, analog, battery, duration, brightness, red, green, blue, step.
+        :param above: event matches if value is greater than this threshold.
+        :param below: event matches if value is less than this threshold.
+        :param condition: additional condition over the raw event.
+        :param edge: fire only when condition becomes true. By default True for value triggers and False for others.
+        """
+        if value is not None and value not in _VALUE_INDEXES:
+            raise ValueError("Unknown value: {0}".format(value))
+        if value is None and (above is not None or below is not None):
+            raise ValueError("Value is required for thresholds")
+        self.channel = channel
+        self.command = command
+        self.value = value
+        self.above = above
+        self.below = below
+        self.condition = condition
+        self.edge = edge if edge is not None else value is not None
+
+    def compile(self) -> Callable[[IncomingData, tuple], bool]:
+        """ Returns predicate of the event and its decoded values, channel and command are checked by the engine index. """
+        condition = self.condition
+        if self.value is None:
+            if condition is None:
+                return _always
+            return lambda data, values: condition(data)
+
+        index = _VALUE_INDEXES[self.value]
+        above = self.above
+        below = self.below
+
+        def predicate(data: IncomingData, values: tuple) -> bool:
+            value = values[index]
+            # NaN is not comparable, so missed value never matches
+            if value != value:
+                return False
+            if above is not None and not value > above:
+                return False
+            if below is not None and not value < below:
+                return False
+            return condition is None or condition(data)
+
+        return predicate
+
+    def __repr__(self):
+        return "<Trigger (0x{0:x}), channel: {1}, command: {2}, value: {3}, above: {4}, below: {5}, edge: {6}>" \
+            .format(id(self), self.channel, self.command, self.value, self.above, self.below, self.edge)
+
+
+def _always(data: IncomingData, values: tuple) -> bool:
+    return True
+
+
+class Rule(object):
+    """ Calls module methods when trigger fires, e.g. Rule("hall light", Trigger(5, Command.ON), [(lamp, "on")]). """
+
+    def __init__(self, name: str, trigger: Trigger, actions: Iterable[tuple], cooldown: float = 0.0):
+        """
+        :param name: unique rule name.
+        :param trigger: condition over incoming event.
+        :param actions: (module, method name, *args) tuples, e.g. (dimmer, "set_brightness", 0.5).
+        :param cooldown: minimal time in seconds between rule firings.
+        """
+        self.name = name
+        self.trigger = trigger
+        self.actions = [tuple(action) for action in actions]
+        self.cooldown = cooldown
+        for action in self.actions:
+            if not callable(getattr(action[0], action[1], None)):
+                raise ValueError("Module {0} has no method {1}".format(action[0], action[1]))
+
+    def __repr__(self):
+        return "<Rule (0x{0:x}), name: {1}, trigger: {2}, actions: {3}>".format(id(self), self.name, self.trigger, len(self.actions))
+
+
+class RuleStats(object):
+    events = 0
+    evaluated = 0
+    fired = 0
+    executed = 0
+    failed = 0
+    expired = 0
+    reloads = 0
+    total_latency = 0.0
+    max_latency = 0.0
+
+    @property
+    def average_latency(self) -> float:
+        """ Average time in seconds from event reception till action start. """
+        return self.total_latency / self.executed if self.executed > 0 else 0.0
+
+    def copy(self) -> 'RuleStats':
+        stats = RuleStats()
+        stats.__dict__.update(self.__dict__)
+        return stats
+
+    def __repr__(self):
+        return "<RuleStats (0x{0:x}), events: {1}, evaluated: {2}, fired: {3}, executed: {4}, failed: {5}, expired: {6}, average latency: {7:.4f}, max latency: {8:.4f}>" \
+            .format(id(self), self.events, self.evaluated, self.fired, self.executed, self.failed, self.expired, self.average_latency, self.max_latency)
+
+
+class _CompiledRule(object):
+    __slots__ = ("rule", "predicate", "edge", "cooldown", "active", "fired_at")
+
+    def __init__(self, rule: Rule):
+        self.rule = rule
+        self.predicate = rule.trigger.compile()
+        self.edge = rule.trigger.edge
+        self.cooldown = rule.cooldown
+        self.active = False
+        self.fired_at = None
+
+
+class RulesEngine(object):
+    """ Evaluates automation rules for incoming events of MTRF64Controller.
+
+    Rules are compiled into index keyed by (channel, command), so each event is checked only against the rules of its
+    channel and command. The index is replaced at once on reload, events are never stopped. Rule actions are executed
+    by engine workers, so listeners are not blocked by the radio. Control commands are sent by controller with the
+    interactive priority. Actions of a fired rule are executed one after another in the listed order, actions which
+    were not started within action timeout are dropped.
+    """
+
+    def __init__(self, controller, rules: Iterable[Rule] = (), action_timeout: float = 2.0, workers: int = 2):
+        """
+        :param controller: MTRF64Controller which events are evaluated.
+        :param rules: initial rules.
+        :param action_timeout: maximal time in seconds from event reception till action is sent to the adapter.
+        :param workers: number of threads which execute fired rules, different rules are executed concurrently.
+        """
+        self._controller = controller
+        self._action_timeout = action_timeout
+        self._lock = Lock()
+        self._stats = RuleStats()
+        self._rules = {}
+        self._index = {}
+        self._actions = Queue()
+        self._workers = []
+        for i in range(workers):
+            worker = Thread(target=self._work)
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+
+        self.load(rules)
+        self._controller.add_event_sink(self)
+
+    def load(self, rules: Iterable[Rule]):
+        """ Replace all rules. State of the rules with the same name (edge and cooldown) is kept. """
+        with self._lock:
+            previous = self._rules
+            compiled = {}
+            for rule in rules:
+                if rule.name in compiled:
+                    raise ValueError("Duplicated rule name: {0}".format(rule.name))
+                compiled[rule.name] = self._compile(rule, previous.get(rule.name))
+            self._install(compiled)
+            self._stats.reloads += 1
+
+    def add(self, rule: Rule):
+        """ Add rule or replace the rule with the same name. State of the replaced rule (edge and cooldown) is kept. """
+        with self._lock:
+            compiled = dict(self._rules)
+            compiled[rule.name] = self._compile(rule, compiled.get(rule.name))
+            self._install(compiled)
+
+    def remove(self, name: str):
+        with self._lock:
+            compiled = dict(self._rules)
+            compiled.pop(name, None)
+            self._install(compiled)
+
+    def rules(self) -> List[Rule]:
+        return [item.rule for item in self._rules.values()]
+
+    def stop(self):
+        """ Stop evaluating events and wait until queued actions are done. """
+        self._controller.remove_event_sink(self)
+        for worker in self._workers:
+            self._actions.put(None)
+        for worker in self._workers:
+            worker.join()
+
+    def stats(self) -> RuleStats:
+        with self._lock:
+            return self._stats.copy()
+
+    def __call__(self, data: IncomingData):
+        # Called from controller listener thread as event sink
+        received_at = monotonic()
+        index = self._index
+        rules = index.get((data.channel, data.command))
+        with self._lock:
+            self._stats.events += 1
+        if rules is None:
+            return
+
+        # values are decoded once for all rules of the channel and command
+        values = decode_values(data)
+        fired = []
+        failed = 0
+        for item in rules:
+            try:
+                matched = item.predicate(data, values)
+            except Exception as err:
+                # error in the user condition doesn't stop evaluation of other rules, the rule is not matched
+                _LOGGER.error("Rule {0} condition error: {1}".format(item.rule.name, err))
+                failed += 1
+                matched = False
+            if item.edge:
+                was_active = item.active
+                item.active = matched
+                if was_active:
+                    continue
+            if not matched:
+                continue
+            if item.cooldown > 0 and item.fired_at is not None and received_at - item.fired_at < item.cooldown:
+                continue
+            item.fired_at = received_at
+            fired.append(item.rule)
+
+        with self._lock:
+            self._stats.evaluated += len(rules)
+            self._stats.fired += len(fired)
+            self._stats.failed += failed
+
+        # actions of the rule are executed by one worker, so they are sent in order
+        for rule in fired:
+            self._actions.put((rule, Deadline(self._action_timeout), received_at))
+
+    # Private
+    @staticmethod
+    def _compile(rule: Rule, previous: _CompiledRule = None) -> _CompiledRule:
+        item = _CompiledRule(rule)
+        if previous is not None:
+            item.active = previous.active
+            item.fired_at = previous.fired_at
+        return item
+
+    def _install(self, compiled: dict):
+        index = {}
+        for item in compiled.values():
+            key = (item.rule.trigger.channel, item.rule.trigger.command)
+            index[key] = index.get(key, ()) + (item,)
+        self._rules = compiled
+        # the index is replaced by one assignment, so event evaluation is not locked
+        self._index = index
+
+    def _work(self):
+        while True:
+            item = self._actions.get()
+            if item is None:
+                break
+            rule, deadline, received_at = item
+            for index, action in enumerate(rule.actions):
+                if deadline.expired:
+                    self._count_expired(rule, len(rule.actions) - index)
+                    break
+                self._execute(rule, action, deadline, received_at)
+
+    def _execute(self, rule: Rule, action: tuple, deadline: Deadline, received_at: float):
+        latency = monotonic() - received_at
+        module, method = action[0], action[1]
+        try:
+            getattr(module, method)(*action[2:], timeout=deadline)
+        except Exception as err:
+            # the failed action doesn't stop the following actions of the rule
+            _LOGGER.error("Rule {0} action {1} error: {2}".format(rule.name, method, err))
+            with self._lock:
+                self._stats.failed += 1
+            return
+
+        with self._lock:
+            self._stats.executed += 1
+            self._stats.total_latency += latency
+            self._stats.max_latency = max(self._stats.max_latency, latency)
+
+    def _count_expired(self, rule: Rule, count: int):
+        _LOGGER.warning("Rule {0}: {1} action(s) dropped, they waited too long".format(rule.name, count))
+        with self._lock:
+            self._stats.expired += count
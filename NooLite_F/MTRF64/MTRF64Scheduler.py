@@ -0,0 +1,156 @@
+from collections import deque
+from enum import IntEnum
+from threading import Condition
+from time import monotonic
+from typing import Dict
+
+from NooLite_F.NooLiteFController import Deadline
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    NORMAL = 1
+    BACKGROUND = 2
+
+
+DEFAULT_MAX_WAIT = {
+    Priority.NORMAL: 5.0,
+    Priority.BACKGROUND: 30.0,
+}
+
+
+class LaneStats(object):
+    """ Statistics of the scheduler lane. """
+    depth = 0
+    max_depth = 0
+    count = 0
+    total_wait = 0.0
+    max_wait = 0.0
+
+    @property
+    def average_wait(self) -> float:
+        if self.count == 0:
+            return 0.0
+        return self.total_wait / self.count
+
+    def copy(self) -> 'LaneStats':
+        stats = LaneStats()
+        stats.depth = self.depth
+        stats.max_depth = self.max_depth
+        stats.count = self.count
+        stats.total_wait = self.total_wait
+        stats.max_wait = self.max_wait
+        return stats
+
+    def __repr__(self):
+        return "<LaneStats (0x{0:x}), depth: {1}, max depth: {2}, count: {3}, average wait: {4:.3f}, max wait: {5:.3f}>" \
+            .format(id(self), self.depth, self.max_depth, self.count, self.average_wait, self.max_wait)
+
+
+class _Ticket(object):
+    def __init__(self, priority: Priority):
+        self.priority = priority
+        self.enqueued_at = monotonic()
+
+
+class PriorityScheduler(object):
+    """ Grants exclusive access to the adapter to requests in order of their priority.
+
+    Requests with the same priority are served in arrival order. To avoid starvation, the request which waits longer
+    than max_wait of its lane is served before requests of higher priority lanes.
+    """
+
+    def __init__(self, max_wait: Dict[Priority, float] = None):
+        """
+        :param max_wait: time in seconds for each lane after which waiting request is served out of priority order.
+        Lanes without max_wait (INTERACTIVE by default) are served only in priority order.
+        """
+        self._max_wait = dict(DEFAULT_MAX_WAIT)
+        if max_wait is not None:
+            self._max_wait.update(max_wait)
+
+        self._condition = Condition()
+        self._lanes = {priority: deque() for priority in Priority}
+        self._stats = {priority: LaneStats() for priority in Priority}
+        self._busy = False
+
+    def acquire(self, priority: Priority = Priority.NORMAL, deadline: Deadline = None) -> bool:
+        """ Wait until the request can use the adapter.
+
+        :param priority: request priority.
+        :param deadline: request deadline. If it is expired or cancelled while waiting, then access is not granted.
+        :return: True if access is granted, otherwise False. If True is returned, release() must be called.
+        """
+        if deadline is None:
+            deadline = Deadline()
+
+        ticket = _Ticket(priority)
+        lane = self._lanes[priority]
+        stats = self._stats[priority]
+
+        with self._condition:
+            lane.append(ticket)
+            stats.depth = len(lane)
+            stats.max_depth = max(stats.max_depth, stats.depth)
+
+            try:
+                while True:
+                    # request which is cancelled or expired is never granted, even if the adapter is free
+                    if deadline.cancelled:
+                        return False
+                    remaining = deadline.remaining()
+                    if remaining is not None and remaining <= 0:
+                        return False
+
+                    if not self._busy and self._next() is ticket:
+                        lane.popleft()
+                        self._busy = True
+                        self._record_wait(stats, monotonic() - ticket.enqueued_at)
+                        return True
+
+                    self._condition.wait(0.05 if remaining is None else min(0.05, remaining))
+            finally:
+                if ticket in lane:
+                    lane.remove(ticket)
+                    self._condition.notify_all()
+                stats.depth = len(lane)
+
+    def release(self):
+        with self._condition:
+            self._busy = False
+            self._condition.notify_all()
+
+    def stats(self) -> Dict[Priority, LaneStats]:
+        """ Returns snapshot of statistics for each lane. """
+        with self._condition:
+            return {priority: stats.copy() for priority, stats in self._stats.items()}
+
+    # Private
+    def _next(self) -> _Ticket:
+        now = monotonic()
+        starving = None
+        for priority in Priority:
+            lane = self._lanes[priority]
+            if len(lane) == 0:
+                continue
+            head = lane[0]
+            waited = now - head.enqueued_at
+            max_wait = self._max_wait.get(priority)
+            if max_wait is not None and waited >= max_wait:
+                if starving is None or head.enqueued_at < starving.enqueued_at:
+                    starving = head
+
+        if starving is not None:
+            return starving
+
+        for priority in Priority:
+            lane = self._lanes[priority]
+            if len(lane) > 0:
+                return lane[0]
+        return None
+
+    @staticmethod
+    def _record_wait(stats: LaneStats, wait: float):
+        stats.count += 1
+        stats.total_wait += wait
+        stats.max_wait = max(stats.max_wait, wait)
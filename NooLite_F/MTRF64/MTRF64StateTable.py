@@ -0,0 +1,342 @@
+import logging
+import mmap
+import os
+import sys
+
+from math import nan, isnan
+from struct import Struct
+from threading import Lock
+from time import time, sleep
+from typing import List
+
+from NooLite_F import ModuleState, BatteryState
+from NooLite_F.MTRF64.MTRF64Adapter import IncomingData, Command, Mode, ResponseCode
+from NooLite_F.MTRF64.MTRF64Decoders import decode_response, decode_temp_humi, decode_brightness
+
+
+_LOGGER = logging.getLogger("MTRF64StateTable")
+
+_MAGIC = b"NLFSTT01"
+_HEADER = Struct("=8sBxHIId")
+_HEADER_SIZE = 64
+_BYTE_ORDER = 0 if sys.byteorder == "little" else 1
+
+# sequence, module id, channel, state, battery, command, brightness, temperature, humidity, updated, state at, sensor at
+_SLOT = Struct("=QIBBBBdddddd")
+_SEQUENCE = Struct("=Q")
+_SLOT_SIZE = 64
+
+CHANNELS = 64
+
+# Reader gives up when the slot is being written for so many attempts (e.g. writer is killed while writing)
+_READ_ATTEMPTS = 1000
+
+_NO_COMMAND = 0xFF
+_NO_CHANNEL = 0xFF
+
+
+class StateTableException(Exception):
+    """Base class for state table exceptions."""
+
+
+class SlotState(object):
+    """ Consistent snapshot of one slot. Values which were never received are None. """
+    channel = None
+    module_id = None
+    state = None
+    battery = None
+    command = None
+    brightness = None
+    temperature = None
+    humidity = None
+    updated = None
+    state_at = None
+    sensor_at = None
+
+    def __repr__(self):
+        return "<SlotState (0x{0:x}), channel: {1}, id: {2}, state: {3}, brightness: {4}, temperature: {5}, humidity: {6}, battery: {7}, updated: {8}>" \
+            .format(id(self), self.channel, None if self.module_id is None else hex(self.module_id), self.state, self.brightness,
+                    self.temperature, self.humidity, self.battery, self.updated)
+
+
+def _slot_index(module_id: int, capacity: int) -> int:
+    return (module_id * 2654435761 & 0xFFFFFFFF) % capacity
+
+
+def _decode_slot(values: tuple) -> SlotState:
+    sequence, module_id, channel, state, battery, command, brightness, temperature, humidity, updated, state_at, sensor_at = values
+    slot = SlotState()
+    slot.channel = channel if channel != _NO_CHANNEL else None
+    slot.module_id = module_id if module_id != 0 else None
+    slot.state = ModuleState(state) if state != 0 else None
+    slot.battery = BatteryState(battery - 1) if battery != 0 else None
+    slot.command = command if command != _NO_COMMAND else None
+    slot.brightness = None if isnan(brightness) else brightness
+    slot.temperature = None if isnan(temperature) else temperature
+    slot.humidity = None if isnan(humidity) else humidity
+    slot.updated = updated if updated > 0 else None
+    slot.state_at = state_at if state_at > 0 else None
+    slot.sensor_at = sensor_at if sensor_at > 0 else None
+    return slot
+
+
+class StateTable(object):
+    """ Publishes module states and sensor readings into memory mapped file which is read by other processes.
+
+    The file has fixed layout: header, slots of receiver channels (remote controls and sensors, indexed by channel)
+    and slots of NooLite-F modules (found by module id with linear probing). Each slot is protected by the sequence
+    number (seqlock): writer makes it odd while the slot is written and even after that. Readers never lock, they copy
+    the slot and retry if the sequence number was odd or changed meanwhile.
+
+    Only one process writes the table. The file is created anew on open, readers of the previous file can find it out
+    with StateTableReader.refresh().
+    """
+
+    def __init__(self, path: str, module_capacity: int = 1024):
+        """
+        :param path: path of the table file.
+        :param module_capacity: maximal number of NooLite-F modules in the table.
+        """
+        self._path = path
+        self._capacity = module_capacity
+        self._lock = Lock()
+        self._slots = {}
+        self._dropped = 0
+
+        size = _HEADER_SIZE + (CHANNELS + module_capacity) * _SLOT_SIZE
+        temp_path = "{0}.{1}.tmp".format(path, os.getpid())
+        with open(temp_path, "wb") as file:
+            file.truncate(size)
+            file.write(_HEADER.pack(_MAGIC, _BYTE_ORDER, _SLOT_SIZE, CHANNELS, module_capacity, time()))
+        empty = _SLOT.pack(0, 0, _NO_CHANNEL, 0, 0, _NO_COMMAND, nan, nan, nan, 0.0, 0.0, 0.0)
+        self._file = open(temp_path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), size)
+        for index in range(CHANNELS + module_capacity):
+            offset = _HEADER_SIZE + index * _SLOT_SIZE
+            self._map[offset:offset + _SLOT.size] = empty
+            if index < CHANNELS:
+                self._write(index, lambda values: values[:2] + (index,) + values[3:])
+        # readers see the complete file only
+        os.replace(temp_path, path)
+
+    def update_module(self, module_id: int, channel: int = None, state: ModuleState = None, brightness: float = None, timestamp: float = None):
+        """ Store state of NooLite-F module. Values which are None are kept. """
+        if timestamp is None:
+            timestamp = time()
+        with self._lock:
+            index = self._module_slot(module_id)
+            if index is None:
+                return
+
+            def update(values):
+                values = list(values)
+                values[1] = module_id
+                if channel is not None:
+                    values[2] = channel
+                if state is not None:
+                    values[3] = state.value
+                if brightness is not None:
+                    values[6] = brightness
+                values[9] = timestamp
+                values[10] = timestamp
+                return tuple(values)
+
+            self._write(index, update)
+
+    def update_channel(self, channel: int, command: int = None, temperature: float = None, humidity: float = None,
+                       battery: BatteryState = None, state: ModuleState = None, brightness: float = None, timestamp: float = None):
+        """ Store the event of remote control or sensor bound to the channel. Values which are None are kept. """
+        if channel < 0 or channel >= CHANNELS:
+            return
+        if timestamp is None:
+            timestamp = time()
+
+        def update(values):
+            values = list(values)
+            if command is not None:
+                values[5] = command
+            if state is not None:
+                values[3] = state.value
+                values[10] = timestamp
+            if brightness is not None:
+                values[6] = brightness
+            if temperature is not None or humidity is not None or battery is not None:
+                if temperature is not None:
+                    values[7] = temperature
+                if humidity is not None:
+                    values[8] = humidity
+                if battery is not None:
+                    values[4] = battery.value + 1
+                values[11] = timestamp
+            values[9] = timestamp
+            return tuple(values)
+
+        with self._lock:
+            self._write(channel, update)
+
+    def on_response(self, data: IncomingData):
+        """ Store module state from the command response. """
+        if data.mode != Mode.TX_F or data.status != ResponseCode.SUCCESS or data.command != Command.SEND_STATE or data.format != 0:
+            return
+        record = decode_response(data)
+        self.update_module(record.info.id, data.channel, record.payload.state, record.payload.brightness)
+
+    def on_incoming(self, data: IncomingData):
+        """ Store module state or sensor event from the incoming packet. """
+        if data.mode == Mode.RX_F and data.command == Command.SEND_STATE and data.format == 0:
+            record = decode_response(data)
+            self.update_module(record.info.id, None, record.payload.state, record.payload.brightness)
+        elif data.command == Command.SENS_TEMP_HUMI:
+            values = decode_temp_humi(data)
+            if values is not None:
+                temp, humi, battery, analog = values
+                self.update_channel(data.channel, data.command, temp, humi, battery)
+        elif data.command == Command.ON:
+            self.update_channel(data.channel, data.command, state=ModuleState.ON)
+        elif data.command == Command.OFF:
+            self.update_channel(data.channel, data.command, state=ModuleState.OFF)
+        elif data.command == Command.TEMPORARY_ON:
+            self.update_channel(data.channel, data.command, state=ModuleState.TEMPORARY_ON)
+        elif data.command == Command.SET_BRIGHTNESS and data.format == 1:
+            self.update_channel(data.channel, data.command, brightness=decode_brightness(data))
+        else:
+            self.update_channel(data.channel, data.command)
+
+    def __call__(self, data: IncomingData):
+        self.on_incoming(data)
+
+    @property
+    def dropped(self) -> int:
+        """ Number of module updates dropped because the table is full. """
+        return self._dropped
+
+    def flush(self):
+        with self._lock:
+            self._map.flush()
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+                self._file.close()
+
+    # Private
+    def _module_slot(self, module_id: int) -> int:
+        index = self._slots.get(module_id)
+        if index is not None:
+            return index
+        if len(self._slots) >= self._capacity:
+            self._dropped += 1
+            _LOGGER.warning("State table is full, module 0x{0:x} is not stored".format(module_id))
+            return None
+
+        position = _slot_index(module_id, self._capacity)
+        while True:
+            index = CHANNELS + position
+            if _SLOT.unpack_from(self._map, _HEADER_SIZE + index * _SLOT_SIZE)[1] == 0:
+                self._slots[module_id] = index
+                return index
+            position = (position + 1) % self._capacity
+
+    def _write(self, index: int, update):
+        offset = _HEADER_SIZE + index * _SLOT_SIZE
+        values = _SLOT.unpack_from(self._map, offset)
+        sequence = values[0]
+        # odd sequence tells readers that the slot is being written
+        _SEQUENCE.pack_into(self._map, offset, sequence + 1)
+        _SLOT.pack_into(self._map, offset, sequence + 1, *update(values)[1:])
+        _SEQUENCE.pack_into(self._map, offset, sequence + 2)
+
+
+class StateTableReader(object):
+    """ Reads the state table in other process. Reads are lock free and don't communicate with the writer. """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._file = None
+        self._map = None
+        self._open()
+
+    def module(self, module_id: int) -> SlotState:
+        """ Returns state of NooLite-F module or None if it is unknown. """
+        position = _slot_index(module_id, self._capacity)
+        for i in range(self._capacity):
+            values = self._read(CHANNELS + position)
+            if values[1] == module_id:
+                return _decode_slot(values)
+            if values[1] == 0:
+                return None
+            position = (position + 1) % self._capacity
+        return None
+
+    def channel(self, channel: int) -> SlotState:
+        """ Returns the last event of remote control or sensor bound to the channel. """
+        if channel < 0 or channel >= CHANNELS:
+            raise StateTableException("Invalid channel: {0}".format(channel))
+        return _decode_slot(self._read(channel))
+
+    def modules(self) -> List[SlotState]:
+        """ Returns states of all modules in the table. Each state is consistent, but they are read one by one. """
+        result = []
+        for index in range(CHANNELS, CHANNELS + self._capacity):
+            values = self._read(index)
+            if values[1] != 0:
+                result.append(_decode_slot(values))
+        return result
+
+    def channels(self) -> List[SlotState]:
+        """ Returns states of channels which received any event. """
+        result = []
+        for index in range(CHANNELS):
+            values = self._read(index)
+            if values[9] > 0:
+                result.append(_decode_slot(values))
+        return result
+
+    def refresh(self) -> bool:
+        """ Reopen the table if the writer created the new file. Returns True if the table is reopened. """
+        try:
+            if os.stat(self._path).st_ino == os.fstat(self._file.fileno()).st_ino:
+                return False
+        except OSError:
+            return False
+        self.close()
+        self._open()
+        return True
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    # Private
+    def _open(self):
+        self._file = open(self._path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, byte_order, slot_size, channels, self._capacity, created = _HEADER.unpack_from(self._map, 0)
+            size = _HEADER_SIZE + (channels + self._capacity) * slot_size
+            if magic != _MAGIC or byte_order != _BYTE_ORDER or slot_size != _SLOT_SIZE or channels != CHANNELS or len(self._map) != size:
+                raise StateTableException("Invalid state table file: {0}".format(self._path))
+        except Exception:
+            self.close()
+            raise
+
+    def _read(self, index: int) -> tuple:
+        offset = _HEADER_SIZE + index * _SLOT_SIZE
+        for attempt in range(_READ_ATTEMPTS):
+            values = _SLOT.unpack_from(self._map, offset)
+            if values[0] % 2 == 0 and _SEQUENCE.unpack_from(self._map, offset)[0] == values[0]:
+                return values
+            sleep(0)
+        raise StateTableException("Slot {0} is not consistent".format(index))
@@ -0,0 +1,69 @@
+import asyncio
+
+from concurrent.futures import Executor
+from threading import Lock
+from typing import Iterator
+
+
+_DONE = object()
+
+
+class AsyncResponseIterator(object):
+    """ Async iterator over responses of the controller command.
+
+    The blocking iterator is advanced in the executor, so the event loop is not blocked while the adapter waits
+    for the next response. Adapter is not available for other commands until the iterator is exhausted or closed,
+    so iteration which can be stopped early should be made in async with block::
+
+        async with controller.read_state_aiter(channel=5) as responses:
+            async for status, info, state in responses:
+                ...
+    """
+
+    def __init__(self, iterator: Iterator, executor: Executor = None, loop: asyncio.AbstractEventLoop = None):
+        """
+        :param iterator: blocking iterator, e.g. returned by controller.read_state_iter.
+        :param executor: executor which advances the iterator. If None, default executor of the loop is used.
+        :param loop: event loop. If None, the current event loop is used.
+        """
+        self._iterator = iterator
+        self._executor = executor
+        self._loop = loop
+        # the iterator is advanced and closed in executor threads, close waits for the pending next
+        self._lock = Lock()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        item = await self._run(self._next)
+        if item is _DONE:
+            raise StopAsyncIteration
+        return item
+
+    async def aclose(self):
+        """ Stop iteration before the last response, adapter is released and remaining responses are dropped.
+        Pending __anext__ is finished first, even if its task is cancelled.
+        """
+        await self._run(self._close)
+
+    async def __aenter__(self) -> 'AsyncResponseIterator':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    # Private
+    def _run(self, function):
+        loop = self._loop if self._loop is not None else asyncio.get_event_loop()
+        return loop.run_in_executor(self._executor, function)
+
+    def _next(self):
+        with self._lock:
+            return next(self._iterator, _DONE)
+
+    def _close(self):
+        close = getattr(self._iterator, "close", None)
+        with self._lock:
+            if close is not None:
+                close()
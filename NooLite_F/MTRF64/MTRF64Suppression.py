@@ -0,0 +1,176 @@
+from threading import Lock
+from time import monotonic
+from typing import List, Tuple
+
+from NooLite_F import ModuleInfo, ModuleBaseStateInfo, ModuleState
+from NooLite_F.MTRF64.MTRF64Adapter import IncomingData, Command, Mode
+from NooLite_F.MTRF64.MTRF64Decoders import ResponseRecord, decode_response
+
+
+# Incoming commands of remote controls which can change state of modules bound to the same remote control
+_CONTROL_COMMANDS = frozenset([
+    Command.OFF, Command.BRIGHT_DOWN, Command.ON, Command.BRIGHT_UP, Command.SWITCH, Command.BRIGHT_BACK,
+    Command.SET_BRIGHTNESS, Command.LOAD_PRESET, Command.STOP_BRIGHT, Command.BRIGHT_STEP_DOWN, Command.BRIGHT_STEP_UP,
+    Command.BRIGHT_REG, Command.ROLL_COLOR, Command.SWITCH_COLOR, Command.SWITCH_MODE, Command.SPEED_MODE,
+    Command.TEMPORARY_ON, Command.MODES,
+])
+
+# Brightness is requested in 120 levels of set brightness command and reported in 255 levels of module state,
+# so the same brightness can differ by half level of both scales
+_BRIGHTNESS_TOLERANCE = 0.5 / 120 + 0.5 / 255
+
+# Commands which start gradual change, the module answers before the change is over
+_TRANSIENT_COMMANDS = frozenset([
+    Command.BRIGHT_DOWN, Command.BRIGHT_UP, Command.BRIGHT_BACK, Command.BRIGHT_REG, Command.ROLL_COLOR,
+    Command.SWITCH_MODE, Command.SPEED_MODE,
+])
+
+
+class SuppressionStats(object):
+    checked = 0
+    suppressed = 0
+    confirmed = 0
+    invalidated = 0
+
+    @property
+    def rate(self) -> float:
+        """ Part of the checked commands which were answered without transmission. """
+        return self.suppressed / self.checked if self.checked > 0 else 0.0
+
+    def copy(self) -> 'SuppressionStats':
+        stats = SuppressionStats()
+        stats.__dict__.update(self.__dict__)
+        return stats
+
+    def __repr__(self):
+        return "<SuppressionStats (0x{0:x}), checked: {1}, suppressed: {2}, rate: {3:.2f}, confirmed: {4}, invalidated: {5}>" \
+            .format(id(self), self.checked, self.suppressed, self.rate, self.confirmed, self.invalidated)
+
+
+class CommandSuppressor(object):
+    """ Answers redundant commands locally using the last confirmed state of NooLite-F modules.
+
+    The state is confirmed by module responses (any command addressed to module or channel, including read_state).
+    Only ON, OFF and SET_BRIGHTNESS commands addressed to module id are checked: ON is redundant when module is on,
+    OFF when module is off and SET_BRIGHTNESS when module is on with the same brightness (or off for zero level).
+    Brightness is compared as 0..1 fraction: the requested level against ModuleBaseStateInfo.brightness reported by
+    module, with tolerance of the level rounding.
+
+    Module state can also be changed by its own button or remote control bound directly to the module, the freshness
+    window limits the age of state which is trusted. Commands forget the state of target modules until they answer,
+    channel commands forget all states (channel members are unknown). Remote control events and adapter disconnects
+    forget the cached states too.
+    """
+
+    def __init__(self, freshness: float = 5.0):
+        """
+        :param freshness: maximal age of confirmed state in seconds which is used to suppress commands.
+        """
+        self._freshness = freshness
+        self._lock = Lock()
+        # module id -> (confirmed at, module info, state)
+        self._states = {}
+        # incremented by each sent command, responses of the command are remembered only if no other command was sent meanwhile
+        self._generation = 0
+        # number of sent commands which can change module state and are not answered yet
+        self._changing = 0
+        self._stats = SuppressionStats()
+
+    def lookup(self, module_id: int, mode: Mode, command: Command, command_data: bytearray = None, fmt: int = None) -> List[Tuple[bool, ModuleInfo, ModuleBaseStateInfo]]:
+        """ Returns synthesized response if the command does not change the module state, otherwise None. """
+        if module_id is None or mode != Mode.TX_F:
+            return None
+        if command != Command.ON and command != Command.OFF and not (command == Command.SET_BRIGHTNESS and fmt == 1):
+            return None
+
+        with self._lock:
+            self._stats.checked += 1
+            cached = self._states.get(module_id)
+            if cached is None:
+                return None
+            confirmed_at, info, state = cached
+            if monotonic() - confirmed_at > self._freshness:
+                del self._states[module_id]
+                return None
+            if not self._redundant(state, command, command_data):
+                return None
+            self._stats.suppressed += 1
+            return [(True, info, state)]
+
+    def begin(self, module_id: int, command: Command) -> int:
+        """ Called before the command is sent. Forgets the state of modules which can be changed by the command.
+
+        :return: token for confirm, confirm must be called for each begin.
+        """
+        with self._lock:
+            self._generation += 1
+            if command != Command.READ_STATE:
+                self._changing += 1
+                if module_id is None:
+                    self._forget(())
+                elif self._states.pop(module_id, None) is not None:
+                    self._stats.invalidated += 1
+            return self._generation
+
+    def confirm(self, token: int, mode: Mode, command: Command, records: List[ResponseRecord]):
+        """ Remember states from responses of the command. States are not remembered if other commands were sent
+        meanwhile, because responses could be received before the other command changed the state.
+        """
+        now = monotonic()
+        with self._lock:
+            if command != Command.READ_STATE:
+                self._changing -= 1
+            if token != self._generation or self._changing > 0:
+                return
+            if mode != Mode.TX_F or command in _TRANSIENT_COMMANDS:
+                # NooLite modules don't answer and gradual changes are not finished, state stays unknown
+                return
+            for record in records:
+                if record.status and record.format == 0 and isinstance(record.payload, ModuleBaseStateInfo):
+                    self._states[record.info.id] = (now, record.info, record.payload)
+                    self._stats.confirmed += 1
+
+    def on_incoming(self, data: IncomingData):
+        """ Update states by incoming packet. Called from adapter reader thread. """
+        if data.mode == Mode.RX_F and data.command == Command.SEND_STATE and data.format == 0:
+            record = decode_response(data)
+            with self._lock:
+                self._generation += 1
+                self._states[data.id] = (monotonic(), record.info, record.payload)
+                self._stats.confirmed += 1
+        elif data.command in _CONTROL_COMMANDS:
+            self.invalidate()
+
+    def invalidate(self, module_id: int = None):
+        """ Forget the state of module or all modules. """
+        with self._lock:
+            self._generation += 1
+            if module_id is None:
+                self._forget(())
+            elif self._states.pop(module_id, None) is not None:
+                self._stats.invalidated += 1
+
+    def stats(self) -> SuppressionStats:
+        with self._lock:
+            return self._stats.copy()
+
+    # Private
+    def _forget(self, keep):
+        for key in list(self._states):
+            if key not in keep:
+                del self._states[key]
+                self._stats.invalidated += 1
+
+    @staticmethod
+    def _redundant(state: ModuleBaseStateInfo, command: Command, command_data: bytearray) -> bool:
+        if command == Command.ON:
+            return state.state == ModuleState.ON
+        if command == Command.OFF:
+            return state.state == ModuleState.OFF
+
+        level = command_data[0]
+        if level == 0:
+            return state.state == ModuleState.OFF
+        # set brightness level is 35 + 120 * brightness (see MTRF64Controller.set_brightness)
+        brightness = min(1.0, max(0.0, (level - 35) / 120))
+        return state.state == ModuleState.ON and abs(state.brightness - brightness) <= _BRIGHTNESS_TOLERANCE
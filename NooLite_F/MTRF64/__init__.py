@@ -1,3 +1,22 @@
-from NooLite_F.MTRF64.MTRF64Adapter import MTRF64Adapter, IncomingData, OutgoingData, Command, Mode, Action, ResponseCode, IncomingDataException
+from NooLite_F.MTRF64.MTRF64Adapter import MTRF64Adapter, IncomingData, OutgoingData, Command, Mode, Action, ResponseCode, IncomingDataException, AdapterSession
+from NooLite_F.MTRF64.MTRF64Scheduler import PriorityScheduler, Priority, LaneStats
+from NooLite_F.MTRF64.MTRF64Reconnect import ReconnectPolicy, PendingPolicy, ConnectionStats, find_port
+from NooLite_F.MTRF64.MTRF64Queue import EventQueue, OverflowPolicy, QueueStats, stale_key
+from NooLite_F.MTRF64.MTRF64IOLoop import MTRF64IOLoop, IOLoopStats
+from NooLite_F.MTRF64.MTRF64Retry import RetryPolicy, CircuitBreaker, CircuitBreakerRegistry, CircuitState, CommandClass
+from NooLite_F.MTRF64.MTRF64Filter import EventFilter, FilterStats
+from NooLite_F.MTRF64.MTRF64Suppression import CommandSuppressor, SuppressionStats
+from NooLite_F.MTRF64.MTRF64Firmware import FirmwareUpdater, FirmwareUpdateResult, FirmwareUpdateError, FirmwareFrameCodec
+from NooLite_F.MTRF64.MTRF64DutyCycle import DutyCycleGovernor, AirtimeModel, AirtimeStats
+from NooLite_F.MTRF64.MTRF64EventStore import EventStore, StoredEvent, EventStoreException
+from NooLite_F.MTRF64.MTRF64StateTable import StateTable, StateTableReader, SlotState, StateTableException
+from NooLite_F.MTRF64.MTRF64Decoders import decode_response, ResponseRecord
+from NooLite_F.MTRF64.MTRF64BatchDecoder import decode_frames, DecodedFrames
+from NooLite_F.MTRF64.MTRF64Listeners import ListenerRegistry
+from NooLite_F.MTRF64.MTRF64Streaming import AsyncResponseIterator
 from NooLite_F.MTRF64.MTRF64Controller import MTRF64Controller
+from NooLite_F.MTRF64.MTRF64Rules import RulesEngine, Rule, Trigger, RuleStats
+from NooLite_F.MTRF64.MTRF64MQTTBridge import MQTTBridge, BridgeStats, LocalBroker, LocalClient, LocalMessage, topic_matches
+from NooLite_F.MTRF64.MTRF64Provisioning import Provisioner, ProvisionedModule, ProvisioningStats, ProvisioningError, ChannelAllocator
 
+from NooLite_F.MTRF64.MTRF64CLI import CommandSession, CommandError, command_usage
@@ -0,0 +1,279 @@
+from collections import OrderedDict
+from threading import Thread
+from typing import Dict, Iterable, List, Tuple
+
+from NooLite_F import ModuleMode, Direction, ModuleConfig, DimmerCorrectionConfig, Deadline, Timeout
+from NooLite_F.Modules import Switch
+
+
+# How the command can be delivered to several modules of one channel
+_CONTROL = 0    # the same command for all modules, broadcast can be used
+_READ = 1       # channel command, answers are matched to modules by module id
+_ADDRESSED = 2  # only command to the module id
+
+
+class _Delivery(object):
+    """ One command sent to the adapter on behalf of one or several group members. """
+
+    def __init__(self, members: List[Switch], module_id: int, channel: int, broadcast: bool, module_mode: ModuleMode):
+        self.members = members
+        self.module_id = module_id
+        self.channel = channel
+        self.broadcast = broadcast
+        self.module_mode = module_mode
+
+    def __repr__(self):
+        return "<Delivery (0x{0:x}), members: {1}, module id: {2}, channel: {3}, broadcast: {4}, mode: {5}>" \
+            .format(id(self), len(self.members), self.module_id, self.channel, self.broadcast, self.module_mode)
+
+
+class SwitchGroup(object):
+    """ Sends the same command to several modules.
+
+    For each command the group chooses the cheapest delivery:
+
+    * members without module id (and NooLite members) are addressed by channel, so one command is sent per channel;
+    * if channel is listed in complete_channels (all modules bound to the channel are group members), one channel
+      command is sent for all members of the channel. Control commands use broadcast, read commands are sent to the
+      channel and answers are matched to members by module id;
+    * otherwise command is sent to each module id.
+
+    Members of different controllers (adapters) are served in parallel, one thread per controller. Commands of one
+    controller are sent sequentially. Results are returned as dictionary: module id -> list of responses as returned
+    by the controller. Answers of channel commands are matched to modules by reported module id. Answers without
+    module id (NooLite modules, broadcast) are returned with ("channel", channel) key for members without module id
+    and with member module id for others.
+    """
+
+    def __init__(self, members: Iterable[Switch], complete_channels: Iterable[int] = (), broadcast: bool = True):
+        """
+        :param members: module objects.
+        :param complete_channels: channels which have only modules of this group bound.
+        :param broadcast: use broadcast for control commands to complete channels.
+        """
+        self._members = list(members)
+        self._complete_channels = frozenset(complete_channels)
+        self._broadcast = broadcast
+        self._plans = {}
+
+    @property
+    def members(self) -> List[Switch]:
+        return list(self._members)
+
+    def on(self, timeout: Timeout = None) -> Dict[object, list]:
+        return self._execute(_CONTROL, "on", (), timeout)
+
+    def off(self, timeout: Timeout = None) -> Dict[object, list]:
+        return self._execute(_CONTROL, "off", (), timeout)
+
+    def switch(self, timeout: Timeout = None) -> Dict[object, list]:
+        return self._execute(_CONTROL, "switch", (), timeout)
+
+    def load_preset(self, timeout: Timeout = None) -> Dict[object, list]:
+        return self._execute(_CONTROL, "load_preset", (), timeout)
+
+    def save_preset(self, timeout: Timeout = None) -> Dict[object, list]:
+        return self._execute(_CONTROL, "save_preset", (), timeout)
+
+    def read_state(self, timeout: Timeout = None) -> Dict[object, list]:
+        return self._execute(_READ, "read_state", (), timeout)
+
+    def read_extra_state(self, timeout: Timeout = None) -> Dict[object, list]:
+        return self._execute(_READ, "read_extra_state", (), timeout)
+
+    def read_channels_state(self, timeout: Timeout = None) -> Dict[object, list]:
+        return self._execute(_READ, "read_channels_state", (), timeout)
+
+    def bind(self, timeout: Timeout = None) -> Dict[object, list]:
+        return self._execute(_ADDRESSED, "bind", (), timeout)
+
+    def unbind(self, timeout: Timeout = None) -> Dict[object, list]:
+        return self._execute(_ADDRESSED, "unbind", (), timeout)
+
+    def set_service_mode(self, state: bool, timeout: Timeout = None) -> Dict[object, list]:
+        return self._execute(_ADDRESSED, "set_service_mode", (state,), timeout)
+
+    def read_config(self, timeout: Timeout = None) -> Dict[object, list]:
+        return self._execute(_ADDRESSED, "read_module_config", (), timeout)
+
+    def write_config(self, config: ModuleConfig, timeout: Timeout = None) -> Dict[object, list]:
+        return self._execute(_ADDRESSED, "write_module_config", (config,), timeout)
+
+    def __len__(self):
+        return len(self._members)
+
+    def __repr__(self):
+        return "<{0} (0x{1:x}), members: {2}, complete channels: {3}, broadcast: {4}>" \
+            .format(type(self).__name__, id(self), len(self._members), sorted(self._complete_channels), self._broadcast)
+
+    # Private
+    @staticmethod
+    def _key(member: Switch):
+        if member.module_id is None or member.module_mode == ModuleMode.NOOLITE:
+            return "channel", member.channel
+        return member.module_id
+
+    def _plan(self, kind: int) -> Dict[object, List[_Delivery]]:
+        plan = self._plans.get(kind)
+        if plan is not None:
+            return plan
+
+        by_controller = OrderedDict()
+        for member in self._members:
+            by_controller.setdefault(member.controller, []).append(member)
+
+        plan = OrderedDict()
+        for controller, members in by_controller.items():
+            by_channel = OrderedDict()
+            by_id = OrderedDict()
+            for member in members:
+                key = self._key(member)
+                if isinstance(key, tuple):
+                    by_channel.setdefault((member.channel, member.module_mode, member.broadcast_mode), []).append(member)
+                elif kind != _ADDRESSED and member.channel in self._complete_channels:
+                    by_id.setdefault((member.channel, member.module_mode), []).append(member)
+                else:
+                    by_id.setdefault(member, [member])
+
+            deliveries = []
+            for (channel, mode, broadcast), channel_members in by_channel.items():
+                deliveries.append(_Delivery(channel_members, None, channel, broadcast, mode))
+            for key, id_members in by_id.items():
+                if isinstance(key, tuple) and len(id_members) > 1:
+                    channel, mode = key
+                    broadcast = kind == _CONTROL and self._broadcast and mode == ModuleMode.NOOLITE_F
+                    deliveries.append(_Delivery(id_members, None, channel, broadcast, mode))
+                else:
+                    for member in id_members:
+                        deliveries.append(_Delivery([member], member.module_id, member.channel, False, member.module_mode))
+            plan[controller] = deliveries
+
+        self._plans[kind] = plan
+        return plan
+
+    def _execute(self, kind: int, method: str, args: tuple, timeout: Timeout) -> Dict[object, list]:
+        # all commands of the group share the same time budget
+        deadline = Deadline.of(timeout)
+        plan = self._plan(kind)
+
+        outcomes = []
+        threads = []
+        for controller, deliveries in plan.items():
+            outcome = [[], None]
+            outcomes.append(outcome)
+            if len(plan) == 1:
+                self._run(controller, deliveries, kind, method, args, deadline, outcome)
+            else:
+                thread = Thread(target=self._run, args=(controller, deliveries, kind, method, args, deadline, outcome))
+                thread.daemon = True
+                thread.start()
+                threads.append(thread)
+
+        for thread in threads:
+            thread.join()
+
+        results = OrderedDict()
+        for member in self._members:
+            results[self._key(member)] = []
+        for items, error in outcomes:
+            if error is not None:
+                raise error
+            for key, responses in items:
+                results.setdefault(key, []).extend(responses)
+
+        # channel answers are returned with module ids when modules report them
+        for key in [key for key, responses in results.items() if isinstance(key, tuple) and len(responses) == 0]:
+            del results[key]
+        return results
+
+    def _run(self, controller, deliveries: List[_Delivery], kind: int, method: str, args: tuple, deadline: Deadline, outcome: list):
+        try:
+            for delivery in deliveries:
+                responses = getattr(controller, method)(*args, delivery.module_id, delivery.channel, delivery.broadcast, delivery.module_mode, deadline)
+                outcome[0].extend(self._split(delivery, kind, responses))
+        except Exception as err:
+            outcome[1] = err
+
+    def _split(self, delivery: _Delivery, kind: int, responses: list) -> List[Tuple[object, list]]:
+        if len(delivery.members) == 1 and delivery.module_id is not None:
+            return [(delivery.module_id, responses)]
+
+        channel_key = ("channel", delivery.channel)
+        if kind == _READ or all(self._response_id(response, None) is not None for response in responses):
+            # answers are matched to modules by reported module id
+            return [(self._response_id(response, channel_key), [response]) for response in responses]
+        if self._key(delivery.members[0]) == channel_key:
+            return [(channel_key, responses)]
+
+        # broadcast has common answer for all members
+        return [(member.module_id, responses) for member in delivery.members]
+
+    @staticmethod
+    def _response_id(response: tuple, default):
+        info = response[1] if len(response) > 2 else None
+        if info is not None and info.id is not None:
+            return info.id
+        return default
+
+
+class DimmerGroup(SwitchGroup):
+
+    def temporary_on(self, duration: int, timeout: Timeout = None) -> Dict[object, list]:
+        return self._execute(_CONTROL, "temporary_on", (duration,), timeout)
+
+    def set_temporary_on_mode(self, enabled: bool, timeout: Timeout = None) -> Dict[object, list]:
+        return self._execute(_CONTROL, "set_temporary_on_mode", (enabled,), timeout)
+
+    def brightness_tune(self, direction: Direction, timeout: Timeout = None) -> Dict[object, list]:
+        return self._execute(_CONTROL, "brightness_tune", (direction,), timeout)
+
+    def brightness_tune_back(self, timeout: Timeout = None) -> Dict[object, list]:
+        return self._execute(_CONTROL, "brightness_tune_back", (), timeout)
+
+    def brightness_tune_stop(self, timeout: Timeout = None) -> Dict[object, list]:
+        return self._execute(_CONTROL, "brightness_tune_stop", (), timeout)
+
+    def brightness_tune_custom(self, direction: Direction, speed: float, timeout: Timeout = None) -> Dict[object, list]:
+        return self._execute(_CONTROL, "brightness_tune_custom", (direction, speed), timeout)
+
+    def brightness_tune_step(self, direction: Direction, step: int = None, timeout: Timeout = None) -> Dict[object, list]:
+        return self._execute(_CONTROL, "brightness_tune_step", (direction, step), timeout)
+
+    def set_brightness(self, brightness: float, timeout: Timeout = None) -> Dict[object, list]:
+        return self._execute(_CONTROL, "set_brightness", (brightness,), timeout)
+
+    def read_dimmer_correction(self, timeout: Timeout = None) -> Dict[object, list]:
+        return self._execute(_ADDRESSED, "read_dimmer_correction", (), timeout)
+
+    def write_dimmer_correction(self, config: DimmerCorrectionConfig, timeout: Timeout = None) -> Dict[object, list]:
+        return self._execute(_ADDRESSED, "write_dimmer_correction", (config,), timeout)
+
+
+class RGBLedGroup(SwitchGroup):
+
+    def brightness_tune(self, direction: Direction, timeout: Timeout = None) -> Dict[object, list]:
+        return self._execute(_CONTROL, "brightness_tune", (direction,), timeout)
+
+    def brightness_tune_back(self, timeout: Timeout = None) -> Dict[object, list]:
+        return self._execute(_CONTROL, "brightness_tune_back", (), timeout)
+
+    def brightness_tune_stop(self, timeout: Timeout = None) -> Dict[object, list]:
+        return self._execute(_CONTROL, "brightness_tune_stop", (), timeout)
+
+    def set_brightness(self, brightness: float, timeout: Timeout = None) -> Dict[object, list]:
+        return self._execute(_CONTROL, "set_brightness", (brightness,), timeout)
+
+    def roll_rgb_color(self, timeout: Timeout = None) -> Dict[object, list]:
+        return self._execute(_CONTROL, "roll_rgb_color", (), timeout)
+
+    def switch_rgb_color(self, timeout: Timeout = None) -> Dict[object, list]:
+        return self._execute(_CONTROL, "switch_rgb_color", (), timeout)
+
+    def switch_rgb_mode(self, timeout: Timeout = None) -> Dict[object, list]:
+        return self._execute(_CONTROL, "switch_rgb_mode", (), timeout)
+
+    def switch_rgb_mode_speed(self, timeout: Timeout = None) -> Dict[object, list]:
+        return self._execute(_CONTROL, "switch_rgb_mode_speed", (), timeout)
+
+    def set_rgb_brightness(self, red: float, green: float, blue: float, timeout: Timeout = None) -> Dict[object, list]:
+        return self._execute(_CONTROL, "set_rgb_brightness", (red, green, blue), timeout)
@@ -1,4 +1,4 @@
-from NooLite_F import NooLiteFController, ModuleMode, Direction, ModuleConfig, DimmerCorrectionConfig
+from NooLite_F import NooLiteFController, ModuleMode, Direction, ModuleConfig, DimmerCorrectionConfig, Timeout
 from NooLite_F import ResponseBaseInfo, ResponseExtraInfo, ResponseChannelsInfo, ResponseModuleConfig, ResponseDimmerCorrectionConfig
 
 
@@ -11,134 +11,154 @@ class Switch(object):
         self._controller = controller
         self._module_id = module_id
 
-    def on(self) -> [ResponseBaseInfo]:
-        return self._controller.on(self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    @property
+    def controller(self) -> NooLiteFController:
+        return self._controller
 
-    def off(self) -> [ResponseBaseInfo]:
-        return self._controller.off(self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    @property
+    def module_id(self) -> int:
+        return self._module_id
 
-    def switch(self) -> [ResponseBaseInfo]:
-        return self._controller.switch(self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    @property
+    def channel(self) -> int:
+        return self._channel
 
-    def load_preset(self) -> [ResponseBaseInfo]:
-        return self._controller.load_preset(self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    @property
+    def module_mode(self) -> ModuleMode:
+        return self._module_mode
 
-    def save_preset(self) -> [ResponseBaseInfo]:
-        return self._controller.save_preset(self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    @property
+    def broadcast_mode(self) -> bool:
+        return self._broadcast_mode
 
-    def read_state(self) -> [ResponseBaseInfo]:
-        return self._controller.read_state(self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def on(self, timeout: Timeout = None) -> [ResponseBaseInfo]:
+        return self._controller.on(self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
-    def read_extra_state(self) -> [ResponseExtraInfo]:
-        return self._controller.read_extra_state(self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def off(self, timeout: Timeout = None) -> [ResponseBaseInfo]:
+        return self._controller.off(self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
-    def read_channels_state(self) -> [ResponseChannelsInfo]:
-        return self._controller.read_channels_state(self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def switch(self, timeout: Timeout = None) -> [ResponseBaseInfo]:
+        return self._controller.switch(self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
-    def bind(self) -> [ResponseBaseInfo]:
-        return self._controller.bind(self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def load_preset(self, timeout: Timeout = None) -> [ResponseBaseInfo]:
+        return self._controller.load_preset(self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
-    def unbind(self) -> [ResponseBaseInfo]:
-        return self._controller.unbind(self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def save_preset(self, timeout: Timeout = None) -> [ResponseBaseInfo]:
+        return self._controller.save_preset(self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
-    def set_service_mode(self, state: bool) -> [ResponseBaseInfo]:
-        return self._controller.set_service_mode(state, self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def read_state(self, timeout: Timeout = None) -> [ResponseBaseInfo]:
+        return self._controller.read_state(self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
-    def read_config(self) -> [ResponseModuleConfig]:
-        return self._controller.read_module_config(self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def read_extra_state(self, timeout: Timeout = None) -> [ResponseExtraInfo]:
+        return self._controller.read_extra_state(self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
-    def write_config(self, config: ModuleConfig) -> [ResponseModuleConfig]:
-        return self._controller.write_module_config(config, self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def read_channels_state(self, timeout: Timeout = None) -> [ResponseChannelsInfo]:
+        return self._controller.read_channels_state(self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
+
+    def bind(self, timeout: Timeout = None) -> [ResponseBaseInfo]:
+        return self._controller.bind(self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
+
+    def unbind(self, timeout: Timeout = None) -> [ResponseBaseInfo]:
+        return self._controller.unbind(self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
+
+    def set_service_mode(self, state: bool, timeout: Timeout = None) -> [ResponseBaseInfo]:
+        return self._controller.set_service_mode(state, self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
+
+    def read_config(self, timeout: Timeout = None) -> [ResponseModuleConfig]:
+        return self._controller.read_module_config(self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
+
+    def write_config(self, config: ModuleConfig, timeout: Timeout = None) -> [ResponseModuleConfig]:
+        return self._controller.write_module_config(config, self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
 
 class ExtendedSwitch(Switch):
 
-    def temporary_on(self, duration: int) -> [ResponseBaseInfo]:
-        return self._controller.temporary_on(duration, self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def temporary_on(self, duration: int, timeout: Timeout = None) -> [ResponseBaseInfo]:
+        return self._controller.temporary_on(duration, self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
-    def set_temporary_on_mode(self, enabled: bool) -> [ResponseBaseInfo]:
-        return self._controller.set_temporary_on_mode(enabled, self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def set_temporary_on_mode(self, enabled: bool, timeout: Timeout = None) -> [ResponseBaseInfo]:
+        return self._controller.set_temporary_on_mode(enabled, self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
 
 class Dimmer(ExtendedSwitch):
 
-    def brightness_tune(self, direction: Direction) -> [ResponseBaseInfo]:
-        return self._controller.brightness_tune(direction, self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def brightness_tune(self, direction: Direction, timeout: Timeout = None) -> [ResponseBaseInfo]:
+        return self._controller.brightness_tune(direction, self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
-    def brightness_tune_back(self) -> [ResponseBaseInfo]:
-        return self._controller.brightness_tune_back(self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def brightness_tune_back(self, timeout: Timeout = None) -> [ResponseBaseInfo]:
+        return self._controller.brightness_tune_back(self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
-    def brightness_tune_stop(self) -> [ResponseBaseInfo]:
-        return self._controller.brightness_tune_stop(self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def brightness_tune_stop(self, timeout: Timeout = None) -> [ResponseBaseInfo]:
+        return self._controller.brightness_tune_stop(self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
-    def brightness_tune_custom(self, direction: Direction, speed: float) -> [ResponseBaseInfo]:
-        return self._controller.brightness_tune_custom(direction, speed, self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def brightness_tune_custom(self, direction: Direction, speed: float, timeout: Timeout = None) -> [ResponseBaseInfo]:
+        return self._controller.brightness_tune_custom(direction, speed, self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
-    def brightness_tune_step(self, direction: Direction, step: int = None) -> [ResponseBaseInfo]:
-        return self._controller.brightness_tune_step(direction, step, self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def brightness_tune_step(self, direction: Direction, step: int = None, timeout: Timeout = None) -> [ResponseBaseInfo]:
+        return self._controller.brightness_tune_step(direction, step, self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
-    def set_brightness(self, brightness: float) -> [ResponseBaseInfo]:
-        return self._controller.set_brightness(brightness, self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def set_brightness(self, brightness: float, timeout: Timeout = None) -> [ResponseBaseInfo]:
+        return self._controller.set_brightness(brightness, self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
-    def read_dimmer_correction(self) -> [ResponseDimmerCorrectionConfig]:
-        return self._controller.read_dimmer_correction(self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def read_dimmer_correction(self, timeout: Timeout = None) -> [ResponseDimmerCorrectionConfig]:
+        return self._controller.read_dimmer_correction(self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
-    def write_dimmer_correction(self, config: DimmerCorrectionConfig) -> [ResponseDimmerCorrectionConfig]:
-        return self._controller.write_dimmer_correction(config, self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def write_dimmer_correction(self, config: DimmerCorrectionConfig, timeout: Timeout = None) -> [ResponseDimmerCorrectionConfig]:
+        return self._controller.write_dimmer_correction(config, self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
 
 class Fan(ExtendedSwitch):
 
-    def speed_tune(self, direction: Direction) -> [ResponseBaseInfo]:
-        return self._controller.brightness_tune(direction, self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def speed_tune(self, direction: Direction, timeout: Timeout = None) -> [ResponseBaseInfo]:
+        return self._controller.brightness_tune(direction, self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
-    def speed_tune_back(self) -> [ResponseBaseInfo]:
-        return self._controller.brightness_tune_back(self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def speed_tune_back(self, timeout: Timeout = None) -> [ResponseBaseInfo]:
+        return self._controller.brightness_tune_back(self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
-    def speed_tune_stop(self) -> [ResponseBaseInfo]:
-        return self._controller.brightness_tune_stop(self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def speed_tune_stop(self, timeout: Timeout = None) -> [ResponseBaseInfo]:
+        return self._controller.brightness_tune_stop(self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
-    def speed_tune_custom(self, direction: Direction, speed: float) -> [ResponseBaseInfo]:
-        return self._controller.brightness_tune_custom(direction, speed, self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def speed_tune_custom(self, direction: Direction, speed: float, timeout: Timeout = None) -> [ResponseBaseInfo]:
+        return self._controller.brightness_tune_custom(direction, speed, self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
-    def speed_tune_step(self, direction: Direction, step: int = None) -> [ResponseBaseInfo]:
-        return self._controller.brightness_tune_step(direction, step, self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def speed_tune_step(self, direction: Direction, step: int = None, timeout: Timeout = None) -> [ResponseBaseInfo]:
+        return self._controller.brightness_tune_step(direction, step, self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
-    def set_speed(self, speed: float) -> [ResponseBaseInfo]:
-        return self._controller.set_brightness(speed, self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def set_speed(self, speed: float, timeout: Timeout = None) -> [ResponseBaseInfo]:
+        return self._controller.set_brightness(speed, self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
-    def read_dimmer_correction(self) -> [ResponseDimmerCorrectionConfig]:
-        return self._controller.read_dimmer_correction(self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def read_dimmer_correction(self, timeout: Timeout = None) -> [ResponseDimmerCorrectionConfig]:
+        return self._controller.read_dimmer_correction(self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
-    def write_dimmer_correction(self, config: DimmerCorrectionConfig) -> [ResponseDimmerCorrectionConfig]:
-        return self._controller.write_dimmer_correction(config, self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def write_dimmer_correction(self, config: DimmerCorrectionConfig, timeout: Timeout = None) -> [ResponseDimmerCorrectionConfig]:
+        return self._controller.write_dimmer_correction(config, self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
 
 class RGBLed(Switch):
 
-    def brightness_tune(self, direction: Direction) -> [ResponseBaseInfo]:
-        return self._controller.brightness_tune(direction, self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def brightness_tune(self, direction: Direction, timeout: Timeout = None) -> [ResponseBaseInfo]:
+        return self._controller.brightness_tune(direction, self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
-    def brightness_tune_back(self) -> [ResponseBaseInfo]:
-        return self._controller.brightness_tune_back(self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def brightness_tune_back(self, timeout: Timeout = None) -> [ResponseBaseInfo]:
+        return self._controller.brightness_tune_back(self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
-    def brightness_tune_stop(self) -> [ResponseBaseInfo]:
-        return self._controller.brightness_tune_stop(self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def brightness_tune_stop(self, timeout: Timeout = None) -> [ResponseBaseInfo]:
+        return self._controller.brightness_tune_stop(self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
-    def set_brightness(self, brightness: float) -> [ResponseBaseInfo]:
-        return self._controller.set_brightness(brightness, self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def set_brightness(self, brightness: float, timeout: Timeout = None) -> [ResponseBaseInfo]:
+        return self._controller.set_brightness(brightness, self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
-    def roll_rgb_color(self) -> [ResponseBaseInfo]:
-        return self._controller.roll_rgb_color(self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def roll_rgb_color(self, timeout: Timeout = None) -> [ResponseBaseInfo]:
+        return self._controller.roll_rgb_color(self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
-    def switch_rgb_color(self) -> [ResponseBaseInfo]:
-        return self._controller.switch_rgb_color(self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def switch_rgb_color(self, timeout: Timeout = None) -> [ResponseBaseInfo]:
+        return self._controller.switch_rgb_color(self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
-    def switch_rgb_mode(self) -> [ResponseBaseInfo]:
-        return self._controller.switch_rgb_mode(self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def switch_rgb_mode(self, timeout: Timeout = None) -> [ResponseBaseInfo]:
+        return self._controller.switch_rgb_mode(self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
-    def switch_rgb_mode_speed(self) -> [ResponseBaseInfo]:
-        return self._controller.switch_rgb_mode_speed(self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def switch_rgb_mode_speed(self, timeout: Timeout = None) -> [ResponseBaseInfo]:
+        return self._controller.switch_rgb_mode_speed(self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
 
-    def set_rgb_brightness(self, red: float, green: float, blue: float) -> [ResponseBaseInfo]:
-        return self._controller.set_rgb_brightness(red, green, blue, self._module_id, self._channel, self._broadcast_mode, self._module_mode)
+    def set_rgb_brightness(self, red: float, green: float, blue: float, timeout: Timeout = None) -> [ResponseBaseInfo]:
+        return self._controller.set_rgb_brightness(red, green, blue, self._module_id, self._channel, self._broadcast_mode, self._module_mode, timeout)
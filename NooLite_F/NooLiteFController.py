@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
 from enum import Enum
-from typing import Tuple, List
+from threading import Event
+from time import monotonic
+from typing import Tuple, List, Union
 
 
 class ModuleMode(Enum):
@@ -103,6 +105,50 @@ class ModuleChannelsStateInfo(object):
             .format(id(self), self.noolite_cells, self.noolite_f_cells)
 
 
+class Deadline(object):
+    """ Limits the time of the command execution and allows to cancel the command until it is sent to the adapter.
+
+    The same deadline can be passed to several commands, then all of them share the same time budget.
+    """
+
+    def __init__(self, timeout: float = None):
+        """
+        :param timeout: time in seconds from now until the deadline. If None then time is not limited.
+        """
+        self._expires_at = None if timeout is None else monotonic() + timeout
+        self._cancelled = Event()
+
+    @staticmethod
+    def of(timeout) -> 'Deadline':
+        if isinstance(timeout, Deadline):
+            return timeout
+        return Deadline(timeout)
+
+    def remaining(self) -> float:
+        """ Returns time in seconds until the deadline or None if time is not limited. """
+        if self._expires_at is None:
+            return None
+        return max(0.0, self._expires_at - monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self._expires_at is not None and monotonic() >= self._expires_at
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """ Cancel all commands that use this deadline and are not sent yet. """
+        self._cancelled.set()
+
+    def __repr__(self):
+        return "<Deadline (0x{0:x}), remaining: {1}, cancelled: {2}>".format(id(self), self.remaining(), self.cancelled)
+
+
+Timeout = Union[float, Deadline]
+
+
 ResponseBaseInfo = Tuple[bool, ModuleInfo, ModuleBaseStateInfo]
 ResponseExtraInfo = Tuple[bool, ModuleInfo, ModuleExtraStateInfo]
 ResponseChannelsInfo = Tuple[bool, ModuleInfo, ModuleChannelsStateInfo]
@@ -175,33 +221,35 @@ class NooLiteFController(ABC):
     # Base power control
     @abstractmethod
     def off(self, module_id: int = None, channel: int = None, broadcast: bool = False,
-            module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
+            module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
         """ Turn off the modules
 
         :param module_id: the module id. The command will be send to module with specified id (used only for NOOLITE-F modules).
         :param channel: the number of the channel. The command will be send to all modules that are binded with selected channel. If module_id is also specified then command will be send only to appropriate device in channel.
         :param broadcast: broadcast mode. If True then command will be send simultaneously to all modules that are binded with selected channel (default - False). If module_id is specified or mode is NOOLITE then broadcast parameter will be ignored.
         :param module_mode: module work mode, used to determine adapter mode for send command (default - NOOLITE_F).
+        :param timeout: maximal time in seconds to wait for the command result or Deadline object. If time is over, then results received so far are returned. If None then default adapter timeouts are used.
         :return: for nooLite-F command returns array which contains command result and module info for each module that are binded with selected channel. For nooLite modules returns nothing.
         """
         pass
 
     @abstractmethod
     def on(self, module_id: int = None, channel: int = None, broadcast: bool = False,
-           module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
+           module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
         """ Turn on the modules
 
         :param module_id: the module id. The command will be send to module with specified id (used only for NOOLITE-F modules).
         :param channel: the number of the channel. The command will be send to all modules that are binded with selected channel. If module_id is also specified then command will be send only to appropriate device in channel.
         :param broadcast: broadcast mode. If True then command will be send simultaneously to all modules that are binded with selected channel (default - False). If module_id is specified or mode is NOOLITE then broadcast parameter will be ignored.
         :param module_mode: module work mode, used to determine adapter mode for send command (default - NOOLITE_F).
+        :param timeout: maximal time in seconds to wait for the command result or Deadline object. If time is over, then results received so far are returned. If None then default adapter timeouts are used.
         :return: for nooLite-F command returns array which contains command result and module info for each module that are binded with selected channel. For nooLite modules returns nothing.
         """
         pass
 
     @abstractmethod
     def temporary_on(self, duration: int, module_id: int = None, channel: int = None, broadcast: bool = False,
-                     module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
+                     module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
         """ Turn on the modules for a specified time interval
 
         :param module_id: the module id. The command will be send to module with specified id (used only for NOOLITE-F modules).
@@ -209,13 +257,14 @@ class NooLiteFController(ABC):
         :param broadcast: broadcast mode. If True then command will be send simultaneously to all modules that are binded with selected channel (default - False). If module_id is specified or mode is NOOLITE then broadcast parameter will be ignored.
         :param duration: the time during which the modules will be turned on, duration measurement equals 5 sec.
         :param module_mode: module work mode, used to determine adapter mode for send command (default - NOOLITE_F).
+        :param timeout: maximal time in seconds to wait for the command result or Deadline object. If time is over, then results received so far are returned. If None then default adapter timeouts are used.
         :return: for nooLite-F command returns array which contains command result and module info for each module that are binded with selected channel. For nooLite modules returns nothing.
         """
         pass
 
     @abstractmethod
     def set_temporary_on_mode(self, enabled: bool, module_id: int = None, channel: int = None, broadcast: bool = False,
-                              module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
+                              module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
         """ Enable/disable "temporary on" mode
 
         :param enabled: new "temporary on" mode state (enable/disable).
@@ -223,26 +272,28 @@ class NooLiteFController(ABC):
         :param channel: the number of the channel. The command will be send to all modules that are binded with selected channel. If module_id is also specified then command will be send only to appropriate device in channel.
         :param broadcast: broadcast mode. If True then command will be send simultaneously to all modules that are binded with selected channel (default - False). If module_id is specified or mode is NOOLITE then broadcast parameter will be ignored.
         :param module_mode: module work mode, used to determine adapter mode for send command (default - NOOLITE_F).
+        :param timeout: maximal time in seconds to wait for the command result or Deadline object. If time is over, then results received so far are returned. If None then default adapter timeouts are used.
         :return: for nooLite-F command returns array which contains command result and module info for each module that are binded with selected channel. For nooLite modules returns nothing.
         """
         pass
 
     @abstractmethod
     def switch(self, module_id: int = None, channel: int = None, broadcast: bool = False,
-               module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
+               module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
         """ Switch modules mode (on/off)
 
         :param module_id: the module id. The command will be send to module with specified id (used only for NOOLITE-F modules).
         :param channel: the number of the channel. The command will be send to all modules that are binded with selected channel. If module_id is also specified then command will be send only to appropriate device in channel.
         :param broadcast: broadcast mode. If True then command will be send simultaneously to all modules that are binded with selected channel (default - False). If module_id is specified or mode is NOOLITE then broadcast parameter will be ignored.
         :param module_mode: module work mode, used to determine adapter mode for send command (default - NOOLITE_F).
+        :param timeout: maximal time in seconds to wait for the command result or Deadline object. If time is over, then results received so far are returned. If None then default adapter timeouts are used.
         :return: for nooLite-F command returns array which contains command result and module info for each module that are binded with selected channel. For nooLite modules returns nothing.
         """
         pass
 
     @abstractmethod
     def brightness_tune(self, direction: Direction, module_id: int = None, channel: int = None,
-                        broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[
+                        broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[
         ResponseBaseInfo]:
         """ Start to increase/decrease brightness
 
@@ -251,32 +302,35 @@ class NooLiteFController(ABC):
         :param broadcast: broadcast mode. If True then command will be send simultaneously to all modules that are binded with selected channel (default - False). If module_id is specified or mode is NOOLITE then broadcast parameter will be ignored.
         :param direction: direction of the brightness changing
         :param module_mode: module work mode, used to determine adapter mode for send command (default - NOOLITE_F).
+        :param timeout: maximal time in seconds to wait for the command result or Deadline object. If time is over, then results received so far are returned. If None then default adapter timeouts are used.
         :return: for nooLite-F command returns array which contains command result and module info for each module that are binded with selected channel. For nooLite modules returns nothing.
         """
         pass
 
     @abstractmethod
     def brightness_tune_back(self, module_id: int = None, channel: int = None, broadcast: bool = False,
-                             module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
+                             module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
         """ Invert direction of the brightness change
 
         :param module_id: the module id. The command will be send to module with specified id (used only for NOOLITE-F modules).
         :param channel: the number of the channel. The command will be send to all modules that are binded with selected channel. If module_id is also specified then command will be send only to appropriate device in channel.
         :param broadcast: broadcast mode. If True then command will be send simultaneously to all modules that are binded with selected channel (default - False). If module_id is specified or mode is NOOLITE then broadcast parameter will be ignored.
         :param module_mode: module work mode, used to determine adapter mode for send command (default - NOOLITE_F).
+        :param timeout: maximal time in seconds to wait for the command result or Deadline object. If time is over, then results received so far are returned. If None then default adapter timeouts are used.
         :return: for nooLite-F command returns array which contains command result and module info for each module that are binded with selected channel. For nooLite modules returns nothing.
         """
         pass
 
     @abstractmethod
     def brightness_tune_stop(self, module_id: int = None, channel: int = None, broadcast: bool = False,
-                             module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
+                             module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
         """ Stop brightness changing
 
         :param module_id: the module id. The command will be send to module with specified id (used only for NOOLITE-F modules).
         :param channel: the number of the channel. The command will be send to all modules that are binded with selected channel. If module_id is also specified then command will be send only to appropriate device in channel.
         :param broadcast: broadcast mode. If True then command will be send simultaneously to all modules that are binded with selected channel (default - False). If module_id is specified or mode is NOOLITE then broadcast parameter will be ignored.
         :param module_mode: module work mode, used to determine adapter mode for send command (default - NOOLITE_F).
+        :param timeout: maximal time in seconds to wait for the command result or Deadline object. If time is over, then results received so far are returned. If None then default adapter timeouts are used.
         :return: for nooLite-F command returns array which contains command result and module info for each module that are binded with selected channel. For nooLite modules returns nothing.
         """
         pass
@@ -284,7 +338,7 @@ class NooLiteFController(ABC):
     @abstractmethod
     def brightness_tune_custom(self, direction: Direction, speed: float, module_id: int = None,
                                channel: int = None, broadcast: bool = False,
-                               module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
+                               module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
         """ Start to increase/decrease brightness with a specified speed
 
         :param module_id: the module id. The command will be send to module with specified id (used only for NOOLITE-F modules).
@@ -293,6 +347,7 @@ class NooLiteFController(ABC):
         :param direction: direction of the brightness changing
         :param speed: speed of the brightness changing. The range of value is 0 .. 1.0
         :param module_mode: module work mode, used to determine adapter mode for send command (default - NOOLITE_F).
+        :param timeout: maximal time in seconds to wait for the command result or Deadline object. If time is over, then results received so far are returned. If None then default adapter timeouts are used.
         :return: for nooLite-F command returns array which contains command result and module info for each module that are binded with selected channel. For nooLite modules returns nothing.
         """
         pass
@@ -300,7 +355,7 @@ class NooLiteFController(ABC):
     @abstractmethod
     def brightness_tune_step(self, direction: Direction, step: int = None, module_id: int = None,
                              channel: int = None, broadcast: bool = False,
-                             module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
+                             module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
         """ Increase/decrease brightness once with a specified step
 
         :param module_id: the module id. The command will be send to module with specified id (used only for NOOLITE-F modules).
@@ -309,13 +364,14 @@ class NooLiteFController(ABC):
         :param direction: direction of the brightness changing
         :param step: step in microseconds. If specify then can have values in range (1..255) or 0 (it is means 256), by default step equals 64
         :param module_mode: module work mode, used to determine adapter mode for send command (default - NOOLITE_F).
+        :param timeout: maximal time in seconds to wait for the command result or Deadline object. If time is over, then results received so far are returned. If None then default adapter timeouts are used.
         :return: for nooLite-F command returns array which contains command result and module info for each module that are binded with selected channel. For nooLite modules returns nothing.
         """
         pass
 
     @abstractmethod
     def set_brightness(self, brightness: float, module_id: int = None, channel: int = None, broadcast: bool = False,
-                       module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
+                       module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
         """ Set brightness
 
         :param module_id: the module id. The command will be send to module with specified id (used only for NOOLITE-F modules).
@@ -323,65 +379,70 @@ class NooLiteFController(ABC):
         :param broadcast: broadcast mode. If True then command will be send simultaneously to all modules that are binded with selected channel (default - False). If module_id is specified or mode is NOOLITE then broadcast parameter will be ignored.
         :param brightness: brightness level. The range of value is 0 .. 1.0
         :param module_mode: module work mode, used to determine adapter mode for send command (default - NOOLITE_F).
+        :param timeout: maximal time in seconds to wait for the command result or Deadline object. If time is over, then results received so far are returned. If None then default adapter timeouts are used.
         :return: for nooLite-F command returns array which contains command result and module info for each module that are binded with selected channel. For nooLite modules returns nothing.
         """
         pass
 
     @abstractmethod
     def roll_rgb_color(self, module_id: int = None, channel: int = None, broadcast: bool = False,
-                       module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
+                       module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
         """ Start color changing (only for RGB Led modules)
 
         :param module_id: the module id. The command will be send to module with specified id (used only for NOOLITE-F modules).
         :param channel: the number of the channel. The command will be send to all modules that are binded with selected channel. If module_id is also specified then command will be send only to appropriate device in channel.
         :param broadcast: broadcast mode. If True then command will be send simultaneously to all modules that are binded with selected channel (default - False). If module_id is specified or mode is NOOLITE then broadcast parameter will be ignored.
         :param module_mode: module work mode, used to determine adapter mode for send command (default - NOOLITE_F).
+        :param timeout: maximal time in seconds to wait for the command result or Deadline object. If time is over, then results received so far are returned. If None then default adapter timeouts are used.
         :return: for nooLite-F command returns array which contains command result and module info for each module that are binded with selected channel. For nooLite modules returns nothing.
         """
         pass
 
     @abstractmethod
     def switch_rgb_color(self, module_id: int = None, channel: int = None, broadcast: bool = False,
-                         module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
+                         module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
         """ Switch color (only for RGB Led modules)
 
         :param module_id: the module id. The command will be send to module with specified id (used only for NOOLITE-F modules).
         :param channel: the number of the channel. The command will be send to all modules that are binded with selected channel. If module_id is also specified then command will be send only to appropriate device in channel.
         :param broadcast: broadcast mode. If True then command will be send simultaneously to all modules that are binded with selected channel (default - False). If module_id is specified or mode is NOOLITE then broadcast parameter will be ignored.
         :param module_mode: module work mode, used to determine adapter mode for send command (default - NOOLITE_F).
+        :param timeout: maximal time in seconds to wait for the command result or Deadline object. If time is over, then results received so far are returned. If None then default adapter timeouts are used.
         :return: for nooLite-F command returns array which contains command result and module info for each module that are binded with selected channel. For nooLite modules returns nothing.
         """
         pass
 
     @abstractmethod
     def switch_rgb_mode(self, module_id: int = None, channel: int = None, broadcast: bool = False,
-                        module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
+                        module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
         """ Switch color changing modes (only for RGB Led modules)
 
         :param module_id: the module id. The command will be send to module with specified id (used only for NOOLITE-F modules).
         :param channel: the number of the channel. The command will be send to all modules that are binded with selected channel. If module_id is also specified then command will be send only to appropriate device in channel.
         :param broadcast: broadcast mode. If True then command will be send simultaneously to all modules that are binded with selected channel (default - False). If module_id is specified or mode is NOOLITE then broadcast parameter will be ignored.
         :param module_mode: module work mode, used to determine adapter mode for send command (default - NOOLITE_F).
+        :param timeout: maximal time in seconds to wait for the command result or Deadline object. If time is over, then results received so far are returned. If None then default adapter timeouts are used.
         :return: for nooLite-F command returns array which contains command result and module info for each module that are binded with selected channel. For nooLite modules returns nothing.
         """
         pass
 
     @abstractmethod
     def switch_rgb_mode_speed(self, module_id: int = None, channel: int = None, broadcast: bool = False,
-                              module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
+                              module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
         """ Switch speed of the color changing (only for RGB Led modules)
 
         :param module_id: the module id. The command will be send to module with specified id (used only for NOOLITE-F modules).
         :param channel: the number of the channel. The command will be send to all modules that are binded with selected channel. If module_id is also specified then command will be send only to appropriate device in channel.
         :param broadcast: broadcast mode. If True then command will be send simultaneously to all modules that are binded with selected channel (default - False). If module_id is specified or mode is NOOLITE then broadcast parameter will be ignored.
         :param module_mode: module work mode, used to determine adapter mode for send command (default - NOOLITE_F).
+        :param timeout: maximal time in seconds to wait for the command result or Deadline object. If time is over, then results received so far are returned. If None then default adapter timeouts are used.
         :return: for nooLite-F command returns array which contains command result and module info for each module that are binded with selected channel. For nooLite modules returns nothing.
         """
         pass
 
     @abstractmethod
     def set_rgb_brightness(self, red: float, green: float, blue: float, module_id: int = None, channel: int = None,
-                           broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[
+                           broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[
         ResponseBaseInfo]:
         """ Set brightness for each rgb color (only for RGB Led modules)
 
@@ -392,91 +453,98 @@ class NooLiteFController(ABC):
         :param green: green color brightness level. The range of value is 0 .. 1.0
         :param blue: blue color brightness level. The range of value is 0 .. 1.0
         :param module_mode: module work mode, used to determine adapter mode for send command (default - NOOLITE_F).
+        :param timeout: maximal time in seconds to wait for the command result or Deadline object. If time is over, then results received so far are returned. If None then default adapter timeouts are used.
         :return: for nooLite-F command returns array which contains command result and module info for each module that are binded with selected channel. For nooLite modules returns nothing.
         """
         pass
 
     @abstractmethod
     def load_preset(self, module_id: int = None, channel: int = None, broadcast: bool = False,
-                    module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
+                    module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
         """ Load saved module state from preset
 
         :param module_id: the module id. The command will be send to module with specified id (used only for NOOLITE-F modules).
         :param channel: the number of the channel. The command will be send to all modules that are binded with selected channel. If module_id is also specified then command will be send only to appropriate device in channel.
         :param broadcast: broadcast mode. If True then command will be send simultaneously to all modules that are binded with selected channel (default - False). If module_id is specified or mode is NOOLITE then broadcast parameter will be ignored.
         :param module_mode: module work mode, used to determine adapter mode for send command (default - NOOLITE_F).
+        :param timeout: maximal time in seconds to wait for the command result or Deadline object. If time is over, then results received so far are returned. If None then default adapter timeouts are used.
         :return: for nooLite-F command returns array which contains command result and module info for each module that are binded with selected channel. For nooLite modules returns nothing.
         """
         pass
 
     @abstractmethod
     def save_preset(self, module_id: int = None, channel: int = None, broadcast: bool = False,
-                    module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
+                    module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
         """ Save current module state as preset
 
         :param module_id: the module id. The command will be send to module with specified id (used only for NOOLITE-F modules).
         :param channel: the number of the channel. The command will be send to all modules that are binded with selected channel. If module_id is also specified then command will be send only to appropriate device in channel.
         :param broadcast: broadcast mode. If True then command will be send simultaneously to all modules that are binded with selected channel (default - False). If module_id is specified or mode is NOOLITE then broadcast parameter will be ignored.
         :param module_mode: module work mode, used to determine adapter mode for send command (default - NOOLITE_F).
+        :param timeout: maximal time in seconds to wait for the command result or Deadline object. If time is over, then results received so far are returned. If None then default adapter timeouts are used.
         :return: for nooLite-F command returns array which contains command result and module info for each module that are binded with selected channel. For nooLite modules returns nothing.
         """
         pass
 
     @abstractmethod
     def read_state(self, module_id: int = None, channel: int = None, broadcast: bool = False,
-                   module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
+                   module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
         """  Read module base state (only for NooLite-F modules)
 
         :param module_id: the module id. The command will be send to module with specified id (used only for NOOLITE-F modules).
         :param channel: the number of the channel. The command will be send to all modules that are binded with selected channel. If module_id is also specified then command will be send only to appropriate device in channel.
         :param broadcast: broadcast mode. If True then command will be send simultaneously to all modules that are binded with selected channel (default - False). If module_id is specified or mode is NOOLITE then broadcast parameter will be ignored.
         :param module_mode: module work mode, used to determine adapter mode for send command (default - NOOLITE_F).
+        :param timeout: maximal time in seconds to wait for the command result or Deadline object. If time is over, then results received so far are returned. If None then default adapter timeouts are used.
         :return: for nooLite-F command returns array which contains command result and module info for each module that are binded with selected channel. For nooLite modules returns nothing.
         """
         pass
 
     @abstractmethod
     def read_extra_state(self, module_id: int = None, channel: int = None, broadcast: bool = False,
-                         module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseExtraInfo]:
+                         module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseExtraInfo]:
         """  Read module extra state: extra input state, noolite mode state (only for NooLite-F modules)
 
         :param module_id: the module id. The command will be send to module with specified id (used only for NOOLITE-F modules).
         :param channel: the number of the channel. The command will be send to all modules that are binded with selected channel. If module_id is also specified then command will be send only to appropriate device in channel.
         :param broadcast: broadcast mode. If True then command will be send simultaneously to all modules that are binded with selected channel (default - False). If module_id is specified or mode is NOOLITE then broadcast parameter will be ignored.
         :param module_mode: module work mode, used to determine adapter mode for send command (default - NOOLITE_F).
+        :param timeout: maximal time in seconds to wait for the command result or Deadline object. If time is over, then results received so far are returned. If None then default adapter timeouts are used.
         :return: for nooLite-F command returns array which contains command result and module extra info for each module that are binded with selected channel. For nooLite modules returns nothing.
         """
         pass
 
     @abstractmethod
     def read_channels_state(self, module_id: int = None, channel: int = None, broadcast: bool = False,
-                            module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseChannelsInfo]:
+                            module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseChannelsInfo]:
         """  Read module available cells count for binding (only for NooLite-F modules)
 
         :param module_id: the module id. The command will be send to module with specified id (used only for NOOLITE-F modules).
         :param channel: the number of the channel. The command will be send to all modules that are binded with selected channel. If module_id is also specified then command will be send only to appropriate device in channel.
         :param broadcast: broadcast mode. If True then command will be send simultaneously to all modules that are binded with selected channel (default - False). If module_id is specified or mode is NOOLITE then broadcast parameter will be ignored.
         :param module_mode: module work mode, used to determine adapter mode for send command (default - NOOLITE_F).
+        :param timeout: maximal time in seconds to wait for the command result or Deadline object. If time is over, then results received so far are returned. If None then default adapter timeouts are used.
         :return: for nooLite-F command returns array which contains command result and module cells count for each module that are binded with selected channel. For nooLite modules returns nothing.
         """
         pass
 
     @abstractmethod
     def read_module_config(self, module_id: int = None, channel: int = None, broadcast: bool = False,
-                           module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseModuleConfig]:
+                           module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseModuleConfig]:
         """  Read module configuration (only for NooLite-F modules)
 
         :param module_id: the module id. The command will be send to module with specified id (used only for NOOLITE-F modules).
         :param channel: the number of the channel. The command will be send to all modules that are binded with selected channel. If module_id is also specified then command will be send only to appropriate device in channel.
         :param broadcast: broadcast mode. If True then command will be send simultaneously to all modules that are binded with selected channel (default - False). If module_id is specified or mode is NOOLITE then broadcast parameter will be ignored.
         :param module_mode: module work mode, used to determine adapter mode for send command (default - NOOLITE_F).
+        :param timeout: maximal time in seconds to wait for the command result or Deadline object. If time is over, then results received so far are returned. If None then default adapter timeouts are used.
         :return: for nooLite-F command returns array which contains command result and module configuration for each module that are binded with selected channel. For nooLite modules returns nothing.
         """
         pass
 
     @abstractmethod
     def write_module_config(self, config: ModuleConfig, module_id: int = None, channel: int = None,
-                            broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[
+                            broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[
         ResponseModuleConfig]:
         """  Write module configuration (only for NooLite-F modules)
 
@@ -485,26 +553,28 @@ class NooLiteFController(ABC):
         :param channel: the number of the channel. The command will be send to all modules that are binded with selected channel. If module_id is also specified then command will be send only to appropriate device in channel.
         :param broadcast: broadcast mode. If True then command will be send simultaneously to all modules that are binded with selected channel (default - False). If module_id is specified or mode is NOOLITE then broadcast parameter will be ignored.
         :param module_mode: module work mode, used to determine adapter mode for send command (default - NOOLITE_F).
+        :param timeout: maximal time in seconds to wait for the command result or Deadline object. If time is over, then results received so far are returned. If None then default adapter timeouts are used.
         :return: for nooLite-F command returns array which contains command result and new module configuration for each module that are binded with selected channel. For nooLite modules returns nothing.
         """
         pass
 
     @abstractmethod
     def read_dimmer_correction(self, module_id: int = None, channel: int = None, broadcast: bool = False,
-                               module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseDimmerCorrectionConfig]:
+                               module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseDimmerCorrectionConfig]:
         """  Read dimmer correction values. Affects only on power modules in dimmer mode (only for NooLite-F modules)
 
         :param module_id: the module id. The command will be send to module with specified id (used only for NOOLITE-F modules).
         :param channel: the number of the channel. The command will be send to all modules that are binded with selected channel. If module_id is also specified then command will be send only to appropriate device in channel.
         :param broadcast: broadcast mode. If True then command will be send simultaneously to all modules that are binded with selected channel (default - False). If module_id is specified or mode is NOOLITE then broadcast parameter will be ignored.
         :param module_mode: module work mode, used to determine adapter mode for send command (default - NOOLITE_F).
+        :param timeout: maximal time in seconds to wait for the command result or Deadline object. If time is over, then results received so far are returned. If None then default adapter timeouts are used.
         :return: for nooLite-F command returns array which contains command result and dimmer configuration for each module that are binded with selected channel. For nooLite modules returns nothing.
         """
         pass
 
     @abstractmethod
     def write_dimmer_correction(self, config: DimmerCorrectionConfig, module_id: int = None, channel: int = None,
-                                broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[
+                                broadcast: bool = False, module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[
         ResponseDimmerCorrectionConfig]:
         """  Writes dimmer correction values. Affects only on power modules in dimmer mode (only for NooLite-F modules)
 
@@ -513,39 +583,42 @@ class NooLiteFController(ABC):
         :param channel: the number of the channel. The command will be send to all modules that are binded with selected channel. If module_id is also specified then command will be send only to appropriate device in channel.
         :param broadcast: broadcast mode. If True then command will be send simultaneously to all modules that are binded with selected channel (default - False). If module_id is specified or mode is NOOLITE then broadcast parameter will be ignored.
         :param module_mode: module work mode, used to determine adapter mode for send command (default - NOOLITE_F).
+        :param timeout: maximal time in seconds to wait for the command result or Deadline object. If time is over, then results received so far are returned. If None then default adapter timeouts are used.
         :return: for nooLite-F command returns array which contains command result and new brightness configuration for each module that are binded with selected channel. For nooLite modules returns nothing.
         """
         pass
 
     @abstractmethod
     def bind(self, module_id: int = None, channel: int = None, broadcast: bool = False,
-             module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
+             module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
         """  Send bind command to module
 
         :param module_id: the module id. The command will be send to module with specified id (used only for NOOLITE-F modules).
         :param channel: the number of the channel. The command will be send to all modules that are binded with selected channel. If module_id is also specified then command will be send only to appropriate device in channel.
         :param broadcast: broadcast mode. If True then command will be send simultaneously to all modules that are binded with selected channel (default - False). If module_id is specified or mode is NOOLITE then broadcast parameter will be ignored.
         :param module_mode: module work mode, used to determine adapter mode for send command (default - NOOLITE_F).
+        :param timeout: maximal time in seconds to wait for the command result or Deadline object. If time is over, then results received so far are returned. If None then default adapter timeouts are used.
         :return: for nooLite-F command returns array which contains command result and module info for each module that are binded with selected channel. For nooLite modules returns nothing.
         """
         pass
 
     @abstractmethod
     def unbind(self, module_id: int = None, channel: int = None, broadcast: bool = False,
-               module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
+               module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
         """  Send unbind command to module
 
         :param module_id: the module id. The command will be send to module with specified id (used only for NOOLITE-F modules).
         :param channel: the number of the channel. The command will be send to all modules that are binded with selected channel. If module_id is also specified then command will be send only to appropriate device in channel.
         :param broadcast: broadcast mode. If True then command will be send simultaneously to all modules that are binded with selected channel (default - False). If module_id is specified or mode is NOOLITE then broadcast parameter will be ignored.
         :param module_mode: module work mode, used to determine adapter mode for send command (default - NOOLITE_F).
+        :param timeout: maximal time in seconds to wait for the command result or Deadline object. If time is over, then results received so far are returned. If None then default adapter timeouts are used.
         :return: for nooLite-F command returns array which contains command result and module info for each module that are binded with selected channel. For nooLite modules returns nothing.
         """
         pass
 
     @abstractmethod
     def set_service_mode(self, state: bool, module_id: int = None, channel: int = None, broadcast: bool = False,
-                         module_mode: ModuleMode = ModuleMode.NOOLITE_F) -> List[ResponseBaseInfo]:
+                         module_mode: ModuleMode = ModuleMode.NOOLITE_F, timeout: Timeout = None) -> List[ResponseBaseInfo]:
         """  Turn on/off the service mode on module (only for NooLite-F modules)
 
         :param state: new service mode state (on/off).
@@ -553,6 +626,7 @@ class NooLiteFController(ABC):
         :param channel: the number of the channel. The command will be send to all modules that are binded with selected channel. If module_id is also specified then command will be send only to appropriate device in channel.
         :param broadcast: broadcast mode. If True then command will be send simultaneously to all modules that are binded with selected channel (default - False). If module_id is specified or mode is NOOLITE then broadcast parameter will be ignored.
         :param module_mode: module work mode, used to determine adapter mode for send command (default - NOOLITE_F).
+        :param timeout: maximal time in seconds to wait for the command result or Deadline object. If time is over, then results received so far are returned. If None then default adapter timeouts are used.
         :return: for nooLite-F command returns array which contains command result and module info for each module that are binded with selected channel. For nooLite modules returns nothing.
         """
         pass
@@ -561,7 +635,7 @@ class NooLiteFController(ABC):
     def add_listener(self, channel: int, listener: NooLiteFListener):
         """ Add the remote controls listener to channel.
 
-        :param channel: channel to which the listener will be assigned
+        :param channel: channel to which the listener will be assigned or None to assign listener to all channels
         :param listener: listener
         """
         pass
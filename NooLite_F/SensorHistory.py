@@ -0,0 +1,281 @@
+from array import array
+from math import floor, inf
+from time import time
+from typing import List, Tuple
+
+from NooLite_F import BatteryState
+
+
+class TempHumiRecord(object):
+    timestamp = None
+    temp = None
+    humi = None
+    analog = None
+    battery = None
+
+    def __repr__(self):
+        return "<TempHumiRecord (0x{0:x}), timestamp: {1}, temp: {2}, humi: {3}, analog: {4}, battery: {5}>" \
+            .format(id(self), self.timestamp, self.temp, self.humi, self.analog, self.battery)
+
+
+class Aggregate(object):
+    count = 0
+    min = None
+    max = None
+    mean = None
+
+    def __repr__(self):
+        return "<Aggregate (0x{0:x}), count: {1}, min: {2}, max: {3}, mean: {4}>" \
+            .format(id(self), self.count, self.min, self.max, self.mean)
+
+
+class _MinMaxTree(object):
+    """ Segment tree over ring buffer slots, answers min/max queries for range of slots in O(log n). """
+
+    def __init__(self, capacity: int):
+        self._size = capacity
+        self._min = array("d", [inf]) * (2 * capacity)
+        self._max = array("d", [-inf]) * (2 * capacity)
+
+    def set(self, slot: int, value: float):
+        i = slot + self._size
+        if value is None:
+            self._min[i] = inf
+            self._max[i] = -inf
+        else:
+            self._min[i] = value
+            self._max[i] = value
+
+        i >>= 1
+        while i > 0:
+            self._min[i] = min(self._min[2 * i], self._min[2 * i + 1])
+            self._max[i] = max(self._max[2 * i], self._max[2 * i + 1])
+            i >>= 1
+
+    def query(self, begin: int, end: int) -> Tuple[float, float]:
+        low = inf
+        high = -inf
+        begin += self._size
+        end += self._size
+        while begin < end:
+            if begin & 1:
+                low = min(low, self._min[begin])
+                high = max(high, self._max[begin])
+                begin += 1
+            if end & 1:
+                end -= 1
+                low = min(low, self._min[end])
+                high = max(high, self._max[end])
+            begin >>= 1
+            end >>= 1
+        return low, high
+
+
+class _Series(object):
+    """ Values of one sensor field with min/max tree and prefix sums for O(log n) window aggregates. """
+
+    def __init__(self, capacity: int):
+        self._capacity = capacity
+        self.values = array("d", [0.0]) * capacity
+        self.present = array("B", [0]) * capacity
+        self._tree = _MinMaxTree(capacity)
+        # sum and count of all values appended before the value in the slot
+        self._sum_before = array("d", [0.0]) * capacity
+        self._count_before = array("Q", [0]) * capacity
+        self._sum = 0.0
+        self._count = 0
+
+    def set(self, slot: int, value: float):
+        self._sum_before[slot] = self._sum
+        self._count_before[slot] = self._count
+        self._tree.set(slot, value)
+        if value is None:
+            self.values[slot] = 0.0
+            self.present[slot] = 0
+        else:
+            self.values[slot] = value
+            self.present[slot] = 1
+            self._sum += value
+            self._count += 1
+
+    def get(self, slot: int) -> float:
+        if self.present[slot]:
+            return self.values[slot]
+        return None
+
+    def aggregate(self, begin_slot: int, end_slot: int, end_is_head: bool) -> Aggregate:
+        """ Aggregate values in the slot range [begin_slot, end_slot), the range can wrap around the ring end. """
+        result = Aggregate()
+
+        if end_is_head:
+            total_sum, total_count = self._sum, self._count
+        else:
+            total_sum, total_count = self._sum_before[end_slot], self._count_before[end_slot]
+        result.count = total_count - self._count_before[begin_slot]
+        if result.count == 0:
+            return result
+
+        result.mean = (total_sum - self._sum_before[begin_slot]) / result.count
+
+        if begin_slot < end_slot:
+            result.min, result.max = self._tree.query(begin_slot, end_slot)
+        else:
+            low1, high1 = self._tree.query(begin_slot, self._capacity)
+            low2, high2 = self._tree.query(0, end_slot)
+            result.min, result.max = min(low1, low2), max(high1, high2)
+
+        return result
+
+
+class TempHumiHistory(object):
+    """ Fixed size history of temperature and humidity sensor readings.
+
+    Readings are stored in typed arrays, so memory usage does not depend on the number of readings. When history
+    is full, the oldest reading is overwritten. Min, max and mean for any time period are calculated in O(log n).
+    Timestamps are expected to be non decreasing, readings with older timestamp are stored with the last timestamp.
+    """
+
+    def __init__(self, capacity: int = 1440):
+        """
+        :param capacity: maximal number of stored readings.
+        """
+        if capacity <= 0:
+            raise ValueError("History capacity should be positive: {0}".format(capacity))
+
+        self._capacity = capacity
+        self._timestamps = array("d", [0.0]) * capacity
+        self._temp = _Series(capacity)
+        self._humi = _Series(capacity)
+        self._analog = array("d", [0.0]) * capacity
+        self._battery = array("B", [0]) * capacity
+        self._total = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def __len__(self):
+        return min(self._total, self._capacity)
+
+    def append(self, temp: float, humi: int, analog: float, battery: BatteryState, timestamp: float = None):
+        """ Add new reading to the history.
+
+        :param timestamp: time of the reading (seconds since epoch). If None then current time is used.
+        """
+        if timestamp is None:
+            timestamp = time()
+        if self._total > 0:
+            timestamp = max(timestamp, self._timestamps[(self._total - 1) % self._capacity])
+
+        slot = self._total % self._capacity
+        self._timestamps[slot] = timestamp
+        self._temp.set(slot, temp)
+        self._humi.set(slot, humi)
+        self._analog[slot] = analog
+        self._battery[slot] = battery.value
+        self._total += 1
+
+    def clear(self):
+        self.__init__(self._capacity)
+
+    def last(self, count: int = 1) -> List[TempHumiRecord]:
+        """ Returns the latest readings, the oldest first. """
+        count = min(count, len(self))
+        return [self._record(seq) for seq in range(self._total - count, self._total)]
+
+    def records(self, period: float = None, now: float = None) -> List[TempHumiRecord]:
+        """ Returns readings for the last period, the oldest first.
+
+        :param period: period length in seconds. If None then all stored readings are returned.
+        :param now: end of the period. If None then current time is used.
+        """
+        begin, end = self._period(period, now)
+        return [self._record(seq) for seq in range(begin, end)]
+
+    def temperature(self, period: float = None, now: float = None) -> Aggregate:
+        """ Returns min, max and mean temperature for the last period.
+
+        :param period: period length in seconds. If None then all stored readings are used.
+        :param now: end of the period. If None then current time is used.
+        """
+        begin, end = self._period(period, now)
+        return self._aggregate(self._temp, begin, end)
+
+    def humidity(self, period: float = None, now: float = None) -> Aggregate:
+        """ Returns min, max and mean humidity for the last period. Readings without humidity are ignored.
+
+        :param period: period length in seconds. If None then all stored readings are used.
+        :param now: end of the period. If None then current time is used.
+        """
+        begin, end = self._period(period, now)
+        return self._aggregate(self._humi, begin, end)
+
+    def downsample(self, bucket: float, period: float = None, now: float = None) -> List[Tuple[float, Aggregate, Aggregate]]:
+        """ Split readings into buckets of fixed length and aggregate each of them.
+
+        :param bucket: bucket length in seconds. Buckets are aligned to multiple of bucket length.
+        :param period: period length in seconds. If None then all stored readings are used.
+        :param now: end of the period. If None then current time is used.
+        :return: list of (bucket start time, temperature aggregate, humidity aggregate) for non empty buckets.
+        """
+        begin, end = self._period(period, now)
+
+        result = []
+        while begin < end:
+            start = floor(self._timestamp(begin) / bucket) * bucket
+            bucket_end = self._find(start + bucket, begin, end)
+            result.append((start, self._aggregate(self._temp, begin, bucket_end), self._aggregate(self._humi, begin, bucket_end)))
+            begin = bucket_end
+        return result
+
+    # Private
+    def _timestamp(self, seq: int) -> float:
+        return self._timestamps[seq % self._capacity]
+
+    def _record(self, seq: int) -> TempHumiRecord:
+        slot = seq % self._capacity
+        record = TempHumiRecord()
+        record.timestamp = self._timestamps[slot]
+        record.temp = self._temp.get(slot)
+        record.humi = self._humi.get(slot)
+        if record.humi is not None:
+            record.humi = int(record.humi)
+        record.analog = self._analog[slot]
+        record.battery = BatteryState(self._battery[slot])
+        return record
+
+    def _find(self, timestamp: float, begin: int, end: int) -> int:
+        """ Returns the first sequence number in [begin, end) with reading time >= timestamp. """
+        while begin < end:
+            middle = (begin + end) // 2
+            if self._timestamp(middle) < timestamp:
+                begin = middle + 1
+            else:
+                end = middle
+        return begin
+
+    def _period(self, period: float, now: float) -> Tuple[int, int]:
+        begin = self._total - len(self)
+        end = self._total
+        if period is None and now is None:
+            return begin, end
+
+        if now is None:
+            now = time()
+        else:
+            end = self._find(now, begin, end)
+            # readings exactly at 'now' belong to the period
+            while end < self._total and self._timestamp(end) == now:
+                end += 1
+
+        if period is not None:
+            begin = self._find(now - period, begin, end)
+        return begin, end
+
+    def _aggregate(self, series: _Series, begin: int, end: int) -> Aggregate:
+        if begin >= end:
+            return Aggregate()
+        return series.aggregate(begin % self._capacity, end % self._capacity, end == self._total)
+
+    def __repr__(self):
+        return "<TempHumiHistory (0x{0:x}), capacity: {1}, size: {2}>".format(id(self), self._capacity, len(self))
@@ -1,4 +1,5 @@
 from NooLite_F import NooLiteFController, NooLiteFListener, BatteryState, Direction
+from NooLite_F.SensorHistory import TempHumiHistory
 
 
 class GenericListener(NooLiteFListener):
@@ -20,11 +21,15 @@ class GenericListener(NooLiteFListener):
 
 class TempHumiSensor(GenericListener):
 
-    def __init__(self, controller: NooLiteFController, channel: int, on_data):
+    def __init__(self, controller: NooLiteFController, channel: int, on_data, history: TempHumiHistory = None):
         super().__init__(controller, channel)
         self._on_data_listener = on_data
+        self.history = history
 
     def on_temp_humi(self, temp: float, humi: int, battery: BatteryState, analog: float):
+        if self.history is not None:
+            self.history.append(temp, humi, analog, battery)
+
         if self._on_data_listener is not None:
             self._on_data_listener(temp, humi, analog, battery)
 
@@ -0,0 +1,342 @@
+import heapq
+import logging
+
+from abc import ABC, abstractmethod
+from itertools import count
+from threading import Thread, Condition, Event
+from time import monotonic
+from typing import Tuple
+
+from NooLite_F import Direction
+from NooLite_F.Modules import Dimmer, Fan, RGBLed
+
+
+_LOGGER = logging.getLogger("NooLiteTransitions")
+
+# Number of brightness levels of set_brightness and set_rgb_brightness commands
+_BRIGHTNESS_LEVELS = 120
+_RGB_LEVELS = 255
+# Speed of brightness_tune_custom command is transmitted as 7 bit value
+_SPEED_LEVELS = 127
+
+
+class Transition(ABC):
+    """ Handle of the running transition. """
+
+    def __init__(self, module, start, end, duration: float):
+        self.module = module
+        self.start = start
+        self.end = end
+        self.duration = duration
+        self.error = None
+        self._started_at = None
+        self._done = Event()
+        self._cancelled = False
+        self._wakeup = None
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def cancel(self):
+        """ Stop the transition. The module keeps the current value. """
+        self._cancelled = True
+        if self._wakeup is not None:
+            self._wakeup(self)
+
+    def wait(self, timeout: float = None) -> bool:
+        """ Wait until the transition is finished.
+
+        :return: True if transition is finished, False on timeout.
+        """
+        return self._done.wait(timeout)
+
+    @abstractmethod
+    def step(self, now: float, timeout: float) -> float:
+        """ Send the next command of transition.
+
+        :param now: current time.
+        :param timeout: maximal time in seconds of each command.
+        :return: time of the next step or None if transition is finished.
+        """
+        pass
+
+    def on_cancel(self, timeout: float):
+        pass
+
+    def value(self, now: float):
+        """ Returns transition value at the specified time. """
+        progress = 1.0
+        if self.duration > 0:
+            progress = min(1.0, max(0.0, (now - self._started_at) / self.duration))
+        if isinstance(self.start, tuple):
+            return tuple(s + (e - s) * progress for s, e in zip(self.start, self.end))
+        return self.start + (self.end - self.start) * progress
+
+    def __repr__(self):
+        return "<Transition (0x{0:x}), start: {1}, end: {2}, duration: {3}, done: {4}, cancelled: {5}>" \
+            .format(id(self), self.start, self.end, self.duration, self.done, self.cancelled)
+
+
+class _SteppedTransition(Transition):
+    """ Sends set brightness command each time the value changes by one level, but not often than min_interval. """
+
+    def __init__(self, module, start, end, duration: float, min_interval: float):
+        super().__init__(module, start, end, duration)
+        self._last = None
+
+        if isinstance(start, tuple):
+            levels = _RGB_LEVELS
+            delta = max(abs(e - s) for s, e in zip(start, end))
+        else:
+            levels = _BRIGHTNESS_LEVELS
+            delta = abs(end - start)
+
+        self._levels = levels
+        self._interval = min_interval
+        if delta > 0:
+            self._interval = max(min_interval, duration / (delta * levels))
+
+    def step(self, now: float, timeout: float) -> float:
+        value = self.value(now)
+        finished = now - self._started_at >= self.duration
+
+        if isinstance(value, tuple):
+            quantized = tuple(int(v * self._levels + 0.5) for v in value)
+        else:
+            quantized = int(value * self._levels + 0.5)
+
+        if quantized != self._last:
+            self._last = quantized
+            _send_value(self.module, value, timeout)
+
+        if finished:
+            return None
+        return min(now + self._interval, self._started_at + self.duration)
+
+
+class _RegulatedTransition(Transition):
+    """ Sets the start value, starts brightness regulation with calculated speed and stops it when duration is over. """
+
+    def __init__(self, module, start: float, end: float, duration: float, speed: float):
+        super().__init__(module, start, end, duration)
+        self._speed = speed
+        self._stage = 0
+
+    def step(self, now: float, timeout: float) -> float:
+        if self._stage == 0:
+            _send_value(self.module, self.start, timeout)
+            self._stage = 1
+            return now
+        elif self._stage == 1:
+            direction = Direction.UP if self.end > self.start else Direction.DOWN
+            _tune_custom(self.module, direction, self._speed, timeout)
+            self._started_at = now
+            self._stage = 2
+            return now + self.duration
+        elif self._stage == 2:
+            _tune_stop(self.module, timeout)
+            self._stage = 3
+            return now
+        else:
+            # regulation is not precise, so set exact end value
+            _send_value(self.module, self.end, timeout)
+            return None
+
+    def on_cancel(self, timeout: float):
+        if self._stage == 2:
+            _tune_stop(self.module, timeout)
+
+
+def _send_value(module, value, timeout: float):
+    if isinstance(module, RGBLed) and isinstance(value, tuple):
+        module.set_rgb_brightness(value[0], value[1], value[2], timeout=timeout)
+    elif isinstance(module, Fan):
+        module.set_speed(value, timeout=timeout)
+    else:
+        module.set_brightness(value, timeout=timeout)
+
+
+def _tune_custom(module, direction: Direction, speed: float, timeout: float):
+    if isinstance(module, Fan):
+        module.speed_tune_custom(direction, speed, timeout=timeout)
+    else:
+        module.brightness_tune_custom(direction, speed, timeout=timeout)
+
+
+def _tune_stop(module, timeout: float):
+    if isinstance(module, Fan):
+        module.speed_tune_stop(timeout=timeout)
+    else:
+        module.brightness_tune_stop(timeout=timeout)
+
+
+class TransitionEngine(object):
+    """ Runs brightness (fan speed, rgb color) transitions of many modules in one thread.
+
+    Commands of all transitions share the common rate budget. When budget is exhausted, transitions send commands
+    less often, but still finish in time because each command sets the value calculated for the current time.
+    Each command is limited by step_timeout, so unreachable module delays other transitions only for this time.
+    """
+
+    def __init__(self, max_rate: float = 5.0, min_step_interval: float = 0.2, step_timeout: float = 0.5):
+        """
+        :param max_rate: maximal number of commands per second for all transitions.
+        :param min_step_interval: minimal interval in seconds between commands of one stepped transition.
+        :param step_timeout: maximal time in seconds of each command (including waiting for the adapter and retries).
+        """
+        self._max_rate = max_rate
+        self._min_step_interval = min_step_interval
+        self._step_timeout = step_timeout
+        self._condition = Condition()
+        self._queue = []
+        self._sequence = count()
+        self._tokens = 1.0
+        self._tokens_updated = monotonic()
+        self._is_stopped = False
+
+        self._thread = Thread(target=self._loop)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def fade(self, module, start: float, end: float, duration: float, full_scale_time: float = None) -> Transition:
+        """ Start brightness (or fan speed) transition.
+
+        If full_scale_time is specified and required speed can be reached, module regulates brightness itself
+        (brightness_tune_custom with stop after duration), so only few commands are sent. Otherwise brightness
+        is changed by set_brightness commands.
+
+        :param module: Dimmer, Fan or RGBLed module.
+        :param start: start brightness (0..1).
+        :param end: end brightness (0..1).
+        :param duration: transition duration in seconds.
+        :param full_scale_time: time in seconds for which the module changes brightness from 0 to 1 with maximal regulation speed.
+        If None then module is considered as not supporting brightness regulation.
+        :return: transition handle.
+        """
+        if not isinstance(module, (Dimmer, Fan, RGBLed)):
+            raise TypeError("Module does not support brightness: {0}".format(module))
+
+        transition = None
+        if full_scale_time is not None and duration > 0 and end != start and not isinstance(module, RGBLed):
+            speed = full_scale_time * abs(end - start) / duration
+            if 1 / _SPEED_LEVELS <= speed <= 1:
+                transition = _RegulatedTransition(module, start, end, duration, speed)
+
+        if transition is None:
+            transition = _SteppedTransition(module, start, end, duration, self._min_step_interval)
+
+        self._schedule(transition)
+        return transition
+
+    def fade_rgb(self, module: RGBLed, start: Tuple[float, float, float], end: Tuple[float, float, float], duration: float) -> Transition:
+        """ Start color transition of rgb module.
+
+        :param module: RGBLed module.
+        :param start: start (red, green, blue) levels (0..1).
+        :param end: end (red, green, blue) levels (0..1).
+        :param duration: transition duration in seconds.
+        :return: transition handle.
+        """
+        if not isinstance(module, RGBLed):
+            raise TypeError("Module does not support rgb: {0}".format(module))
+
+        transition = _SteppedTransition(module, tuple(start), tuple(end), duration, self._min_step_interval)
+        self._schedule(transition)
+        return transition
+
+    def active(self) -> int:
+        """ Returns number of running transitions. """
+        with self._condition:
+            return len(set(transition for when, sequence, transition in self._queue if not transition.done))
+
+    def stop(self):
+        """ Stop all transitions and engine thread. """
+        with self._condition:
+            self._is_stopped = True
+            pending = []
+            for when, sequence, transition in self._queue:
+                if transition not in pending:
+                    pending.append(transition)
+            self._queue = []
+            self._condition.notify_all()
+        self._thread.join()
+
+        for transition in pending:
+            transition._cancelled = True
+            self._run(transition)
+
+    # Private
+    def _schedule(self, transition: Transition):
+        with self._condition:
+            if self._is_stopped:
+                raise RuntimeError("Transition engine is stopped")
+            now = monotonic()
+            transition._started_at = now
+            transition._wakeup = self._wakeup
+            heapq.heappush(self._queue, (now, next(self._sequence), transition))
+            self._condition.notify_all()
+
+    def _wakeup(self, transition: Transition):
+        with self._condition:
+            if not self._is_stopped and not transition.done:
+                heapq.heappush(self._queue, (monotonic(), next(self._sequence), transition))
+                self._condition.notify_all()
+
+    def _take_token(self, now: float) -> float:
+        """ Take token from the rate budget. Returns 0 on success or time to wait for the next token. """
+        self._tokens = min(1.0, self._tokens + (now - self._tokens_updated) * self._max_rate)
+        self._tokens_updated = now
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return 0
+        return (1.0 - self._tokens) / self._max_rate
+
+    def _loop(self):
+        while True:
+            with self._condition:
+                while not self._is_stopped:
+                    wait = None
+                    if len(self._queue) > 0:
+                        when, sequence, transition = self._queue[0]
+                        if transition.done:
+                            heapq.heappop(self._queue)
+                            continue
+                        if transition.cancelled:
+                            break
+                        now = monotonic()
+                        if when <= now:
+                            wait = self._take_token(now)
+                            if wait == 0:
+                                break
+                        else:
+                            wait = when - now
+                    self._condition.wait(wait)
+
+                if self._is_stopped:
+                    return
+                when, sequence, transition = heapq.heappop(self._queue)
+
+            self._run(transition)
+
+    def _run(self, transition: Transition):
+        next_time = None
+        try:
+            if not transition.cancelled:
+                next_time = transition.step(monotonic(), self._step_timeout)
+            # cancel can also land while the step is running, e.g. when regulation is started
+            if transition.cancelled:
+                transition.on_cancel(self._step_timeout)
+        except Exception as err:
+            _LOGGER.error("Transition error: {0}".format(err))
+            transition.error = err
+
+        with self._condition:
+            if next_time is None or transition.cancelled or self._is_stopped:
+                transition._done.set()
+            else:
+                heapq.heappush(self._queue, (next_time, next(self._sequence), transition))
@@ -1,5 +1,10 @@
 from NooLite_F.NooLiteFController import NooLiteFController, Direction, NooLiteFListener, BatteryState, ModuleMode
-from NooLite_F.NooLiteFController import ModuleInfo, ModuleBaseStateInfo, ModuleExtraStateInfo, ModuleChannelsStateInfo, ModuleState, ServiceModeState, InputMode, DimmerCorrectionConfig, ModuleConfig, NooliteModeState
+from NooLite_F.NooLiteFController import ModuleInfo, ModuleBaseStateInfo, ModuleExtraStateInfo, ModuleChannelsStateInfo, ModuleState, ServiceModeState, InputMode, DimmerCorrectionConfig, ModuleConfig, NooliteModeState, Deadline, Timeout
 from NooLite_F.NooLiteFController import ResponseBaseInfo, ResponseExtraInfo, ResponseChannelsInfo, ResponseModuleConfig, ResponseDimmerCorrectionConfig
 from NooLite_F.Modules import Switch, ExtendedSwitch, Dimmer, RGBLed
+from NooLite_F.ModuleGroups import SwitchGroup, DimmerGroup, RGBLedGroup
+from NooLite_F.ConfigPush import ConfigApplier, ConfigPushResult, ConfigPushStatus
+from NooLite_F.SensorHistory import TempHumiHistory, TempHumiRecord, Aggregate
 from NooLite_F.Sensors import GenericListener, TempHumiSensor, MotionSensor, RemoteController, RGBRemoteController
+from NooLite_F.Transitions import TransitionEngine, Transition
+from NooLite_F.CommandScheduler import CommandScheduler, ScheduledAction
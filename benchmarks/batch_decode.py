@@ -0,0 +1,117 @@
+""" Compare batch frame decoding with scalar decoding and check that results are equal.
+
+Usage: python benchmarks/batch_decode.py [frames count]
+"""
+import random
+import sys
+
+from math import isnan
+from struct import Struct
+from time import perf_counter
+
+from NooLite_F.MTRF64 import MTRF64Adapter, Command, IncomingDataException
+from NooLite_F.MTRF64.MTRF64BatchDecoder import decode_frames
+from NooLite_F.MTRF64.MTRF64Decoders import decode_temp_humi, decode_temporary_on, decode_brightness, decode_rgb_brightness
+
+
+_FORMAT = Struct(">BBBBBBB4sI")
+
+_SAMPLES = [
+    (Command.SENS_TEMP_HUMI, 7),
+    (Command.SENS_TEMP_HUMI, 3),
+    (Command.SET_BRIGHTNESS, 1),
+    (Command.SET_BRIGHTNESS, 3),
+    (Command.TEMPORARY_ON, 5),
+    (Command.TEMPORARY_ON, 6),
+    (Command.ON, 0),
+    (Command.SWITCH, 0),
+]
+
+
+def generate(count: int) -> bytes:
+    frames = bytearray()
+    for i in range(count):
+        command, fmt = random.choice(_SAMPLES)
+        data = bytes(random.randrange(256) for _ in range(4))
+        packet = _FORMAT.pack(173, 1, 0, 0, random.randrange(64), command, fmt, data, random.randrange(1 << 32))
+        crc = sum(packet) & 0xFF
+        if random.random() < 0.01:
+            crc = (crc + 1) & 0xFF
+        frames += packet + bytes([crc, 174])
+    return bytes(frames)
+
+
+def scalar_decode(adapter: MTRF64Adapter, buffer: bytes) -> list:
+    results = []
+    for offset in range(0, len(buffer), 17):
+        try:
+            data = adapter._parse(buffer[offset:offset + 17])
+        except IncomingDataException:
+            results.append(None)
+            continue
+
+        values = {}
+        if data.command == Command.SENS_TEMP_HUMI:
+            decoded = decode_temp_humi(data)
+            if decoded is not None:
+                values["temp"], values["humi"], values["battery"], values["analog"] = decoded
+        elif data.command == Command.SET_BRIGHTNESS:
+            if data.format == 1:
+                values["brightness"] = decode_brightness(data)
+            elif data.format == 3:
+                values["red"], values["green"], values["blue"] = decode_rgb_brightness(data)
+        elif data.command == Command.TEMPORARY_ON:
+            values["duration"] = decode_temporary_on(data)
+        results.append((data, values))
+    return results
+
+
+def compare(scalar: list, batch) -> int:
+    mismatches = 0
+    for i, item in enumerate(scalar):
+        if item is None:
+            mismatches += bool(batch.valid[i])
+            continue
+
+        data, values = item
+        expected = {
+            "channel": data.channel, "command": data.command, "format": data.format, "id": data.id,
+            "temp": values.get("temp"), "humi": values.get("humi"), "analog": values.get("analog"),
+            "battery": None if "battery" not in values else values["battery"].value,
+            "brightness": values.get("brightness"), "red": values.get("red"), "green": values.get("green"),
+            "blue": values.get("blue"), "duration": values.get("duration"),
+        }
+        for name, value in expected.items():
+            actual = getattr(batch, name)[i]
+            if value is None:
+                ok = isnan(actual)
+            else:
+                ok = actual == value
+            if not ok:
+                mismatches += 1
+                print("Mismatch in frame {0}, {1}: {2} != {3}".format(i, name, actual, value))
+    return mismatches
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    buffer = generate(count)
+    adapter = MTRF64Adapter.__new__(MTRF64Adapter)
+
+    start = perf_counter()
+    scalar = scalar_decode(adapter, buffer)
+    scalar_time = perf_counter() - start
+
+    start = perf_counter()
+    batch = decode_frames(buffer)
+    batch_time = perf_counter() - start
+
+    mismatches = compare(scalar, batch)
+
+    print("frames: {0}, invalid: {1}, mismatches: {2}".format(count, count - int(batch.valid.sum()), mismatches))
+    print("scalar: {0:.3f} s ({1:.0f} frames/s)".format(scalar_time, count / scalar_time))
+    print("batch:  {0:.3f} s ({1:.0f} frames/s), speedup: {2:.1f}x".format(batch_time, count / batch_time, scalar_time / batch_time))
+
+
+if __name__ == "__main__":
+    main()
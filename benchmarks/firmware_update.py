@@ -0,0 +1,218 @@
+""" Measure firmware transfer throughput with the simulated adapter.
+
+The serial port is replaced with the simulated adapter which receives Mode.FIRMWARE_UPDATE frames with the line speed
+of the port (17 bytes frame, 10 bits per byte), writes each chunk to flash and acknowledges received size. Frames can
+be lost with the specified probability. The transfer is made with stop-and-wait (window 1) and with pipelined
+frames, then the transfer is interrupted by "unplugging" the adapter and resumed after reconnection.
+
+MTRF-64 firmware update frames are not documented, so the benchmark defines own frame layout (SimulatedFrameCodec)
+which is understood by the simulated adapter.
+
+Usage: python benchmarks/firmware_update.py [image size] [loss probability]
+"""
+import importlib
+import os
+import random
+import struct
+import sys
+import zlib
+
+from enum import IntEnum
+from queue import Queue, Empty
+from threading import Thread, Event, Lock
+from time import monotonic, sleep
+
+from serial import SerialException
+
+from NooLite_F.MTRF64 import MTRF64Adapter, ReconnectPolicy, FirmwareUpdater, FirmwareUpdateError, FirmwareFrameCodec, \
+    IncomingData, OutgoingData, Mode, ResponseCode
+
+# package exports the adapter class with the same name as module
+adapter_module = importlib.import_module("NooLite_F.MTRF64.MTRF64Adapter")
+
+BAUDRATE = 9600
+FRAME_TIME = 17 * 10 / BAUDRATE
+FLASH_TIME = 0.002
+# frames which can wait in the simulated adapter input buffer, other frames are rejected as busy
+INPUT_BUFFER = 32
+
+
+class FirmwareCommand(IntEnum):
+    BEGIN = 0   # start or resume transfer, id is image size, data is image CRC32. Adapter answers with received size
+    DATA = 1    # image chunk, id is chunk offset, data is chunk. Adapter answers with received size (cumulative ack)
+    END = 2     # transfer is over, data is image CRC32. Adapter answers SUCCESS if received image has the same CRC32
+
+
+class SimulatedFrameCodec(FirmwareFrameCodec):
+    """ Frame layout of the simulated adapter: firmware command is in the command field and acknowledgement has
+    the same command as the request.
+    """
+    payload_size = 4
+
+    def begin(self, size: int, crc: int) -> OutgoingData:
+        return self._frame(FirmwareCommand.BEGIN, size, crc.to_bytes(4, "big"))
+
+    def data(self, offset: int, chunk: bytes) -> OutgoingData:
+        return self._frame(FirmwareCommand.DATA, offset, chunk.ljust(self.payload_size, b"\xff"))
+
+    def end(self, crc: int) -> OutgoingData:
+        return self._frame(FirmwareCommand.END, 0, crc.to_bytes(4, "big"))
+
+    def is_ack(self, request: OutgoingData, response: IncomingData) -> bool:
+        return response.mode == Mode.FIRMWARE_UPDATE and response.command == request.command
+
+    def ack(self, response: IncomingData) -> tuple:
+        return response.status == ResponseCode.SUCCESS, response.id
+
+    @staticmethod
+    def _frame(command: FirmwareCommand, value: int, payload: bytes) -> OutgoingData:
+        data = OutgoingData()
+        data.mode = Mode.FIRMWARE_UPDATE
+        data.command = command
+        data.id = value
+        data.data = payload
+        return data
+
+
+class SimulatedDevice(object):
+    """ State of the simulated adapter, it survives port reopening. """
+    size = 0
+    crc = None
+    image = bytearray()
+    plugged = Event()
+    fail_at = None
+    loss = 0.0
+
+
+class SimulatedSerial(object):
+    def __init__(self, baudrate=9600, **kwargs):
+        self.port = None
+        self.is_open = False
+        self._lock = Lock()
+        self._input = Queue()
+        self._output = Queue()
+        self._line_free = 0.0
+        self._thread = None
+
+    def open(self):
+        if not SimulatedDevice.plugged.is_set():
+            raise SerialException("could not open port {0}".format(self.port))
+        self.is_open = True
+        self._thread = Thread(target=self._process)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def close(self):
+        self.is_open = False
+        self._input.put(None)
+        self._output.put(None)
+
+    def write(self, packet: bytes):
+        if not SimulatedDevice.plugged.is_set() or not self.is_open:
+            raise SerialException("write failed: device disconnected")
+        with self._lock:
+            # frames are transmitted one after another with the line speed
+            self._line_free = max(self._line_free, monotonic()) + FRAME_TIME
+            arrival = self._line_free
+        if self._input.qsize() >= INPUT_BUFFER:
+            fields = struct.unpack(">BBBBBBB4sIBB", packet)
+            self._answer(fields[5], 2, len(SimulatedDevice.image), arrival)
+            return
+        self._input.put((arrival, packet))
+
+    def read(self, size: int = 1) -> bytes:
+        while True:
+            if not SimulatedDevice.plugged.is_set() or not self.is_open:
+                raise SerialException("read failed: device disconnected")
+            try:
+                item = self._output.get(timeout=0.05)
+            except Empty:
+                continue
+            if item is None:
+                continue
+            ready_at, packet = item
+            delay = ready_at - monotonic()
+            if delay > 0:
+                sleep(delay)
+            return packet
+
+    def _process(self):
+        device = SimulatedDevice
+        while self.is_open:
+            item = self._input.get()
+            if item is None:
+                return
+            arrival, packet = item
+            delay = arrival - monotonic()
+            if delay > 0:
+                sleep(delay)
+            start, mode, action, res, channel, command, fmt, data, value, crc, stop = struct.unpack(">BBBBBBB4sIBB", packet)
+            if mode != Mode.FIRMWARE_UPDATE:
+                continue
+            if random.random() < device.loss:
+                continue
+
+            if command == FirmwareCommand.BEGIN:
+                crc = struct.unpack(">I", data)[0]
+                if crc != device.crc or value != device.size:
+                    device.size, device.crc, device.image = value, crc, bytearray()
+                self._answer(command, 0, len(device.image), monotonic())
+            elif command == FirmwareCommand.DATA:
+                if value == len(device.image) and value < device.size:
+                    sleep(FLASH_TIME)
+                    device.image += data[:device.size - value]
+                    if device.fail_at is not None and len(device.image) >= device.fail_at:
+                        device.fail_at = None
+                        SimulatedDevice.plugged.clear()
+                        return
+                self._answer(command, 0, len(device.image), monotonic())
+            elif command == FirmwareCommand.END:
+                ok = len(device.image) == device.size and zlib.crc32(bytes(device.image)) & 0xFFFFFFFF == struct.unpack(">I", data)[0]
+                self._answer(command, 0 if ok else 2, len(device.image), monotonic())
+
+    def _answer(self, command: int, status: int, received: int, at: float):
+        packet = struct.pack(">BBBBBBB4sI", 173, Mode.FIRMWARE_UPDATE, status, 0, 0, command, 0, bytes(4), received)
+        self._output.put((at + FRAME_TIME, packet + bytes([sum(packet) & 0xFF, 174])))
+
+
+def reset_device():
+    SimulatedDevice.size = 0
+    SimulatedDevice.crc = None
+    SimulatedDevice.image = bytearray()
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    SimulatedDevice.loss = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+    image = os.urandom(size)
+
+    adapter_module.Serial = SimulatedSerial
+    SimulatedDevice.plugged.set()
+    adapter = MTRF64Adapter("/dev/simulated", reconnect=ReconnectPolicy(delay=0.1, max_delay=0.5))
+    codec = SimulatedFrameCodec()
+
+    print("image: {0} bytes, line: {1} baud, loss: {2:.1%}".format(size, BAUDRATE, SimulatedDevice.loss))
+    for window in (1, 4, 16, 32):
+        reset_device()
+        result = FirmwareUpdater(adapter, codec, window).update(image)
+        print("window {0:>2}: {1:7.1f} B/s, {2:.2f} s, frames: {3}, retransmits: {4}"
+              .format(window, result.throughput, result.duration, result.frames, result.retransmits))
+
+    reset_device()
+    SimulatedDevice.fail_at = size // 2
+    try:
+        FirmwareUpdater(adapter, codec).update(image)
+    except FirmwareUpdateError as err:
+        print("interrupted at {0} bytes: {1}".format(err.offset, err))
+
+    SimulatedDevice.plugged.set()
+    while not adapter.connection_stats().connected:
+        sleep(0.01)
+    result = FirmwareUpdater(adapter, codec).update(image)
+    print("resumed from {0} bytes: {1:.1f} B/s, verified: {2}".format(result.resumed_from, result.throughput,
+                                                                      bytes(SimulatedDevice.image) == image))
+    adapter.release()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+""" Compare event latency of adapters with own reader threads and adapters served by one MTRF64IOLoop.
+
+Every adapter is opened on the slave side of a pseudo terminal, the benchmark writes NooLite-F RX packets to the
+master side and measures time until the packet is delivered to the listener. Requires POSIX system.
+
+Usage: python benchmarks/io_loop.py [events per adapter]
+"""
+import os
+import struct
+import sys
+
+from threading import Event, Lock, active_count
+from time import perf_counter, sleep
+
+from NooLite_F.MTRF64 import MTRF64Adapter, MTRF64IOLoop, Mode
+
+ADAPTER_COUNTS = (1, 2, 4, 8, 16)
+# interval between packet bursts (one packet to every adapter)
+INTERVAL = 0.002
+
+
+def packet(channel: int, sequence: int) -> bytes:
+    body = struct.pack(">BBBBBBB4sI", 173, Mode.RX, 0, 0, channel, 21, 7, bytes(4), sequence)
+    return body + bytes([sum(body) & 0xFF, 174])
+
+
+def percentile(values: list, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run(count: int, events: int, use_loop: bool) -> tuple:
+    threads = active_count()
+    loop = MTRF64IOLoop() if use_loop else None
+    sent = {}
+    latencies = []
+    lock = Lock()
+    done = Event()
+    expected = count * events
+
+    def on_receive(data):
+        received_at = perf_counter()
+        with lock:
+            latencies.append(received_at - sent[(data.channel, data.id)])
+            if len(latencies) == expected:
+                done.set()
+
+    masters = []
+    adapters = []
+    for i in range(count):
+        master, slave = os.openpty()
+        masters.append(master)
+        adapters.append(MTRF64Adapter(os.ttyname(slave), on_receive_data=on_receive, io_loop=loop))
+        os.close(slave)
+
+    for sequence in range(events):
+        for channel, master in enumerate(masters):
+            with lock:
+                sent[(channel, sequence)] = perf_counter()
+            os.write(master, packet(channel, sequence))
+        sleep(INTERVAL)
+
+    done.wait(10)
+    threads = active_count() - threads
+    for adapter in adapters:
+        adapter.release()
+    if loop is not None:
+        loop.stop()
+    for master in masters:
+        os.close(master)
+
+    latencies = [value * 1000000 for value in latencies]
+    return threads, len(latencies), sum(latencies) / len(latencies), percentile(latencies, 0.99)
+
+
+def main():
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print("{0:>8} {1:>8} {2:>8} {3:>8} {4:>10} {5:>10}".format("adapters", "mode", "threads", "events", "mean, us", "p99, us"))
+    for count in ADAPTER_COUNTS:
+        for use_loop in (False, True):
+            threads, received, mean, p99 = run(count, events, use_loop)
+            print("{0:>8} {1:>8} {2:>8} {3:>8} {4:>10.1f} {5:>10.1f}".format(count, "loop" if use_loop else "threads", threads, received, mean, p99))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+""" Measure provisioning throughput (modules per minute) with the simulated adapter.
+
+The serial port is replaced with the simulated adapter. Simulated operator puts the next sensor or module into
+service mode press interval after the application tells that the previous one is done: sensor sends the bind request
+when adapter channel is in bind mode, module answers the bind command sent to the channel. Each request takes the line
+time of the port, modules answer with the radio latency and the bind command without answer takes the answer timeout.
+Sensor sends its first reading after the bind.
+
+Devices are bound one by one and the operator goes on after each of them is verified (manual procedure), then with
+Provisioner which allocates channels, opens the next bind window and tells the operator to go on as soon as the device
+is bound, while it is verified in the background. So the provisioner saves the verification time of each device:
+the first reading of the sensor or the state request to the module. The state request is short, and the next bind
+commands are sent in vain until the module is put into service mode, so for modules the saving is usually hidden by
+the answer timeout of these bind commands and both rates are the same. When the operator is fast, both procedures are
+limited by the adapter: the bind mode request of the receiver and the answer timeout of the bind command.
+
+Usage: python benchmarks/provisioning.py [modules] [press interval]
+"""
+import importlib
+import struct
+import sys
+
+from queue import Queue
+from threading import Thread, Lock
+from time import monotonic, sleep
+
+from NooLite_F.MTRF64 import MTRF64Controller, Provisioner, Command, Mode, Action, ResponseCode, IncomingData
+
+# package exports the adapter class with the same name as module
+adapter_module = importlib.import_module("NooLite_F.MTRF64.MTRF64Adapter")
+
+BAUDRATE = 9600
+FRAME_TIME = 17 * 10 / BAUDRATE
+RADIO_LATENCY = 0.05
+NO_ANSWER_TIMEOUT = 0.3
+
+
+class SimulatedFleet(object):
+    """ Sensors and modules which are put into service mode by operator one by one, each after start() call. """
+    press_interval = 0.5
+    _lock = Lock()
+    _next_id = 0x1000
+    _ready_at = None
+    bound = {}
+
+    @classmethod
+    def start(cls, *args):
+        """ Operator is told to put the next device into service mode. """
+        with cls._lock:
+            cls._ready_at = monotonic() + cls.press_interval
+
+    @classmethod
+    def take(cls):
+        """ Returns id of the device in service mode or None. """
+        with cls._lock:
+            now = monotonic()
+            if cls._ready_at is None or now < cls._ready_at:
+                return None
+            cls._ready_at = None
+            cls._next_id += 1
+            return cls._next_id
+
+
+class SimulatedSerial(object):
+    def __init__(self, baudrate=9600, **kwargs):
+        self.port = None
+        self.is_open = False
+        self._requests = Queue()
+        self._output = Queue()
+        self._bind_channel = None
+
+    def open(self):
+        self.is_open = True
+        thread = Thread(target=self._process)
+        thread.daemon = True
+        thread.start()
+
+    def close(self):
+        self.is_open = False
+        self._requests.put(None)
+        self._output.put(None)
+
+    def write(self, packet: bytes):
+        self._requests.put(packet)
+
+    def read(self, size: int = 1) -> bytes:
+        while True:
+            packet = self._output.get()
+            if packet is not None:
+                return packet
+            if not self.is_open:
+                raise OSError("port is closed")
+
+    def _process(self):
+        while self.is_open:
+            packet = self._requests.get()
+            if packet is None:
+                return
+            sleep(FRAME_TIME)
+            start, mode, action, res, channel, command, fmt, data, module_id, crc, stop = struct.unpack(">BBBBBBB4sIBB", packet)
+
+            if mode == Mode.RX_F and action == Action.BIND_MODE_ON:
+                self._bind_channel = channel
+                Thread(target=self._wait_sensor, args=(channel,), daemon=True).start()
+            elif mode == Mode.RX_F and action == Action.BIND_MODE_OFF:
+                self._bind_channel = None
+            elif mode == Mode.TX_F and command == Command.BIND:
+                device = SimulatedFleet.take()
+                if device is None:
+                    sleep(NO_ANSWER_TIMEOUT)
+                    self._answer(Mode.TX_F, ResponseCode.NO_RESPONSE, channel, Command.SEND_STATE, 0)
+                else:
+                    sleep(RADIO_LATENCY)
+                    SimulatedFleet.bound[device] = channel
+                    self._answer(Mode.TX_F, ResponseCode.SUCCESS, channel, Command.SEND_STATE, device)
+            elif mode == Mode.TX_F and command == Command.UNBIND:
+                if SimulatedFleet.bound.pop(module_id, None) is not None:
+                    sleep(RADIO_LATENCY)
+                    self._answer(Mode.TX_F, ResponseCode.SUCCESS, channel, Command.SEND_STATE, module_id)
+                else:
+                    sleep(NO_ANSWER_TIMEOUT)
+                    self._answer(Mode.TX_F, ResponseCode.NO_RESPONSE, channel, Command.SEND_STATE, 0)
+            elif mode == Mode.TX_F and command == Command.READ_STATE:
+                if SimulatedFleet.bound.get(module_id) == channel:
+                    sleep(RADIO_LATENCY)
+                    self._answer(Mode.TX_F, ResponseCode.SUCCESS, channel, Command.SEND_STATE, module_id)
+                else:
+                    sleep(NO_ANSWER_TIMEOUT)
+                    self._answer(Mode.TX_F, ResponseCode.NO_RESPONSE, channel, Command.SEND_STATE, 0)
+
+    def _wait_sensor(self, channel: int):
+        while self.is_open and self._bind_channel == channel:
+            device = SimulatedFleet.take()
+            if device is not None:
+                self._bind_channel = None
+                self._answer(Mode.RX_F, ResponseCode.BIND_SUCCESS, channel, Command.BIND, device)
+                sleep(RADIO_LATENCY)
+                self._answer(Mode.RX_F, ResponseCode.SUCCESS, channel, Command.SENS_TEMP_HUMI, device)
+                return
+            sleep(0.01)
+
+    def _answer(self, mode: int, status: int, channel: int, command: int, module_id: int):
+        packet = struct.pack(">BBBBBBB4sI", 173, mode, status, 0, channel, command, 0, bytes([5, 1, 0, 0]), module_id)
+        self._output.put(packet + bytes([sum(packet) & 0xFF, 174]))
+
+
+def bind_manually(controller: MTRF64Controller, count: int) -> float:
+    started_at = monotonic()
+    for channel in range(count):
+        while True:
+            answered = [info for status, info, state in controller.bind(channel=channel) if status]
+            if len(answered) > 0:
+                break
+        controller.read_state(module_id=answered[0].id, channel=channel)
+        SimulatedFleet.start()
+    return count * 60 / (monotonic() - started_at)
+
+
+def bind_sensors_manually(controller: MTRF64Controller, count: int) -> float:
+    events = Queue()
+
+    def sink(data: IncomingData):
+        events.put(data)
+
+    controller.add_event_sink(sink)
+    started_at = monotonic()
+    for channel in range(count):
+        controller.bind_mode_on(channel)
+        # bind is reported by adapter, the sensor is verified by its first reading
+        while True:
+            data = events.get()
+            if data.channel == channel and data.status != ResponseCode.BIND_SUCCESS:
+                break
+        SimulatedFleet.start()
+    controller.remove_event_sink(sink)
+    return count * 60 / (monotonic() - started_at)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    SimulatedFleet.press_interval = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+
+    adapter_module.Serial = SimulatedSerial
+    controller = MTRF64Controller("/dev/simulated")
+    print("{0} devices, operator presses service button every {1} s".format(count, SimulatedFleet.press_interval))
+
+    SimulatedFleet.start()
+    print("modules, manual bind and verify: {0:6.1f} modules/min".format(bind_manually(controller, count)))
+
+    provisioner = Provisioner(controller, bind_window=5)
+    SimulatedFleet.start()
+    modules = provisioner.bind_modules(count, on_bound=SimulatedFleet.start)
+    stats = provisioner.stats()
+    print("modules, provisioner:            {0:6.1f} modules/min, verified: {1}/{2}"
+          .format(stats.modules_per_minute, stats.verified, len(modules)))
+
+    failed = provisioner.unbind(modules)
+    print("modules unbound: {0}, not verified: {1}".format(provisioner.stats().unbound, len(failed)))
+
+    SimulatedFleet.start()
+    print("sensors, manual bind and verify: {0:6.1f} modules/min".format(bind_sensors_manually(controller, count)))
+
+    provisioner = Provisioner(controller, bind_window=5)
+    SimulatedFleet.start()
+    sensors = provisioner.bind_transmitters(count, on_bound=SimulatedFleet.start)
+    stats = provisioner.stats()
+    print("sensors, provisioner:            {0:6.1f} modules/min, verified: {1}/{2}, channels: {3}..{4}"
+          .format(stats.modules_per_minute, stats.verified, len(sensors), sensors[0].channel, sensors[-1].channel))
+
+    failed = provisioner.unbind(sensors)
+    print("sensors unbound: {0}, not verified: {1}".format(provisioner.stats().unbound, len(failed)))
+    controller.release()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+""" Measure adapter recovery after simulated USB disconnect.
+
+The serial port is replaced with the simulated adapter which answers NooLite-F commands. The adapter is "unplugged"
+for the outage time, one command is sent during the outage (it is buffered until reconnection), then adapter is
+"plugged" back.
+
+Usage: python benchmarks/reconnect.py [outage seconds]
+"""
+import importlib
+import struct
+import sys
+
+from queue import Queue, Empty
+from threading import Event, Thread
+from time import monotonic, sleep
+
+from serial import SerialException
+
+from NooLite_F.MTRF64 import MTRF64Controller, ReconnectPolicy
+
+# package exports the adapter class with the same name as module
+adapter_module = importlib.import_module("NooLite_F.MTRF64.MTRF64Adapter")
+
+
+class SimulatedSerial(object):
+    plugged = Event()
+    module_id = 0x5023
+
+    def __init__(self, baudrate=9600, **kwargs):
+        self.port = None
+        self.is_open = False
+        self._packets = Queue()
+
+    def open(self):
+        if not self.plugged.is_set():
+            raise SerialException("could not open port {0}".format(self.port))
+        self.is_open = True
+
+    def close(self):
+        self.is_open = False
+        self._packets.put(None)
+
+    def write(self, packet: bytes):
+        if not self.plugged.is_set() or not self.is_open:
+            raise SerialException("write failed: device disconnected")
+        start, mode, action, res, channel, command, fmt, data, module_id, crc, stop = struct.unpack(">BBBBBBB4sIBB", packet)
+        self._answer(mode, channel, 130, 0, bytes([5, 0, 1, 255]), self.module_id)
+
+    def read(self, size: int = 1) -> bytes:
+        while True:
+            if not self.plugged.is_set() or not self.is_open:
+                raise SerialException("read failed: device disconnected")
+            try:
+                packet = self._packets.get(timeout=0.05)
+            except Empty:
+                continue
+            if packet is not None:
+                return packet
+
+    def _answer(self, mode, channel, command, fmt, data, module_id):
+        packet = struct.pack(">BBBBBBB4sI", 173, mode, 0, 0, channel, command, fmt, data, module_id)
+        self._packets.put(packet + bytes([sum(packet) & 0xFF, 174]))
+
+
+def main():
+    outage = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    adapter_module.Serial = SimulatedSerial
+    SimulatedSerial.plugged.set()
+
+    controller = MTRF64Controller("/dev/simulated", reconnect=ReconnectPolicy(delay=0.1, max_delay=0.5))
+    resynced = Event()
+    resync_result = {}
+
+    def on_connection(connected, states):
+        if connected:
+            resync_result.update(states)
+            resynced.set()
+
+    controller.add_connection_listener(on_connection)
+    controller.on(SimulatedSerial.module_id)
+
+    unplugged_at = monotonic()
+    SimulatedSerial.plugged.clear()
+    while controller.connection_stats().connected:
+        sleep(0.001)
+    detected_at = monotonic()
+
+    buffered = {}
+
+    def send_during_outage():
+        buffered["result"] = controller.off(SimulatedSerial.module_id)
+        buffered["done_at"] = monotonic()
+
+    sender = Thread(target=send_during_outage)
+    sender.start()
+
+    sleep(outage)
+    plugged_at = monotonic()
+    SimulatedSerial.plugged.set()
+
+    sender.join()
+    resynced.wait(10)
+    stats = controller.connection_stats()
+    controller.release()
+
+    print("outage: {0:.2f} s, detection: {1:.3f} s".format(outage, detected_at - unplugged_at))
+    print("recovery after replug: {0:.3f} s, buffered command done after replug: {1:.3f} s, result: {2}"
+          .format(detected_at + stats.last_outage - plugged_at,
+                  buffered["done_at"] - plugged_at, buffered["result"][0][0] if buffered["result"] else None))
+    print("resynced modules: {0}".format(len(resync_result)))
+    print(stats)
+
+
+if __name__ == "__main__":
+    main()
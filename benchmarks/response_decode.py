@@ -0,0 +1,68 @@
+""" Measure decoding cost of module responses (time and allocated memory blocks per response).
+
+Usage: python benchmarks/response_decode.py [responses count]
+"""
+import random
+import sys
+import tracemalloc
+
+from time import perf_counter
+
+from NooLite_F.MTRF64 import IncomingData, Command, ResponseCode
+from NooLite_F.MTRF64.MTRF64Decoders import decode_response
+
+
+# controller command, response format and view returned by the command
+_SAMPLES = [
+    ("read_state", 0, lambda record: record.base(0)),
+    ("read_extra_state", 1, lambda record: record.base(1)),
+    ("read_channels_state", 2, lambda record: record.base(2)),
+    ("read_module_config", 16, lambda record: record.config(16)),
+    ("read_dimmer_correction", 17, lambda record: record.config(17)),
+]
+
+
+def generate(count: int, fmt: int) -> list:
+    responses = []
+    for i in range(count):
+        data = IncomingData()
+        data.mode = 2
+        data.status = ResponseCode.SUCCESS
+        data.count = 0
+        data.channel = random.randrange(64)
+        data.command = Command.SEND_STATE
+        data.format = fmt
+        data.data = bytes(random.randrange(256) for _ in range(4))
+        data.id = random.randrange(1 << 32)
+        responses.append(data)
+    return responses
+
+
+def measure(responses: list, view) -> tuple:
+    start = perf_counter()
+    for data in responses:
+        view(decode_response(data))
+    elapsed = perf_counter() - start
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    results = [view(decode_response(data)) for data in responses]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    del results
+    return elapsed, blocks
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    for name, fmt, view in _SAMPLES:
+        responses = generate(count, fmt)
+        elapsed, blocks = measure(responses, view)
+        print("{0:24} format {1:2}: {2:.2f} us/response, {3:.1f} blocks/response"
+              .format(name, fmt, elapsed / count * 1e6, blocks / count))
+
+
+if __name__ == "__main__":
+    main()
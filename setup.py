@@ -16,6 +16,8 @@ setup(
     url="https://github.com/SergejPr/NooLite-F",
     keywords="noolite noolite-f noolitef",
     install_requires=["pyserial"],
+    extras_require={"numpy": ["numpy"], "mqtt": ["paho-mqtt"]},
+    entry_points={"console_scripts": ["noolite-f=NooLite_F.MTRF64.MTRF64CLI:main"]},
     platforms="any",
     classifiers=[
         "Development Status :: 4 - Beta",
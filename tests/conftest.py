@@ -0,0 +1,192 @@
+import importlib
+import struct
+
+from queue import Queue
+from threading import Thread, Lock
+from time import sleep
+
+import pytest
+
+from serial import SerialException
+
+from NooLite_F.MTRF64 import MTRF64Controller, Command, Mode, Action, ResponseCode
+
+# package exports the adapter class with the same name as module
+adapter_module = importlib.import_module("NooLite_F.MTRF64.MTRF64Adapter")
+
+
+class FakeModule(object):
+    """ NooLite-F module bound to the simulated adapter. """
+
+    def __init__(self, module_id: int, channel: int, state: int = 0, brightness: int = 0, module_type: int = 5):
+        self.id = module_id
+        self.channel = channel
+        self.state = state
+        self.brightness = brightness
+        self.type = module_type
+        self.config = 0
+        self.reachable = True
+
+
+class Request(object):
+    """ Request frame written to the simulated adapter. """
+
+    def __init__(self, packet: bytes):
+        start, self.mode, self.action, res, self.channel, self.command, self.format, self.data, self.id, crc, stop = \
+            struct.unpack(">BBBBBBB4sIBB", packet)
+
+    def __repr__(self):
+        return "<Request mode: {0}, action: {1}, channel: {2}, command: {3}, format: {4}, id: 0x{5:x}>" \
+            .format(self.mode, self.action, self.channel, self.command, self.format, self.id)
+
+
+class FakeSerial(object):
+    """ Simulated MTRF-64 adapter. It answers NooLite-F commands of registered modules, NooLite commands are
+    acknowledged by adapter, receiver requests are not answered. Incoming packets are injected by tests.
+    """
+    instances = []
+
+    def __init__(self, baudrate=9600, **kwargs):
+        self.port = None
+        self.is_open = False
+        self.modules = {}
+        self.requests = []
+        # adapter doesn't answer at all
+        self.silent = False
+        # delay before each answer frame
+        self.delay = 0.0
+        self._output = Queue()
+        self._lock = Lock()
+        FakeSerial.instances.append(self)
+
+    def add_module(self, module_id: int, channel: int, **kwargs) -> FakeModule:
+        module = FakeModule(module_id, channel, **kwargs)
+        self.modules[module_id] = module
+        return module
+
+    def open(self):
+        self.is_open = True
+
+    def close(self):
+        self.is_open = False
+        self._output.put(None)
+
+    def write(self, packet: bytes):
+        if not self.is_open:
+            raise SerialException("Port is closed")
+        request = Request(packet)
+        with self._lock:
+            self.requests.append(request)
+        if self.silent:
+            return
+        answers = self._answers(request)
+        if self.delay > 0:
+            thread = Thread(target=self._answer_later, args=(answers,))
+            thread.daemon = True
+            thread.start()
+        else:
+            for answer in answers:
+                self._output.put(answer)
+
+    def read(self, size: int = 1) -> bytes:
+        packet = self._output.get()
+        if packet is None:
+            raise SerialException("Port is closed")
+        return packet
+
+    def inject(self, mode: int, channel: int, command: int, fmt: int = 0, data: bytes = bytes(4), module_id: int = 0,
+               status: int = ResponseCode.SUCCESS, count: int = 0):
+        self._output.put(frame(mode, channel, command, fmt, data, module_id, status, count))
+
+    def sent(self, command: int = None) -> list:
+        with self._lock:
+            return [request for request in self.requests if command is None or request.command == command]
+
+    # Private
+    def _answer_later(self, answers: list):
+        for answer in answers:
+            sleep(self.delay)
+            self._output.put(answer)
+
+    def _answers(self, request: Request) -> list:
+        if request.mode == Mode.TX:
+            return [frame(Mode.TX, request.channel, request.command, request.format, request.data, 0, ResponseCode.SUCCESS, 0)]
+        if request.mode != Mode.TX_F:
+            return []
+
+        if request.action == Action.SEND_COMMAND_TO_ID:
+            targets = [module for module in self.modules.values() if module.id == request.id]
+        elif request.action == Action.SEND_COMMAND_TO_ID_IN_CHANNEL:
+            targets = [module for module in self.modules.values() if module.id == request.id and module.channel == request.channel]
+        elif request.action in (Action.SEND_COMMAND, Action.SEND_BROADCAST_COMMAND):
+            targets = [module for module in self.modules.values() if module.channel == request.channel]
+        else:
+            targets = []
+        targets = [module for module in targets if module.reachable]
+        if len(targets) == 0:
+            return [frame(Mode.TX_F, request.channel, Command.SEND_STATE, 0, bytes(4), 0, ResponseCode.NO_RESPONSE, 0)]
+
+        answers = []
+        for index, module in enumerate(targets):
+            count = len(targets) - index - 1
+            if request.command == Command.ON:
+                module.state = 1
+            elif request.command == Command.OFF:
+                module.state = 0
+            elif request.command == Command.SWITCH:
+                module.state = 1 - module.state
+            elif request.command == Command.SET_BRIGHTNESS and request.format == 1:
+                # module reports brightness in 0..255 scale, the request is 35 + 120 * brightness
+                level = request.data[0]
+                module.brightness = int(min(1, max(0, (level - 35) / 120)) * 255 + 0.5) if level > 0 else 0
+                module.state = 1 if level > 0 else 0
+            elif request.command == Command.WRITE_STATE and request.format == 16:
+                module.config = (module.config & ~request.data[2]) | (request.data[0] & request.data[2])
+
+            if request.format in (16, 17):
+                data = bytes([module.config, 0, 0, 0])
+                fmt = request.format
+            else:
+                data = bytes([module.type, 0, module.state, module.brightness])
+                fmt = request.format if request.command == Command.READ_STATE else 0
+            answers.append(frame(Mode.TX_F, request.channel, Command.SEND_STATE, fmt, data, module.id, ResponseCode.SUCCESS, count))
+        return answers
+
+
+def frame(mode: int, channel: int, command: int, fmt: int = 0, data: bytes = bytes(4), module_id: int = 0,
+          status: int = ResponseCode.SUCCESS, count: int = 0) -> bytes:
+    packet = struct.pack(">BBBBBBB4sI", 173, mode, status, count, channel, command, fmt, bytes(data), module_id)
+    return packet + bytes([sum(packet) & 0xFF, 174])
+
+
+@pytest.fixture
+def fake_serial(monkeypatch):
+    FakeSerial.instances = []
+    monkeypatch.setattr(adapter_module, "Serial", FakeSerial)
+    return FakeSerial
+
+
+@pytest.fixture
+def make_controller(fake_serial):
+    """ Returns function which creates controller with the given arguments and returns (controller, port). """
+    controllers = []
+
+    def make(**kwargs):
+        controller = MTRF64Controller("/dev/fake", **kwargs)
+        controllers.append(controller)
+        return controller, FakeSerial.instances[-1]
+
+    yield make
+    for controller in controllers:
+        if controller._adapter is not None:
+            controller.release()
+
+
+@pytest.fixture
+def controller(make_controller) -> MTRF64Controller:
+    return make_controller()[0]
+
+
+@pytest.fixture
+def port(controller) -> FakeSerial:
+    return FakeSerial.instances[-1]
@@ -0,0 +1,61 @@
+import pytest
+
+from conftest import frame
+
+from NooLite_F.MTRF64 import Command, Mode, IncomingDataException
+
+np = pytest.importorskip("numpy")
+
+from NooLite_F.MTRF64.MTRF64BatchDecoder import decode_frames
+
+
+def test_frame_header_is_decoded():
+    frames = decode_frames(frame(Mode.RX, 5, Command.ON, module_id=0x12345678) + frame(Mode.TX, 63, Command.OFF, count=2))
+    assert len(frames) == 2
+    assert frames.valid.tolist() == [True, True]
+    assert frames.mode.tolist() == [Mode.RX, Mode.TX]
+    assert frames.channel.tolist() == [5, 63]
+    assert frames.command.tolist() == [Command.ON, Command.OFF]
+    assert frames.count.tolist() == [0, 2]
+    assert frames.id.tolist() == [0x12345678, 0]
+    assert np.isnan(frames.temp).all() and np.isnan(frames.brightness).all()
+
+
+def test_sensor_values_are_decoded():
+    # -5.0 with humidity, 23.5 without humidity and with low battery
+    frames = decode_frames(frame(Mode.RX, 1, Command.SENS_TEMP_HUMI, 7, bytes([0xCE, 0x2F, 45, 255])) +
+                           frame(Mode.RX, 1, Command.SENS_TEMP_HUMI, 7, bytes([0xEB, 0x90, 0, 0])) +
+                           frame(Mode.RX, 1, Command.SENS_TEMP_HUMI, 3, bytes([0xEB, 0x00, 0, 0])))
+    assert frames.temp[:2].tolist() == [-5.0, 23.5]
+    assert frames.humi[0] == 45 and np.isnan(frames.humi[1])
+    assert frames.analog[:2].tolist() == [1.0, 0.0]
+    assert frames.battery[:2].tolist() == [0, 1]
+    # only format 7 is decoded
+    assert np.isnan(frames.temp[2])
+
+
+def test_brightness_and_duration_are_decoded():
+    frames = decode_frames(frame(Mode.RX, 1, Command.SET_BRIGHTNESS, 1, bytes([95, 0, 0, 0])) +
+                           frame(Mode.RX, 1, Command.SET_BRIGHTNESS, 3, bytes([255, 0, 51, 0])) +
+                           frame(Mode.RX, 1, Command.TEMPORARY_ON, 5, bytes([12, 0, 0, 0])) +
+                           frame(Mode.RX, 1, Command.TEMPORARY_ON, 6, bytes([1, 1, 0, 0])))
+    assert frames.brightness[0] == 0.5 and np.isnan(frames.brightness[1:]).all()
+    assert (frames.red[1], frames.green[1], frames.blue[1]) == (1.0, 0.0, 0.2)
+    assert frames.duration[2:].tolist() == [12, 1 + (1 << 15)]
+
+
+def test_corrupted_frames_are_marked_invalid():
+    good = frame(Mode.RX, 1, Command.SET_BRIGHTNESS, 1, bytes([155, 0, 0, 0]))
+    bad_crc = bytearray(good)
+    bad_crc[15] ^= 0xFF
+    bad_stop = bytearray(good)
+    bad_stop[16] = 0
+
+    frames = decode_frames(good + bytes(bad_crc) + bytes(bad_stop))
+    assert frames.valid.tolist() == [True, False, False]
+    assert frames.brightness[0] == 1.0 and np.isnan(frames.brightness[1:]).all()
+
+
+def test_buffer_of_partial_frame_is_rejected():
+    with pytest.raises(IncomingDataException):
+        decode_frames(frame(Mode.RX, 1, Command.ON)[:-1])
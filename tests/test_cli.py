@@ -0,0 +1,61 @@
+import io
+import json
+import sys
+
+from NooLite_F.MTRF64 import CommandSession, command_usage, Command, Mode
+from NooLite_F.MTRF64.MTRF64CLI import main
+
+
+def test_command_with_arguments_is_executed(controller, port):
+    port.add_module(0x10, 3)
+    session = CommandSession(controller, timing=True)
+
+    result = session.execute("set_brightness 1.0 module_id=0x10 timeout=1")
+    assert result["n"] == 1 and result["ok"]
+    assert result["latency"] >= 0
+    response = result["responses"][0]
+    assert (response["status"], response["id"], response["state"]) == (True, "10", "ON")
+    assert port.sent(Command.SET_BRIGHTNESS)[0].data[0] == 155
+
+    result = session.execute("read_module_config module_id=0x10")
+    assert result["ok"] and result["responses"][0]["input_mode"] == "SWITCH"
+    assert session.summary().startswith("2 commands")
+
+
+def test_noolite_command_is_sent_to_channel(controller, port):
+    result = CommandSession(controller).execute("brightness_tune_step up 5 channel=2 module_mode=noolite")
+    assert result["ok"]
+    request = port.sent(Command.BRIGHT_STEP_UP)[0]
+    assert (request.mode, request.channel, request.data[0]) == (Mode.TX, 2, 5)
+
+
+def test_invalid_commands_are_reported(controller, port):
+    session = CommandSession(controller)
+    for line in ("dim channel=1", "on 1", "on channel=1 power=2", "set_brightness high", "# comment"):
+        result = session.execute(line)
+        assert not result["ok"] and "error" in result
+    assert port.sent() == []
+
+    result = session.execute("on channel=1 module_mode=noolite # comment")
+    assert result["ok"] and "error" not in result
+
+
+def test_command_usage():
+    assert command_usage("set_brightness").startswith("set_brightness brightness [module_id=..] [channel=..]")
+    assert command_usage("sleep") == "sleep seconds"
+
+
+def test_commands_are_executed_in_one_session(fake_serial, capsys, monkeypatch):
+    monkeypatch.setattr(sys, "stdin", io.StringIO("off channel=1 module_mode=noolite\n# comment\n\nswitch channel=1 module_mode=noolite\n"))
+    assert main(["-p", "/dev/fake", "-f", "-", "on channel=1 module_mode=noolite"]) == 0
+
+    results = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [result["command"].split()[0] for result in results] == ["on", "off", "switch"]
+    assert len(fake_serial.instances) == 1 and not fake_serial.instances[0].is_open
+
+
+def test_session_stops_on_error(fake_serial, capsys):
+    assert main(["-p", "/dev/fake", "-x", "dim channel=1", "on channel=1"]) == 1
+    results = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert len(results) == 1 and results[0]["error"].startswith("CommandError")
+    assert fake_serial.instances[0].sent() == []
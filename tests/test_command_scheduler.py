@@ -0,0 +1,120 @@
+from threading import Event
+from time import monotonic, sleep
+
+import pytest
+
+from NooLite_F import CommandScheduler, ScheduledAction
+from NooLite_F.CommandScheduler import TimerWheel
+
+
+def _timer() -> ScheduledAction:
+    return ScheduledAction(lambda: None, (), {})
+
+
+def _expirations(wheel: TimerWheel, ticks: int) -> dict:
+    expired = {}
+    for i in range(ticks):
+        for timer in wheel.advance():
+            expired[timer] = wheel.tick
+    return expired
+
+
+def test_timers_expire_on_their_tick():
+    wheel = TimerWheel(level_bits=(4, 3, 3))
+    # level 0, level 1, level 2 and out of the wheel range
+    ticks = [3, 16, 50, 200, 1500]
+    timers = [_timer() for _ in ticks]
+    for timer, tick in zip(timers, ticks):
+        assert wheel.add(timer, tick) == []
+    assert wheel.size == len(ticks)
+
+    expired = _expirations(wheel, 2000)
+    assert [expired[timer] for timer in timers] == ticks
+    assert wheel.size == 0
+
+
+def test_expired_timer_is_returned_on_add():
+    wheel = TimerWheel()
+    wheel.tick = 10
+    timer = _timer()
+    assert wheel.add(timer, 10) == [timer]
+    assert wheel.size == 0
+
+
+def test_cancelled_timer_is_dropped():
+    wheel = TimerWheel(level_bits=(4, 3, 3))
+    cancelled = _timer()
+    kept = _timer()
+    wheel.add(cancelled, 40)
+    wheel.add(kept, 40)
+    cancelled.cancel()
+    wheel.remove()
+
+    assert list(_expirations(wheel, 100)) == [kept]
+    assert wheel.size == 0
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = CommandScheduler(resolution=0.01)
+    yield scheduler
+    scheduler.stop()
+
+
+def test_delayed_action_is_called_with_arguments(scheduler):
+    called = Event()
+    received = []
+
+    def action(*args, **kwargs):
+        received.append((args, kwargs))
+        called.set()
+
+    started_at = monotonic()
+    scheduler.call_later(0.1, action, 1, module_id=0x10)
+    assert called.wait(1)
+    assert monotonic() - started_at >= 0.09
+    assert received == [((1,), {"module_id": 0x10})]
+    assert scheduler.pending() == 0
+
+
+def test_cancelled_action_is_not_called(scheduler):
+    called = Event()
+    handle = scheduler.call_later(0.05, called.set)
+    assert scheduler.pending() == 1
+    handle.cancel()
+    assert scheduler.pending() == 0
+    assert not called.wait(0.2)
+
+
+def test_recurring_action_is_repeated_until_cancelled(scheduler):
+    calls = []
+    handle = scheduler.call_every(0.05, lambda: calls.append(monotonic()), first_delay=0)
+    sleep(0.33)
+    handle.cancel()
+    count = len(calls)
+    sleep(0.1)
+
+    assert 5 <= count <= 8
+    assert len(calls) == count
+    with pytest.raises(ValueError):
+        scheduler.call_every(0, print)
+
+
+def test_failed_action_does_not_stop_dispatch(scheduler):
+    def fail():
+        raise RuntimeError("Action error")
+
+    called = Event()
+    scheduler.call_later(0, fail)
+    scheduler.call_later(0.02, called.set)
+    assert called.wait(1)
+
+
+def test_stopped_scheduler_rejects_actions():
+    scheduler = CommandScheduler(resolution=0.01)
+    called = Event()
+    scheduler.call_later(0.1, called.set)
+    scheduler.stop()
+    with pytest.raises(RuntimeError):
+        scheduler.call_later(0, print)
+    assert not called.wait(0.2)
@@ -0,0 +1,95 @@
+import pytest
+
+from conftest import FakeSerial, adapter_module
+
+from NooLite_F import ModuleConfig, DimmerCorrectionConfig, ConfigApplier, ConfigPushStatus, InputMode
+from NooLite_F.ConfigPush import config_diff, correction_diff
+from NooLite_F.Modules import Switch
+from NooLite_F.MTRF64 import Command
+
+
+class ReadOnlySerial(FakeSerial):
+    """ Modules answer config writes, but keep their config. """
+
+    def _answers(self, request):
+        if request.command == Command.WRITE_STATE:
+            request.data = bytes(4)
+        return FakeSerial._answers(self, request)
+
+
+def _dimmer_config() -> ModuleConfig:
+    config = ModuleConfig()
+    config.dimmer_mode = True
+    return config
+
+
+def _writes(port: FakeSerial) -> list:
+    return [request.id for request in port.sent(Command.WRITE_STATE)]
+
+
+def test_only_changed_values_are_requested():
+    current = ModuleConfig()
+    current.dimmer_mode = False
+    current.input_mode = InputMode.SWITCH
+    requested = _dimmer_config()
+    requested.input_mode = InputMode.SWITCH
+    assert config_diff(current, requested) == ["dimmer_mode"]
+    assert config_diff(None, requested) == ["dimmer_mode", "input_mode"]
+
+
+def test_not_requested_correction_levels_are_skipped():
+    current = DimmerCorrectionConfig()
+    requested = DimmerCorrectionConfig()
+    requested.min_level = 0.2
+    requested.max_level = None
+    assert correction_diff(current, requested) == ["min_level"]
+    assert correction_diff(None, requested) == ["min_level"]
+    requested.min_level = None
+    assert correction_diff(current, requested) == []
+
+
+def test_modules_with_requested_config_are_not_written(controller, port):
+    port.add_module(0x10, 1)
+    port.add_module(0x11, 2).config = 0x02
+    modules = [Switch(controller, 0x10, 1), Switch(controller, 0x11, 2)]
+    progress = []
+
+    results = ConfigApplier(max_rate=1000).apply(modules, _dimmer_config(), on_progress=lambda done, total, result: progress.append((done, total)))
+    assert [result.status for result in results] == [ConfigPushStatus.WRITTEN, ConfigPushStatus.UNCHANGED]
+    assert results[0].changed == ["dimmer_mode"] and results[0].config.dimmer_mode
+    assert _writes(port) == [0x10]
+    assert port.modules[0x10].config == 0x02
+    assert sorted(progress) == [(1, 2), (2, 2)]
+
+
+def test_cached_config_is_not_read_again(controller, port):
+    port.add_module(0x10, 1)
+    modules = [Switch(controller, 0x10, 1)]
+    applier = ConfigApplier(max_rate=1000)
+    applier.apply(modules, _dimmer_config())
+    reads = len(port.sent(Command.READ_STATE))
+
+    assert applier.apply(modules, _dimmer_config())[0].status == ConfigPushStatus.UNCHANGED
+    assert len(port.sent(Command.READ_STATE)) == reads
+    assert applier.cached_config(modules[0]).dimmer_mode
+
+    applier.invalidate(modules[0])
+    applier.apply(modules, _dimmer_config())
+    assert len(port.sent(Command.READ_STATE)) == reads + 1
+
+
+def test_not_applied_and_missed_modules_are_reported(make_controller, monkeypatch):
+    monkeypatch.setattr(adapter_module, "Serial", ReadOnlySerial)
+    controller, port = make_controller()
+    port.add_module(0x10, 1)
+    port.add_module(0x11, 1).reachable = False
+    modules = [Switch(controller, 0x10, 1), Switch(controller, 0x11, 1)]
+
+    results = ConfigApplier(max_rate=1000).apply(modules, _dimmer_config())
+    assert [result.status for result in results] == [ConfigPushStatus.MISMATCH, ConfigPushStatus.FAILED]
+    assert _writes(port) == [0x10]
+
+
+def test_module_id_is_required(controller):
+    with pytest.raises(ValueError):
+        ConfigApplier().apply([Switch(controller, channel=1)], _dimmer_config())
@@ -0,0 +1,102 @@
+from threading import Thread, Timer
+from time import monotonic, sleep
+
+import pytest
+
+from serial import SerialException
+
+from NooLite_F import Deadline
+from NooLite_F.MTRF64 import CircuitBreaker, CircuitBreakerRegistry, CircuitState, Command
+
+
+def test_cancelled_command_is_not_sent(controller, port):
+    port.add_module(0x10, 1)
+    deadline = Deadline()
+    deadline.cancel()
+
+    assert controller.on(module_id=0x10, timeout=deadline) == []
+    assert port.sent(Command.ON) == []
+
+
+def test_timeout_limits_waiting_for_response(controller, port):
+    port.silent = True
+    started_at = monotonic()
+    assert controller.read_state(channel=1, timeout=0.2) == []
+    assert monotonic() - started_at < 1
+
+
+def test_cancel_releases_waiting_command(controller, port):
+    port.silent = True
+    # the first command holds the adapter, the second one waits for it and is cancelled
+    holder = Thread(target=controller.read_state, kwargs={"channel": 1, "timeout": 1})
+    holder.start()
+    sleep(0.05)
+    deadline = Deadline()
+    Timer(0.05, deadline.cancel).start()
+
+    started_at = monotonic()
+    assert controller.read_state(channel=2, timeout=deadline) == []
+    assert monotonic() - started_at < 0.5
+    assert [request.channel for request in port.sent()] == [1]
+    holder.join()
+
+
+def test_deadline_is_shared_by_commands(controller, port):
+    port.silent = True
+    deadline = Deadline(0.2)
+    started_at = monotonic()
+    controller.read_state(channel=1, timeout=deadline)
+    controller.read_state(channel=2, timeout=deadline)
+    assert monotonic() - started_at < 1
+    assert deadline.expired
+
+
+def test_aborted_command_finishes_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    breaker.on_failure()
+    sleep(0.02)
+    assert breaker.allow()
+    breaker.on_abort()
+    assert breaker.state == CircuitState.OPEN
+    # abort is not a failure, the next command is the new probe
+    assert breaker.allow()
+
+
+def _half_open(make_controller):
+    registry = CircuitBreakerRegistry(failure_threshold=1, reset_timeout=0.01)
+    controller, port = make_controller(circuit_breakers=registry)
+    module = port.add_module(0x10, 1)
+    module.reachable = False
+    controller.on(module_id=0x10)
+    assert registry.state(module_id=0x10) == CircuitState.OPEN
+    sleep(0.02)
+    module.reachable = True
+    return controller, port, registry
+
+
+def test_expired_probe_does_not_lock_module(make_controller):
+    controller, port, registry = _half_open(make_controller)
+    deadline = Deadline()
+    deadline.cancel()
+    assert controller.on(module_id=0x10, timeout=deadline) == []
+    assert registry.state(module_id=0x10) == CircuitState.OPEN
+
+    status, info, state = controller.on(module_id=0x10)[0]
+    assert status
+    assert registry.state(module_id=0x10) == CircuitState.CLOSED
+
+
+def test_port_error_during_probe_does_not_lock_module(make_controller, monkeypatch):
+    controller, port, registry = _half_open(make_controller)
+
+    def fail(*args, **kwargs):
+        raise SerialException("Port is lost")
+        yield
+
+    monkeypatch.setattr(controller._adapter, "stream", fail)
+    with pytest.raises(SerialException):
+        controller.on(module_id=0x10)
+    monkeypatch.undo()
+
+    assert controller.on(module_id=0x10)[0][0]
+    assert registry.state(module_id=0x10) == CircuitState.CLOSED
@@ -0,0 +1,98 @@
+from threading import Timer
+from time import monotonic
+
+from NooLite_F import Deadline
+from NooLite_F.MTRF64 import CircuitBreakerRegistry, CircuitState, Command, DutyCycleGovernor, Priority
+from NooLite_F.MTRF64.MTRF64Adapter import OutgoingData, Mode, Action
+from NooLite_F.MTRF64.MTRF64DutyCycle import AirtimeModel
+
+
+def _request(channel: int = 1) -> OutgoingData:
+    data = OutgoingData()
+    data.mode = Mode.TX_F
+    data.action = Action.SEND_COMMAND
+    data.channel = channel
+    return data
+
+
+def _governor(**kwargs) -> DutyCycleGovernor:
+    # each NooLite-F request takes 0.01 s on air
+    return DutyCycleGovernor(model=AirtimeModel(noolite_f_frame=0.01), **kwargs)
+
+
+def test_requests_are_paced():
+    governor = _governor(budget=0.1)
+    started_at = monotonic()
+    for i in range(3):
+        assert governor.acquire(_request())
+    # the second and third requests wait for 0.01 / 0.1 each
+    assert 0.15 < monotonic() - started_at < 0.5
+    stats = governor.stats()
+    assert stats.requests == 3 and stats.delayed == 2
+
+
+def test_urgent_requests_are_not_paced():
+    governor = _governor(budget=0.1)
+    started_at = monotonic()
+    for i in range(3):
+        assert governor.acquire(_request(), Priority.INTERACTIVE)
+    assert monotonic() - started_at < 0.05
+
+
+def test_rolling_window_limits_all_requests():
+    governor = _governor(budget=0.1, window=0.2)
+    assert governor.acquire(_request(), Priority.INTERACTIVE)
+    assert governor.acquire(_request(), Priority.INTERACTIVE)
+    # window budget is 0.02 s of airtime, the third request waits until the first one leaves the window
+    assert not governor.acquire(_request(), Priority.INTERACTIVE, Deadline(0.1))
+    started_at = monotonic()
+    assert governor.acquire(_request(), Priority.INTERACTIVE)
+    assert monotonic() - started_at > 0.1
+    assert governor.stats().dropped == 1
+
+
+def test_channel_budget():
+    governor = _governor(budget=1, channel_budget=0.1, window=0.2)
+    assert governor.acquire(_request(1), Priority.INTERACTIVE)
+    assert governor.acquire(_request(1), Priority.INTERACTIVE)
+    assert not governor.acquire(_request(1), Priority.INTERACTIVE, Deadline(0.05))
+    assert governor.acquire(_request(2), Priority.INTERACTIVE, Deadline(0.05))
+    assert set(governor.stats().channels) == {1, 2}
+
+
+def test_cancelled_wait_returns_reservation():
+    governor = _governor(budget=0.01)
+    assert governor.acquire(_request())
+    deadline = Deadline()
+    Timer(0.05, deadline.cancel).start()
+    # the request waits for 1 s pacing delay and is cancelled
+    assert not governor.acquire(_request(), deadline=deadline)
+
+    stats = governor.stats()
+    assert stats.requests == 1 and stats.delayed == 0 and stats.dropped == 1
+    assert abs(stats.airtime - 0.01) < 1e-9
+    # the pacing clock is moved back, so the next request waits for the first one only
+    started_at = monotonic()
+    assert governor.acquire(_request(), deadline=Deadline(1.5))
+    assert monotonic() - started_at < 1.1
+
+
+def test_utilisation_counts_started_requests_only():
+    governor = _governor(budget=0.1, window=1)
+    assert governor.acquire(_request(), Priority.INTERACTIVE)
+    assert abs(governor.utilisation() - 0.01) < 1e-9
+    assert abs(governor.utilisation(channel=1) - 0.01) < 1e-9
+    assert governor.utilisation(channel=2) == 0
+
+
+def test_throttled_command_does_not_open_breaker(make_controller):
+    registry = CircuitBreakerRegistry(failure_threshold=1)
+    controller, port = make_controller(circuit_breakers=registry, duty_cycle=DutyCycleGovernor(budget=0.001))
+    port.add_module(0x10, 1)
+    assert controller.read_state(module_id=0x10)[0][0]
+
+    # the next request must wait for 12 s of pacing
+    assert controller.read_state(module_id=0x10, timeout=0.1) == []
+    assert registry.state(module_id=0x10) == CircuitState.CLOSED
+    assert len(port.sent(Command.READ_STATE)) == 1
+    assert controller.on(module_id=0x10)[0][0]
@@ -0,0 +1,71 @@
+from NooLite_F.MTRF64 import EventStore, IncomingData, Command, Mode
+
+
+def _event(channel: int, command: int = Command.SET_BRIGHTNESS, fmt: int = 1, level: int = 155) -> IncomingData:
+    event = IncomingData()
+    event.mode = Mode.RX
+    event.channel = channel
+    event.command = command
+    event.format = fmt
+    event.data = bytearray([level, 0, 0, 0])
+    event.id = 0
+    return event
+
+
+def _fill(store: EventStore, count: int):
+    for i in range(count):
+        store.append(_event(i % 2, Command.SET_BRIGHTNESS if i % 3 else Command.ON), timestamp=100.0 + i)
+
+
+def test_events_are_rotated_into_segments(tmp_path):
+    store = EventStore(str(tmp_path), segment_capacity=8)
+    _fill(store, 20)
+    store.flush()
+    assert len(store.segments()) == 3
+    assert [event.timestamp for event in store.scan()] == [100.0 + i for i in range(20)]
+    store.close()
+
+
+def test_scan_by_time_channel_and_command(tmp_path):
+    store = EventStore(str(tmp_path), segment_capacity=8)
+    _fill(store, 20)
+    store.flush()
+
+    assert [event.timestamp for event in store.scan(start=105, end=110)] == [105.0, 106.0, 107.0, 108.0, 109.0]
+    assert all(event.channel == 1 for event in store.scan(channel=1))
+    events = list(store.scan(channel=1, command=Command.SET_BRIGHTNESS, start=110))
+    assert [event.timestamp for event in events] == [111.0, 113.0, 117.0, 119.0]
+    assert events[0].values[0] == 1.0 and events[0].values[1] is None
+    assert list(store.scan(start=200)) == []
+    store.close()
+
+
+def test_older_timestamp_is_stored_with_last_one(tmp_path):
+    store = EventStore(str(tmp_path))
+    store.append(_event(1), timestamp=10.0)
+    store.append(_event(1), timestamp=5.0)
+    store.flush()
+    assert [event.timestamp for event in store.scan()] == [10.0, 10.0]
+    store.close()
+
+
+def test_reopened_store_continues_segment(tmp_path):
+    store = EventStore(str(tmp_path), segment_capacity=8)
+    _fill(store, 3)
+    store.close()
+
+    store = EventStore(str(tmp_path), segment_capacity=8)
+    store.append(_event(1), timestamp=50.0)
+    store.flush()
+    assert len(store.segments()) == 1
+    assert [event.timestamp for event in store.scan()] == [100.0, 101.0, 102.0, 102.0]
+    store.close()
+
+
+def test_oldest_segments_are_removed(tmp_path):
+    store = EventStore(str(tmp_path), segment_capacity=8, max_segments=2)
+    _fill(store, 40)
+    store.flush()
+    assert len(store.segments()) == 2
+    assert next(store.scan()).timestamp == 124.0
+    store.close()
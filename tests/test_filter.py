@@ -0,0 +1,97 @@
+from time import sleep
+
+from NooLite_F.MTRF64 import EventFilter, IncomingData, Command, Mode
+
+
+def _event(channel: int = 1, command: int = Command.ON, fmt: int = 0, data: bytes = bytes(4)) -> IncomingData:
+    event = IncomingData()
+    event.mode = Mode.RX
+    event.channel = channel
+    event.command = command
+    event.format = fmt
+    event.data = bytearray(data)
+    event.id = 0
+    event.count = 0
+    return event
+
+
+def _reading(temp: float, humi: int = 50, low_battery: bool = False, channel: int = 1) -> IncomingData:
+    # PT111 format: 12 bit temperature in 0.1 degree, device type 2 (with humidity), battery bit
+    value = int(round(temp * 10)) & 0xFFF
+    high = (value >> 8) | 0x20 | (0x80 if low_battery else 0)
+    return _event(channel, Command.SENS_TEMP_HUMI, 7, bytes([value & 0xFF, high, humi, 0]))
+
+
+def test_repeated_packets_are_dropped_within_window():
+    event_filter = EventFilter(dedup_window=0.5)
+    assert event_filter.accept(_event(), now=0.0)
+    assert not event_filter.accept(_event(), now=0.3)
+    assert event_filter.accept(_event(channel=2), now=0.3)
+    assert event_filter.accept(_event(), now=0.6)
+    assert event_filter.stats().duplicates == 1
+
+
+def test_next_press_with_other_toggle_counter_is_not_duplicate():
+    event_filter = EventFilter(dedup_window=0.5)
+    event = _event()
+    assert event_filter.accept(event, now=0.0)
+    assert not event_filter.accept(event, now=0.1)
+    event.count = 1
+    assert event_filter.accept(event, now=0.2)
+
+
+def test_deadband():
+    event_filter = EventFilter(dedup_window=None, temp_deadband=0.5, humi_deadband=5, deadband_heartbeat=60)
+    assert event_filter.accept(_reading(20.0), now=0)
+    assert not event_filter.accept(_reading(20.3, 52), now=1)
+    assert event_filter.accept(_reading(20.5), now=2)
+    assert event_filter.accept(_reading(20.5, 56), now=3)
+    # battery change and heartbeat pass the same value
+    assert event_filter.accept(_reading(20.5, 56, low_battery=True), now=4)
+    assert not event_filter.accept(_reading(20.5, 56, low_battery=True), now=5)
+    assert event_filter.accept(_reading(20.5, 56, low_battery=True), now=64)
+    assert event_filter.stats().deadband == 2
+
+
+def test_negative_temperature_deadband():
+    event_filter = EventFilter(dedup_window=None, temp_deadband=1.0)
+    assert event_filter.accept(_reading(-5.0), now=0)
+    assert not event_filter.accept(_reading(-5.5), now=1)
+    assert event_filter.accept(_reading(-6.0), now=2)
+
+
+def test_rate_limit_per_channel():
+    event_filter = EventFilter(dedup_window=None, rate_limit=1, rate_burst=2)
+    assert [event_filter.accept(_event(), now=0) for i in range(3)] == [True, True, False]
+    assert event_filter.accept(_event(channel=2), now=0)
+    assert event_filter.accept(_event(), now=1)
+    assert event_filter.stats().rate_limited == 1
+
+
+def test_rate_limited_reading_does_not_update_deadband_reference():
+    event_filter = EventFilter(dedup_window=None, temp_deadband=0.5, rate_limit=1, rate_burst=1)
+    assert event_filter.accept(_reading(20.0), now=0)
+    assert not event_filter.accept(_reading(21.0), now=0.1)
+    # the reading dropped by rate limit is not the reference, so the same change passes later
+    assert event_filter.accept(_reading(21.0), now=2)
+    stats = event_filter.stats()
+    assert (stats.passed, stats.deadband, stats.rate_limited) == (2, 0, 1)
+
+
+def test_controller_drops_filtered_events(make_controller):
+    received = []
+
+    def sink(data):
+        received.append(data.command)
+
+    event_filter = EventFilter(dedup_window=5)
+    controller, port = make_controller(event_filter=event_filter)
+    controller.add_event_sink(sink)
+    for command in (Command.ON, Command.ON, Command.OFF):
+        port.inject(Mode.RX, 1, command)
+    for i in range(100):
+        stats = event_filter.stats()
+        if stats.passed + stats.suppressed == 3:
+            break
+        sleep(0.01)
+    assert received == [Command.ON, Command.OFF]
@@ -0,0 +1,128 @@
+import os
+import zlib
+
+import pytest
+
+from NooLite_F.MTRF64 import MTRF64Adapter, FirmwareUpdater, FirmwareUpdateError, FirmwareFrameCodec, \
+    IncomingData, OutgoingData, Mode, Command, ResponseCode
+
+from conftest import FakeSerial, Request, adapter_module, frame
+
+BEGIN, DATA, END = 0, 1, 2
+
+
+class Codec(FirmwareFrameCodec):
+    """ Firmware command is in the command field, acknowledgement has the same command and received size in id. """
+
+    def begin(self, size: int, crc: int) -> OutgoingData:
+        return self._frame(BEGIN, size, crc.to_bytes(4, "big"))
+
+    def data(self, offset: int, chunk: bytes) -> OutgoingData:
+        return self._frame(DATA, offset, chunk.ljust(self.payload_size, b"\xff"))
+
+    def end(self, crc: int) -> OutgoingData:
+        return self._frame(END, 0, crc.to_bytes(4, "big"))
+
+    def is_ack(self, request: OutgoingData, response: IncomingData) -> bool:
+        return response.mode == Mode.FIRMWARE_UPDATE and response.command == request.command
+
+    def ack(self, response: IncomingData) -> tuple:
+        return response.status == ResponseCode.SUCCESS, response.id
+
+    @staticmethod
+    def _frame(command: int, value: int, payload: bytes) -> OutgoingData:
+        data = OutgoingData()
+        data.mode = Mode.FIRMWARE_UPDATE
+        data.command = command
+        data.id = value
+        data.data = payload
+        return data
+
+
+class FirmwareSerial(FakeSerial):
+    """ Simulated adapter which receives firmware image, lost data frames are listed by their offsets. """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.size = 0
+        self.crc = None
+        self.image = bytearray()
+        self.lost = set()
+
+    def _answers(self, request: Request) -> list:
+        if request.mode != Mode.FIRMWARE_UPDATE:
+            return super()._answers(request)
+        if request.command == BEGIN:
+            crc = int.from_bytes(request.data, "big")
+            if crc != self.crc or request.id != self.size:
+                self.size, self.crc, self.image = request.id, crc, bytearray()
+        elif request.command == DATA:
+            if request.id in self.lost:
+                self.lost.discard(request.id)
+                return []
+            if request.id == len(self.image) and request.id < self.size:
+                self.image += request.data[:self.size - request.id]
+        elif request.command == END:
+            ok = zlib.crc32(bytes(self.image)) & 0xFFFFFFFF == int.from_bytes(request.data, "big")
+            status = ResponseCode.SUCCESS if ok else ResponseCode.ERROR
+            return [frame(Mode.FIRMWARE_UPDATE, 0, request.command, 0, bytes(4), len(self.image), status)]
+        return [frame(Mode.FIRMWARE_UPDATE, 0, request.command, 0, bytes(4), len(self.image))]
+
+
+@pytest.fixture
+def adapter(monkeypatch):
+    FakeSerial.instances = []
+    monkeypatch.setattr(adapter_module, "Serial", FirmwareSerial)
+    adapter = MTRF64Adapter("/dev/fake")
+    yield adapter
+    adapter.release()
+
+
+def test_codec_is_required():
+    with pytest.raises(TypeError):
+        FirmwareFrameCodec()
+    with pytest.raises(TypeError):
+        FirmwareUpdater(None)
+
+
+def test_image_is_transferred(adapter):
+    image = os.urandom(100)
+    progress = []
+    result = FirmwareUpdater(adapter, Codec(), window=8).update(image, lambda done, size: progress.append(done))
+
+    assert bytes(FakeSerial.instances[-1].image) == image
+    assert result.frames == 25 and result.retransmits == 0 and result.resumed_from == 0
+    assert progress[-1] == 100
+
+
+def test_lost_frames_are_resent(adapter):
+    port = FakeSerial.instances[-1]
+    port.lost = {8, 40}
+    image = os.urandom(64)
+    result = FirmwareUpdater(adapter, Codec(), window=8, ack_timeout=0.1).update(image)
+
+    assert bytes(port.image) == image
+    assert result.retransmits > 0
+
+
+def test_transfer_is_resumed(adapter):
+    port = FakeSerial.instances[-1]
+    image = os.urandom(64)
+    port.size, port.crc, port.image = 64, zlib.crc32(image) & 0xFFFFFFFF, bytearray(image[:32])
+
+    result = FirmwareUpdater(adapter, Codec()).update(image)
+    assert result.resumed_from == 32 and result.frames == 8
+    assert bytes(port.image) == image
+
+
+def test_silent_adapter_interrupts_transfer(adapter):
+    FakeSerial.instances[-1].silent = True
+    with pytest.raises(FirmwareUpdateError):
+        FirmwareUpdater(adapter, Codec(), ack_timeout=0.02, max_retries=1).update(bytes(16))
+
+
+def test_service_frames_are_not_responses(controller, port):
+    port.add_module(0x10, 1)
+    port.inject(Mode.SERVICE, 0, Command.OFF)
+    assert controller.read_state(module_id=0x10)[0][0]
+    assert controller.queue_stats()["responses"].received == 1
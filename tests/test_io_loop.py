@@ -0,0 +1,93 @@
+import os
+
+from threading import Event, Lock, Thread, active_count
+
+import pytest
+
+from conftest import frame
+
+from NooLite_F.MTRF64 import MTRF64Adapter, MTRF64IOLoop, OutgoingData, Command, Mode
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="I/O loop requires pseudo terminals")
+
+
+@pytest.fixture
+def loop():
+    loop = MTRF64IOLoop()
+    yield loop
+    loop.stop()
+
+
+@pytest.fixture
+def open_adapter(loop):
+    """ Returns function which opens adapter served by the loop and returns (adapter, master descriptor). """
+    adapters = []
+    masters = []
+
+    def open_adapter(on_receive=None):
+        # adapter port is the slave side of pseudo terminal, test writes adapter packets to the master side
+        master, slave = os.openpty()
+        adapter = MTRF64Adapter(os.ttyname(slave), on_receive_data=on_receive, io_loop=loop)
+        os.close(slave)
+        adapters.append(adapter)
+        masters.append(master)
+        return adapter, master
+
+    yield open_adapter
+    for adapter in adapters:
+        adapter.release()
+    for master in masters:
+        os.close(master)
+
+
+def test_events_of_all_adapters_are_dispatched(loop, open_adapter):
+    received = []
+    lock = Lock()
+    done = Event()
+
+    def on_receive(data):
+        with lock:
+            received.append((data.channel, data.id))
+            if len(received) == 20:
+                done.set()
+
+    threads = active_count()
+    masters = [open_adapter(on_receive)[1] for i in range(4)]
+    # adapters don't start own threads
+    assert active_count() == threads
+
+    for sequence in range(5):
+        for channel, master in enumerate(masters):
+            os.write(master, frame(Mode.RX, channel, Command.ON, module_id=sequence))
+    assert done.wait(2)
+    for channel in range(4):
+        assert [item_id for item_channel, item_id in received if item_channel == channel] == list(range(5))
+
+    stats = loop.stats()
+    assert stats.adapters == 4 and stats.packets == 20 and stats.dispatched == 20
+
+
+def test_stream_is_resynchronized_on_start_byte(loop, open_adapter):
+    received = Event()
+    adapter, master = open_adapter(lambda data: received.set())
+    os.write(master, b"\x01\x02\x03" + frame(Mode.RX, 1, Command.SWITCH))
+    assert received.wait(2)
+    assert loop.stats().skipped_bytes == 3
+
+
+def test_command_response_is_read_by_loop(open_adapter):
+    adapter, master = open_adapter()
+
+    def answer():
+        request = os.read(master, 17)
+        os.write(master, frame(Mode.TX, request[4], request[5]))
+
+    thread = Thread(target=answer)
+    thread.start()
+    request = OutgoingData()
+    request.channel = 3
+    request.command = Command.ON
+    responses = adapter.send(request, timeout=2)
+    thread.join()
+
+    assert [(response.channel, response.command) for response in responses] == [(3, Command.ON)]
@@ -0,0 +1,87 @@
+from threading import Event
+
+import pytest
+
+from NooLite_F import NooLiteFListener
+from NooLite_F.MTRF64 import ListenerRegistry, Command, Mode
+from NooLite_F.MTRF64.MTRF64Listeners import listener_commands, ALL_COMMANDS
+
+
+class OnOffListener(NooLiteFListener):
+    def on_on(self):
+        pass
+
+    def on_off(self):
+        pass
+
+
+def test_commands_of_overridden_methods():
+    assert set(listener_commands(OnOffListener())) == {Command.ON, Command.OFF}
+
+
+def test_commands_of_instance_callbacks():
+    listener = NooLiteFListener()
+    listener.on_temp_humi = lambda temp, humi, battery, analog: None
+    assert listener_commands(listener) == (Command.SENS_TEMP_HUMI,)
+
+
+def test_listener_without_handlers_gets_all_commands():
+    assert listener_commands(NooLiteFListener()) == ALL_COMMANDS
+
+
+def test_registry_lookup_by_channel_and_command():
+    registry = ListenerRegistry()
+    listener = OnOffListener()
+    wildcard = OnOffListener()
+    registry.add(3, listener)
+    registry.add(None, wildcard, [Command.ON])
+
+    assert registry.listeners(3, Command.ON) == (listener, wildcard)
+    assert registry.listeners(3, Command.OFF) == (listener,)
+    assert registry.listeners(4, Command.ON) == (wildcard,)
+    assert not registry.is_subscribed(4, Command.OFF)
+
+    registry.remove(3, listener)
+    assert registry.listeners(3, Command.OFF) == ()
+    with pytest.raises(ValueError):
+        registry.add(64, listener)
+
+
+def test_controller_dispatches_to_instance_callback(controller, port):
+    received = Event()
+    listener = NooLiteFListener()
+    listener.on_on = received.set
+    controller.add_listener(5, listener)
+
+    port.inject(Mode.RX, 5, Command.ON)
+    assert received.wait(1)
+
+
+def test_callback_assigned_after_subscription_is_called(controller, port):
+    received = Event()
+    listener = NooLiteFListener()
+    controller.add_listener(5, listener)
+    listener.on_off = received.set
+
+    port.inject(Mode.RX, 5, Command.OFF)
+    assert received.wait(1)
+
+
+def test_not_subscribed_packets_are_not_dispatched(controller, port):
+    received = []
+    done = Event()
+
+    class Listener(NooLiteFListener):
+        def on_on(self):
+            received.append(Command.ON)
+            done.set()
+
+        def on_off(self):
+            received.append(Command.OFF)
+
+    controller.add_listener(5, Listener(), [Command.ON])
+    port.inject(Mode.RX, 5, Command.OFF)
+    port.inject(Mode.RX, 6, Command.ON)
+    port.inject(Mode.RX, 5, Command.ON)
+    assert done.wait(1)
+    assert received == [Command.ON]
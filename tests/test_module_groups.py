@@ -0,0 +1,82 @@
+from time import monotonic
+
+from NooLite_F import ModuleMode, ModuleState, SwitchGroup, DimmerGroup
+from NooLite_F.Modules import Switch, Dimmer
+from NooLite_F.MTRF64 import Command, Mode, Action
+
+
+def _states(results: dict) -> dict:
+    return {key: [response[2].state for response in responses] for key, responses in results.items()}
+
+
+def test_modules_of_shared_channel_are_addressed_by_id(controller, port):
+    port.add_module(0x10, 1)
+    port.add_module(0x11, 1)
+    port.add_module(0x12, 1)
+    group = SwitchGroup([Switch(controller, 0x10, 1), Switch(controller, 0x11, 1)])
+
+    results = group.on()
+    assert [request.id for request in port.sent(Command.ON)] == [0x10, 0x11]
+    assert list(results) == [0x10, 0x11]
+    assert all(status for responses in results.values() for status, info, state in responses)
+    assert port.modules[0x12].state == 0
+
+
+def test_complete_channel_gets_one_broadcast(controller, port):
+    port.add_module(0x10, 1)
+    port.add_module(0x11, 1)
+    group = SwitchGroup([Switch(controller, 0x10, 1), Switch(controller, 0x11, 1)], complete_channels=[1])
+
+    results = group.on()
+    requests = port.sent(Command.ON)
+    assert len(requests) == 1 and requests[0].action == Action.SEND_BROADCAST_COMMAND
+    assert set(results) == {0x10, 0x11}
+    assert port.modules[0x10].state == 1 and port.modules[0x11].state == 1
+
+
+def test_channel_read_is_matched_by_module_id(controller, port):
+    port.add_module(0x10, 1, state=1)
+    port.add_module(0x11, 1)
+    group = SwitchGroup([Switch(controller, 0x10, 1), Switch(controller, 0x11, 1)], complete_channels=[1])
+
+    results = group.read_state()
+    requests = port.sent(Command.READ_STATE)
+    assert len(requests) == 1 and requests[0].action == Action.SEND_COMMAND
+    assert _states(results) == {0x10: [ModuleState.ON], 0x11: [ModuleState.OFF]}
+
+
+def test_service_commands_are_addressed_by_id(controller, port):
+    port.add_module(0x10, 1)
+    port.add_module(0x11, 1)
+    group = SwitchGroup([Switch(controller, 0x10, 1), Switch(controller, 0x11, 1)], complete_channels=[1])
+
+    group.read_config()
+    assert [request.id for request in port.sent(Command.READ_STATE)] == [0x10, 0x11]
+
+
+def test_noolite_members_are_keyed_by_channel(controller, port):
+    group = DimmerGroup([Dimmer(controller, channel=2, module_mode=ModuleMode.NOOLITE),
+                         Dimmer(controller, channel=2, module_mode=ModuleMode.NOOLITE)])
+
+    results = group.set_brightness(0.5)
+    requests = port.sent(Command.SET_BRIGHTNESS)
+    assert len(requests) == 1 and requests[0].mode == Mode.TX
+    assert list(results) == [("channel", 2)]
+
+
+def test_controllers_are_served_in_parallel(make_controller):
+    members = []
+    for index in range(2):
+        controller, port = make_controller()
+        port.delay = 0.1
+        for module_id in (0x10, 0x11):
+            port.add_module(module_id + index * 0x10, 1)
+            members.append(Switch(controller, module_id + index * 0x10, 1))
+    group = SwitchGroup(members)
+
+    started_at = monotonic()
+    results = group.off()
+    # two commands of each controller are sent sequentially
+    assert monotonic() - started_at < 0.35
+    assert list(results) == [0x10, 0x11, 0x20, 0x21]
+    assert all(responses[0][0] for responses in results.values())
@@ -0,0 +1,101 @@
+import json
+
+from time import monotonic, sleep
+
+import pytest
+
+from NooLite_F.MTRF64 import MQTTBridge, LocalBroker, Command, Mode, topic_matches
+
+
+def _wait(condition, timeout: float = 1) -> bool:
+    until = monotonic() + timeout
+    while not condition():
+        if monotonic() > until:
+            return False
+        sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def broker():
+    return LocalBroker()
+
+
+@pytest.fixture
+def bridge(controller, broker):
+    bridge = MQTTBridge(controller, broker.client(), linger=0.01)
+    yield bridge
+    bridge.stop()
+
+
+def _retained(broker: LocalBroker, topic: str):
+    payload = broker.retained(topic).get(topic)
+    return None if payload is None else payload.decode("utf-8")
+
+
+def test_topic_matches():
+    assert topic_matches("noolite/+/set", "noolite/10/set")
+    assert topic_matches("noolite/#", "noolite/module/10/state")
+    assert not topic_matches("noolite/+/set", "noolite/module/10/set")
+    assert not topic_matches("noolite/+", "noolite")
+
+
+def test_module_command_publishes_state(bridge, broker, port):
+    port.add_module(0x10, 1)
+    broker.client().publish("noolite/module/10/set", "ON")
+
+    assert _wait(lambda: _retained(broker, "noolite/module/10/state") is not None)
+    assert json.loads(_retained(broker, "noolite/module/10/state"))["state"] == "ON"
+    assert [request.id for request in port.sent(Command.ON)] == [0x10]
+    assert _retained(broker, "noolite/bridge/state") == "online"
+
+
+def test_channel_json_command(bridge, broker, port):
+    broker.client().publish("noolite/channel/2/set", json.dumps({"brightness": 1.0, "mode": "noolite"}))
+
+    assert _wait(lambda: bridge.stats().executed == 1)
+    request = port.sent(Command.SET_BRIGHTNESS)[0]
+    assert (request.mode, request.channel) == (Mode.TX, 2)
+
+
+def test_invalid_command_is_rejected(bridge, broker, port):
+    client = broker.client()
+    client.publish("noolite/module/zz/set", "ON")
+    client.publish("noolite/module/10/set", "[1, 2]")
+    client.publish("noolite/module/10/set", json.dumps({"state": "DIM"}))
+
+    assert _wait(lambda: bridge.stats().failed == 1)
+    stats = bridge.stats()
+    assert (stats.commands, stats.rejected, stats.executed) == (3, 2, 0)
+    assert port.sent() == []
+
+
+def test_sensor_reading_is_published(bridge, broker, port):
+    events = []
+    client = broker.client()
+    client.on_message = lambda client, userdata, message: events.append(json.loads(message.payload.decode("utf-8")))
+    client.subscribe("noolite/channel/+/event")
+
+    # 23.5 C, 45 %
+    port.inject(Mode.RX, 3, Command.SENS_TEMP_HUMI, 7, bytes([0xEB, 0x20, 45, 0]))
+    assert _wait(lambda: _retained(broker, "noolite/channel/3/sensor") is not None)
+    reading = json.loads(_retained(broker, "noolite/channel/3/sensor"))
+    assert (reading["temperature"], reading["humidity"], reading["battery"]) == (23.5, 45, "OK")
+    assert _wait(lambda: len(events) == 1)
+    assert events[0]["command"] == "SENS_TEMP_HUMI" and events[0]["values"][:2] == [23.5, 45]
+
+
+def test_states_are_coalesced(controller, broker, port):
+    bridge = MQTTBridge(controller, broker.client(), linger=0.2)
+    port.add_module(0x10, 1)
+    controller.on(module_id=0x10)
+    bridge.publish_states(controller.read_state(module_id=0x10))
+    controller.off(module_id=0x10)
+    bridge.publish_states(controller.read_state(module_id=0x10))
+    bridge.stop()
+
+    assert json.loads(_retained(broker, "noolite/module/10/state"))["state"] == "OFF"
+    assert _retained(broker, "noolite/bridge/state") == "offline"
+    stats = bridge.stats()
+    # module state and bridge state (online, offline) are coalesced
+    assert stats.coalesced == 2 and stats.batches == 1
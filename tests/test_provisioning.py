@@ -0,0 +1,108 @@
+from threading import Thread
+from time import sleep
+
+import pytest
+
+from NooLite_F.MTRF64 import Provisioner, ChannelAllocator, ProvisioningError, Command, Mode, Action, ResponseCode
+
+from conftest import FakeSerial, adapter_module
+
+
+class ServiceSerial(FakeSerial):
+    """ Simulated adapter with modules in service mode, each of them is bound by the next bind command. Unbound
+    module answers the unbind command and leaves the channel.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.service = []
+
+    def _answers(self, request) -> list:
+        if request.mode == Mode.TX_F and request.command == Command.BIND and self.service:
+            self.add_module(self.service.pop(0), request.channel)
+        answers = super()._answers(request)
+        if request.mode == Mode.TX_F and request.command == Command.UNBIND:
+            self.modules.pop(request.id, None)
+        return answers
+
+
+def _wait_request(port: FakeSerial, action: int, channel: int):
+    for i in range(200):
+        if any(request.action == action and request.channel == channel for request in port.sent()):
+            return
+        sleep(0.01)
+    raise AssertionError("Request is not sent")
+
+
+def _transmitters(port: FakeSerial, readings: list):
+    # each transmitter is bound in the next channel, then it sends reading if it is listed
+    for channel, module_id in enumerate([0x100, 0x101]):
+        _wait_request(port, Action.BIND_MODE_ON, channel)
+        port.inject(Mode.RX_F, channel, Command.BIND, module_id=module_id, status=ResponseCode.BIND_SUCCESS)
+        if module_id in readings:
+            port.inject(Mode.RX_F, channel, Command.SENS_TEMP_HUMI, module_id=module_id)
+
+
+def test_allocator():
+    allocator = ChannelAllocator(range(4), used=[0, 2])
+    assert allocator.allocate() == 1
+    allocator.release(1)
+    assert allocator.free == [1, 3]
+    allocator.reserve(3)
+    assert allocator.allocate() == 1
+    with pytest.raises(ProvisioningError):
+        allocator.allocate()
+
+
+def test_transmitters_are_verified_by_first_event(controller, port):
+    provisioner = Provisioner(controller, bind_window=0.3, verify_timeout=0.2)
+    thread = Thread(target=_transmitters, args=(port, [0x100]))
+    thread.start()
+    bound = provisioner.bind_transmitters(2)
+    thread.join()
+
+    assert [(module.channel, module.module_id, module.verified) for module in bound] == [(0, 0x100, True), (1, 0x101, False)]
+    stats = provisioner.stats()
+    assert stats.bound == 2 and stats.verified == 1 and stats.failed == 1
+
+
+def test_event_of_other_transmitter_does_not_verify(controller, port):
+    provisioner = Provisioner(controller, bind_window=0.3, verify_timeout=0.1)
+
+    def bind():
+        _wait_request(port, Action.BIND_MODE_ON, 0)
+        port.inject(Mode.RX_F, 0, Command.BIND, module_id=0x100, status=ResponseCode.BIND_SUCCESS)
+        port.inject(Mode.RX_F, 0, Command.ON, module_id=0x200)
+
+    thread = Thread(target=bind)
+    thread.start()
+    bound = provisioner.bind_transmitters(1)
+    thread.join()
+    assert not bound[0].verified
+
+
+def test_modules_are_bound_and_verified(make_controller, monkeypatch):
+    monkeypatch.setattr(adapter_module, "Serial", ServiceSerial)
+    controller, port = make_controller()
+    port.service = [0x10, 0x11]
+    provisioner = Provisioner(controller, module_channels=ChannelAllocator(used=[0]), bind_window=0.5)
+
+    bound = provisioner.bind_modules(2)
+    assert [(module.channel, module.module_id, module.verified) for module in bound] == [(1, 0x10, True), (2, 0x11, True)]
+    assert provisioner.stats().verified == 2
+
+    assert provisioner.unbind(bound[:1]) == []
+    assert [module.module_id for module in provisioner.modules()] == [0x11]
+
+
+def test_receiver_unbind_is_done_when_written(controller, port):
+    provisioner = Provisioner(controller, bind_window=0.3, verify_timeout=0.1)
+    thread = Thread(target=_transmitters, args=(port, [0x100, 0x101]))
+    thread.start()
+    bound = provisioner.bind_transmitters(2)
+    thread.join()
+
+    assert provisioner.unbind(bound) == []
+    assert [(request.action, request.channel) for request in port.sent() if request.action == Action.UNBIND_ADDRESS_FROM_CHANNEL] == [
+        (Action.UNBIND_ADDRESS_FROM_CHANNEL, 0), (Action.UNBIND_ADDRESS_FROM_CHANNEL, 1)]
+    assert provisioner.modules() == []
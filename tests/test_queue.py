@@ -0,0 +1,75 @@
+from queue import Empty
+from threading import Timer
+
+import pytest
+
+from NooLite_F.MTRF64 import Command, Mode
+from NooLite_F.MTRF64.MTRF64Queue import EventQueue, OverflowPolicy, stale_key
+from NooLite_F.MTRF64.MTRF64Adapter import IncomingData
+
+
+def _reading(channel: int, value: int) -> IncomingData:
+    data = IncomingData()
+    data.mode = Mode.RX
+    data.channel = channel
+    data.command = Command.SENS_TEMP_HUMI
+    data.id = 0
+    data.data = [value]
+    return data
+
+
+def test_drop_oldest():
+    queue = EventQueue(capacity=2)
+    for item in range(3):
+        assert queue.put(item)
+    assert [queue.get(0), queue.get(0)] == [1, 2]
+    stats = queue.stats()
+    assert stats.overflow == 1 and stats.high_water == 2 and stats.depth == 0
+
+
+def test_drop_newest():
+    queue = EventQueue(capacity=2, overflow=OverflowPolicy.DROP_NEWEST)
+    assert queue.put(0) and queue.put(1)
+    assert not queue.put(2)
+    assert [queue.get(0), queue.get(0)] == [0, 1]
+    with pytest.raises(Empty):
+        queue.get(0)
+
+
+def test_block_waits_for_free_space():
+    queue = EventQueue(capacity=1, overflow=OverflowPolicy.BLOCK, block_timeout=1)
+    queue.put(0)
+    Timer(0.05, queue.get).start()
+    assert queue.put(1)
+    assert queue.get(0) == 1
+
+    queue = EventQueue(capacity=1, overflow=OverflowPolicy.BLOCK, block_timeout=0.05)
+    queue.put(0)
+    assert not queue.put(1)
+
+
+def test_newer_reading_makes_queued_one_stale():
+    queue = EventQueue(key=stale_key([Command.SENS_TEMP_HUMI]))
+    queue.put(_reading(1, 10))
+    queue.put(_reading(2, 20))
+    queue.put(_reading(1, 11))
+    assert [item.data[0] for item in (queue.get(0), queue.get(0))] == [11, 20]
+    assert queue.stats().stale == 1
+
+
+def test_closed_queue_returns_none():
+    queue = EventQueue()
+    Timer(0.05, queue.close).start()
+    assert queue.get(1) is None
+
+
+def test_controller_uses_given_queues(make_controller):
+    incoming = EventQueue(capacity=8)
+    responses = EventQueue(capacity=4)
+    controller, port = make_controller(incoming_queue=incoming, response_queue=responses)
+    port.add_module(0x10, 1)
+    assert controller.read_state(module_id=0x10)[0][0]
+
+    stats = controller.queue_stats()
+    assert stats["incoming"].capacity == 8
+    assert stats["responses"].capacity == 4 and stats["responses"].received == 1
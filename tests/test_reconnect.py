@@ -0,0 +1,110 @@
+from threading import Event, Thread
+from time import monotonic, sleep
+
+import pytest
+
+from serial import SerialException
+
+from conftest import FakeSerial, adapter_module
+
+from NooLite_F.MTRF64 import ReconnectPolicy, PendingPolicy, Command
+
+
+class UnpluggableSerial(FakeSerial):
+    """ Adapter which can be unplugged, modules are kept by the adapter between port instances. """
+    plugged = True
+    modules = {}
+
+    def __init__(self, baudrate=9600, **kwargs):
+        FakeSerial.__init__(self, baudrate, **kwargs)
+        self.modules = UnpluggableSerial.modules
+
+    def open(self):
+        if not UnpluggableSerial.plugged:
+            raise SerialException("No such device: {0}".format(self.port))
+        FakeSerial.open(self)
+
+    def unplug(self):
+        UnpluggableSerial.plugged = False
+        self.close()
+
+
+@pytest.fixture
+def make_reconnecting(make_controller, monkeypatch):
+    UnpluggableSerial.plugged = True
+    UnpluggableSerial.modules = {}
+    monkeypatch.setattr(adapter_module, "Serial", UnpluggableSerial)
+
+    def make(**kwargs):
+        return make_controller(reconnect=ReconnectPolicy(delay=0.01, backoff=1, **kwargs))
+    return make
+
+
+def _wait(condition, timeout: float = 1) -> bool:
+    until = monotonic() + timeout
+    while not condition():
+        if monotonic() > until:
+            return False
+        sleep(0.01)
+    return True
+
+
+def test_retry_delay_is_limited():
+    policy = ReconnectPolicy(delay=0.5, backoff=2, max_delay=3)
+    assert [policy.retry_delay(attempt) for attempt in range(4)] == [0.5, 1, 2, 3]
+
+
+def test_buffered_command_is_sent_after_reconnect(make_reconnecting):
+    controller, port = make_reconnecting()
+    port.add_module(0x10, 1)
+    changes = []
+    resynced = Event()
+
+    def listener(connected, states):
+        changes.append((connected, states))
+        if connected:
+            resynced.set()
+
+    controller.add_connection_listener(listener)
+    controller.on(module_id=0x10)
+
+    port.unplug()
+    assert _wait(lambda: not controller.connection_stats().connected)
+    results = []
+    thread = Thread(target=lambda: results.extend(controller.off(module_id=0x10, timeout=2)))
+    thread.start()
+    sleep(0.1)
+    assert results == []
+    UnpluggableSerial.plugged = True
+    thread.join()
+
+    assert results[0][0]
+    assert port.modules[0x10].state == 0
+    assert resynced.wait(1)
+    assert changes[0] == (False, {})
+    connected, states = changes[1]
+    assert connected and [module_id for module_id, channel in states] == [0x10]
+
+    stats = controller.connection_stats()
+    assert stats.connected and stats.disconnects == 1 and stats.reconnects == 1
+    assert stats.attempts >= 2 and stats.last_outage >= 0.1
+
+
+def test_command_fails_fast_while_port_is_lost(make_reconnecting):
+    controller, port = make_reconnecting(pending=PendingPolicy.FAIL_FAST)
+    port.add_module(0x10, 1)
+    port.unplug()
+    assert _wait(lambda: not controller.connection_stats().connected)
+
+    started_at = monotonic()
+    assert controller.on(module_id=0x10, timeout=1) == []
+    assert monotonic() - started_at < 0.5
+    assert all(item.sent(Command.ON) == [] for item in FakeSerial.instances)
+
+
+def test_resolved_port_is_reopened(make_reconnecting):
+    controller, port = make_reconnecting(port_resolver=lambda: "/dev/fake-new")
+    port.unplug()
+    UnpluggableSerial.plugged = True
+    assert _wait(lambda: controller.connection_stats().reconnects == 1)
+    assert FakeSerial.instances[-1].port == "/dev/fake-new"
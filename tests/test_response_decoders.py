@@ -0,0 +1,65 @@
+from NooLite_F import ModuleState, ServiceModeState, NooliteModeState, InputMode
+from NooLite_F.MTRF64 import IncomingData, Command, Mode, ResponseCode, decode_response
+
+
+def _response(fmt: int, data: bytes, command: int = Command.SEND_STATE, status: int = ResponseCode.SUCCESS) -> IncomingData:
+    response = IncomingData()
+    response.mode = Mode.TX_F
+    response.status = status
+    response.count = 0
+    response.channel = 1
+    response.command = command
+    response.format = fmt
+    response.data = data
+    response.id = 0x1234
+    return response
+
+
+def test_base_state_is_decoded():
+    record = decode_response(_response(0, bytes([5, 3, 0x82, 255])))
+    status, info, state = record.base()
+    assert status
+    assert (info.type, info.firmware, info.id) == (5, 3, 0x1234)
+    assert state.state is None
+    assert state.service_mode == ServiceModeState.BIND_ON
+    assert state.brightness == 1.0
+
+    status, info, state = decode_response(_response(0, bytes([5, 3, 2, 0]))).base()
+    assert state.state == ModuleState.TEMPORARY_ON and state.service_mode == ServiceModeState.BIND_OFF
+
+
+def test_extra_and_channels_state_are_decoded():
+    status, info, state = decode_response(_response(1, bytes([5, 0, 1, 0x01]))).base(1)
+    assert state.extra_input_state and state.noolite_mode_state == NooliteModeState.TEMPORARY_DISABLED
+
+    status, info, state = decode_response(_response(2, bytes([5, 0, 12, 40]))).base(2)
+    assert (state.noolite_cells, state.noolite_f_cells) == (12, 40)
+
+
+def test_configs_are_decoded():
+    status, config = decode_response(_response(16, bytes([0x01 | 0x04 | 0x10 | 0x40, 0, 0, 0]))).config()
+    assert config.save_state_mode and not config.dimmer_mode and config.noolite_support
+    assert config.input_mode == InputMode.BREAKER
+    assert not config.init_state and config.noolite_retranslation
+
+    status, config = decode_response(_response(17, bytes([255, 51, 0, 0]))).config(17)
+    assert (config.max_level, config.min_level) == (1.0, 0.2)
+
+
+def test_unexpected_format_has_no_payload():
+    record = decode_response(_response(0, bytes([5, 0, 1, 0])))
+    assert record.base(1) == (True, record.info, None)
+    assert record.config() == (True, None)
+
+    record = decode_response(_response(0, bytes(4), status=ResponseCode.NO_RESPONSE, command=Command.ON))
+    assert (record.status, record.info, record.payload) == (False, None, None)
+
+
+def test_controller_returns_decoded_responses(controller, port):
+    port.add_module(0x10, 1, state=1, brightness=255)
+    status, info, state = controller.read_state(module_id=0x10)[0]
+    assert status and info.id == 0x10
+    assert state.state == ModuleState.ON and state.brightness == 1.0
+
+    status, config = controller.read_module_config(module_id=0x10)[0]
+    assert status and config.input_mode == InputMode.SWITCH
@@ -0,0 +1,77 @@
+from time import sleep
+
+from NooLite_F.MTRF64 import RetryPolicy, CircuitBreaker, CircuitBreakerRegistry, CircuitState, CommandClass, Command
+
+
+def test_retry_delay_grows_up_to_limit():
+    policy = RetryPolicy(attempts=5, delay=0.1, backoff=2.0, max_delay=0.3)
+    assert [policy.retry_delay(retry) for retry in range(4)] == [0.1, 0.2, 0.3, 0.3]
+    assert RetryPolicy(attempts=0).attempts == 1
+
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    assert breaker.allow()
+    breaker.on_failure()
+    assert breaker.state == CircuitState.CLOSED
+    breaker.on_failure()
+    assert breaker.state == CircuitState.OPEN
+    assert not breaker.allow()
+
+
+def test_breaker_lets_one_probe_after_reset_timeout():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    breaker.on_failure()
+    sleep(0.02)
+    assert breaker.allow()
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.on_success()
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_opens_breaker_again():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.01)
+    for i in range(3):
+        breaker.on_failure()
+    sleep(0.02)
+    assert breaker.allow()
+    breaker.on_failure()
+    assert breaker.state == CircuitState.OPEN
+    assert not breaker.allow()
+
+
+def test_unreachable_module_is_retried(make_controller):
+    controller, port = make_controller(retry_policies={CommandClass.CONTROL: RetryPolicy(attempts=3, delay=0.01)})
+    port.add_module(0x10, 1).reachable = False
+
+    responses = controller.on(module_id=0x10)
+    assert [status for status, info, state in responses] == [False]
+    assert len(port.sent(Command.ON)) == 3
+
+
+def test_retry_stops_when_module_answers(make_controller):
+    controller, port = make_controller(retry_policies={CommandClass.CONTROL: RetryPolicy(attempts=3, delay=0.01)})
+    port.add_module(0x10, 1)
+
+    status, info, state = controller.on(module_id=0x10)[0]
+    assert status and info.id == 0x10
+    assert len(port.sent(Command.ON)) == 1
+
+
+def test_open_breaker_rejects_commands_without_sending(make_controller):
+    registry = CircuitBreakerRegistry(failure_threshold=2, reset_timeout=60)
+    controller, port = make_controller(circuit_breakers=registry)
+    port.add_module(0x10, 1).reachable = False
+
+    controller.on(module_id=0x10)
+    controller.on(module_id=0x10)
+    assert registry.state(module_id=0x10) == CircuitState.OPEN
+
+    responses = controller.on(module_id=0x10)
+    assert [status for status, info, state in responses] == [False]
+    assert len(port.sent(Command.ON)) == 2
+    # other modules are not affected
+    assert registry.state(module_id=0x11) == CircuitState.CLOSED
@@ -0,0 +1,124 @@
+from threading import Lock
+from time import sleep
+
+import pytest
+
+from NooLite_F.MTRF64 import Command, Mode, Rule, RulesEngine, Trigger
+
+
+class Recorder(object):
+    """ Module stub which records called methods, the first method is slow. """
+
+    def __init__(self):
+        self.calls = []
+        self._lock = Lock()
+
+    def _record(self, name: str, *args):
+        with self._lock:
+            self.calls.append((name,) + args)
+
+    def slow(self, timeout=None):
+        sleep(0.05)
+        self._record("slow")
+
+    def fast(self, value=None, timeout=None):
+        self._record("fast", value)
+
+    def fail(self, timeout=None):
+        raise RuntimeError("Module error")
+
+
+def _wait(engine: RulesEngine, count: int):
+    for i in range(100):
+        stats = engine.stats()
+        if stats.executed + stats.failed + stats.expired >= count:
+            return stats
+        sleep(0.01)
+    return engine.stats()
+
+
+@pytest.fixture
+def recorder():
+    return Recorder()
+
+
+def _brightness(level: int) -> bytes:
+    return bytes([level, 0, 0, 0])
+
+
+def test_actions_are_executed_in_order(controller, port, recorder):
+    rule = Rule("sequence", Trigger(5, Command.ON), [(recorder, "slow"), (recorder, "fail"), (recorder, "fast", 1), (recorder, "fast", 2)])
+    engine = RulesEngine(controller, [rule], workers=4)
+    port.inject(Mode.RX, 5, Command.ON)
+
+    stats = _wait(engine, 4)
+    engine.stop()
+    assert recorder.calls == [("slow",), ("fast", 1), ("fast", 2)]
+    assert stats.fired == 1 and stats.executed == 3 and stats.failed == 1
+
+
+def test_expired_rule_drops_remaining_actions(controller, port, recorder):
+    rule = Rule("sequence", Trigger(5, Command.ON), [(recorder, "slow"), (recorder, "fast", 1), (recorder, "fast", 2)])
+    engine = RulesEngine(controller, [rule], action_timeout=0.01)
+    port.inject(Mode.RX, 5, Command.ON)
+
+    stats = _wait(engine, 3)
+    engine.stop()
+    assert recorder.calls == [("slow",)]
+    assert stats.executed == 1 and stats.expired == 2
+
+
+def test_threshold_trigger_fires_on_edge(controller, port, recorder):
+    trigger = Trigger(5, Command.SET_BRIGHTNESS, value="brightness", above=0.5)
+    engine = RulesEngine(controller, [Rule("bright", trigger, [(recorder, "fast")])])
+    for level in (155, 155, 35, 155):
+        port.inject(Mode.RX, 5, Command.SET_BRIGHTNESS, 1, _brightness(level))
+
+    stats = _wait(engine, 2)
+    engine.stop()
+    assert stats.events == 4 and stats.fired == 2
+
+
+@pytest.mark.parametrize("replace", ["add", "load"])
+def test_replaced_rule_keeps_state(controller, port, recorder, replace):
+    trigger = Trigger(5, Command.SET_BRIGHTNESS, value="brightness", above=0.5)
+    engine = RulesEngine(controller, [Rule("bright", trigger, [(recorder, "fast", 1)])])
+    port.inject(Mode.RX, 5, Command.SET_BRIGHTNESS, 1, _brightness(155))
+    _wait(engine, 1)
+
+    rule = Rule("bright", trigger, [(recorder, "fast", 2)])
+    if replace == "add":
+        engine.add(rule)
+    else:
+        engine.load([rule])
+    # the value is still over the threshold, so the replaced rule doesn't fire again
+    port.inject(Mode.RX, 5, Command.SET_BRIGHTNESS, 1, _brightness(155))
+    port.inject(Mode.RX, 5, Command.ON)
+    for i in range(100):
+        if engine.stats().events == 3:
+            break
+        sleep(0.01)
+    engine.stop()
+    assert recorder.calls == [("fast", 1)]
+
+
+def test_failed_condition_does_not_stop_other_rules(controller, port, recorder):
+    def broken(data):
+        raise KeyError("missing")
+
+    rules = [
+        Rule("broken", Trigger(5, Command.ON, condition=broken), [(recorder, "fast", 1)]),
+        Rule("working", Trigger(5, Command.ON), [(recorder, "fast", 2)]),
+    ]
+    engine = RulesEngine(controller, rules)
+    port.inject(Mode.RX, 5, Command.ON)
+
+    stats = _wait(engine, 2)
+    engine.stop()
+    assert recorder.calls == [("fast", 2)]
+    assert stats.evaluated == 2 and stats.fired == 1 and stats.executed == 1 and stats.failed == 1
+
+
+def test_unknown_method_is_rejected(recorder):
+    with pytest.raises(ValueError):
+        Rule("wrong", Trigger(5, Command.ON), [(recorder, "missing")])
@@ -0,0 +1,77 @@
+from threading import Thread
+from time import sleep
+
+from NooLite_F import Deadline
+from NooLite_F.MTRF64 import PriorityScheduler, Priority, Command
+
+
+def _start(scheduler: PriorityScheduler, priority: Priority, order: list, name: str) -> Thread:
+    def run():
+        if scheduler.acquire(priority):
+            order.append(name)
+            scheduler.release()
+
+    thread = Thread(target=run)
+    thread.start()
+    return thread
+
+
+def _wait_depth(scheduler: PriorityScheduler, priority: Priority, depth: int):
+    for i in range(100):
+        if scheduler.stats()[priority].depth >= depth:
+            return
+        sleep(0.01)
+
+
+def test_higher_priority_is_served_first():
+    scheduler = PriorityScheduler()
+    assert scheduler.acquire(Priority.NORMAL)
+    order = []
+    threads = [_start(scheduler, Priority.BACKGROUND, order, "background")]
+    _wait_depth(scheduler, Priority.BACKGROUND, 1)
+    threads.append(_start(scheduler, Priority.NORMAL, order, "normal"))
+    _wait_depth(scheduler, Priority.NORMAL, 1)
+    threads.append(_start(scheduler, Priority.INTERACTIVE, order, "interactive"))
+    _wait_depth(scheduler, Priority.INTERACTIVE, 1)
+
+    scheduler.release()
+    for thread in threads:
+        thread.join()
+    assert order == ["interactive", "normal", "background"]
+
+
+def test_starving_request_is_served_out_of_order():
+    scheduler = PriorityScheduler(max_wait={Priority.BACKGROUND: 0.05})
+    assert scheduler.acquire(Priority.NORMAL)
+    order = []
+    threads = [_start(scheduler, Priority.BACKGROUND, order, "background")]
+    _wait_depth(scheduler, Priority.BACKGROUND, 1)
+    sleep(0.1)
+    threads.append(_start(scheduler, Priority.INTERACTIVE, order, "interactive"))
+    _wait_depth(scheduler, Priority.INTERACTIVE, 1)
+
+    scheduler.release()
+    for thread in threads:
+        thread.join()
+    assert order == ["background", "interactive"]
+
+
+def test_waiting_request_gives_up_at_deadline():
+    scheduler = PriorityScheduler()
+    assert scheduler.acquire(Priority.NORMAL)
+    assert not scheduler.acquire(Priority.INTERACTIVE, Deadline(0.05))
+    stats = scheduler.stats()[Priority.INTERACTIVE]
+    assert stats.depth == 0 and stats.count == 0
+    scheduler.release()
+    assert scheduler.acquire(Priority.BACKGROUND)
+
+
+def test_controller_uses_given_scheduler(make_controller):
+    scheduler = PriorityScheduler()
+    controller, port = make_controller(scheduler=scheduler)
+    port.add_module(0x10, 1)
+    controller.on(module_id=0x10)
+    controller.read_state(module_id=0x10)
+    assert scheduler.stats()[Priority.INTERACTIVE].count == 1
+    assert scheduler.stats()[Priority.NORMAL].count == 1
+    assert len(port.sent(Command.ON)) == 1
@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from NooLite_F import BatteryState, TempHumiSensor, TempHumiHistory
+
+
+def _fill(history: TempHumiHistory, count: int) -> list:
+    readings = []
+    for i in range(count):
+        temp = round(random.uniform(-20, 30), 1)
+        humi = random.randint(0, 100) if i % 3 else None
+        history.append(temp, humi, 0.0, BatteryState.OK, timestamp=float(i))
+        readings.append((float(i), temp, humi))
+    return readings
+
+
+def test_capacity_is_positive():
+    with pytest.raises(ValueError):
+        TempHumiHistory(0)
+
+
+def test_oldest_readings_are_overwritten():
+    history = TempHumiHistory(4)
+    _fill(history, 6)
+    assert len(history) == 4
+    assert [record.timestamp for record in history.records()] == [2.0, 3.0, 4.0, 5.0]
+    assert [record.timestamp for record in history.last(2)] == [4.0, 5.0]
+
+
+def test_window_aggregates_match_brute_force():
+    random.seed(1)
+    history = TempHumiHistory(50)
+    readings = _fill(history, 130)[-50:]
+
+    for i in range(200):
+        now = random.uniform(80, 135)
+        period = random.uniform(0, 60)
+        window = [item for item in readings if now - period <= item[0] <= now]
+        temps = [temp for timestamp, temp, humi in window]
+        humis = [humi for timestamp, temp, humi in window if humi is not None]
+
+        temperature = history.temperature(period, now)
+        humidity = history.humidity(period, now)
+        assert temperature.count == len(temps) and humidity.count == len(humis)
+        if temps:
+            assert (temperature.min, temperature.max) == (min(temps), max(temps))
+            assert temperature.mean == pytest.approx(sum(temps) / len(temps))
+        if humis:
+            assert (humidity.min, humidity.max) == (min(humis), max(humis))
+
+
+def test_downsample():
+    history = TempHumiHistory(100)
+    for i in range(10):
+        history.append(float(i), None, 0.0, BatteryState.OK, timestamp=float(i))
+
+    buckets = history.downsample(5)
+    assert [start for start, temperature, humidity in buckets] == [0.0, 5.0]
+    assert [temperature.mean for start, temperature, humidity in buckets] == [2.0, 7.0]
+    assert all(humidity.count == 0 for start, temperature, humidity in buckets)
+
+
+def test_sensor_appends_readings(controller):
+    received = []
+    sensor = TempHumiSensor(controller, 3, lambda *args: received.append(args), history=TempHumiHistory(10))
+    sensor.on_temp_humi(21.5, 40, BatteryState.LOW, 0.0)
+
+    record = sensor.history.last()[0]
+    assert (record.temp, record.humi, record.battery) == (21.5, 40, BatteryState.LOW)
+    assert received == [(21.5, 40, 0.0, BatteryState.LOW)]
@@ -0,0 +1,105 @@
+import os
+
+from time import monotonic, sleep
+
+import pytest
+
+from NooLite_F import ModuleState, BatteryState
+from NooLite_F.MTRF64 import StateTable, StateTableReader, StateTableException, Command, Mode
+from NooLite_F.MTRF64.MTRF64StateTable import CHANNELS, _slot_index
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "states")
+
+
+def test_module_and_channel_states_are_read(path):
+    table = StateTable(path, module_capacity=8)
+    table.update_module(0x10, channel=1, state=ModuleState.ON, brightness=0.5, timestamp=100.0)
+    table.update_module(0x10, state=ModuleState.OFF, timestamp=101.0)
+    table.update_channel(3, Command.SENS_TEMP_HUMI, temperature=-5.0, humidity=45, battery=BatteryState.LOW, timestamp=102.0)
+
+    with StateTableReader(path) as reader:
+        module = reader.module(0x10)
+        assert (module.module_id, module.channel, module.state, module.brightness) == (0x10, 1, ModuleState.OFF, 0.5)
+        assert (module.updated, module.temperature) == (101.0, None)
+        assert reader.module(0x11) is None
+
+        channel = reader.channel(3)
+        assert (channel.channel, channel.command, channel.temperature, channel.humidity) == (3, Command.SENS_TEMP_HUMI, -5.0, 45)
+        assert (channel.battery, channel.sensor_at, channel.state) == (BatteryState.LOW, 102.0, None)
+        assert [item.channel for item in reader.channels()] == [3]
+        with pytest.raises(StateTableException):
+            reader.channel(CHANNELS)
+    table.close()
+
+
+def test_colliding_modules_are_probed(path):
+    table = StateTable(path, module_capacity=4)
+    ids = [module_id for module_id in range(1, 1000) if _slot_index(module_id, 4) == 0][:4]
+    for module_id in ids:
+        table.update_module(module_id, state=ModuleState.ON)
+    table.update_module(0xFFFF, state=ModuleState.ON)
+    assert table.dropped == 1
+
+    with StateTableReader(path) as reader:
+        assert all(reader.module(module_id).module_id == module_id for module_id in ids)
+        assert sorted(item.module_id for item in reader.modules()) == sorted(ids)
+        assert reader.module(0xFFFF) is None
+    table.close()
+
+
+def test_slot_being_written_is_not_read(path):
+    table = StateTable(path, module_capacity=8)
+    table.update_channel(1, Command.ON, state=ModuleState.ON)
+    reader = StateTableReader(path)
+
+    # writer died in the middle of the slot update
+    offset = 64 + 64
+    table._map[offset] = table._map[offset] + 1
+    with pytest.raises(StateTableException):
+        reader.channel(1)
+    reader.close()
+    table.close()
+
+
+def test_reader_reopens_new_table(path):
+    table = StateTable(path)
+    reader = StateTableReader(path)
+    assert not reader.refresh()
+    table.close()
+
+    table = StateTable(path)
+    table.update_module(0x10, state=ModuleState.ON)
+    assert reader.module(0x10) is None
+    assert reader.refresh()
+    assert reader.module(0x10).state == ModuleState.ON
+    reader.close()
+    table.close()
+    assert os.listdir(os.path.dirname(path)) == ["states"]
+
+
+def test_invalid_file_is_rejected(path):
+    with open(path, "wb") as file:
+        file.write(bytes(256))
+    with pytest.raises(StateTableException):
+        StateTableReader(path)
+
+
+def test_controller_publishes_states(make_controller, path):
+    table = StateTable(path)
+    controller, port = make_controller(state_table=table)
+    port.add_module(0x10, 1, brightness=255)
+    controller.on(module_id=0x10, channel=1)
+    port.inject(Mode.RX, 5, Command.SENS_TEMP_HUMI, 7, bytes([0xEB, 0x20, 45, 0]))
+
+    with StateTableReader(path) as reader:
+        module = reader.module(0x10)
+        assert (module.state, module.channel, module.brightness) == (ModuleState.ON, 1, 1.0)
+        until = monotonic() + 1
+        while reader.channel(5).temperature is None and monotonic() < until:
+            sleep(0.01)
+        assert reader.channel(5).temperature == 23.5
+    controller.release()
+    table.close()
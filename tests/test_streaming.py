@@ -0,0 +1,90 @@
+import asyncio
+
+from contextlib import closing
+from time import monotonic
+
+import pytest
+
+from NooLite_F.MTRF64 import Command
+
+
+def _run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+@pytest.fixture
+def channel(port):
+    port.add_module(0x10, 1)
+    port.add_module(0x11, 1)
+    return 1
+
+
+def test_read_state_iter_yields_each_module(controller, channel):
+    assert [info.id for status, info, state in controller.read_state_iter(channel=channel)] == [0x10, 0x11]
+
+
+def test_command_iter_streams_base_commands(controller, port, channel):
+    responses = controller.command_iter("on", channel=channel)
+    assert port.sent(Command.ON) == []
+    assert [(status, info.id) for status, info, state in responses] == [(True, 0x10), (True, 0x11)]
+    assert all(module.state == 1 for module in port.modules.values())
+
+
+def test_command_iter_streams_config_commands(controller, channel):
+    assert [status for status, config in controller.command_iter("read_module_config", channel=channel)] == [True, True]
+
+
+def test_command_iter_encodes_command_arguments(controller, port, channel):
+    responses = controller.command_iter("set_brightness", 1.0, channel=channel, timeout=1)
+    assert [status for status, info, state in responses] == [True, True]
+    assert port.sent(Command.SET_BRIGHTNESS)[0].data[0] == 155
+
+
+def test_command_iter_rejects_other_methods(controller):
+    for method in ("bind_mode_on", "release", "_stream", "missing"):
+        with pytest.raises(ValueError):
+            controller.command_iter(method, 1)
+    with pytest.raises(TypeError):
+        controller.command_iter("set_brightness", channel=1)
+    with pytest.raises(TypeError):
+        controller.command_iter("on", power=1)
+
+
+def test_closed_iterator_releases_adapter(controller, port, channel):
+    port.delay = 0.1
+    with closing(controller.read_state_iter(channel=channel)) as responses:
+        next(responses)
+    port.delay = 0
+    started_at = monotonic()
+    assert controller.read_state(module_id=0x10)[0][0]
+    assert monotonic() - started_at < 0.5
+
+
+def test_aiter_in_async_with(controller, channel):
+    async def read():
+        async with controller.read_state_aiter(channel=channel) as responses:
+            async for status, info, state in responses:
+                return info.id
+
+    assert _run(read()) == 0x10
+    assert controller.read_state(module_id=0x11)[0][0]
+
+
+def test_aclose_waits_for_pending_next(controller, port, channel):
+    port.delay = 0.2
+
+    async def cancel_pending():
+        responses = controller.command_aiter("read_state", channel=channel)
+        pending = asyncio.ensure_future(responses.__anext__())
+        await asyncio.sleep(0.05)
+        pending.cancel()
+        # the cancelled next is still running in the executor, close must not interrupt it
+        await responses.aclose()
+
+    _run(cancel_pending())
+    port.delay = 0
+    assert controller.read_state(module_id=0x10)[0][0]
@@ -0,0 +1,111 @@
+from time import monotonic, sleep
+
+import pytest
+
+from NooLite_F.MTRF64 import CommandSuppressor, Command, Mode, IncomingData, ResponseCode, decode_response
+
+
+@pytest.fixture
+def suppressed(make_controller):
+    controller, port = make_controller(suppressor=CommandSuppressor(freshness=1))
+    port.add_module(0x10, 1)
+    port.add_module(0x11, 1)
+    return controller, port
+
+
+def _state_response(module_id: int, state: int) -> IncomingData:
+    data = IncomingData()
+    data.mode = Mode.TX_F
+    data.status = ResponseCode.SUCCESS
+    data.channel = 1
+    data.command = Command.SEND_STATE
+    data.format = 0
+    data.data = bytes([5, 0, state, 0])
+    data.id = module_id
+    return data
+
+
+def test_redundant_commands_are_not_sent(suppressed):
+    controller, port = suppressed
+    assert controller.on(module_id=0x10)[0][0]
+    status, info, state = controller.on(module_id=0x10)[0]
+    assert status and info.id == 0x10
+    assert len(port.sent(Command.ON)) == 1
+
+    controller.off(module_id=0x10)
+    assert len(port.sent(Command.OFF)) == 1
+
+    controller.set_brightness(0.5, module_id=0x10)
+    controller.set_brightness(0.5, module_id=0x10)
+    controller.set_brightness(0.6, module_id=0x10)
+    assert len(port.sent(Command.SET_BRIGHTNESS)) == 2
+
+    stats = controller.suppression_stats()
+    assert (stats.checked, stats.suppressed) == (6, 2)
+
+
+def test_brightness_is_compared_with_reported_state(suppressed):
+    controller, port = suppressed
+    controller.set_brightness(0.3, module_id=0x10)
+    status, info, state = controller.set_brightness(0.3, module_id=0x10)[0]
+    assert state.brightness == pytest.approx(0.3, abs=0.01)
+    assert len(port.sent(Command.SET_BRIGHTNESS)) == 1
+
+    # the next level of set brightness command is not redundant
+    controller.set_brightness(0.3 + 1 / 120, module_id=0x10)
+    assert len(port.sent(Command.SET_BRIGHTNESS)) == 2
+
+
+def test_read_state_confirms_state(suppressed):
+    controller, port = suppressed
+    controller.read_state(module_id=0x11)
+    controller.off(module_id=0x11)
+    assert port.sent(Command.OFF) == []
+
+
+def test_old_state_is_not_trusted(make_controller):
+    controller, port = make_controller(suppressor=CommandSuppressor(freshness=0.05))
+    port.add_module(0x10, 1)
+    controller.on(module_id=0x10)
+    sleep(0.1)
+    controller.on(module_id=0x10)
+    assert len(port.sent(Command.ON)) == 2
+
+
+def test_channel_command_keeps_only_answered_states(suppressed):
+    controller, port = suppressed
+    controller.on(module_id=0x10)
+    controller.on(module_id=0x11)
+    port.modules[0x11].reachable = False
+    controller.off(channel=1)
+
+    controller.off(module_id=0x10)
+    assert len(port.sent(Command.OFF)) == 1
+    controller.on(module_id=0x11)
+    assert len(port.sent(Command.ON)) == 3
+
+
+def test_remote_control_event_forgets_states(suppressed):
+    controller, port = suppressed
+    controller.on(module_id=0x10)
+    port.inject(Mode.RX, 5, Command.SWITCH)
+
+    until = monotonic() + 1
+    while controller.suppression_stats().invalidated == 0 and monotonic() < until:
+        sleep(0.01)
+    controller.on(module_id=0x10)
+    assert len(port.sent(Command.ON)) == 2
+
+
+def test_responses_of_overlapped_commands_are_not_remembered():
+    suppressor = CommandSuppressor()
+    first = suppressor.begin(0x10, Command.ON)
+    second = suppressor.begin(0x11, Command.ON)
+    suppressor.confirm(first, Mode.TX_F, Command.ON, [decode_response(_state_response(0x10, 1))])
+    suppressor.confirm(second, Mode.TX_F, Command.ON, [decode_response(_state_response(0x11, 1))])
+
+    assert suppressor.lookup(0x10, Mode.TX_F, Command.ON) is None
+    assert suppressor.lookup(0x11, Mode.TX_F, Command.ON) is not None
+    # only commands to NooLite-F module id are answered locally
+    assert suppressor.lookup(None, Mode.TX_F, Command.ON) is None
+    assert suppressor.lookup(0x11, Mode.TX, Command.ON) is None
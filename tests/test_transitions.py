@@ -0,0 +1,114 @@
+from threading import Event, Lock
+from time import monotonic, sleep
+
+import pytest
+
+from NooLite_F import Dimmer, Direction, Transition, TransitionEngine
+
+
+class RecordingController(object):
+    """ Records brightness commands, commands to unreachable modules wait for the whole timeout. """
+
+    def __init__(self, unreachable=()):
+        self.commands = []
+        self.unreachable = set(unreachable)
+        self._lock = Lock()
+
+    def _record(self, name, value, module_id, timeout):
+        with self._lock:
+            self.commands.append((module_id, name, value, timeout))
+        if module_id in self.unreachable:
+            sleep(timeout)
+            return [(False, None, None)]
+        return [(True, None, None)]
+
+    def set_brightness(self, brightness, module_id, channel, broadcast, mode, timeout):
+        return self._record("set_brightness", brightness, module_id, timeout)
+
+    def brightness_tune_custom(self, direction, speed, module_id, channel, broadcast, mode, timeout):
+        return self._record("tune", (direction, speed), module_id, timeout)
+
+    def brightness_tune_stop(self, module_id, channel, broadcast, mode, timeout):
+        return self._record("stop", None, module_id, timeout)
+
+    def values(self, module_id: int, name: str = "set_brightness") -> list:
+        with self._lock:
+            return [value for item_id, item_name, value, timeout in self.commands if item_id == module_id and item_name == name]
+
+
+@pytest.fixture
+def engine():
+    engine = TransitionEngine(max_rate=100, min_step_interval=0.02, step_timeout=0.1)
+    yield engine
+    engine.stop()
+
+
+def test_transition_is_abstract():
+    with pytest.raises(TypeError):
+        Transition(None, 0, 1, 1)
+
+
+def test_stepped_fade_reaches_end_value(engine):
+    controller = RecordingController()
+    fade = engine.fade(Dimmer(controller, 0x10), start=0.0, end=1.0, duration=0.3)
+    assert fade.wait(2)
+
+    values = controller.values(0x10)
+    assert values[0] == pytest.approx(0.0, abs=0.05) and values[-1] == 1.0
+    assert values == sorted(values)
+    assert all(timeout == 0.1 for module_id, name, value, timeout in controller.commands)
+
+
+def test_unreachable_module_does_not_stall_other_fades(engine):
+    controller = RecordingController(unreachable=[0x20])
+    engine.fade(Dimmer(controller, 0x20), start=0.0, end=1.0, duration=5)
+    started_at = monotonic()
+    fade = engine.fade(Dimmer(controller, 0x10), start=0.0, end=1.0, duration=0.5)
+
+    assert fade.wait(3)
+    # each command to unreachable module takes step timeout, so the fade is late by about one timeout per step
+    assert monotonic() - started_at < 1.5
+    assert controller.values(0x10)[-1] == 1.0
+
+
+def test_regulated_fade_stops_regulation(engine):
+    controller = RecordingController()
+    fade = engine.fade(Dimmer(controller, 0x10), start=0.2, end=0.8, duration=0.2, full_scale_time=0.2)
+    assert fade.wait(2)
+
+    names = [name for module_id, name, value, timeout in controller.commands]
+    assert names == ["set_brightness", "tune", "stop", "set_brightness"]
+    assert controller.values(0x10, "tune")[0][0] == Direction.UP
+    assert controller.values(0x10) == [0.2, 0.8]
+
+
+def test_cancelled_regulation_is_stopped(engine):
+    controller = RecordingController()
+    fade = engine.fade(Dimmer(controller, 0x10), start=0.2, end=0.8, duration=5, full_scale_time=5)
+    sleep(0.1)
+    fade.cancel()
+    assert fade.wait(2)
+    assert fade.cancelled
+    assert [name for module_id, name, value, timeout in controller.commands][-1] == "stop"
+
+
+def test_cancel_during_regulation_start_stops_regulation(engine):
+    controller = RecordingController()
+    tuning = Event()
+    resume = Event()
+    record = controller._record
+
+    def slow_record(name, value, module_id, timeout):
+        if name == "tune":
+            tuning.set()
+            resume.wait(1)
+        return record(name, value, module_id, timeout)
+
+    controller._record = slow_record
+    fade = engine.fade(Dimmer(controller, 0x10), start=0.2, end=0.8, duration=5, full_scale_time=5)
+    assert tuning.wait(1)
+    fade.cancel()
+    resume.set()
+
+    assert fade.wait(2)
+    assert [name for module_id, name, value, timeout in controller.commands] == ["set_brightness", "tune", "stop"]